@@ -38,6 +38,7 @@ from sapphire_backend.telegrams.api import TelegramsAPIController
 from sapphire_backend.telegrams.exceptions import TelegramParserException
 from sapphire_backend.users.api import UsersAPIController
 from sapphire_backend.users.auth.api import AuthController
+from sapphire_backend.utils.api import MonitoringAPIController
 
 api = NinjaExtraAPI(
     title="iEasyHydroHF API",
@@ -69,6 +70,7 @@ api.register_controllers(DischargeModelsAPIController)
 api.register_controllers(EstimationsAPIController)
 api.register_controllers(VirtualStationsAPIController)
 api.register_controllers(SDKDataValuesAPIController)
+api.register_controllers(MonitoringAPIController)
 
 
 @api.exception_handler(NinjaValidationError)
@@ -1,6 +1,7 @@
 import math
 from datetime import datetime
 
+import numpy as np
 from django.db.models import F
 from django.http import HttpRequest
 from ninja import Query
@@ -144,27 +145,32 @@ class DischargeModelsAPIController:
         start_row = math.floor(min_level / 10)  # 900 -> 90
         end_row = math.ceil(max_level / 10)
 
-        # Generate table
+        # Generate table, one row per ten water levels
+        rows = np.arange(start_row, end_row + 1)
+        discharges = model.estimate_discharges(rows[:, np.newaxis] * 10 + np.arange(10))
         values = []
-        for row in range(start_row, end_row + 1):
-            row_values = []
-            for col in range(10):
-                water_level = (row * 10) + col
-                value = model.estimate_discharge(water_level)
-                row_values.append(value)
+        for row, row_discharges in zip(rows, discharges):
             values.append(
                 {
-                    "id": row,  # This will be 90, 91, 92, etc.
-                    "values": row_values,
+                    "id": int(row),  # This will be 90, 91, 92, etc.
+                    "values": [None if np.isnan(value) else value for value in row_discharges.tolist()],
                 }
             )
 
         return values
 
-    @route.get("discharge-models/{discharge_model_uuid}/calculate", response=DischargeCalculationSchema)
+    @route.get(
+        "discharge-models/{discharge_model_uuid}/calculate",
+        response={200: DischargeCalculationSchema, 400: Message},
+    )
     def calculate_discharge(self, request: HttpRequest, discharge_model_uuid: str, water_level: float):
         model = DischargeModel.objects.get(uuid=discharge_model_uuid)
-        discharge = model.estimate_discharge(water_level)
+        discharge = model.estimate_discharges(water_level).item()
+        if math.isnan(discharge):
+            return 400, {
+                "detail": "The discharge model is not defined for the given water level.",
+                "code": "undefined_discharge",
+            }
         return {"discharge": discharge, "water_level": water_level}
 
 
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class EstimationsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "sapphire_backend.estimations"
+
+    def ready(self):
+        import sapphire_backend.estimations.signals  # noqa: F401
@@ -0,0 +1,107 @@
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from dateutil.relativedelta import relativedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from zoneinfo import ZoneInfo
+
+from sapphire_backend.estimations.materialization import MATERIALIZED_ESTIMATIONS, MaterializedEstimation
+from sapphire_backend.stations.models import HydrologicalStation
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the history of the incrementally maintained estimation tables, in chunks of one station and "
+        "a few months which are processed in parallel and committed one by one"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--tables",
+            nargs="+",
+            choices=list(MATERIALIZED_ESTIMATIONS),
+            default=list(MATERIALIZED_ESTIMATIONS),
+            help="Tables to backfill, all by default",
+        )
+        parser.add_argument("--station_ids", type=int, nargs="+", help="Only backfill these hydro station IDs")
+        parser.add_argument(
+            "--start", type=str, default="2010-01-01", help="Backfill from the month of this date (YYYY-MM-DD)"
+        )
+        parser.add_argument(
+            "--end", type=str, help="Backfill until this date, exclusive (YYYY-MM-DD), the next month by default"
+        )
+        parser.add_argument("--chunk_months", type=int, default=12, help="Number of months per chunk")
+        parser.add_argument("--workers", type=int, default=4, help="Number of parallel database connections")
+
+    @staticmethod
+    def _parse_date(value: str) -> datetime:
+        try:
+            return datetime.strptime(value, "%Y-%m-%d").replace(tzinfo=ZoneInfo("UTC"))
+        except ValueError:
+            raise CommandError(f"Invalid date {value}, expected YYYY-MM-DD")
+
+    @staticmethod
+    def _get_chunks(
+        station_ids: list[int], start: datetime, end: datetime, chunk_months: int
+    ) -> list[tuple[int, datetime, datetime]]:
+        chunks = []
+        for station_id in station_ids:
+            chunk_start = start
+            while chunk_start < end:
+                chunk_end = min(chunk_start + relativedelta(months=chunk_months), end)
+                chunks.append((station_id, chunk_start, chunk_end))
+                chunk_start = chunk_end
+        return chunks
+
+    @staticmethod
+    def _refresh_chunks(estimation: MaterializedEstimation, chunks: queue.SimpleQueue) -> int:
+        refreshed = 0
+        try:
+            while True:
+                try:
+                    station_id, start, end = chunks.get_nowait()
+                except queue.Empty:
+                    return refreshed
+                estimation.refresh(station_id, start, end)
+                refreshed += 1
+        finally:
+            # every worker thread opened its own connection
+            connection.close()
+
+    def handle(self, *args, **options):
+        # the period averages are recomputed for whole months, month aligned chunks never share one
+        start = self._parse_date(options["start"]).replace(day=1)
+        if options["end"] is None:
+            end = datetime.now(tz=ZoneInfo("UTC")).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+            end += relativedelta(months=1)
+        else:
+            end = self._parse_date(options["end"])
+        if start >= end:
+            raise CommandError("Start date must be before the end date")
+        if options["chunk_months"] < 1 or options["workers"] < 1:
+            raise CommandError("Number of months per chunk and number of workers must be positive integers")
+
+        station_ids = options["station_ids"] or list(HydrologicalStation.objects.values_list("id", flat=True))
+        chunks = self._get_chunks(station_ids, start, end, options["chunk_months"])
+
+        # the tables are processed one after another since later ones read from the earlier ones
+        for name in options["tables"]:
+            estimation = MATERIALIZED_ESTIMATIONS[name]
+            pending = queue.SimpleQueue()
+            for chunk in chunks:
+                pending.put(chunk)
+
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=options["workers"]) as executor:
+                futures = [
+                    executor.submit(self._refresh_chunks, estimation, pending) for _ in range(options["workers"])
+                ]
+                refreshed = sum(future.result() for future in futures)
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"{estimation.table}: {refreshed} chunks recomputed in {time.perf_counter() - started:.1f} s"
+                )
+            )
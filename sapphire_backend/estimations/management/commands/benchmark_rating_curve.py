@@ -0,0 +1,66 @@
+import random
+import statistics
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+
+from sapphire_backend.estimations.models import DischargeModel
+from sapphire_backend.estimations.rating_curve import estimate_discharges_for_models
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the scalar DischargeModel.estimate_discharge loop with the vectorized rating curve engine, "
+        "for a single model (HQ table) and for one model per water level (telegram simulation)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--water_levels", type=int, default=10000, help="Number of water levels to estimate")
+        parser.add_argument("--models", type=int, default=20, help="Number of distinct models in the mixed run")
+        parser.add_argument("--repeats", type=int, default=5, help="Number of timed runs per variant")
+
+    def _time(self, func) -> float:
+        start = time.perf_counter()
+        func()
+        return (time.perf_counter() - start) * 1000
+
+    def _report(self, label: str, scalar_durations: list[float], vectorized_durations: list[float]):
+        scalar_ms = statistics.median(scalar_durations)
+        vectorized_ms = statistics.median(vectorized_durations)
+        self.stdout.write(
+            f"{label:<18} scalar {scalar_ms:>9.2f} ms  vectorized {vectorized_ms:>8.2f} ms"
+            f"  speedup {scalar_ms / vectorized_ms:>6.1f}x"
+        )
+
+    def handle(self, *args, **options):
+        if min(options["water_levels"], options["models"], options["repeats"]) < 1:
+            raise CommandError("All options must be positive integers")
+
+        models = [
+            DischargeModel(
+                name=f"Model {idx}",
+                param_a=Decimal(str(round(random.uniform(-50, 0), 6))),
+                param_b=Decimal("2"),
+                param_c=Decimal(str(round(random.uniform(0.001, 0.01), 6))),
+            )
+            for idx in range(options["models"])
+        ]
+        water_levels = [random.randint(50, 1000) for _ in range(options["water_levels"])]
+        model_per_level = [random.choice(models) for _ in water_levels]
+        model = models[0]
+
+        variants = {
+            "single model": (
+                lambda: [model.estimate_discharge(level) for level in water_levels],
+                lambda: model.estimate_discharges(water_levels),
+            ),
+            "model per level": (
+                lambda: [m.estimate_discharge(level) for m, level in zip(model_per_level, water_levels)],
+                lambda: estimate_discharges_for_models(water_levels, model_per_level),
+            ),
+        }
+        for label, (scalar, vectorized) in variants.items():
+            scalar_durations = [self._time(scalar) for _ in range(options["repeats"])]
+            vectorized_durations = [self._time(vectorized) for _ in range(options["repeats"])]
+            self._report(label, scalar_durations, vectorized_durations)
@@ -0,0 +1,60 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from zoneinfo import ZoneInfo
+
+from sapphire_backend.estimations.materialization import MATERIALIZED_ESTIMATIONS
+
+
+class Command(BaseCommand):
+    help = "Compare the incrementally maintained estimation tables with their legacy views and optionally repair them"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--tables",
+            nargs="+",
+            choices=list(MATERIALIZED_ESTIMATIONS),
+            default=list(MATERIALIZED_ESTIMATIONS),
+            help="Tables to check, all by default",
+        )
+        parser.add_argument("--station_ids", type=int, nargs="+", help="Only check these hydro station IDs")
+        parser.add_argument("--start", type=str, help="Only check from this date on (YYYY-MM-DD)")
+        parser.add_argument("--end", type=str, help="Only check until this date, exclusive (YYYY-MM-DD)")
+        parser.add_argument(
+            "--fix", action="store_true", default=False, help="Recompute the checked range of inconsistent stations"
+        )
+
+    @staticmethod
+    def _parse_date(value: str | None) -> datetime | None:
+        if value is None:
+            return None
+        try:
+            return datetime.strptime(value, "%Y-%m-%d").replace(tzinfo=ZoneInfo("UTC"))
+        except ValueError:
+            raise CommandError(f"Invalid date {value}, expected YYYY-MM-DD")
+
+    def handle(self, *args, **options):
+        start = self._parse_date(options["start"])
+        end = self._parse_date(options["end"])
+        inconsistent = False
+
+        for name in options["tables"]:
+            estimation = MATERIALIZED_ESTIMATIONS[name]
+            differences = estimation.diff(station_ids=options["station_ids"], start=start, end=end)
+            if not differences:
+                self.stdout.write(
+                    self.style.SUCCESS(f"{estimation.table} is consistent with {estimation.legacy_view}")
+                )
+                continue
+
+            inconsistent = True
+            for station_id, count in differences.items():
+                self.stdout.write(
+                    self.style.WARNING(f"{estimation.table}: station {station_id} has {count} differing rows")
+                )
+                if options["fix"]:
+                    estimation.refresh(station_id, start or "-infinity", end or "infinity")
+                    self.stdout.write(f"{estimation.table}: station {station_id} recomputed")
+
+        if inconsistent and not options["fix"]:
+            raise CommandError("Inconsistencies found, rerun with --fix to recompute the affected stations")
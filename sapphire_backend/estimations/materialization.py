@@ -0,0 +1,117 @@
+from datetime import datetime
+
+from django.db import connection
+
+
+class MaterializedEstimation:
+    """
+    Estimation table kept up to date by database triggers which recompute only the affected station / time range
+    through the refresh function. The legacy view holds the original definition and is the reference the table
+    is checked against.
+    """
+
+    def __init__(self, table: str, legacy_view: str, refresh_function: str, columns: list[str]):
+        self.table = table
+        self.legacy_view = legacy_view
+        self.refresh_function = refresh_function
+        self.columns = columns
+
+    @staticmethod
+    def _construct_filter(
+        station_ids: list[int] | None, start: datetime | None, end: datetime | None
+    ) -> tuple[str, list]:
+        where_clauses = []
+        params = []
+        if station_ids:
+            where_clauses.append("station_id = ANY(%s)")
+            params.append(station_ids)
+        if start is not None:
+            where_clauses.append("timestamp_local >= %s")
+            params.append(start)
+        if end is not None:
+            where_clauses.append("timestamp_local < %s")
+            params.append(end)
+        return f"WHERE {' AND '.join(where_clauses)}" if where_clauses else "", params
+
+    def refresh(self, station_id: int, start: datetime | str = "-infinity", end: datetime | str = "infinity") -> None:
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT {self.refresh_function}(%s, %s, %s)", [station_id, start, end])
+
+    def diff(self, station_ids: list[int] = None, start: datetime = None, end: datetime = None) -> dict[int, int]:
+        """
+        Number of rows per station which differ between the table and the legacy view (missing, stale or extra).
+        """
+        columns = ", ".join(self.columns)
+        where_clause, params = self._construct_filter(station_ids, start, end)
+        query = f"""
+            SELECT station_id, COUNT(*)
+            FROM (
+                (
+                    SELECT {columns} FROM {self.legacy_view} {where_clause}
+                    EXCEPT ALL
+                    SELECT {columns} FROM {self.table} {where_clause}
+                )
+                UNION ALL
+                (
+                    SELECT {columns} FROM {self.table} {where_clause}
+                    EXCEPT ALL
+                    SELECT {columns} FROM {self.legacy_view} {where_clause}
+                )
+            ) AS differences
+            GROUP BY station_id
+            ORDER BY station_id
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(query, params * 4)
+            return dict(cursor.fetchall())
+
+
+HYDRO_METRIC_COLUMNS = [
+    "timestamp_local",
+    "min_value",
+    "avg_value",
+    "max_value",
+    "unit",
+    "value_type",
+    "metric_name",
+    "sensor_identifier",
+    "sensor_type",
+    "station_id",
+]
+
+water_discharge_daily = MaterializedEstimation(
+    table="estimations_water_discharge_daily",
+    legacy_view="estimations_water_discharge_daily_legacy",
+    refresh_function="refresh_water_discharge_daily",
+    columns=[*HYDRO_METRIC_COLUMNS, "model_id"],
+)
+
+# the period averages are refreshed for whole months, see migration 0011
+water_level_decade_average = MaterializedEstimation(
+    table="estimations_water_level_decade_average",
+    legacy_view="estimations_water_level_decade_average_legacy",
+    refresh_function="refresh_water_level_decade_average",
+    columns=HYDRO_METRIC_COLUMNS,
+)
+
+water_discharge_fiveday_average = MaterializedEstimation(
+    table="estimations_water_discharge_fiveday_average",
+    legacy_view="estimations_water_discharge_fiveday_average_legacy",
+    refresh_function="refresh_water_discharge_fiveday_average",
+    columns=HYDRO_METRIC_COLUMNS,
+)
+
+water_discharge_decade_average = MaterializedEstimation(
+    table="estimations_water_discharge_decade_average",
+    legacy_view="estimations_water_discharge_decade_average_legacy",
+    refresh_function="refresh_water_discharge_decade_average",
+    columns=HYDRO_METRIC_COLUMNS,
+)
+
+# in dependency order, the daily discharge average falls back to the daily discharge table
+MATERIALIZED_ESTIMATIONS = {
+    "water_discharge_daily": water_discharge_daily,
+    "water_level_decade_average": water_level_decade_average,
+    "water_discharge_fiveday_average": water_discharge_fiveday_average,
+    "water_discharge_decade_average": water_discharge_decade_average,
+}
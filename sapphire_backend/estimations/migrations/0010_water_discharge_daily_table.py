@@ -0,0 +1,252 @@
+# Generated by Django 5.1.1 on 2026-10-17 09:00
+
+from django.db import migrations
+
+# views reading the daily discharge, recreated so that they resolve the name to the table (or back to the view)
+DEPENDENT_VIEWS_SQL = """
+    CREATE OR REPLACE VIEW estimations_water_discharge_daily_average_computed AS
+    SELECT
+        time_bucket('1 day', timestamp_local) at time zone 'UTC' + '12 hours' as timestamp_local,
+        CAST(NULL AS NUMERIC)         AS min_value,
+        AVG(avg_value)            AS avg_value,
+        CAST(NULL AS NUMERIC)         AS max_value,
+        'm^3/s'                AS unit,
+        'E'                  AS value_type,
+        'WDDA'                AS metric_name,
+        ''                  AS sensor_identifier,
+        ''                  AS sensor_type,
+        station_id
+    FROM {source}
+    GROUP BY
+        station_id,
+        time_bucket('1 day', timestamp_local)
+    HAVING
+        COUNT(DISTINCT model_id) > 1;
+
+    CREATE OR REPLACE VIEW estimations_water_discharge_daily_virtual AS
+        SELECT
+            wdd.timestamp_local,
+            vsa.virtual_station_id as station_id,
+            hydrological_round(SUM(wdd.avg_value * (vsa.weight / 100.0))) AS avg_value,
+            'm^3/s' as unit,
+            'E' as value_type,
+            wdd.metric_name
+        FROM
+            {source} wdd
+        JOIN
+            stations_virtualstationassociation vsa
+        ON
+            wdd.station_id = vsa.hydro_station_id
+        GROUP BY
+            wdd.timestamp_local,
+            vsa.virtual_station_id,
+            wdd.metric_name
+        HAVING
+            COUNT(DISTINCT vsa.hydro_station_id) = (
+                SELECT COUNT(*)
+                FROM stations_virtualstationassociation
+                WHERE virtual_station_id = vsa.virtual_station_id
+            );
+
+    CREATE OR REPLACE VIEW metrics_bulk_data_hydro_manual AS
+        SELECT station_id,
+               timestamp_local::timestamp without time zone, -- Convert timestamp_local to timestamp without timezone
+               MAX(CASE WHEN metric_name = 'WLD' AND value_type = 'M' THEN avg_value END)   AS water_level_daily,
+               MAX(CASE WHEN metric_name = 'WLDA' AND value_type = 'E' THEN avg_value END)  AS water_level_daily_average,
+               MAX(CASE WHEN metric_name = 'WDD' AND value_type = 'M' THEN avg_value END)   AS discharge_measurement,
+               MAX(CASE WHEN metric_name = 'WDD' AND value_type = 'E' THEN avg_value END)   AS discharge_daily,
+               MAX(CASE WHEN metric_name = 'RCSA' AND value_type = 'M' THEN avg_value END)  AS free_river_area,
+               MAX(CASE WHEN metric_name = 'WDDCA' AND value_type = 'E' THEN avg_value END) AS decade_discharge,
+               MAX(CASE WHEN metric_name = 'WDDA' AND value_type = 'E' THEN avg_value END)  AS discharge_daily_average,
+               MAX(CASE
+                       WHEN metric_name = 'IPO' AND value_type = 'M'
+                           THEN value_code || ':' || avg_value::text END)                   AS ice_phenomena,
+               MAX(CASE WHEN metric_name = 'WLDC' AND value_type = 'M' THEN avg_value END)  AS water_level_measurement,
+               MAX(CASE WHEN metric_name = 'WDFA' AND value_type = 'E' THEN avg_value END)  AS fiveday_discharge,
+                      MAX(CASE WHEN metric_name = 'ATO' AND value_type = 'M' THEN avg_value END)  AS air_temperature,
+               MAX(CASE WHEN metric_name = 'WTO' AND value_type = 'M' THEN avg_value END)  AS water_temperature,
+               MAX(CASE
+                       WHEN metric_name = 'PD' AND value_type = 'M'
+                           THEN value_code || ':' || avg_value::text END)                   AS precipitation_daily
+        FROM (SELECT station_id, timestamp_local, metric_name, value_type, avg_value, value_code
+              FROM metrics_hydrologicalmetric
+              WHERE value_type = 'M'
+                and metric_name in ('WLD', 'RCSA', 'IPO', 'WTO', 'ATO', 'PD')
+              UNION ALL
+              SELECT station_id, timestamp_local, metric_name, value_type, avg_value, NULL as value_code
+              FROM {source}
+              UNION ALL
+              SELECT station_id, timestamp_local, metric_name, value_type, avg_value, NULL as value_code
+              FROM estimations_water_level_daily_average_with_periods
+              UNION ALL
+              SELECT station_id, timestamp_local, metric_name, value_type, avg_value, NULL as value_code
+              FROM estimations_water_discharge_daily_average
+              UNION ALL
+              SELECT station_id, timestamp_local, metric_name, value_type, avg_value, NULL as value_code
+              FROM estimations_water_discharge_fiveday_average
+              UNION ALL
+              SELECT station_id, timestamp_local, metric_name, value_type, avg_value, NULL as value_code
+              FROM estimations_water_discharge_decade_average) AS sub
+        where station_id IN (select distinct id from stations_hydrologicalstation where station_type = 'M')
+        GROUP BY station_id, timestamp_local::timestamp without time zone;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('estimations', '0009_add_unmanaged_models_for_new_views'),
+        ('metrics', '0012_alter_hydrologicalnorm_options_and_more'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            """
+            ALTER VIEW estimations_water_discharge_daily RENAME TO estimations_water_discharge_daily_legacy;
+
+            CREATE TABLE estimations_water_discharge_daily AS
+                SELECT * FROM estimations_water_discharge_daily_legacy WITH NO DATA;
+            CREATE INDEX estimations_water_discharge_daily_station_ts_idx
+                ON estimations_water_discharge_daily (station_id, timestamp_local);
+            INSERT INTO estimations_water_discharge_daily SELECT * FROM estimations_water_discharge_daily_legacy;
+            """,
+            reverse_sql="""
+            DROP TABLE IF EXISTS estimations_water_discharge_daily;
+            ALTER VIEW estimations_water_discharge_daily_legacy RENAME TO estimations_water_discharge_daily;
+            """
+        ),
+        migrations.RunSQL(
+            DEPENDENT_VIEWS_SQL.format(source="estimations_water_discharge_daily"),
+            reverse_sql=DEPENDENT_VIEWS_SQL.format(source="estimations_water_discharge_daily_legacy"),
+        ),
+        migrations.RunSQL(
+            """
+            -- recompute the materialized rows of one station in [p_start, p_end) from the legacy view
+            CREATE OR REPLACE FUNCTION refresh_water_discharge_daily(
+                p_station_id bigint, p_start timestamptz, p_end timestamptz
+            )
+            RETURNS void AS $$
+            BEGIN
+                DELETE FROM estimations_water_discharge_daily
+                WHERE station_id = p_station_id AND timestamp_local >= p_start AND timestamp_local < p_end;
+
+                INSERT INTO estimations_water_discharge_daily
+                SELECT * FROM estimations_water_discharge_daily_legacy
+                WHERE station_id = p_station_id AND timestamp_local >= p_start AND timestamp_local < p_end;
+            END;
+            $$ LANGUAGE plpgsql;
+
+            -- a discharge model is used from its valid_from_local until the next model of the station
+            CREATE OR REPLACE FUNCTION refresh_water_discharge_daily_for_model(
+                p_station_id bigint, p_valid_from timestamptz
+            )
+            RETURNS void AS $$
+            BEGIN
+                PERFORM refresh_water_discharge_daily(
+                    p_station_id,
+                    p_valid_from,
+                    COALESCE(
+                        (
+                            SELECT MIN(valid_from_local)
+                            FROM estimations_dischargemodel
+                            WHERE station_id = p_station_id AND valid_from_local > p_valid_from
+                        ),
+                        'infinity'
+                    )
+                );
+            END;
+            $$ LANGUAGE plpgsql;
+
+            CREATE OR REPLACE FUNCTION water_discharge_daily_metric_changed()
+            RETURNS trigger AS $$
+            BEGIN
+                IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                    PERFORM refresh_water_discharge_daily(
+                        OLD.station_id,
+                        date_trunc('day', OLD.timestamp_local),
+                        date_trunc('day', OLD.timestamp_local) + INTERVAL '1 day'
+                    );
+                END IF;
+                IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                    PERFORM refresh_water_discharge_daily(
+                        NEW.station_id,
+                        date_trunc('day', NEW.timestamp_local),
+                        date_trunc('day', NEW.timestamp_local) + INTERVAL '1 day'
+                    );
+                END IF;
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql;
+
+            CREATE OR REPLACE FUNCTION water_discharge_daily_model_changed()
+            RETURNS trigger AS $$
+            BEGIN
+                IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                    PERFORM refresh_water_discharge_daily_for_model(OLD.station_id, OLD.valid_from_local);
+                END IF;
+                IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                    PERFORM refresh_water_discharge_daily_for_model(NEW.station_id, NEW.valid_from_local);
+                END IF;
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql;
+
+            CREATE OR REPLACE FUNCTION water_discharge_daily_period_changed()
+            RETURNS trigger AS $$
+            BEGIN
+                IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                    PERFORM refresh_water_discharge_daily(
+                        OLD.station_id, OLD.start_date_local, COALESCE(OLD.end_date_local, 'infinity')
+                    );
+                END IF;
+                IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                    PERFORM refresh_water_discharge_daily(
+                        NEW.station_id, NEW.start_date_local, COALESCE(NEW.end_date_local, 'infinity')
+                    );
+                END IF;
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql;
+
+            -- only manual water levels and discharge overrides feed the daily discharge
+            CREATE TRIGGER water_discharge_daily_metric_insert
+                AFTER INSERT ON metrics_hydrologicalmetric
+                FOR EACH ROW
+                WHEN ((NEW.metric_name = 'WLD' AND NEW.value_type = 'M') OR (NEW.metric_name = 'WDD' AND NEW.value_type = 'O'))
+                EXECUTE FUNCTION water_discharge_daily_metric_changed();
+            CREATE TRIGGER water_discharge_daily_metric_update
+                AFTER UPDATE ON metrics_hydrologicalmetric
+                FOR EACH ROW
+                WHEN (
+                    (OLD.metric_name = 'WLD' AND OLD.value_type = 'M') OR (OLD.metric_name = 'WDD' AND OLD.value_type = 'O')
+                    OR (NEW.metric_name = 'WLD' AND NEW.value_type = 'M') OR (NEW.metric_name = 'WDD' AND NEW.value_type = 'O')
+                )
+                EXECUTE FUNCTION water_discharge_daily_metric_changed();
+            CREATE TRIGGER water_discharge_daily_metric_delete
+                AFTER DELETE ON metrics_hydrologicalmetric
+                FOR EACH ROW
+                WHEN ((OLD.metric_name = 'WLD' AND OLD.value_type = 'M') OR (OLD.metric_name = 'WDD' AND OLD.value_type = 'O'))
+                EXECUTE FUNCTION water_discharge_daily_metric_changed();
+
+            CREATE TRIGGER water_discharge_daily_model_changed
+                AFTER INSERT OR UPDATE OR DELETE ON estimations_dischargemodel
+                FOR EACH ROW EXECUTE FUNCTION water_discharge_daily_model_changed();
+
+            CREATE TRIGGER water_discharge_daily_period_changed
+                AFTER INSERT OR UPDATE OR DELETE ON estimations_dischargecalculationperiod
+                FOR EACH ROW EXECUTE FUNCTION water_discharge_daily_period_changed();
+            """,
+            reverse_sql="""
+            DROP TRIGGER IF EXISTS water_discharge_daily_period_changed ON estimations_dischargecalculationperiod;
+            DROP TRIGGER IF EXISTS water_discharge_daily_model_changed ON estimations_dischargemodel;
+            DROP TRIGGER IF EXISTS water_discharge_daily_metric_delete ON metrics_hydrologicalmetric;
+            DROP TRIGGER IF EXISTS water_discharge_daily_metric_update ON metrics_hydrologicalmetric;
+            DROP TRIGGER IF EXISTS water_discharge_daily_metric_insert ON metrics_hydrologicalmetric;
+            DROP FUNCTION IF EXISTS water_discharge_daily_period_changed();
+            DROP FUNCTION IF EXISTS water_discharge_daily_model_changed();
+            DROP FUNCTION IF EXISTS water_discharge_daily_metric_changed();
+            DROP FUNCTION IF EXISTS refresh_water_discharge_daily_for_model(bigint, timestamptz);
+            DROP FUNCTION IF EXISTS refresh_water_discharge_daily(bigint, timestamptz, timestamptz);
+            """
+        ),
+    ]
@@ -0,0 +1,544 @@
+# Generated by Django 5.1.1 on 2026-10-17 12:00
+
+from django.db import migrations
+
+PERIOD_AVERAGE_TABLES = [
+    "estimations_water_level_decade_average",
+    "estimations_water_discharge_fiveday_average",
+    "estimations_water_discharge_decade_average",
+]
+
+CREATE_TABLES_SQL = "".join(
+    f"""
+    ALTER VIEW {table} RENAME TO {table}_legacy;
+
+    CREATE TABLE {table} AS SELECT * FROM {table}_legacy WITH NO DATA;
+    CREATE INDEX {table}_station_ts_idx ON {table} (station_id, timestamp_local);
+    INSERT INTO {table} SELECT * FROM {table}_legacy;
+    """
+    for table in PERIOD_AVERAGE_TABLES
+)
+
+DROP_TABLES_SQL = "".join(
+    f"""
+    DROP TABLE IF EXISTS {table};
+    ALTER VIEW {table}_legacy RENAME TO {table};
+    """
+    for table in PERIOD_AVERAGE_TABLES
+)
+
+# views reading the pentad / decade discharge, recreated so that they resolve the names to the tables (or back to the views)
+DEPENDENT_VIEWS_SQL = """
+    CREATE OR REPLACE VIEW estimations_water_discharge_fiveday_average_virtual AS
+        SELECT wdfa.timestamp_local,
+               vsa.virtual_station_id                     as station_id,
+               hydrological_round(SUM(wdfa.avg_value * (vsa.weight / 100.0))) AS avg_value,
+               'm^3/s'                                    as unit,
+               'E'                                        as value_type,
+               wdfa.metric_name
+        FROM {fiveday} wdfa
+                 JOIN
+             stations_virtualstationassociation vsa
+             ON
+                 wdfa.station_id = vsa.hydro_station_id
+        GROUP BY wdfa.timestamp_local,
+                 vsa.virtual_station_id,
+                 wdfa.metric_name
+        HAVING
+            COUNT(DISTINCT vsa.hydro_station_id) = (
+                SELECT COUNT(*)
+                FROM stations_virtualstationassociation
+                WHERE virtual_station_id = vsa.virtual_station_id
+            );
+
+    CREATE OR REPLACE VIEW estimations_water_discharge_decade_average_virtual AS
+        SELECT wddca.timestamp_local,
+            vsa.virtual_station_id                     as station_id,
+            hydrological_round(SUM(wddca.avg_value * (vsa.weight / 100.0))) AS avg_value,
+            'm^3/s'                                    as unit,
+            'E'                                        as value_type,
+            wddca.metric_name
+        FROM {decade} wddca
+                JOIN
+            stations_virtualstationassociation vsa
+            ON
+                wddca.station_id = vsa.hydro_station_id
+        GROUP BY wddca.timestamp_local,
+                vsa.virtual_station_id,
+                wddca.metric_name
+        HAVING
+            COUNT(DISTINCT vsa.hydro_station_id) = (
+                SELECT COUNT(*)
+                FROM stations_virtualstationassociation
+                WHERE virtual_station_id = vsa.virtual_station_id
+            );
+
+    CREATE OR REPLACE VIEW metrics_bulk_data_hydro_manual AS
+        SELECT station_id,
+               timestamp_local::timestamp without time zone, -- Convert timestamp_local to timestamp without timezone
+               MAX(CASE WHEN metric_name = 'WLD' AND value_type = 'M' THEN avg_value END)   AS water_level_daily,
+               MAX(CASE WHEN metric_name = 'WLDA' AND value_type = 'E' THEN avg_value END)  AS water_level_daily_average,
+               MAX(CASE WHEN metric_name = 'WDD' AND value_type = 'M' THEN avg_value END)   AS discharge_measurement,
+               MAX(CASE WHEN metric_name = 'WDD' AND value_type = 'E' THEN avg_value END)   AS discharge_daily,
+               MAX(CASE WHEN metric_name = 'RCSA' AND value_type = 'M' THEN avg_value END)  AS free_river_area,
+               MAX(CASE WHEN metric_name = 'WDDCA' AND value_type = 'E' THEN avg_value END) AS decade_discharge,
+               MAX(CASE WHEN metric_name = 'WDDA' AND value_type = 'E' THEN avg_value END)  AS discharge_daily_average,
+               MAX(CASE
+                       WHEN metric_name = 'IPO' AND value_type = 'M'
+                           THEN value_code || ':' || avg_value::text END)                   AS ice_phenomena,
+               MAX(CASE WHEN metric_name = 'WLDC' AND value_type = 'M' THEN avg_value END)  AS water_level_measurement,
+               MAX(CASE WHEN metric_name = 'WDFA' AND value_type = 'E' THEN avg_value END)  AS fiveday_discharge,
+                      MAX(CASE WHEN metric_name = 'ATO' AND value_type = 'M' THEN avg_value END)  AS air_temperature,
+               MAX(CASE WHEN metric_name = 'WTO' AND value_type = 'M' THEN avg_value END)  AS water_temperature,
+               MAX(CASE
+                       WHEN metric_name = 'PD' AND value_type = 'M'
+                           THEN value_code || ':' || avg_value::text END)                   AS precipitation_daily
+        FROM (SELECT station_id, timestamp_local, metric_name, value_type, avg_value, value_code
+              FROM metrics_hydrologicalmetric
+              WHERE value_type = 'M'
+                and metric_name in ('WLD', 'RCSA', 'IPO', 'WTO', 'ATO', 'PD')
+              UNION ALL
+              SELECT station_id, timestamp_local, metric_name, value_type, avg_value, NULL as value_code
+              FROM estimations_water_discharge_daily
+              UNION ALL
+              SELECT station_id, timestamp_local, metric_name, value_type, avg_value, NULL as value_code
+              FROM estimations_water_level_daily_average_with_periods
+              UNION ALL
+              SELECT station_id, timestamp_local, metric_name, value_type, avg_value, NULL as value_code
+              FROM estimations_water_discharge_daily_average
+              UNION ALL
+              SELECT station_id, timestamp_local, metric_name, value_type, avg_value, NULL as value_code
+              FROM {fiveday}
+              UNION ALL
+              SELECT station_id, timestamp_local, metric_name, value_type, avg_value, NULL as value_code
+              FROM {decade}) AS sub
+        where station_id IN (select distinct id from stations_hydrologicalstation where station_type = 'M')
+        GROUP BY station_id, timestamp_local::timestamp without time zone;
+
+    CREATE OR REPLACE VIEW metrics_bulk_data_hydro_auto AS
+        SELECT station_id,
+               timestamp_local::timestamp without time zone,
+               MAX(CASE WHEN metric_name = 'WLD' AND value_type = 'A' THEN min_value END)   AS water_level_daily_min,
+               MAX(CASE WHEN metric_name = 'WLD' AND value_type = 'A' THEN avg_value END)   AS water_level_daily_average,
+               MAX(CASE WHEN metric_name = 'WLD' AND value_type = 'A' THEN max_value END)   AS water_level_daily_max,
+               MAX(CASE WHEN metric_name = 'ATO' AND value_type = 'A' THEN min_value END)   AS air_temperature_min,
+               MAX(CASE WHEN metric_name = 'ATO' AND value_type = 'A' THEN avg_value END)   AS air_temperature_average,
+               MAX(CASE WHEN metric_name = 'ATO' AND value_type = 'A' THEN max_value END)   AS air_temperature_max,
+               MAX(CASE WHEN metric_name = 'WTO' AND value_type = 'A' THEN min_value END)   AS water_temperature_min,
+               MAX(CASE WHEN metric_name = 'WTO' AND value_type = 'A' THEN avg_value END)   AS water_temperature_average,
+               MAX(CASE WHEN metric_name = 'WTO' AND value_type = 'A' THEN max_value END)   AS water_temperature_max,
+               MAX(CASE WHEN metric_name = 'WDDA' AND value_type = 'E' THEN avg_value END)  AS discharge_daily_average,
+               MAX(CASE WHEN metric_name = 'WDFA' AND value_type = 'E' THEN avg_value END)  AS fiveday_discharge,
+               MAX(CASE WHEN metric_name = 'WDDCA' AND value_type = 'E' THEN avg_value END) AS decade_discharge
+        FROM (SELECT station_id, timestamp_local, metric_name, value_type, min_value, avg_value, max_value
+              FROM metrics_hydrologicalmetric
+              WHERE value_type = 'A'
+                and metric_name in ('WLD', 'WTO', 'ATO')
+              UNION ALL
+              SELECT station_id, timestamp_local, metric_name, value_type, min_value, avg_value, max_value
+              FROM estimations_water_discharge_daily_average
+              UNION ALL
+              SELECT station_id, timestamp_local, metric_name, value_type, min_value, avg_value, max_value
+              FROM {fiveday}
+              UNION ALL
+              SELECT station_id, timestamp_local, metric_name, value_type, min_value, avg_value, max_value
+              FROM {decade}) AS sub
+        where station_id IN (select distinct id from stations_hydrologicalstation where station_type = 'A')
+        GROUP BY station_id, timestamp_local::timestamp without time zone;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('estimations', '0010_water_discharge_daily_table'),
+    ]
+
+    operations = [
+        migrations.RunSQL(CREATE_TABLES_SQL, reverse_sql=DROP_TABLES_SQL),
+        migrations.RunSQL(
+            DEPENDENT_VIEWS_SQL.format(
+                fiveday="estimations_water_discharge_fiveday_average",
+                decade="estimations_water_discharge_decade_average",
+            ),
+            reverse_sql=DEPENDENT_VIEWS_SQL.format(
+                fiveday="estimations_water_discharge_fiveday_average_legacy",
+                decade="estimations_water_discharge_decade_average_legacy",
+            ),
+        ),
+        migrations.RunSQL(
+            """
+            -- The refresh functions recompute the periods of one station in the months overlapping [p_start, p_end).
+            -- They repeat the aggregation of the legacy views, but filter the daily rows before grouping them
+            -- so that only these months are read.
+            CREATE OR REPLACE FUNCTION refresh_water_level_decade_average(
+                p_station_id bigint, p_start timestamptz, p_end timestamptz
+            )
+            RETURNS void AS $$
+            DECLARE
+                v_start timestamptz := date_trunc('month', p_start);
+                v_end timestamptz := CASE
+                    WHEN date_trunc('month', p_end) = p_end THEN p_end
+                    ELSE date_trunc('month', p_end) + INTERVAL '1 month'
+                END;
+            BEGIN
+                DELETE FROM estimations_water_level_decade_average
+                WHERE station_id = p_station_id AND timestamp_local >= v_start AND timestamp_local < v_end;
+
+                INSERT INTO estimations_water_level_decade_average
+                WITH data_ranges AS (
+                    SELECT wldawp.timestamp_local,
+                           wldawp.station_id,
+                           wldawp.value_type,
+                           CASE
+                               WHEN EXTRACT(DAY FROM wldawp.timestamp_local) BETWEEN 1 AND 10 THEN 'first_decade'
+                               WHEN EXTRACT(DAY FROM wldawp.timestamp_local) BETWEEN 11 AND 20 THEN 'second_decade'
+                               ELSE 'third_decade'
+                           END AS decade,
+                           wldawp.avg_value
+                    FROM public.estimations_water_level_daily_average_with_periods wldawp
+                    WHERE wldawp.station_id = p_station_id
+                        AND wldawp.timestamp_local >= v_start
+                        AND wldawp.timestamp_local < v_end
+                ),
+                decade_averages AS (
+                    SELECT station_id,
+                           EXTRACT(YEAR FROM timestamp_local) AS year,
+                           EXTRACT(MONTH FROM timestamp_local) AS month,
+                           decade,
+                           CASE
+                               WHEN value_type = 'A' THEN ROUND(AVG(avg_value), 1)
+                               ELSE CEIL(AVG(avg_value))
+                           END AS avg_value
+                    FROM data_ranges
+                    GROUP BY station_id, year, month, decade, value_type
+                ),
+                representative_days AS (
+                    SELECT
+                        station_id,
+                        avg_value,
+                        TO_TIMESTAMP(
+                            year || '-' || month || '-' ||
+                            CASE
+                                WHEN decade = 'first_decade' THEN '05'
+                                WHEN decade = 'second_decade' THEN '15'
+                                ELSE '25'
+                            END || ' 12:00:00', 'YYYY-MM-DD HH24:MI:SS'
+                        ) AS representative_timestamp
+                    FROM decade_averages
+                )
+                SELECT representative_timestamp AS timestamp_local,
+                       CAST(NULL AS NUMERIC) AS min_value,
+                       avg_value,
+                       CAST(NULL AS NUMERIC) AS max_value,
+                       'cm' AS unit,
+                       'E' AS value_type,
+                       'WLDCA' AS metric_name,
+                       '' AS sensor_identifier,
+                       '' AS sensor_type,
+                       station_id
+                FROM representative_days;
+            END;
+            $$ LANGUAGE plpgsql;
+
+            CREATE OR REPLACE FUNCTION refresh_water_discharge_fiveday_average(
+                p_station_id bigint, p_start timestamptz, p_end timestamptz
+            )
+            RETURNS void AS $$
+            DECLARE
+                v_start timestamptz := date_trunc('month', p_start);
+                v_end timestamptz := CASE
+                    WHEN date_trunc('month', p_end) = p_end THEN p_end
+                    ELSE date_trunc('month', p_end) + INTERVAL '1 month'
+                END;
+            BEGIN
+                DELETE FROM estimations_water_discharge_fiveday_average
+                WHERE station_id = p_station_id AND timestamp_local >= v_start AND timestamp_local < v_end;
+
+                INSERT INTO estimations_water_discharge_fiveday_average
+                WITH data_ranges AS (
+                    SELECT wdda.timestamp_local,
+                           wdda.station_id,
+                           CASE
+                               WHEN EXTRACT(DAY FROM wdda.timestamp_local) BETWEEN 1 AND 5 THEN 'first_pentad'
+                               WHEN EXTRACT(DAY FROM wdda.timestamp_local) BETWEEN 6 AND 10 THEN 'second_pentad'
+                               WHEN EXTRACT(DAY FROM wdda.timestamp_local) BETWEEN 11 AND 15 THEN 'third_pentad'
+                               WHEN EXTRACT(DAY FROM wdda.timestamp_local) BETWEEN 16 AND 20 THEN 'fourth_pentad'
+                               WHEN EXTRACT(DAY FROM wdda.timestamp_local) BETWEEN 21 AND 25 THEN 'fifth_pentad'
+                               ELSE 'sixth_pentad'
+                           END AS pentad,
+                           wdda.avg_value
+                    FROM public.estimations_water_discharge_daily_average wdda
+                    WHERE wdda.station_id = p_station_id
+                        AND wdda.timestamp_local >= v_start
+                        AND wdda.timestamp_local < v_end
+                ),
+                pentad_averages AS (
+                    SELECT station_id,
+                           EXTRACT(YEAR FROM timestamp_local) AS year,
+                           EXTRACT(MONTH FROM timestamp_local) AS month,
+                           pentad,
+                           hydrological_round(AVG(avg_value)) AS avg_value
+                    FROM data_ranges
+                    GROUP BY station_id, year, month, pentad
+                ),
+                representative_days AS (
+                    SELECT
+                        station_id,
+                        avg_value,
+                        TO_TIMESTAMP(
+                            year || '-' || month || '-' ||
+                            CASE
+                                WHEN pentad = 'first_pentad' THEN 3
+                                WHEN pentad = 'second_pentad' THEN 8
+                                WHEN pentad = 'third_pentad' THEN 13
+                                WHEN pentad = 'fourth_pentad' THEN 18
+                                WHEN pentad = 'fifth_pentad' THEN 23
+                                ELSE 28
+                            END || ' 12:00:00', 'YYYY-MM-DD HH24:MI:SS'
+                        ) AS representative_timestamp
+                    FROM pentad_averages
+                )
+                SELECT representative_timestamp AS timestamp_local,
+                       CAST(NULL AS NUMERIC) AS min_value,
+                       avg_value,
+                       CAST(NULL AS NUMERIC) AS max_value,
+                       'm^3/s' AS unit,
+                       'E' AS value_type,
+                       'WDFA' AS metric_name,
+                       '' AS sensor_identifier,
+                       '' AS sensor_type,
+                       station_id
+                FROM representative_days;
+            END;
+            $$ LANGUAGE plpgsql;
+
+            CREATE OR REPLACE FUNCTION refresh_water_discharge_decade_average(
+                p_station_id bigint, p_start timestamptz, p_end timestamptz
+            )
+            RETURNS void AS $$
+            DECLARE
+                v_start timestamptz := date_trunc('month', p_start);
+                v_end timestamptz := CASE
+                    WHEN date_trunc('month', p_end) = p_end THEN p_end
+                    ELSE date_trunc('month', p_end) + INTERVAL '1 month'
+                END;
+            BEGIN
+                DELETE FROM estimations_water_discharge_decade_average
+                WHERE station_id = p_station_id AND timestamp_local >= v_start AND timestamp_local < v_end;
+
+                INSERT INTO estimations_water_discharge_decade_average
+                WITH data_ranges AS (
+                    SELECT wdda.timestamp_local,
+                           wdda.station_id,
+                           CASE
+                               WHEN EXTRACT(DAY FROM wdda.timestamp_local) BETWEEN 1 AND 10 THEN 'first_decade'
+                               WHEN EXTRACT(DAY FROM wdda.timestamp_local) BETWEEN 11 AND 20 THEN 'second_decade'
+                               ELSE 'third_decade'
+                           END AS decade,
+                           wdda.avg_value
+                    FROM public.estimations_water_discharge_daily_average wdda
+                    WHERE wdda.station_id = p_station_id
+                        AND wdda.timestamp_local >= v_start
+                        AND wdda.timestamp_local < v_end
+                ),
+                decade_averages AS (
+                    SELECT station_id,
+                           EXTRACT(YEAR FROM timestamp_local) AS year,
+                           EXTRACT(MONTH FROM timestamp_local) AS month,
+                           decade,
+                           hydrological_round(AVG(avg_value)) AS avg_value
+                    FROM data_ranges
+                    GROUP BY station_id, year, month, decade
+                ),
+                representative_days AS (
+                    SELECT
+                        station_id,
+                        avg_value,
+                        TO_TIMESTAMP(
+                            year || '-' || month || '-' ||
+                            CASE
+                                WHEN decade = 'first_decade' THEN '05'
+                                WHEN decade = 'second_decade' THEN '15'
+                                ELSE '25'
+                            END || ' 12:00:00', 'YYYY-MM-DD HH24:MI:SS'
+                        ) AS representative_timestamp
+                    FROM decade_averages
+                )
+                SELECT representative_timestamp AS timestamp_local,
+                       CAST(NULL AS NUMERIC) AS min_value,
+                       avg_value,
+                       CAST(NULL AS NUMERIC) AS max_value,
+                       'm^3/s' AS unit,
+                       'E' AS value_type,
+                       'WDDCA' AS metric_name,
+                       '' AS sensor_identifier,
+                       '' AS sensor_type,
+                       station_id
+                FROM representative_days;
+            END;
+            $$ LANGUAGE plpgsql;
+
+            CREATE OR REPLACE FUNCTION refresh_water_discharge_period_averages(
+                p_station_id bigint, p_start timestamptz, p_end timestamptz
+            )
+            RETURNS void AS $$
+            BEGIN
+                PERFORM refresh_water_discharge_fiveday_average(p_station_id, p_start, p_end);
+                PERFORM refresh_water_discharge_decade_average(p_station_id, p_start, p_end);
+            END;
+            $$ LANGUAGE plpgsql;
+
+            -- called after a refresh of the water level daily average continuous aggregate, which no trigger sees;
+            -- covers the stations with daily averages in the window and the ones whose periods have to be removed
+            CREATE OR REPLACE FUNCTION refresh_period_averages(p_start timestamptz, p_end timestamptz)
+            RETURNS void AS $$
+            DECLARE
+                v_start timestamptz := date_trunc('month', p_start);
+                v_end timestamptz := CASE
+                    WHEN date_trunc('month', p_end) = p_end THEN p_end
+                    ELSE date_trunc('month', p_end) + INTERVAL '1 month'
+                END;
+                v_station_id bigint;
+            BEGIN
+                FOR v_station_id IN
+                    SELECT station_id FROM estimations_water_level_daily_average
+                    WHERE timestamp_local >= v_start AND timestamp_local < v_end
+                    UNION
+                    SELECT station_id FROM estimations_water_level_decade_average
+                    WHERE timestamp_local >= v_start AND timestamp_local < v_end
+                    UNION
+                    SELECT station_id FROM estimations_water_discharge_fiveday_average
+                    WHERE timestamp_local >= v_start AND timestamp_local < v_end
+                LOOP
+                    PERFORM refresh_water_level_decade_average(v_station_id, p_start, p_end);
+                    PERFORM refresh_water_discharge_period_averages(v_station_id, p_start, p_end);
+                END LOOP;
+            END;
+            $$ LANGUAGE plpgsql;
+
+            -- discharge overrides replace the daily average of manual calculation periods
+            CREATE OR REPLACE FUNCTION water_discharge_period_averages_metric_changed()
+            RETURNS trigger AS $$
+            BEGIN
+                IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                    PERFORM refresh_water_discharge_period_averages(
+                        OLD.station_id,
+                        date_trunc('day', OLD.timestamp_local),
+                        date_trunc('day', OLD.timestamp_local) + INTERVAL '1 day'
+                    );
+                END IF;
+                IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                    PERFORM refresh_water_discharge_period_averages(
+                        NEW.station_id,
+                        date_trunc('day', NEW.timestamp_local),
+                        date_trunc('day', NEW.timestamp_local) + INTERVAL '1 day'
+                    );
+                END IF;
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql;
+
+            -- a discharge model is used from its valid_from_local until the next model of the station
+            CREATE OR REPLACE FUNCTION refresh_water_discharge_period_averages_for_model(
+                p_station_id bigint, p_valid_from timestamptz
+            )
+            RETURNS void AS $$
+            BEGIN
+                PERFORM refresh_water_discharge_period_averages(
+                    p_station_id,
+                    p_valid_from,
+                    COALESCE(
+                        (
+                            SELECT MIN(valid_from_local)
+                            FROM estimations_dischargemodel
+                            WHERE station_id = p_station_id AND valid_from_local > p_valid_from
+                        ),
+                        'infinity'
+                    )
+                );
+            END;
+            $$ LANGUAGE plpgsql;
+
+            CREATE OR REPLACE FUNCTION water_discharge_period_averages_model_changed()
+            RETURNS trigger AS $$
+            BEGIN
+                IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                    PERFORM refresh_water_discharge_period_averages_for_model(OLD.station_id, OLD.valid_from_local);
+                END IF;
+                IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                    PERFORM refresh_water_discharge_period_averages_for_model(NEW.station_id, NEW.valid_from_local);
+                END IF;
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql;
+
+            CREATE OR REPLACE FUNCTION water_period_averages_period_changed()
+            RETURNS trigger AS $$
+            BEGIN
+                IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                    PERFORM refresh_water_level_decade_average(
+                        OLD.station_id, OLD.start_date_local, COALESCE(OLD.end_date_local, 'infinity')
+                    );
+                    PERFORM refresh_water_discharge_period_averages(
+                        OLD.station_id, OLD.start_date_local, COALESCE(OLD.end_date_local, 'infinity')
+                    );
+                END IF;
+                IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                    PERFORM refresh_water_level_decade_average(
+                        NEW.station_id, NEW.start_date_local, COALESCE(NEW.end_date_local, 'infinity')
+                    );
+                    PERFORM refresh_water_discharge_period_averages(
+                        NEW.station_id, NEW.start_date_local, COALESCE(NEW.end_date_local, 'infinity')
+                    );
+                END IF;
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql;
+
+            -- triggers of one event fire in name order, these have to run after the water_discharge_daily ones
+            -- because the daily average falls back to the daily discharge table
+            CREATE TRIGGER water_discharge_period_averages_metric_insert
+                AFTER INSERT ON metrics_hydrologicalmetric
+                FOR EACH ROW
+                WHEN (NEW.metric_name = 'WDD' AND NEW.value_type = 'O')
+                EXECUTE FUNCTION water_discharge_period_averages_metric_changed();
+            CREATE TRIGGER water_discharge_period_averages_metric_update
+                AFTER UPDATE ON metrics_hydrologicalmetric
+                FOR EACH ROW
+                WHEN (
+                    (OLD.metric_name = 'WDD' AND OLD.value_type = 'O') OR (NEW.metric_name = 'WDD' AND NEW.value_type = 'O')
+                )
+                EXECUTE FUNCTION water_discharge_period_averages_metric_changed();
+            CREATE TRIGGER water_discharge_period_averages_metric_delete
+                AFTER DELETE ON metrics_hydrologicalmetric
+                FOR EACH ROW
+                WHEN (OLD.metric_name = 'WDD' AND OLD.value_type = 'O')
+                EXECUTE FUNCTION water_discharge_period_averages_metric_changed();
+
+            CREATE TRIGGER water_discharge_period_averages_model_changed
+                AFTER INSERT OR UPDATE OR DELETE ON estimations_dischargemodel
+                FOR EACH ROW EXECUTE FUNCTION water_discharge_period_averages_model_changed();
+
+            CREATE TRIGGER water_period_averages_period_changed
+                AFTER INSERT OR UPDATE OR DELETE ON estimations_dischargecalculationperiod
+                FOR EACH ROW EXECUTE FUNCTION water_period_averages_period_changed();
+            """,
+            reverse_sql="""
+            DROP TRIGGER IF EXISTS water_period_averages_period_changed ON estimations_dischargecalculationperiod;
+            DROP TRIGGER IF EXISTS water_discharge_period_averages_model_changed ON estimations_dischargemodel;
+            DROP TRIGGER IF EXISTS water_discharge_period_averages_metric_delete ON metrics_hydrologicalmetric;
+            DROP TRIGGER IF EXISTS water_discharge_period_averages_metric_update ON metrics_hydrologicalmetric;
+            DROP TRIGGER IF EXISTS water_discharge_period_averages_metric_insert ON metrics_hydrologicalmetric;
+            DROP FUNCTION IF EXISTS water_period_averages_period_changed();
+            DROP FUNCTION IF EXISTS water_discharge_period_averages_model_changed();
+            DROP FUNCTION IF EXISTS water_discharge_period_averages_metric_changed();
+            DROP FUNCTION IF EXISTS refresh_water_discharge_period_averages_for_model(bigint, timestamptz);
+            DROP FUNCTION IF EXISTS refresh_period_averages(timestamptz, timestamptz);
+            DROP FUNCTION IF EXISTS refresh_water_discharge_period_averages(bigint, timestamptz, timestamptz);
+            DROP FUNCTION IF EXISTS refresh_water_discharge_decade_average(bigint, timestamptz, timestamptz);
+            DROP FUNCTION IF EXISTS refresh_water_discharge_fiveday_average(bigint, timestamptz, timestamptz);
+            DROP FUNCTION IF EXISTS refresh_water_level_decade_average(bigint, timestamptz, timestamptz);
+            """
+        ),
+    ]
@@ -8,6 +8,8 @@ from sapphire_backend.metrics.mixins import BaseHydroMetricMixin, MinMaxValueMix
 from sapphire_backend.utils.mixins.models import CreateLastModifiedDateMixin, UUIDMixin
 from sapphire_backend.utils.rounding import hydrological_round
 
+from .rating_curve import estimate_discharges
+
 
 class DischargeModel(UUIDMixin, models.Model):
     name = models.CharField(verbose_name=_("Discharge model name"), max_length=100, blank=False)
@@ -30,6 +32,12 @@ class DischargeModel(UUIDMixin, models.Model):
             float(self.param_c) * (float(water_level) + float(self.param_a)) ** float(self.param_b)
         )
 
+    def estimate_discharges(self, water_levels):
+        """
+        Array version of estimate_discharge, see rating_curve.estimate_discharges.
+        """
+        return estimate_discharges(water_levels, self.param_a, self.param_b, self.param_c)
+
 
 class EstimationsWaterLevelDailyAverage(BaseHydroMetricMixin, MinMaxValueMixin, SensorInfoMixin, models.Model):
     station = models.ForeignKey(
@@ -54,6 +62,11 @@ class EstimationsWaterLevelDailyAverageWithPeriods(
 
 
 class EstimationsWaterLevelDecadeAverage(BaseHydroMetricMixin, MinMaxValueMixin, SensorInfoMixin, models.Model):
+    """
+    Table maintained by database triggers and after the continuous aggregate refreshes, see
+    estimations.materialization and migration 0011.
+    """
+
     station = models.ForeignKey(
         "stations.HydrologicalStation", verbose_name=_("Hydrological station"), on_delete=models.DO_NOTHING
     )
@@ -86,6 +99,10 @@ class EstimationsWaterDischargeDailyOverrides(BaseHydroMetricMixin, MinMaxValueM
 
 
 class EstimationsWaterDischargeDaily(BaseHydroMetricMixin, MinMaxValueMixin, SensorInfoMixin, models.Model):
+    """
+    Table maintained by database triggers, see estimations.materialization and migration 0010.
+    """
+
     station = models.ForeignKey(
         "stations.HydrologicalStation", verbose_name=_("Hydrological station"), on_delete=models.DO_NOTHING
     )
@@ -142,6 +159,10 @@ class EstimationsWaterDischargeDailyAverage(BaseHydroMetricMixin, MinMaxValueMix
 
 
 class EstimationsWaterDischargeFivedayAverage(BaseHydroMetricMixin, MinMaxValueMixin, SensorInfoMixin, models.Model):
+    """
+    Table maintained like EstimationsWaterLevelDecadeAverage.
+    """
+
     station = models.ForeignKey(
         "stations.HydrologicalStation", verbose_name=_("Hydrological station"), on_delete=models.DO_NOTHING
     )
@@ -152,6 +173,10 @@ class EstimationsWaterDischargeFivedayAverage(BaseHydroMetricMixin, MinMaxValueM
 
 
 class EstimationsWaterDischargeDecadeAverage(BaseHydroMetricMixin, MinMaxValueMixin, SensorInfoMixin, models.Model):
+    """
+    Table maintained like EstimationsWaterLevelDecadeAverage.
+    """
+
     station = models.ForeignKey(
         "stations.HydrologicalStation", verbose_name=_("Hydrological station"), on_delete=models.DO_NOTHING
     )
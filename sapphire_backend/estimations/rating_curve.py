@@ -0,0 +1,51 @@
+from collections.abc import Sequence
+from typing import TYPE_CHECKING
+
+import numpy as np
+from numpy.typing import ArrayLike
+
+from sapphire_backend.utils.rounding import hydrological_round, hydrological_round_array, hydrological_round_ties
+
+if TYPE_CHECKING:
+    from sapphire_backend.estimations.models import DischargeModel
+
+
+def estimate_discharges(
+    water_levels: ArrayLike, param_a: ArrayLike, param_b: ArrayLike, param_c: ArrayLike
+) -> np.ndarray:
+    """
+    Vectorized DischargeModel.estimate_discharge, Q = c * (H + a) ^ b hydrologically rounded. The parameters are
+    either the ones of a single model or arrays which broadcast against the water levels, e.g. one model per level.
+    NaN where the water level or the model is missing and where the curve is not defined.
+    """
+    water_levels, param_a, param_b, param_c = np.broadcast_arrays(
+        *(np.asarray(values, dtype=float) for values in (water_levels, param_a, param_b, param_c))
+    )
+    with np.errstate(invalid="ignore", divide="ignore", over="ignore"):
+        discharges = param_c * np.power(water_levels + param_a, param_b)
+    rounded = hydrological_round_array(discharges)
+
+    # numpy's power can differ from the scalar one in the last bit, which only matters right at a rounding tie
+    for idx in np.flatnonzero(hydrological_round_ties(discharges)):
+        discharge = float(param_c.flat[idx]) * (float(water_levels.flat[idx]) + float(param_a.flat[idx])) ** float(
+            param_b.flat[idx]
+        )
+        rounded.flat[idx] = float(hydrological_round(discharge))
+    return rounded
+
+
+def estimate_discharges_for_models(water_levels: ArrayLike, models: Sequence["DischargeModel | None"]) -> np.ndarray:
+    """
+    Estimate every water level with the model at the same position, NaN where the model is None.
+    """
+    distinct_models = {}
+    model_indices = [
+        -1 if model is None else distinct_models.setdefault(id(model), (len(distinct_models), model))[0]
+        for model in models
+    ]
+    # the last row is picked by the -1 index of the missing models
+    parameters = np.array(
+        [(float(model.param_a), float(model.param_b), float(model.param_c)) for _, model in distinct_models.values()]
+        + [(np.nan, np.nan, np.nan)]
+    )[np.array(model_indices, dtype=int)]
+    return estimate_discharges(water_levels, parameters[:, 0], parameters[:, 1], parameters[:, 2])
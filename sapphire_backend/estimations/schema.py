@@ -86,7 +86,7 @@ class EstimationsDailyAverageOutputSchema(Schema):
 
 class HQTableRowSchema(Schema):
     id: int
-    values: list[float]
+    values: list[float | None]
 
 
 class DischargeCalculationSchema(Schema):
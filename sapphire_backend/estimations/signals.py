@@ -0,0 +1,10 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from sapphire_backend.estimations.models import DischargeModel
+from sapphire_backend.estimations.utils import DischargeModelIndex
+
+
+@receiver([post_save, post_delete], sender=DischargeModel)
+def invalidate_discharge_model_index(sender, instance: DischargeModel, **kwargs):
+    DischargeModelIndex.invalidate(instance.station_id)
@@ -0,0 +1,37 @@
+from datetime import datetime
+
+from zoneinfo import ZoneInfo
+
+from sapphire_backend.estimations.tests.factories import DischargeModelFactory
+
+
+class TestDischargeModelsCalculateAPI:
+    endpoint = "/api/v1/estimations/discharge-models/{discharge_model_uuid}/calculate"
+
+    def test_calculate(self, regular_user_kyrgyz_api_client, discharge_model_2021):
+        response = regular_user_kyrgyz_api_client.get(
+            self.endpoint.format(discharge_model_uuid=discharge_model_2021.uuid), {"water_level": 90}
+        )
+
+        assert response.status_code == 200
+        assert response.json() == {"discharge": 5.0, "water_level": 90.0}
+
+    def test_calculate_undefined_curve(self, regular_user_kyrgyz_api_client, manual_hydro_station_kyrgyz):
+        discharge_model = DischargeModelFactory(
+            valid_from_local=datetime(2021, 1, 1, tzinfo=ZoneInfo("UTC")),
+            param_a=10,
+            param_b=1.5,
+            param_c=0.0005,
+            station=manual_hydro_station_kyrgyz,
+        )
+
+        # a fractional power of the negative H + a
+        response = regular_user_kyrgyz_api_client.get(
+            self.endpoint.format(discharge_model_uuid=discharge_model.uuid), {"water_level": -20}
+        )
+
+        assert response.status_code == 400
+        assert response.json() == {
+            "detail": "The discharge model is not defined for the given water level.",
+            "code": "undefined_discharge",
+        }
@@ -0,0 +1,79 @@
+from datetime import datetime, timedelta
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from zoneinfo import ZoneInfo
+
+from sapphire_backend.estimations.models import DischargeCalculationPeriod
+from sapphire_backend.estimations.utils import DischargeCalculationPeriodIndex
+from sapphire_backend.metrics.choices import HydrologicalMetricName
+from sapphire_backend.metrics.utils.helpers import OperationalJournalDataTransformer
+
+FEBRUARY_TIMESTAMPS = [
+    datetime(2020, 2, 1, hour, tzinfo=ZoneInfo("UTC")) + timedelta(days=day)
+    for day in range(29)
+    for hour in (0, 8, 20)
+]
+
+
+class TestDischargeCalculationPeriodIndex:
+    def test_matches_queries(
+        self, manual_hydro_station_kyrgyz, suspended_calculation_period, manual_calculation_period
+    ):
+        index = DischargeCalculationPeriodIndex(
+            manual_hydro_station_kyrgyz.id, FEBRUARY_TIMESTAMPS[0], FEBRUARY_TIMESTAMPS[-1]
+        )
+        expected = [
+            DischargeCalculationPeriod.is_manual_calculation(manual_hydro_station_kyrgyz.id, timestamp)
+            for timestamp in FEBRUARY_TIMESTAMPS
+        ]
+
+        assert [index.is_manual_calculation(timestamp) for timestamp in FEBRUARY_TIMESTAMPS] == expected
+        assert index.is_manual_calculation_many(FEBRUARY_TIMESTAMPS).tolist() == expected
+        assert [index.get_active_period(timestamp) for timestamp in FEBRUARY_TIMESTAMPS] == [
+            DischargeCalculationPeriod.get_active_period(manual_hydro_station_kyrgyz.id, timestamp)
+            for timestamp in FEBRUARY_TIMESTAMPS
+        ]
+
+    def test_overlapping_periods_resolve_to_the_latest_start(
+        self, manual_hydro_station_kyrgyz, suspended_calculation_period, manual_calculation_period
+    ):
+        index = DischargeCalculationPeriodIndex(manual_hydro_station_kyrgyz.id)
+        timestamps = [
+            datetime(2020, 2, 14, tzinfo=ZoneInfo("UTC")),
+            datetime(2020, 2, 15, tzinfo=ZoneInfo("UTC")),
+            datetime(2020, 2, 20, 8, tzinfo=ZoneInfo("UTC")),
+        ]
+
+        assert index.get_states(timestamps).tolist() == [
+            DischargeCalculationPeriod.CalculationState.SUSPENDED,
+            DischargeCalculationPeriod.CalculationState.MANUAL,
+            None,
+        ]
+
+    def test_inactive_periods_are_ignored(self, manual_hydro_station_kyrgyz, manual_calculation_period):
+        manual_calculation_period.is_active = False
+        manual_calculation_period.save()
+
+        index = DischargeCalculationPeriodIndex(manual_hydro_station_kyrgyz.id)
+
+        assert not index.is_manual_calculation_many(FEBRUARY_TIMESTAMPS).any()
+
+
+class TestOperationalJournalManualCalculation:
+    def test_calculation_periods_are_loaded_once(self, manual_hydro_station_kyrgyz, manual_calculation_period):
+        data = [
+            {"timestamp_local": timestamp, "avg_value": 100, "metric_name": HydrologicalMetricName.WATER_LEVEL_DAILY}
+            for timestamp in FEBRUARY_TIMESTAMPS
+            if timestamp.hour != 0
+        ]
+        transformer = OperationalJournalDataTransformer(data, 2, manual_hydro_station_kyrgyz)
+
+        with CaptureQueriesContext(connection) as context:
+            daily_data = transformer.get_daily_data()
+
+        assert len(context.captured_queries) == 1
+        manual_days = {
+            row["date"] for row in daily_data[:-2] if row["water_discharge_morning"]["allow_manual_override"]
+        }
+        assert manual_days == {f"2020-02-{day}" for day in range(15, 20)}
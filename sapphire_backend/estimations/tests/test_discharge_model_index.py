@@ -0,0 +1,104 @@
+from datetime import date, datetime, timedelta
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from zoneinfo import ZoneInfo
+
+from sapphire_backend.estimations.models import DischargeModel
+from sapphire_backend.estimations.utils import DischargeModelIndex, get_discharge_model_from_timestamp_local
+from sapphire_backend.telegrams.schema import TelegramBulkWithDatesInputSchema
+from sapphire_backend.telegrams.utils import get_parsed_telegrams_data, simulate_telegram_insertion
+
+
+def count_discharge_model_queries(context: CaptureQueriesContext) -> int:
+    return sum(DischargeModel._meta.db_table in query["sql"] for query in context.captured_queries)
+
+
+class TestDischargeModelIndex:
+    def test_lookup_matches_query(
+        self,
+        manual_hydro_station_kyrgyz,
+        discharge_model_manual_hydro_station_kyrgyz,
+        discharge_second_model_manual_hydro_station_kyrgyz,
+    ):
+        timestamps = [
+            datetime(2020, 1, 1, tzinfo=ZoneInfo("UTC")),
+            datetime(2020, 1, 15, tzinfo=ZoneInfo("UTC")),
+            datetime(2020, 2, 20, tzinfo=ZoneInfo("UTC")),
+            datetime(2020, 3, 1, tzinfo=ZoneInfo("UTC")),
+            datetime(2021, 1, 1, tzinfo=ZoneInfo("UTC")),
+        ]
+
+        index = DischargeModelIndex()
+
+        assert index.get_many(manual_hydro_station_kyrgyz, timestamps) == [
+            get_discharge_model_from_timestamp_local(manual_hydro_station_kyrgyz, timestamp)
+            for timestamp in timestamps
+        ]
+        assert index.get(manual_hydro_station_kyrgyz, timestamps[0]) is None
+        assert (
+            index.get(manual_hydro_station_kyrgyz, timestamps[3]) == discharge_second_model_manual_hydro_station_kyrgyz
+        )
+
+    def test_station_is_loaded_once(self, manual_hydro_station_kyrgyz, discharge_model_manual_hydro_station_kyrgyz):
+        index = DischargeModelIndex()
+        timestamp = datetime(2020, 2, 1, tzinfo=ZoneInfo("UTC"))
+
+        with CaptureQueriesContext(connection) as context:
+            for _ in range(10):
+                index.get(manual_hydro_station_kyrgyz, timestamp)
+
+        assert count_discharge_model_queries(context) == 1
+
+    def test_saving_or_deleting_a_model_invalidates_the_index(
+        self, manual_hydro_station_kyrgyz, discharge_model_manual_hydro_station_kyrgyz
+    ):
+        index = DischargeModelIndex()
+        timestamp = datetime(2020, 3, 10, tzinfo=ZoneInfo("UTC"))
+        assert index.get(manual_hydro_station_kyrgyz, timestamp) == discharge_model_manual_hydro_station_kyrgyz
+
+        new_model = DischargeModel.objects.create(
+            name="New model",
+            param_a=10,
+            param_b=2,
+            param_c=0.005,
+            valid_from_local=datetime(2020, 3, 1, tzinfo=ZoneInfo("UTC")),
+            station=manual_hydro_station_kyrgyz,
+        )
+        assert index.get(manual_hydro_station_kyrgyz, timestamp) == new_model
+
+        new_model.delete()
+        assert index.get(manual_hydro_station_kyrgyz, timestamp) == discharge_model_manual_hydro_station_kyrgyz
+
+
+class TestSimulateTelegramInsertionQueries:
+    def test_discharge_models_are_loaded_once_for_a_telegram_batch(
+        self,
+        organization_kyrgyz,
+        manual_hydro_station_kyrgyz,
+        manual_second_hydro_station_kyrgyz,
+        discharge_model_manual_hydro_station_kyrgyz,
+        discharge_second_model_manual_hydro_station_kyrgyz,
+        discharge_model_manual_second_hydro_station_kyrgyz,
+    ):
+        telegrams = []
+        for idx in range(50):
+            station = manual_hydro_station_kyrgyz if idx % 2 else manual_second_hydro_station_kyrgyz
+            override_date = date(2020, 2, 1) + timedelta(days=idx // 2)
+            telegrams.append(
+                {
+                    "raw": f"{station.station_code} 01082 10251 20022 30249 45820 51209 00100=",
+                    "override_date": override_date.isoformat(),
+                }
+            )
+        parsed_data = get_parsed_telegrams_data(
+            TelegramBulkWithDatesInputSchema(telegrams=telegrams), organization_kyrgyz.uuid, save_telegrams=False
+        )
+
+        with CaptureQueriesContext(connection) as context:
+            result = simulate_telegram_insertion(parsed_data)
+
+        # previously two queries per telegram plus one per station and day
+        assert count_discharge_model_queries(context) == 1
+        assert len(result[manual_hydro_station_kyrgyz.station_code]) == 26
+        assert len(result[manual_second_hydro_station_kyrgyz.station_code]) == 26
@@ -0,0 +1,123 @@
+from datetime import date, datetime
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from zoneinfo import ZoneInfo
+
+from sapphire_backend.estimations.materialization import (
+    water_discharge_decade_average,
+    water_discharge_fiveday_average,
+    water_level_decade_average,
+)
+from sapphire_backend.estimations.models import EstimationsWaterDischargeDecadeAverage
+from sapphire_backend.estimations.tests.factories import DischargeCalculationPeriodFactory
+
+PERIOD_AVERAGES = [water_level_decade_average, water_discharge_fiveday_average, water_discharge_decade_average]
+
+
+def assert_consistent():
+    for estimation in PERIOD_AVERAGES:
+        assert estimation.diff() == {}, estimation.table
+
+
+class TestPeriodAverageTables:
+    @pytest.mark.django_db(transaction=True)
+    @pytest.mark.parametrize(
+        "water_level_metrics_daily_generator", [(date(2020, 2, 1), date(2020, 3, 31))], indirect=True
+    )
+    def test_tables_match_legacy_views(
+        self, discharge_model_manual_hydro_station_kyrgyz, water_level_metrics_daily_generator
+    ):
+        assert EstimationsWaterDischargeDecadeAverage.objects.count() == 6
+        assert_consistent()
+
+    @pytest.mark.django_db(transaction=True)
+    @pytest.mark.parametrize(
+        "water_level_metrics_daily_generator", [(date(2020, 2, 1), date(2020, 3, 31))], indirect=True
+    )
+    def test_model_change_recomputes_discharge_periods(
+        self, discharge_model_manual_hydro_station_kyrgyz, water_level_metrics_daily_generator
+    ):
+        discharge_model_manual_hydro_station_kyrgyz.param_c = 0.01
+        discharge_model_manual_hydro_station_kyrgyz.save()
+
+        assert_consistent()
+
+    @pytest.mark.django_db(transaction=True)
+    @pytest.mark.parametrize(
+        "water_level_metrics_daily_generator", [(date(2020, 2, 1), date(2020, 3, 31))], indirect=True
+    )
+    def test_calculation_period_recomputes_periods(
+        self,
+        discharge_model_manual_hydro_station_kyrgyz,
+        manual_hydro_station_kyrgyz,
+        water_level_metrics_daily_generator,
+        regular_user_kyrgyz,
+    ):
+        DischargeCalculationPeriodFactory(
+            station=manual_hydro_station_kyrgyz,
+            user=regular_user_kyrgyz,
+            start_date_local=datetime(2020, 2, 10, tzinfo=ZoneInfo("UTC")),
+            end_date_local=datetime(2020, 2, 25, tzinfo=ZoneInfo("UTC")),
+            state=DischargeCalculationPeriodFactory._meta.model.CalculationState.SUSPENDED,
+            reason=DischargeCalculationPeriodFactory._meta.model.CalculationReason.ICE,
+            is_active=True,
+        )
+
+        assert_consistent()
+
+    @pytest.mark.django_db(transaction=True)
+    @pytest.mark.parametrize(
+        "water_level_metrics_daily_generator", [(date(2020, 2, 1), date(2020, 3, 31))], indirect=True
+    )
+    def test_refresh_is_limited_to_the_overlapping_months(
+        self,
+        discharge_model_manual_hydro_station_kyrgyz,
+        manual_hydro_station_kyrgyz,
+        water_level_metrics_daily_generator,
+    ):
+        with connection.cursor() as cursor:
+            cursor.execute("UPDATE estimations_water_discharge_decade_average SET avg_value = avg_value + 1")
+
+        water_discharge_decade_average.refresh(
+            manual_hydro_station_kyrgyz.id,
+            datetime(2020, 3, 1, tzinfo=ZoneInfo("UTC")),
+            datetime(2020, 4, 1, tzinfo=ZoneInfo("UTC")),
+        )
+
+        # the three February decades are still stale
+        assert water_discharge_decade_average.diff() == {manual_hydro_station_kyrgyz.id: 6}
+
+
+class TestBackfillEstimationsTablesCommand:
+    @pytest.mark.django_db(transaction=True)
+    @pytest.mark.parametrize(
+        "water_level_metrics_daily_generator", [(date(2020, 2, 1), date(2020, 3, 31))], indirect=True
+    )
+    def test_backfill_in_parallel_chunks(
+        self,
+        discharge_model_manual_hydro_station_kyrgyz,
+        manual_hydro_station_kyrgyz,
+        water_level_metrics_daily_generator,
+    ):
+        with connection.cursor() as cursor:
+            for estimation in PERIOD_AVERAGES:
+                cursor.execute(f"DELETE FROM {estimation.table}")
+
+        call_command(
+            "backfill_estimations_tables",
+            "--station_ids",
+            str(manual_hydro_station_kyrgyz.id),
+            "--start",
+            "2020-01-15",
+            "--end",
+            "2020-06-01",
+            "--chunk_months",
+            "1",
+            "--workers",
+            "2",
+        )
+
+        assert EstimationsWaterDischargeDecadeAverage.objects.count() == 6
+        assert_consistent()
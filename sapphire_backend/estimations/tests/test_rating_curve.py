@@ -0,0 +1,90 @@
+from decimal import Decimal
+
+import numpy as np
+from hypothesis import given, settings
+from hypothesis import strategies as st
+
+from sapphire_backend.estimations.models import DischargeModel
+from sapphire_backend.estimations.rating_curve import estimate_discharges_for_models
+from sapphire_backend.telegrams.schema import NewOldMetrics
+from sapphire_backend.telegrams.utils import estimate_new_discharges
+from sapphire_backend.utils.rounding import hydrological_round, hydrological_round_array
+
+# decimal inputs put many values exactly on a rounding tie, e.g. 2.675
+roundable_values = st.one_of(
+    st.floats(min_value=-1e3, max_value=1e9, allow_nan=False, allow_infinity=False),
+    st.integers(min_value=-(10**6), max_value=10**9).map(lambda value: value / 1000),
+)
+water_levels = st.integers(min_value=0, max_value=1000)
+parameters = st.tuples(
+    st.floats(min_value=0, max_value=500).map(lambda value: Decimal(str(value))),
+    st.sampled_from([Decimal("1.5"), Decimal("2"), Decimal("2.3"), Decimal("3")]),
+    st.floats(min_value=1e-5, max_value=10).map(lambda value: Decimal(str(value))),
+)
+
+
+def build_model(param_a: Decimal, param_b: Decimal, param_c: Decimal) -> DischargeModel:
+    return DischargeModel(name="Model", param_a=param_a, param_b=param_b, param_c=param_c)
+
+
+class TestHydrologicalRoundArray:
+    @settings(max_examples=500, deadline=None)
+    @given(st.lists(roundable_values, max_size=50))
+    def test_matches_scalar_round(self, values):
+        rounded = hydrological_round_array(values)
+
+        assert rounded.tolist() == [float(hydrological_round(value)) for value in values]
+
+    def test_missing_and_non_finite_values(self):
+        assert np.isnan(hydrological_round_array([None, np.nan, np.inf])).all()
+
+
+class TestEstimateDischarges:
+    @settings(max_examples=300, deadline=None)
+    @given(parameters, st.lists(water_levels, min_size=1, max_size=50))
+    def test_single_model_matches_scalar_path(self, model_parameters, levels):
+        model = build_model(*model_parameters)
+
+        discharges = model.estimate_discharges(levels)
+
+        assert discharges.tolist() == [float(model.estimate_discharge(level)) for level in levels]
+
+    @settings(max_examples=200, deadline=None)
+    @given(st.lists(st.tuples(water_levels, st.none() | parameters), min_size=1, max_size=50))
+    def test_model_per_water_level_matches_scalar_path(self, levels_and_parameters):
+        levels = [level for level, _ in levels_and_parameters]
+        models = [build_model(*params) if params is not None else None for _, params in levels_and_parameters]
+
+        discharges = estimate_discharges_for_models(levels, models)
+
+        for level, model, discharge in zip(levels, models, discharges.tolist()):
+            if model is None:
+                assert np.isnan(discharge)
+            else:
+                assert discharge == float(model.estimate_discharge(level))
+
+    def test_two_dimensional_water_levels(self):
+        model = build_model(Decimal("-30"), Decimal("2"), Decimal("0.007"))
+        levels = np.arange(40, 60).reshape(2, 10)
+
+        discharges = model.estimate_discharges(levels)
+
+        assert discharges.shape == (2, 10)
+        assert discharges[1, 3] == float(model.estimate_discharge(53))
+
+    def test_undefined_curve_is_nan(self):
+        model = build_model(Decimal("-30"), Decimal("1.5"), Decimal("0.007"))
+
+        assert np.isnan(model.estimate_discharges([10])).all()
+
+
+class TestEstimateNewDischarges:
+    def test_entries_without_water_level_or_model_get_none(self):
+        model = build_model(Decimal("-30"), Decimal("2"), Decimal("0.007"))
+        entries = [NewOldMetrics(), NewOldMetrics(), NewOldMetrics()]
+
+        estimate_new_discharges([(entries[0], 120, model), (entries[1], None, model), (entries[2], 120, None)])
+
+        assert entries[0].discharge_new == round(float(model.estimate_discharge(120)), 1)
+        assert entries[1].discharge_new is None
+        assert entries[2].discharge_new is None
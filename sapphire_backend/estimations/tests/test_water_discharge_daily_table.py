@@ -0,0 +1,87 @@
+from datetime import datetime
+
+import pytest
+from django.core.management import CommandError, call_command
+from django.db import connection
+from zoneinfo import ZoneInfo
+
+from sapphire_backend.estimations.materialization import water_discharge_daily
+from sapphire_backend.estimations.models import EstimationsWaterDischargeDaily
+from sapphire_backend.estimations.tests.factories import DischargeCalculationPeriodFactory
+from sapphire_backend.metrics.choices import HydrologicalMeasurementType, HydrologicalMetricName, MetricUnit
+from sapphire_backend.metrics.models import HydrologicalMetric
+from sapphire_backend.utils.rounding import custom_round
+
+
+@pytest.fixture
+def manual_water_level(db, manual_hydro_station_kyrgyz):
+    water_level = HydrologicalMetric(
+        timestamp_local=datetime(2020, 2, 12, 8, tzinfo=ZoneInfo("UTC")),
+        avg_value=70,
+        unit=MetricUnit.WATER_LEVEL,
+        metric_name=HydrologicalMetricName.WATER_LEVEL_DAILY,
+        value_type=HydrologicalMeasurementType.MANUAL,
+        station=manual_hydro_station_kyrgyz,
+    )
+    water_level.save()
+    return water_level
+
+
+class TestWaterDischargeDailyTable:
+    def test_model_change_recomputes_discharge(self, discharge_model_manual_hydro_station_kyrgyz, manual_water_level):
+        discharge_model_manual_hydro_station_kyrgyz.param_c = 0.01
+        discharge_model_manual_hydro_station_kyrgyz.save()
+
+        discharge = EstimationsWaterDischargeDaily.objects.get(timestamp_local=manual_water_level.timestamp_local)
+
+        assert custom_round(discharge.avg_value, 6) == custom_round(
+            discharge_model_manual_hydro_station_kyrgyz.estimate_discharge(70), 6
+        )
+
+    def test_water_level_delete_removes_discharge(
+        self, discharge_model_manual_hydro_station_kyrgyz, manual_water_level
+    ):
+        manual_water_level.delete()
+
+        assert not EstimationsWaterDischargeDaily.objects.exists()
+
+    def test_calculation_period_excludes_and_restores_discharge(
+        self, discharge_model_manual_hydro_station_kyrgyz, manual_water_level, regular_user_kyrgyz
+    ):
+        assert EstimationsWaterDischargeDaily.objects.count() == 1
+
+        period = DischargeCalculationPeriodFactory(
+            station=manual_water_level.station,
+            user=regular_user_kyrgyz,
+            start_date_local=datetime(2020, 2, 10, tzinfo=ZoneInfo("UTC")),
+            end_date_local=datetime(2020, 2, 15, tzinfo=ZoneInfo("UTC")),
+            state=DischargeCalculationPeriodFactory._meta.model.CalculationState.SUSPENDED,
+            reason=DischargeCalculationPeriodFactory._meta.model.CalculationReason.ICE,
+            is_active=True,
+        )
+        assert not EstimationsWaterDischargeDaily.objects.exists()
+
+        period.is_active = False
+        period.save()
+        assert EstimationsWaterDischargeDaily.objects.count() == 1
+
+    def test_table_matches_legacy_view(self, discharge_model_manual_hydro_station_kyrgyz, manual_water_level):
+        assert water_discharge_daily.diff() == {}
+
+
+class TestCheckEstimationsTablesCommand:
+    def test_consistent(self, discharge_model_manual_hydro_station_kyrgyz, manual_water_level):
+        call_command("check_estimations_tables")
+
+    def test_inconsistent_and_fix(self, discharge_model_manual_hydro_station_kyrgyz, manual_water_level):
+        station_id = manual_water_level.station_id
+        with connection.cursor() as cursor:
+            cursor.execute("UPDATE estimations_water_discharge_daily SET avg_value = avg_value + 1")
+
+        assert water_discharge_daily.diff() == {station_id: 2}
+        with pytest.raises(CommandError, match="Inconsistencies found"):
+            call_command("check_estimations_tables", "--station_ids", str(station_id))
+
+        call_command("check_estimations_tables", "--fix")
+
+        assert water_discharge_daily.diff() == {}
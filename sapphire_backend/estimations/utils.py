@@ -1,6 +1,15 @@
+from bisect import bisect_right
+from collections import defaultdict
+from collections.abc import Iterable
 from datetime import datetime
+from typing import ClassVar
 
-from sapphire_backend.estimations.models import DischargeModel
+import numpy as np
+import pandas as pd
+from django.db.models import Q
+from numpy.typing import ArrayLike
+
+from sapphire_backend.estimations.models import DischargeCalculationPeriod, DischargeModel
 from sapphire_backend.estimations.schema import DischargeModelPointsPair
 from sapphire_backend.stations.models import HydrologicalStation
 from sapphire_backend.utils.exceptions import (
@@ -49,3 +58,118 @@ def get_discharge_model_from_timestamp_local(station: HydrologicalStation, times
         .order_by("-valid_from_local")
         .first()
     )
+
+
+class DischargeModelIndex:
+    """
+    Discharge models of each station sorted by valid_from_local, loaded with one query per station (or one for
+    all prefetched stations) and looked up by bisection. An index is meant to live for one request; saving or
+    deleting a model bumps the process-level version of its station, which makes the index reload it.
+    """
+
+    _versions: ClassVar[defaultdict[int, int]] = defaultdict(int)
+
+    def __init__(self):
+        self._stations: dict[int, tuple[int, list[datetime], list[DischargeModel]]] = {}
+
+    @classmethod
+    def invalidate(cls, station_id: int) -> None:
+        cls._versions[station_id] += 1
+
+    def _store(self, station_id: int, models: list[DischargeModel]) -> None:
+        self._stations[station_id] = (
+            self._versions[station_id],
+            [model.valid_from_local for model in models],
+            models,
+        )
+
+    def prefetch(self, stations: Iterable[HydrologicalStation]) -> None:
+        station_ids = {station.id for station in stations}
+        models_by_station = {station_id: [] for station_id in station_ids}
+        for model in DischargeModel.objects.filter(station_id__in=station_ids).order_by("valid_from_local"):
+            models_by_station[model.station_id].append(model)
+        for station_id, models in models_by_station.items():
+            self._store(station_id, models)
+
+    def _get_station_models(self, station_id: int) -> tuple[list[datetime], list[DischargeModel]]:
+        cached = self._stations.get(station_id)
+        if cached is None or cached[0] != self._versions[station_id]:
+            self._store(
+                station_id, list(DischargeModel.objects.filter(station_id=station_id).order_by("valid_from_local"))
+            )
+            cached = self._stations[station_id]
+        return cached[1], cached[2]
+
+    def get(self, station: HydrologicalStation, timestamp_local: datetime) -> DischargeModel | None:
+        """
+        Same as get_discharge_model_from_timestamp_local, without a query once the station is loaded.
+        """
+        return self.get_many(station, [timestamp_local])[0]
+
+    def get_many(self, station: HydrologicalStation, timestamps_local: list[datetime]) -> list[DischargeModel | None]:
+        valid_from, models = self._get_station_models(station.id)
+        result = []
+        for timestamp_local in timestamps_local:
+            position = bisect_right(valid_from, timestamp_local)
+            result.append(models[position - 1] if position else None)
+        return result
+
+
+class DischargeCalculationPeriodIndex:
+    """
+    Active discharge calculation periods of a station overlapping a time window, loaded with one query and sorted
+    by start_date_local. Answers DischargeCalculationPeriod.get_active_period / is_manual_calculation for any
+    timestamp inside the window without further queries, either one timestamp or a whole column at a time.
+    """
+
+    def __init__(self, station_id: int, window_start: datetime | None = None, window_end: datetime | None = None):
+        periods = DischargeCalculationPeriod.objects.filter(station_id=station_id, is_active=True)
+        if window_end is not None:
+            periods = periods.filter(start_date_local__lte=window_end)
+        if window_start is not None:
+            periods = periods.filter(Q(end_date_local__isnull=True) | Q(end_date_local__gte=window_start))
+        self._periods = list(periods.order_by("start_date_local"))
+        self._starts = [period.start_date_local for period in self._periods]
+        self._ends = [period.end_date_local for period in self._periods]
+        # without overlaps the period starting last before a timestamp is the only candidate
+        self._has_overlaps = any(
+            end is None or end >= next_start for end, next_start in zip(self._ends, self._starts[1:])
+        )
+
+    def get_active_period(self, timestamp: datetime) -> DischargeCalculationPeriod | None:
+        for position in reversed(range(bisect_right(self._starts, timestamp))):
+            if self._ends[position] is None or self._ends[position] >= timestamp:
+                return self._periods[position]
+        return None
+
+    def is_manual_calculation(self, timestamp: datetime) -> bool:
+        period = self.get_active_period(timestamp)
+        return period is not None and period.state == DischargeCalculationPeriod.CalculationState.MANUAL
+
+    def get_states(self, timestamps: ArrayLike) -> np.ndarray:
+        """
+        Calculation state of the active period for every timestamp, None where there is no active period.
+        Naive timestamps are taken as UTC, like timestamp_local is stored.
+        """
+        timestamps_index = pd.DatetimeIndex(pd.to_datetime(timestamps, utc=True))
+        states = np.full(len(timestamps_index), None, dtype=object)
+        if not self._periods:
+            return states
+
+        timestamps_ns = timestamps_index.asi8
+        starts_ns = pd.DatetimeIndex(pd.to_datetime(self._starts, utc=True)).asi8
+        ends_ns = pd.DatetimeIndex(pd.to_datetime(self._ends, utc=True)).asi8.copy()
+        ends_ns[pd.isna(self._ends)] = np.iinfo(np.int64).max
+
+        positions = np.searchsorted(starts_ns, timestamps_ns, side="right") - 1
+        covered = (positions >= 0) & (ends_ns[positions.clip(min=0)] >= timestamps_ns)
+        states[covered] = np.array([period.state for period in self._periods], dtype=object)[positions[covered]]
+
+        if self._has_overlaps:
+            for idx in np.flatnonzero(~covered & (positions > 0)):
+                period = self.get_active_period(timestamps_index[idx])
+                states[idx] = period.state if period is not None else None
+        return states
+
+    def is_manual_calculation_many(self, timestamps: ArrayLike) -> np.ndarray:
+        return self.get_states(timestamps) == DischargeCalculationPeriod.CalculationState.MANUAL
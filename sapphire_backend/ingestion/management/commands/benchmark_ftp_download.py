@@ -0,0 +1,83 @@
+import os
+import shutil
+import tempfile
+import time
+from functools import partial
+
+from django.core.management.base import BaseCommand, CommandError
+
+from sapphire_backend.ingestion.utils.filemanager import FTPClient, ShellFTPClient
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the files/sec of downloading small files from a local FTP server which delays every reply like a "
+        "remote one, once with the ftp binary in chunks of 10 files (previous behaviour, if it's installed) and "
+        "once with the ftplib client for every given number of connections"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--files", type=int, default=500, help="Number of files")
+        parser.add_argument("--size_kb", type=int, default=4, help="Size of every file")
+        parser.add_argument("--latency_ms", type=int, default=20, help="Delay of every reply of the server")
+        parser.add_argument(
+            "--connections", type=int, nargs="+", default=[1, 4, 8], help="Numbers of concurrent connections to run"
+        )
+
+    def _measure(self, label: str, download, expected_files: int):
+        with tempfile.TemporaryDirectory() as dest_dir:
+            start = time.perf_counter()
+            download(dest_dir)
+            seconds = time.perf_counter() - start
+            downloaded = len(os.listdir(dest_dir))
+        self.stdout.write(
+            f"{label:<16} {seconds:>9.3f} s {expected_files / seconds:>8.1f} files/s  downloaded {downloaded:>5}"
+        )
+
+    def handle(self, *args, **options):
+        if min(options["files"], options["size_kb"], *options["connections"]) < 1 or options["latency_ms"] < 0:
+            raise CommandError("Number of files, their size and the connections must be positive integers")
+        try:
+            # pyftpdlib is installed with the local requirements only
+            from sapphire_backend.ingestion.utils.ftp_server import (
+                LOCAL_FTP_PASSWORD,
+                LOCAL_FTP_USER,
+                LatencyFTPHandler,
+                local_ftp_server,
+            )
+        except ImportError:
+            raise CommandError("The local FTP server requires pyftpdlib, install the local requirements")
+
+        with tempfile.TemporaryDirectory() as root_dir:
+            os.mkdir(os.path.join(root_dir, "stream1"))
+            remote_paths = []
+            for idx in range(options["files"]):
+                with open(os.path.join(root_dir, "stream1", f"DATA_{idx:06d}.xml.part"), "wb") as remote_file:
+                    remote_file.write(os.urandom(options["size_kb"] * 1024))
+                remote_paths.append(f"/stream1/DATA_{idx:06d}.xml.part")
+            self.stdout.write(
+                f"{options['files']} files of {options['size_kb']} KB, {options['latency_ms']} ms per server reply"
+            )
+
+            with local_ftp_server(root_dir, LatencyFTPHandler, latency=options["latency_ms"] / 1000) as (host, port):
+                credentials = {"ftp_host": host, "ftp_port": port, "ftp_user": LOCAL_FTP_USER}
+                if shutil.which("ftp") is None:
+                    self.stdout.write("ftp binary not installed, skipping the previous behaviour")
+                else:
+                    shell_client = ShellFTPClient(**credentials, ftp_password=LOCAL_FTP_PASSWORD)
+                    self._measure(
+                        "ftp binary",
+                        lambda dest_dir: shell_client._ftp_get_files(remote_paths, dest_dir),
+                        options["files"],
+                    )
+
+                for connections in options["connections"]:
+                    client = FTPClient(**credentials, ftp_password=LOCAL_FTP_PASSWORD, max_connections=connections)
+                    try:
+                        self._measure(
+                            f"ftplib x{connections}",
+                            partial(client.download_files, remote_paths),
+                            options["files"],
+                        )
+                    finally:
+                        client.close()
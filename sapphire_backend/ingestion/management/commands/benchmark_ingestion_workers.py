@@ -0,0 +1,129 @@
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from zoneinfo import ZoneInfo
+
+from sapphire_backend.ingestion.models import FileState
+from sapphire_backend.ingestion.utils.helper import AutoStationCache
+from sapphire_backend.ingestion.utils.ingester import BaseIngester
+from sapphire_backend.ingestion.utils.parser import XMLParser
+from sapphire_backend.ingestion.utils.synthetic import write_synthetic_xml
+from sapphire_backend.metrics.timeseries.refresh import refresh_queue
+from sapphire_backend.organizations.models import Organization
+from sapphire_backend.stations.models import HydrologicalStation
+
+BENCHMARK_INGESTER_NAME = "benchmark_workers"
+BENCHMARK_START = datetime(1990, 1, 1, tzinfo=ZoneInfo("UTC"))
+
+
+class LocalDirIngester(BaseIngester):
+    """
+    Ingester of the files already downloaded to a local directory
+    """
+
+    def _discover_new_files(self):
+        FileState.objects.bulk_create(
+            FileState(
+                remote_path=os.path.join(self._source_dir, filename),
+                local_path=os.path.join(self._source_dir, filename),
+                state=FileState.States.DOWNLOADED,
+                ingester_name=self.ingester_name,
+            )
+            for filename in sorted(os.listdir(self._source_dir))
+        )
+
+    def run(self):
+        self._discover_new_files()
+        self._run_parser()
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the files/sec of ingesting a local directory of synthetic XML files of the hydro stations of an "
+        "organization with different numbers of workers. Every file holds the reports of one station, the files of "
+        "a station follow each other in time."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--organization_uuid", type=str, required=True, help="UUID of the organization")
+        parser.add_argument("--stations", type=int, default=20, help="Number of hydro stations of the files")
+        parser.add_argument("--files", type=int, default=1000, help="Number of files")
+        parser.add_argument("--reports", type=int, default=144, help="Number of 10-minute reports per file")
+        parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8], help="Numbers of workers to run")
+
+    @staticmethod
+    def _cleanup(automatic_station_ids: list[int], end: datetime):
+        FileState.objects.filter(ingester_name=BENCHMARK_INGESTER_NAME).delete()
+        # the synthetic records have no sensor identifier, the range before any automatic data tells them apart
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                DELETE FROM metrics_hydrologicalmetric
+                WHERE station_id = ANY(%s) AND timestamp_local >= %s AND timestamp_local < %s
+                """,
+                [automatic_station_ids, BENCHMARK_START, end],
+            )
+        refresh_queue.add(BENCHMARK_START.date(), end.date())
+
+    def handle(self, *args, **options):
+        try:
+            organization = Organization.objects.get(uuid=options["organization_uuid"])
+        except Organization.DoesNotExist:
+            raise CommandError(f"Organization with UUID {options['organization_uuid']} does not exist")
+        if min(options["stations"], options["files"], options["reports"], *options["workers"]) < 1:
+            raise CommandError("Number of stations, files, reports and workers must be positive integers")
+
+        station_codes = list(
+            HydrologicalStation.objects.filter(
+                site__organization=organization, station_type=HydrologicalStation.StationType.MANUAL
+            )
+            .order_by("station_code")
+            .values_list("station_code", flat=True)[: options["stations"]]
+        )
+        if not station_codes:
+            raise CommandError("The organization doesn't have any manual hydro stations")
+
+        # the automatic stations are created before measuring, like after the first ingestion
+        station_cache = AutoStationCache(organization)
+        station_cache.load(station_codes)
+        automatic_station_ids = [station.id for code in station_codes if (station := station_cache.get(code))]
+        files_per_station = -(-options["files"] // len(station_codes))
+        end = BENCHMARK_START + timedelta(minutes=10 * files_per_station * options["reports"])
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            for idx in range(options["files"]):
+                # the filenames are unique over all the ingesters, they run against the time of the files
+                file_path = os.path.join(temp_dir, f"benchmark_{options['files'] - idx:06d}.xml.gz")
+                file_start = BENCHMARK_START + timedelta(minutes=10 * (idx // len(station_codes)) * options["reports"])
+                write_synthetic_xml(
+                    file_path, [station_codes[idx % len(station_codes)]], options["reports"], file_start
+                )
+            self.stdout.write(
+                f"{options['files']} files of {len(station_codes)} stations, {options['reports']} reports per file"
+            )
+
+            try:
+                for workers in options["workers"]:
+                    self._cleanup(automatic_station_ids, end)
+                    ingester = LocalDirIngester(
+                        client=None,
+                        source_dir=temp_dir,
+                        parser=XMLParser,
+                        ingester_name=BENCHMARK_INGESTER_NAME,
+                        organization=organization,
+                        workers=workers,
+                    )
+                    start = time.perf_counter()
+                    ingester.run()
+                    seconds = time.perf_counter() - start
+                    self.stdout.write(
+                        f"{workers:>3} worker(s) {seconds:>9.3f} s {options['files'] / seconds:>8.1f} files/s"
+                        f"  unprocessed {ingester.files_unprocessed.count():>5}"
+                        f"  failed {ingester.files_failed.count():>5}"
+                    )
+            finally:
+                self._cleanup(automatic_station_ids, end)
@@ -0,0 +1,116 @@
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from zoneinfo import ZoneInfo
+
+from sapphire_backend.ingestion.utils.helper import AutoStationCache
+from sapphire_backend.ingestion.utils.parser import XMLParser
+from sapphire_backend.ingestion.utils.synthetic import write_synthetic_xml
+from sapphire_backend.metrics.timeseries.refresh import refresh_queue
+from sapphire_backend.stations.models import HydrologicalStation
+
+BENCHMARK_START = datetime(1990, 1, 1, tzinfo=ZoneInfo("UTC"))
+
+
+def _save_per_row(parser: XMLParser):
+    # previous behaviour, a connection and an upsert statement per metric
+    with refresh_queue.deferred():
+        for metric_object in parser.output_metric_objects:
+            metric_object.save()
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the records/sec of ingesting synthetic XML files of a hydro station, once saving every metric on "
+        "its own (previous behaviour) and once with a set-based upsert per batch. The automatic station is created "
+        "from the manual one if it doesn't exist yet, like in a real ingestion."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--station_id", type=int, required=True, help="ID of the hydro station to ingest for")
+        parser.add_argument("--files", type=int, default=10, help="Number of files")
+        parser.add_argument("--reports", type=int, default=1000, help="Number of 10-minute reports per file")
+        parser.add_argument("--batch_size", type=int, default=5000, help="Records written at once by the parser")
+        parser.add_argument(
+            "--skip_per_row", action="store_true", default=False, help="Only benchmark the batched writes"
+        )
+
+    @staticmethod
+    @contextmanager
+    def _per_row_save():
+        original = XMLParser.save
+        XMLParser.save = _save_per_row
+        try:
+            yield
+        finally:
+            XMLParser.save = original
+
+    @staticmethod
+    def _cleanup(station: HydrologicalStation, end: datetime):
+        automatic_station = HydrologicalStation.objects.filter(
+            station_code=station.station_code, station_type=HydrologicalStation.StationType.AUTOMATIC
+        ).first()
+        if automatic_station is None:
+            return
+        # the synthetic records have no sensor identifier, the range before any automatic data tells them apart
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                DELETE FROM metrics_hydrologicalmetric
+                WHERE station_id = %s AND timestamp_local >= %s AND timestamp_local < %s
+                """,
+                [automatic_station.id, BENCHMARK_START, end],
+            )
+        refresh_queue.add(BENCHMARK_START.date(), end.date())
+
+    def _ingest(self, label: str, station: HydrologicalStation, file_paths: list[str], batch_size: int):
+        records = inserted = updated = 0
+        start = time.perf_counter()
+        for file_path in file_paths:
+            parser = XMLParser(
+                file_path=file_path, organization=station.site.organization, filestate=None, batch_size=batch_size
+            )
+            parser.run()
+            records += parser.count_parsed_records
+            inserted += parser.result["inserted"]
+            updated += parser.result["updated"]
+        seconds = time.perf_counter() - start
+        self.stdout.write(
+            f"{label:<20} {records:>8} records {seconds:>9.3f} s {records / seconds:>10.0f} records/s"
+            f"  inserted {inserted:>8}  updated {updated:>8}"
+        )
+
+    def handle(self, *args, **options):
+        try:
+            station = HydrologicalStation.objects.select_related("site__organization").get(id=options["station_id"])
+        except HydrologicalStation.DoesNotExist:
+            raise CommandError(f"Hydro station with ID {options['station_id']} does not exist")
+        if min(options["files"], options["reports"], options["batch_size"]) < 1:
+            raise CommandError("Number of files, reports and the batch size must be positive integers")
+
+        end = BENCHMARK_START + timedelta(minutes=10 * options["files"] * options["reports"])
+        with tempfile.TemporaryDirectory() as temp_dir:
+            file_paths = []
+            for idx in range(options["files"]):
+                file_path = os.path.join(temp_dir, f"benchmark_{idx}.xml.gz")
+                file_start = BENCHMARK_START + timedelta(minutes=10 * idx * options["reports"])
+                write_synthetic_xml(file_path, [station.station_code], options["reports"], file_start)
+                file_paths.append(file_path)
+
+            # the per-row saves run on their own connections, they need the automatic station committed
+            AutoStationCache(station.site.organization).load([station.station_code])
+            self._cleanup(station, end)
+            try:
+                if not options["skip_per_row"]:
+                    with self._per_row_save():
+                        self._ingest("per-row save", station, file_paths, options["batch_size"])
+                    self._cleanup(station, end)
+                self._ingest("batched (insert)", station, file_paths, options["batch_size"])
+                self._ingest("batched (update)", station, file_paths, options["batch_size"])
+            finally:
+                self._cleanup(station, end)
@@ -0,0 +1,34 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from zoneinfo import ZoneInfo
+
+from sapphire_backend.ingestion.utils.synthetic import render_report, write_synthetic_xml
+
+
+class Command(BaseCommand):
+    help = (
+        "Write a synthetic XML file of 10-minute automatic station reports of about the given size, e.g. to "
+        "measure the memory and the time a backfill file takes to ingest"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("filepath", type=str, help="Path of the file, gzipped if it ends with .gz")
+        parser.add_argument("--size_mb", type=int, default=500, help="Approximate size of the uncompressed XML")
+        parser.add_argument(
+            "--station_codes", type=str, nargs="+", default=["15194", "15212", "15216"], help="Codes of the stations"
+        )
+        parser.add_argument("--start", type=str, default="2000-01-01", help="Timestamp of the first reports")
+
+    def handle(self, *args, **options):
+        try:
+            start = datetime.strptime(options["start"], "%Y-%m-%d").replace(tzinfo=ZoneInfo("UTC"))
+        except ValueError:
+            raise CommandError(f"Invalid date {options['start']}, expected YYYY-MM-DD")
+        if options["size_mb"] < 1:
+            raise CommandError("Size must be a positive integer")
+
+        report_size = len(render_report(start, options["station_codes"][0], 0).encode())
+        reports = options["size_mb"] * 1024 * 1024 // report_size
+        write_synthetic_xml(options["filepath"], options["station_codes"], reports, start)
+        self.stdout.write(f"Wrote {reports} reports to {options['filepath']}")
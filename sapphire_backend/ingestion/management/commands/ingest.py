@@ -29,6 +29,8 @@ class Command(BaseCommand):
         ingestion_ftp_client_class = os.environ.get("INGESTION_FTP_CLIENT_CLASS", "")
         ingester_auto_class = os.environ.get("INGESTION_AUTO_XML_CLASS", "")
         ingester_telegram_class = os.environ.get("INGESTION_TELEGRAM_CLASS", "")
+        # files parsed concurrently, the files of a station are still applied one after another
+        ingestion_workers = int(os.environ.get("INGESTION_WORKERS", "1"))
 
         if ingestion_ftp_client_class == "filemanager.ImomoStagingFTPClient":
             ftp_client = ImomoStagingFTPClient(
@@ -49,7 +51,7 @@ class Command(BaseCommand):
                 ftp_port=int(os.environ["INGESTION_FTP_PORT"]),
                 ftp_user=os.environ["INGESTION_FTP_USER"],
                 ftp_password=os.environ["INGESTION_FTP_PASSWORD"],
-                ftp_chunk_size=10,
+                max_connections=int(os.environ.get("INGESTION_FTP_CONNECTIONS", "4")),
             )
         else:
             logging.error(
@@ -66,6 +68,7 @@ class Command(BaseCommand):
                 offline_storage_dir=os.environ.get("INGESTION_AUTO_XML_LOCAL_STORAGE_DIR", None),
                 chunk_size=100,
                 organization=Organization.objects.get(name="КыргызГидроМет"),
+                workers=ingestion_workers,
             )
             ingester_auto.run()
 
@@ -83,6 +86,7 @@ class Command(BaseCommand):
                 offline_storage_dir=os.environ.get("INGESTION_TELEGRAM_LOCAL_STORAGE_DIR", None),
                 chunk_size=100,
                 organization=Organization.objects.get(name="КыргызГидроМет"),
+                workers=ingestion_workers,
             )
             ingester_manual.run()
         elif ingester_telegram_class != "ingester.ImomoTelegramIngester" and not skip_telegrams:
@@ -0,0 +1,65 @@
+import io
+import os
+from collections import Counter
+from types import SimpleNamespace
+
+import pytest
+from pyftpdlib.handlers import FTPHandler
+from pyftpdlib.handlers.ftp.producers import FileProducer
+
+from sapphire_backend.ingestion.utils.filemanager import FTPClient
+from sapphire_backend.ingestion.utils.ftp_server import LOCAL_FTP_PASSWORD, LOCAL_FTP_USER, local_ftp_server
+
+
+class FaultyFTPHandler(FTPHandler):
+    """
+    Fails the next transfers of a file with a temporary error or sends only half of it, as often as configured
+    """
+
+    temporary_failures: dict[str, int] = {}
+    truncated_transfers: dict[str, int] = {}
+    retrieved: Counter = Counter()
+    logins: Counter = Counter()
+
+    def on_login(self, username):
+        self.logins[username] += 1
+
+    def ftp_RETR(self, file):
+        filename = os.path.basename(file)
+        self.retrieved[filename] += 1
+        if self.temporary_failures.get(filename, 0) > 0:
+            self.temporary_failures[filename] -= 1
+            self.respond("451 Requested action aborted: local error in processing.")
+            return
+        if self.truncated_transfers.get(filename, 0) > 0:
+            self.truncated_transfers[filename] -= 1
+            with open(file, "rb") as remote_file:
+                content = remote_file.read()
+            truncated_file = io.BytesIO(content[: len(content) // 2])
+            self.push_dtp_data(FileProducer(truncated_file, self._current_type), isproducer=True, cmd="RETR")
+            return file
+        return super().ftp_RETR(file)
+
+
+@pytest.fixture
+def ftp_server(tmp_path):
+    root_dir = tmp_path / "ftp"
+    root_dir.mkdir()
+    faults = {"temporary_failures": {}, "truncated_transfers": {}, "retrieved": Counter(), "logins": Counter()}
+    with local_ftp_server(str(root_dir), FaultyFTPHandler, **faults) as (host, port):
+        yield SimpleNamespace(root_dir=root_dir, host=host, port=port, **faults)
+
+
+@pytest.fixture
+def ftp_client(ftp_server):
+    client = FTPClient(
+        ftp_host=ftp_server.host,
+        ftp_port=ftp_server.port,
+        ftp_user=LOCAL_FTP_USER,
+        ftp_password=LOCAL_FTP_PASSWORD,
+        max_connections=4,
+        retries=2,
+        backoff=0,
+    )
+    yield client
+    client.close()
@@ -0,0 +1,84 @@
+import os
+
+from sapphire_backend.ingestion.utils.filemanager import PartialDownloadError
+
+
+def write_remote_files(ftp_server, count: int, directory: str = "stream1") -> list[str]:
+    os.makedirs(ftp_server.root_dir / directory, exist_ok=True)
+    remote_paths = []
+    for idx in range(count):
+        (ftp_server.root_dir / directory / f"DATA_{idx}.xml.part").write_bytes(os.urandom(1000 + idx))
+        remote_paths.append(f"/{directory}/DATA_{idx}.xml.part")
+    return remote_paths
+
+
+def read_remote_file(ftp_server, remote_path: str) -> bytes:
+    return (ftp_server.root_dir / remote_path.lstrip("/")).read_bytes()
+
+
+class TestFTPClient:
+    def test_download_files(self, tmp_path, ftp_server, ftp_client):
+        remote_paths = write_remote_files(ftp_server, 20)
+
+        results = ftp_client.download_files(remote_paths, str(tmp_path))
+        ftp_client.download_files(remote_paths[:5], str(tmp_path))
+
+        assert [result["remote_path"] for result in results] == remote_paths
+        for result in results:
+            assert result["local_path"] == str(tmp_path / os.path.basename(result["remote_path"]))
+            assert result["error"] is None
+            assert result["attempts"] == 1
+            assert result["size"] == len(read_remote_file(ftp_server, result["remote_path"]))
+            with open(result["local_path"], "rb") as local_file:
+                assert local_file.read() == read_remote_file(ftp_server, result["remote_path"])
+        # the sessions are logged in once and reused by the following downloads
+        assert 1 <= ftp_server.logins["sapphire"] <= ftp_client.max_connections
+
+    def test_temporary_errors_are_retried(self, tmp_path, ftp_server, ftp_client):
+        remote_paths = write_remote_files(ftp_server, 2)
+        ftp_server.temporary_failures.update({"DATA_0.xml.part": 2, "DATA_1.xml.part": 3})
+
+        results = ftp_client.download_files(remote_paths, str(tmp_path))
+
+        assert (results[0]["attempts"], results[0]["error"]) == (3, None)
+        # the retries are used up
+        assert results[1]["attempts"] == 3
+        assert results[1]["local_path"] is None
+        assert "451" in results[1]["error"]
+        assert ftp_client.get_files(remote_paths, str(tmp_path)) == [
+            str(tmp_path / "DATA_0.xml.part"),
+            str(tmp_path / "DATA_1.xml.part"),
+        ]
+
+    def test_partial_downloads_are_detected(self, tmp_path, ftp_server, ftp_client):
+        remote_paths = write_remote_files(ftp_server, 2)
+        ftp_server.truncated_transfers.update({"DATA_0.xml.part": 1, "DATA_1.xml.part": 3})
+
+        results = ftp_client.download_files(remote_paths, str(tmp_path))
+
+        assert (results[0]["attempts"], results[0]["error"]) == (2, None)
+        with open(results[0]["local_path"], "rb") as local_file:
+            assert local_file.read() == read_remote_file(ftp_server, remote_paths[0])
+        assert results[1]["local_path"] is None
+        assert PartialDownloadError.__name__ in results[1]["error"]
+        # nothing is left of the partial downloads
+        assert sorted(os.listdir(tmp_path)) == ["DATA_0.xml.part", "ftp"]
+
+    def test_missing_files_are_not_retried(self, tmp_path, ftp_server, ftp_client):
+        write_remote_files(ftp_server, 1)
+
+        [result] = ftp_client.download_files(["/stream1/missing.xml.part"], str(tmp_path))
+
+        assert result["attempts"] == 1
+        assert result["local_path"] is None
+        assert "550" in result["error"]
+
+    def test_list_mkdir_and_rename(self, ftp_server, ftp_client):
+        remote_paths = write_remote_files(ftp_server, 3)
+
+        ftp_client.mkdir("/stream1/archive")
+        ftp_client.rename_files("/stream1", [("DATA_2.xml.part", "DATA_2.xml")])
+
+        assert sorted(ftp_client.list_dir("/stream1", ".xml.part", line_prefix="-")) == remote_paths[:2]
+        assert ftp_client.list_dir("/stream1", ".xml", line_prefix="-") == ["/stream1/DATA_2.xml"]
+        assert (ftp_server.root_dir / "stream1" / "archive").is_dir()
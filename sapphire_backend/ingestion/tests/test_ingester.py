@@ -0,0 +1,138 @@
+import datetime as dt
+
+import pytest
+from zoneinfo import ZoneInfo
+
+from sapphire_backend.ingestion.models import FileState
+from sapphire_backend.ingestion.utils.ingester import ImomoAutoXMLIngester
+from sapphire_backend.ingestion.utils.parser import XMLParser
+from sapphire_backend.ingestion.utils.synthetic import write_synthetic_xml
+from sapphire_backend.metrics.choices import HydrologicalMetricName
+from sapphire_backend.metrics.models import HydrologicalMetric
+from sapphire_backend.stations.models import HydrologicalStation
+
+from .factories import FileStateFactory
+
+START = dt.datetime(2020, 2, 1, tzinfo=ZoneInfo("UTC"))
+
+
+def create_ingester(organization, workers: int) -> ImomoAutoXMLIngester:
+    return ImomoAutoXMLIngester(
+        client=None,
+        source_dir="/stream1",
+        parser=XMLParser,
+        ingester_name="imomo_auto",
+        organization=organization,
+        workers=workers,
+    )
+
+
+class TestBaseIngester:
+    def test_plan_lanes(self, tmp_path):
+        files = {
+            "a": (["15194"], START + dt.timedelta(hours=1)),
+            "b": (["15194"], START),
+            "c": (["15212"], START),
+            "d": (["15212", "15216"], START + dt.timedelta(hours=2)),
+            "e": (["15216"], START + dt.timedelta(hours=1)),
+            "f": (["15999"], START),
+        }
+        filestates = []
+        for idx, (filename, (station_codes, start)) in enumerate(files.items()):
+            write_synthetic_xml(str(tmp_path / filename), station_codes, 12, start)
+            filestates.append(
+                FileState(id=idx, remote_path=f"/stream1/{filename}", local_path=str(tmp_path / filename))
+            )
+
+        lanes = create_ingester(None, workers=2)._plan_lanes(filestates)
+
+        # the files sharing a station are in one lane, ordered by their first timestamp instead of their name
+        lane_filenames = [[filestate.filename for filestate, _ in lane] for lane in lanes]
+        assert lane_filenames == [["c", "e", "d"], ["b", "a"], ["f"]]
+        assert all(parser.file_path == filestate.local_path for lane in lanes for filestate, parser in lane)
+
+    def test_workers_must_be_positive(self):
+        with pytest.raises(ValueError):
+            create_ingester(None, workers=0)
+
+    @pytest.mark.django_db(transaction=True)
+    def test_parse_files_concurrently(self, tmp_path, organization, manual_hydro_station, automatic_hydro_station):
+        def create_filestate(filename: str, state=FileState.States.DOWNLOADED):
+            return FileStateFactory(
+                remote_path=f"/stream1/{filename}",
+                local_path=str(tmp_path / filename),
+                ingester_name="imomo_auto",
+                state=state,
+            )
+
+        # the newer file of the manual station's code sorts first by its name, it still has to be applied last
+        newer, older = create_filestate("DATA_1.xml"), create_filestate("DATA_2.xml")
+        write_synthetic_xml(newer.local_path, [manual_hydro_station.station_code], 10, START + dt.timedelta(hours=1))
+        write_synthetic_xml(older.local_path, [manual_hydro_station.station_code], 20, START)
+        other_station = create_filestate("DATA_3.xml")
+        write_synthetic_xml(other_station.local_path, [automatic_hydro_station.station_code], 20, START)
+        broken = create_filestate("DATA_4.xml")
+        (tmp_path / "DATA_4.xml").write_text("<reports><report")
+        # claimed by a concurrent run
+        processing = create_filestate("DATA_5.xml", state=FileState.States.PROCESSING)
+
+        create_ingester(organization, workers=3)._run_parser()
+
+        states = dict(FileState.objects.values_list("filename", "state"))
+        assert states == {
+            newer.filename: FileState.States.PROCESSED,
+            older.filename: FileState.States.PROCESSED,
+            other_station.filename: FileState.States.PROCESSED,
+            broken.filename: FileState.States.FAILED,
+            processing.filename: FileState.States.PROCESSING,
+        }
+        new_automatic_station = HydrologicalStation.objects.get(
+            station_code=manual_hydro_station.station_code, station_type=HydrologicalStation.StationType.AUTOMATIC
+        )
+        water_levels = HydrologicalMetric.objects.filter(metric_name=HydrologicalMetricName.WATER_LEVEL_DAILY)
+        assert water_levels.filter(station=new_automatic_station).count() == 20
+        assert water_levels.filter(station=automatic_hydro_station).count() == 20
+        # the first report of the newer file overwrote the 7th report of the older one
+        overwritten = water_levels.get(station=new_automatic_station, timestamp=START + dt.timedelta(hours=1))
+        assert overwritten.avg_value == 200
+
+    @pytest.mark.django_db
+    @pytest.mark.parametrize("offline", [True, False])
+    def test_post_cleanup_leaves_the_files_of_concurrent_runs(self, tmp_path, organization, offline):
+        ingester = ImomoAutoXMLIngester(
+            client=None,
+            source_dir="/stream1",
+            parser=XMLParser,
+            ingester_name="imomo_auto",
+            organization=organization,
+            offline_storage_dir=str(tmp_path) if offline else None,
+        )
+        own_file = FileStateFactory(
+            remote_path="/stream1/DATA_1.xml", ingester_name="imomo_auto", state=FileState.States.DOWNLOADED
+        )
+        ingester._claim_files_to_process()
+        # claimed by a concurrent run which is still to parse it, and by one which was killed a day ago
+        other_run_file = FileStateFactory(
+            remote_path="/stream1/DATA_2.xml", ingester_name="imomo_auto", state=FileState.States.PROCESSING
+        )
+        stale_file = FileStateFactory(
+            remote_path="/stream1/DATA_3.xml", ingester_name="imomo_auto", state=FileState.States.PROCESSING
+        )
+        FileState.objects.filter(id=stale_file.id).update(state_timestamp=START)
+        # discovered and downloaded by a concurrent run which is still to claim them
+        other_run_discovered = FileStateFactory(
+            remote_path="/stream1/DATA_4.xml", ingester_name="imomo_auto", state=FileState.States.DISCOVERED
+        )
+        other_run_downloaded = FileStateFactory(
+            remote_path="/stream1/DATA_5.xml", ingester_name="imomo_auto", state=FileState.States.DOWNLOADED
+        )
+
+        ingester._post_cleanup()
+
+        assert dict(FileState.objects.values_list("filename", "state")) == {
+            own_file.filename: FileState.States.FAILED,
+            other_run_file.filename: FileState.States.PROCESSING,
+            stale_file.filename: FileState.States.FAILED,
+            other_run_discovered.filename: FileState.States.DISCOVERED,
+            other_run_downloaded.filename: FileState.States.DOWNLOADED,
+        }
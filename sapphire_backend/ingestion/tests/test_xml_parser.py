@@ -0,0 +1,163 @@
+import datetime as dt
+import tracemalloc
+import xml.etree.ElementTree as ET
+from unittest.mock import patch
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from zoneinfo import ZoneInfo
+
+from sapphire_backend.ingestion.utils.parser import XMLParser
+from sapphire_backend.ingestion.utils.synthetic import write_synthetic_xml
+from sapphire_backend.metrics.choices import HydrologicalMetricName
+from sapphire_backend.metrics.models import HydrologicalMetric
+from sapphire_backend.stations.models import HydrologicalStation
+
+START = dt.datetime(2020, 2, 1, tzinfo=ZoneInfo("UTC"))
+STATION_CODES = ["15194", "15212", "15216"]
+
+
+def extract_in_memory(xml_data: str) -> list[XMLParser.InputRecord]:
+    # the previous extraction from the whole tree
+    records = []
+    for report in ET.fromstring(xml_data):
+        timestamp = report.attrib["TIME"]
+        for child in report:
+            if child.tag == "station":
+                station_id = child.attrib["ID"]
+            elif child.tag == "parameter" and child.attrib["VAR"] in ["LW", "TW", "TA"]:
+                for value in child:
+                    if value.attrib["PROC"] == "AVE":
+                        avg_value = value.text
+                    elif value.attrib["PROC"] == "MIN":
+                        min_value = value.text
+                    elif value.attrib["PROC"] == "MAX":
+                        max_value = value.text
+                records.append(
+                    XMLParser.InputRecord(
+                        timestamp=timestamp,
+                        station_id=station_id,
+                        var_name=child.attrib["VAR"],
+                        sensor_type=child.attrib.get("SENSTYPE", ""),
+                        sensor_identifier=child.attrib.get("SENSID", ""),
+                        avg_value=avg_value,
+                        min_value=min_value,
+                        max_value=max_value,
+                    )
+                )
+    return records
+
+
+def peak_memory_of_extraction(file_path: str) -> int:
+    parser = XMLParser(file_path=file_path, organization=None, filestate=None)
+    tracemalloc.start()
+    for _ in parser.extract():
+        pass
+    _, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak_memory
+
+
+class TestXMLParser:
+    @pytest.mark.parametrize("file_name", ["reports.xml", "reports.xml.gz"])
+    def test_extract_output_is_unchanged(self, tmp_path, file_name):
+        file_path = str(tmp_path / file_name)
+        write_synthetic_xml(file_path, STATION_CODES, 300, START)
+        write_synthetic_xml(str(tmp_path / "expected.xml"), STATION_CODES, 300, START)
+        parser = XMLParser(file_path=file_path, organization=None, filestate=None)
+
+        records = list(parser.extract())
+
+        assert records == extract_in_memory((tmp_path / "expected.xml").read_text())
+        assert len(records) == 3 * 300
+        assert parser.count_parsed_records == 3 * 300
+        assert parser.count_skipped_records == 300
+        assert parser.log_unsupported_variables == {"HU"}
+        assert records[0] == {
+            "timestamp": "01-02-2020T00:00:00Z",
+            "station_id": "15194",
+            "var_name": "LW",
+            "sensor_type": "PLS",
+            "sensor_identifier": "",
+            "avg_value": "200.0",
+            "min_value": "198.5",
+            "max_value": "201.5",
+        }
+
+    @pytest.mark.parametrize("chunk_size", [100, 1024 * 1024])
+    def test_summarize(self, tmp_path, chunk_size):
+        file_path = str(tmp_path / "reports.xml.gz")
+        write_synthetic_xml(file_path, ["151940", *STATION_CODES[1:]], 300, START + dt.timedelta(hours=1))
+        parser = XMLParser(file_path=file_path, organization=None, filestate=None)
+
+        # tags cut at the end of the small chunks are matched in the next chunk
+        with patch("sapphire_backend.ingestion.utils.parser.XML_SCAN_CHUNK_SIZE", chunk_size):
+            summary = parser.summarize()
+
+        assert summary == {"station_codes": set(STATION_CODES), "first_timestamp": START + dt.timedelta(hours=1)}
+
+    def test_extract_peak_memory_is_bounded(self, tmp_path):
+        small_file_path = str(tmp_path / "small.xml.gz")
+        large_file_path = str(tmp_path / "large.xml.gz")
+        write_synthetic_xml(small_file_path, STATION_CODES, 2_000, START)
+        write_synthetic_xml(large_file_path, STATION_CODES, 20_000, START)
+
+        small_peak_memory = peak_memory_of_extraction(small_file_path)
+        large_peak_memory = peak_memory_of_extraction(large_file_path)
+
+        # 10 times the reports, the whole tree of the large file took over 200 MB
+        assert large_peak_memory < 2 * small_peak_memory
+        assert large_peak_memory < 2 * 1024 * 1024
+
+    @pytest.mark.django_db(transaction=True)
+    def test_run_saves_the_records_in_batches(self, tmp_path, organization, manual_hydro_station):
+        file_path = str(tmp_path / "reports.xml.gz")
+        write_synthetic_xml(file_path, [manual_hydro_station.station_code], 50, START)
+        parser = XMLParser(file_path=file_path, organization=organization, filestate=None, batch_size=7)
+
+        parser.run()
+
+        automatic_station = HydrologicalStation.objects.get(
+            station_code=manual_hydro_station.station_code, station_type=HydrologicalStation.StationType.AUTOMATIC
+        )
+        metrics = HydrologicalMetric.objects.filter(station=automatic_station)
+        assert metrics.count() == 3 * 50
+        assert parser.count_parsed_records == 3 * 50
+        assert parser.output_metric_objects == []
+        water_level = metrics.get(metric_name=HydrologicalMetricName.WATER_LEVEL_DAILY, timestamp=START)
+        assert (water_level.avg_value, water_level.min_value, water_level.max_value) == (200, 198.5, 201.5)
+
+    @pytest.mark.django_db(transaction=True)
+    def test_run_reports_inserted_updated_and_skipped_records(self, tmp_path, organization, manual_hydro_station):
+        file_path = str(tmp_path / "reports.xml")
+        write_synthetic_xml(file_path, [manual_hydro_station.station_code, "99999"], 40, START)
+
+        first_run = XMLParser(file_path=file_path, organization=organization, filestate=None, batch_size=25)
+        first_run.run()
+        second_run = XMLParser(file_path=file_path, organization=organization, filestate=None)
+        second_run.run()
+
+        # 20 reports per station with 3 supported variables, the unsupported variable and the unknown station
+        assert first_run.result == {"inserted": 60, "updated": 0, "skipped": 40 + 60}
+        assert second_run.result == {"inserted": 0, "updated": 60, "skipped": 40 + 60}
+
+    @pytest.mark.django_db
+    def test_stations_are_resolved_once_per_run(
+        self, tmp_path, organization, manual_hydro_station, automatic_hydro_station
+    ):
+        file_path = str(tmp_path / "reports.xml.gz")
+        station_codes = [manual_hydro_station.station_code, automatic_hydro_station.station_code, "99999"]
+        write_synthetic_xml(file_path, station_codes, 3_334, START)
+        parser = XMLParser(file_path=file_path, organization=organization, filestate=None)
+
+        with patch.object(XMLParser, "save"), CaptureQueriesContext(connection) as context:
+            parser.run()
+
+        # the stations of every code, the new automatic station and its ID, for two batches of records
+        assert parser.count_parsed_records == 10_002
+        assert len(context.captured_queries) == 3
+        assert parser.log_unknown_stations == {"99999"}
+        assert HydrologicalStation.objects.filter(
+            station_code=manual_hydro_station.station_code, station_type=HydrologicalStation.StationType.AUTOMATIC
+        ).exists()
@@ -1,7 +1,15 @@
+import ftplib
 import logging
 import os
+import queue
 import subprocess
+import threading
+import time
 from abc import ABC, abstractmethod
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import TypedDict
 
 import paramiko
 from scp import SCPClient
@@ -45,8 +53,25 @@ class BaseFileManager(ABC):
         """
         pass
 
+    @staticmethod
+    def _parse_list_dir(path: str, response: str, file_extension: str, line_prefix: str):
+        """
+        Filter FTP ls response and only files where the response line starts with line_prefix and ends with file_extension
+        """
+        lines = response.split("\n")
+        files = []
+        for line in lines:
+            if line.startswith(line_prefix) and line.endswith(file_extension):
+                f = os.path.join(path, line.split()[-1])
+                files.append(f)
+        return files
+
+
+class ShellFTPClient(BaseFileManager):
+    """
+    FTP client driving the ftp binary with shell commands, on the local machine or on the SSH machine
+    """
 
-class FTPClient(BaseFileManager):
     def __init__(self, ftp_host: str, ftp_port: int, ftp_user: str, ftp_password: str, ftp_chunk_size=10):
         super(BaseFileManager, self).__init__()
         self.ftp_host = ftp_host
@@ -114,19 +139,6 @@ class FTPClient(BaseFileManager):
         list_files = self._parse_list_dir(path, response, file_extension, line_prefix)
         return list_files
 
-    @staticmethod
-    def _parse_list_dir(path: str, response: str, file_extension: str, line_prefix: str):
-        """
-        Filter FTP ls response and only files where the response line starts with line_prefix and ends with file_extension
-        """
-        lines = response.split("\n")
-        files = []
-        for line in lines:
-            if line.startswith(line_prefix) and line.endswith(file_extension):
-                f = os.path.join(path, line.split()[-1])
-                files.append(f)
-        return files
-
     def mkdir(self, dir_path: str):
         """
         Create new dir
@@ -150,7 +162,205 @@ class FTPClient(BaseFileManager):
             logging.info(f"Renaming {i+1}/{len(old_new_names)}")
 
 
-class ImomoStagingFTPClient(FTPClient):
+class DownloadResult(TypedDict):
+    remote_path: str
+    local_path: str | None
+    size: int
+    attempts: int
+    error: str | None
+
+
+class PartialDownloadError(ftplib.Error):
+    pass
+
+
+class FTPClient(BaseFileManager):
+    """
+    FTP client on ftplib. The logged-in sessions are kept open and reused, at most max_connections files are
+    transferred at once. A transfer failing with a temporary error or receiving less than the size of the file on
+    the server is retried with an exponential backoff.
+    """
+
+    # a session idle for longer is checked before it's reused, the server may have closed it in the meantime
+    SESSION_IDLE_CHECK_SECONDS = 30
+    TRANSFER_BLOCK_SIZE = 64 * 1024
+
+    def __init__(
+        self,
+        ftp_host: str,
+        ftp_port: int,
+        ftp_user: str,
+        ftp_password: str,
+        max_connections: int = 4,
+        retries: int = 3,
+        backoff: float = 1.0,
+        timeout: float = 60,
+    ):
+        self.ftp_host = ftp_host
+        self.ftp_port = ftp_port
+        self.ftp_user = ftp_user
+        self.ftp_password = ftp_password
+        self.max_connections = max_connections
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self._idle_sessions = queue.LifoQueue()
+        self._session_slots = threading.BoundedSemaphore(max_connections)
+
+    def _connect(self) -> ftplib.FTP:
+        ftp = ftplib.FTP(timeout=self.timeout)
+        ftp.connect(self.ftp_host, self.ftp_port)
+        ftp.login(self.ftp_user, self.ftp_password)
+        ftp.set_pasv(True)
+        ftp.voidcmd("TYPE I")
+        return ftp
+
+    @staticmethod
+    def _close_session(ftp: ftplib.FTP):
+        try:
+            ftp.quit()
+        except ftplib.all_errors:
+            ftp.close()
+
+    def _get_idle_session(self) -> ftplib.FTP | None:
+        while True:
+            try:
+                ftp, last_used = self._idle_sessions.get_nowait()
+            except queue.Empty:
+                return None
+            if time.monotonic() - last_used < self.SESSION_IDLE_CHECK_SECONDS:
+                return ftp
+            try:
+                ftp.voidcmd("NOOP")
+                return ftp
+            except ftplib.all_errors:
+                self._close_session(ftp)
+
+    @contextmanager
+    def _session(self) -> Iterator[ftplib.FTP]:
+        """
+        Borrow an idle logged-in session or log in a new one, at most max_connections at a time. A session which
+        failed on the connection level is closed instead of returned.
+        """
+        with self._session_slots:
+            ftp = self._get_idle_session() or self._connect()
+            try:
+                yield ftp
+            except ftplib.error_perm:
+                # the server refused the command, the session itself is fine
+                self._idle_sessions.put((ftp, time.monotonic()))
+                raise
+            except BaseException:
+                self._close_session(ftp)
+                raise
+            self._idle_sessions.put((ftp, time.monotonic()))
+
+    def _transfer(self, remote_path: str, local_path: str) -> int:
+        """
+        Download a file and return its size. It's written under a temporary name until it's complete, so a partial
+        download never shows up under the final one.
+        """
+        temp_path = f"{local_path}.download"
+        try:
+            with open(temp_path, "wb") as local_file, self._session() as ftp:
+                try:
+                    expected_size = ftp.size(remote_path)
+                except ftplib.error_perm:
+                    # SIZE is not supported (or the file is missing, which RETR reports)
+                    expected_size = None
+                ftp.retrbinary(f"RETR {remote_path}", local_file.write, blocksize=self.TRANSFER_BLOCK_SIZE)
+                size = local_file.tell()
+            if expected_size is not None and size != expected_size:
+                raise PartialDownloadError(f"Received {size} of {expected_size} bytes of {remote_path}")
+            os.replace(temp_path, local_path)
+            return size
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def _download_file(self, remote_path: str, dest_folder_local: str) -> DownloadResult:
+        result = DownloadResult(remote_path=remote_path, local_path=None, size=0, attempts=0, error=None)
+        local_path = os.path.join(dest_folder_local, os.path.basename(remote_path))
+        while True:
+            result["attempts"] += 1
+            try:
+                result["size"] = self._transfer(remote_path, local_path)
+                result["local_path"] = local_path
+                result["error"] = None
+                return result
+            except ftplib.error_perm as e:
+                # e.g. the file doesn't exist anymore, trying again won't help
+                result["error"] = repr(e)
+                return result
+            except ftplib.all_errors as e:
+                result["error"] = repr(e)
+                if result["attempts"] > self.retries:
+                    return result
+                delay = self.backoff * 2 ** (result["attempts"] - 1)
+                logging.warning(f"FTP download of {remote_path} failed with {e!r}, retrying in {delay:.1f} s")
+                time.sleep(delay)
+
+    def download_files(self, ftp_file_path: list[str], dest_folder_local: str) -> list[DownloadResult]:
+        """
+        Download the files concurrently
+        :return the result of every file, in the order of ftp_file_path
+        """
+        with ThreadPoolExecutor(max_workers=self.max_connections) as executor:
+            results = list(
+                executor.map(lambda remote_path: self._download_file(remote_path, dest_folder_local), ftp_file_path)
+            )
+        for result in results:
+            if result["local_path"] is None:
+                logging.error(
+                    f"FTP download of {result['remote_path']} failed after {result['attempts']} attempt(s): "
+                    f"{result['error']}"
+                )
+        downloaded = sum(result["local_path"] is not None for result in results)
+        logging.info(f"FTP downloaded {downloaded}/{len(results)} files")
+        return results
+
+    def get_files(self, ftp_file_path: list[str], dest_folder_local: str) -> list[str | None]:
+        """
+        Trigger FTP download
+        :return paths to the downloaded files as a list, None for the files which failed
+        """
+        return [result["local_path"] for result in self.download_files(ftp_file_path, dest_folder_local)]
+
+    def list_dir(self, path, file_extension, line_prefix: str = "-rwxrwxrwx"):
+        """
+        List FTP directory
+        """
+        lines = []
+        with self._session() as ftp:
+            ftp.retrlines(f"LIST {path}", lines.append)
+        return self._parse_list_dir(path, "\n".join(lines), file_extension, line_prefix)
+
+    def mkdir(self, dir_path: str):
+        """
+        Create new dir
+        """
+        with self._session() as ftp:
+            return ftp.mkd(dir_path)
+
+    def rename_files(self, src_dir: str, old_new_names: list[(str, str)]):
+        """
+        Rename files within the same ftp dir
+        """
+        with self._session() as ftp:
+            for old_name, new_name in old_new_names:
+                ftp.rename(os.path.join(src_dir, old_name), os.path.join(src_dir, new_name))
+        logging.info(f"Renamed {len(old_new_names)} files")
+
+    def close(self):
+        while True:
+            try:
+                ftp, _ = self._idle_sessions.get_nowait()
+            except queue.Empty:
+                break
+            self._close_session(ftp)
+
+
+class ImomoStagingFTPClient(ShellFTPClient):
     def __init__(
         self,
         ssh_host,
@@ -0,0 +1,53 @@
+import logging
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+from pyftpdlib.authorizers import DummyAuthorizer
+from pyftpdlib.handlers import FTPHandler
+from pyftpdlib.log import logger
+from pyftpdlib.servers import ThreadedFTPServer
+
+# serves the tests and the FTP benchmark, pyftpdlib is installed with the local requirements only
+LOCAL_FTP_USER = "sapphire"
+LOCAL_FTP_PASSWORD = "sapphire"
+
+
+class LatencyFTPHandler(FTPHandler):
+    # seconds every reply is delayed by, to emulate the round trip to a remote server
+    latency = 0.0
+
+    def respond(self, resp, logfun=logger.debug):
+        if self.latency:
+            time.sleep(self.latency)
+        super().respond(resp, logfun)
+
+
+@contextmanager
+def local_ftp_server(root_dir: str, handler: type[FTPHandler] = FTPHandler, **handler_attrs) -> Iterator[tuple]:
+    """
+    Serve the root_dir over FTP on localhost from a background thread, every connection is handled in its own
+    thread. The handler class is subclassed with handler_attrs, e.g. latency=0.02.
+    :return the host and the port of the server
+    """
+    # a line per command and transfer otherwise
+    logger.setLevel(logging.WARNING)
+    authorizer = DummyAuthorizer()
+    authorizer.add_user(LOCAL_FTP_USER, LOCAL_FTP_PASSWORD, root_dir, perm="elradfmw")
+    server_handler = type("LocalFTPHandler", (handler,), {"authorizer": authorizer, **handler_attrs})
+    server = ThreadedFTPServer(("127.0.0.1", 0), server_handler)
+    stopped = threading.Event()
+
+    def serve():
+        while not stopped.is_set():
+            server.serve_forever(timeout=0.05, blocking=False, handle_exit=False)
+        server.close_all()
+
+    thread = threading.Thread(target=serve, daemon=True)
+    thread.start()
+    try:
+        yield server.address
+    finally:
+        stopped.set()
+        thread.join()
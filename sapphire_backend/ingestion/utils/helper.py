@@ -1,4 +1,5 @@
 import logging
+from collections.abc import Iterable
 
 from sapphire_backend.organizations.models import Organization
 from sapphire_backend.stations.models import HydrologicalStation
@@ -37,3 +38,68 @@ def get_or_create_auto_station_by_code(station_code: str, organization: Organiza
             hydro_station_auto_obj.save()
             logging.info(f"Created automatic hydro station from existing manual station code {station_code}")
     return hydro_station_auto_obj
+
+
+class AutoStationCache:
+    """
+    Automatic hydro stations of an organization by station code, for the records of a parser run. The stations of
+    all the codes not seen yet are loaded with a single query and the missing automatic stations are created in
+    bulk from the manual stations with the same code, like get_or_create_auto_station_by_code does one by one.
+    """
+
+    def __init__(self, organization: Organization):
+        self._organization = organization
+        self._stations: dict[str, HydrologicalStation | None] = {}
+
+    def load(self, station_codes: Iterable[str]) -> None:
+        new_station_codes = set(station_codes) - self._stations.keys()
+        if not new_station_codes:
+            return
+
+        automatic_stations = {}
+        manual_stations = {}
+        # the records' timestamps are localized with the timezone of the station's site or organization
+        for station in HydrologicalStation.objects.filter(
+            station_code__in=new_station_codes, site__organization=self._organization
+        ).select_related("site__organization"):
+            if station.station_type == HydrologicalStation.StationType.AUTOMATIC:
+                automatic_stations[station.station_code] = station
+            else:
+                manual_stations[station.station_code] = station
+
+        missing_station_codes = manual_stations.keys() - automatic_stations.keys()
+        if missing_station_codes:
+            # another run might create the same station, the constraint on the code and the type keeps one
+            HydrologicalStation.objects.bulk_create(
+                [
+                    HydrologicalStation(
+                        name=manual_stations[station_code].name,
+                        station_code=station_code,
+                        station_type=HydrologicalStation.StationType.AUTOMATIC,
+                        site_id=manual_stations[station_code].site_id,
+                        description="",
+                        measurement_time_step=None,
+                        discharge_level_alarm=manual_stations[station_code].discharge_level_alarm,
+                        is_deleted=False,
+                    )
+                    for station_code in missing_station_codes
+                ],
+                ignore_conflicts=True,
+            )
+            for station in HydrologicalStation.objects.filter(
+                station_code__in=missing_station_codes,
+                station_type=HydrologicalStation.StationType.AUTOMATIC,
+                site__organization=self._organization,
+            ).select_related("site__organization"):
+                automatic_stations[station.station_code] = station
+            logging.info(
+                f"Created automatic hydro stations from existing manual station codes {missing_station_codes}"
+            )
+
+        for station_code in new_station_codes:
+            self._stations[station_code] = automatic_stations.get(station_code)
+
+    def get(self, station_code: str) -> HydrologicalStation | None:
+        if station_code not in self._stations:
+            self.load([station_code])
+        return self._stations[station_code]
@@ -1,16 +1,26 @@
 import logging
 import os
+import queue
 import tempfile
+import threading
 from abc import ABC, abstractmethod
-from datetime import datetime
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
 
+from django.db import connection, transaction
+from django.db.models import Q, QuerySet
 from zoneinfo import ZoneInfo
 
 from sapphire_backend.ingestion.models import FileState
 from sapphire_backend.ingestion.utils.filemanager import BaseFileManager
-from sapphire_backend.ingestion.utils.parser import BaseParser
+from sapphire_backend.ingestion.utils.parser import BaseParser, FileSummary
+from sapphire_backend.metrics.timeseries.refresh import refresh_queue
 from sapphire_backend.organizations.models import Organization
 
+# files flagged as PROCESSING by another run are left to it, unless they were claimed this long ago
+FILE_PROCESSING_STALE_AFTER = timedelta(hours=24)
+
 
 class BaseIngester(ABC):
     def __init__(
@@ -22,7 +32,10 @@ class BaseIngester(ABC):
         organization: Organization,
         chunk_size=200,
         offline_storage_dir=None,
+        workers=1,
     ):
+        if workers < 1:
+            raise ValueError("Number of workers must be a positive integer")
         self.client = client
         self._source_dir = source_dir
         self._files_discovered = []
@@ -33,6 +46,11 @@ class BaseIngester(ABC):
         self._offline_storage_dir = offline_storage_dir
         self._ingester_name = ingester_name
         self._organization = organization
+        self._workers = workers
+        self._cnt_parsed_files = 0
+        # the files discovered, downloaded or claimed by this run, the post cleanup leaves the others alone
+        self._filestate_ids = set()
+        self._progress_lock = threading.Lock()
 
     @property
     def ingester_name(self):
@@ -71,22 +89,162 @@ class BaseIngester(ABC):
         )
 
     def _run_parser(self):
-        for idx, filestate in enumerate(self.files_to_process):
-            try:
-                if (idx + 1) % 10 == 0:
-                    logging.info(f"Parsing file {idx + 1}/{len(self.files_to_process)}")
-                filestate.state = FileState.States.PROCESSING
-                filestate.save()
-                parser = self.parser(
-                    file_path=filestate.local_path, filestate=filestate, organization=self._organization
-                )
+        # refresh the water level continuous aggregate once per run instead of once per file
+        with refresh_queue.deferred():
+            self._parse_files()
+
+    def _claim_files_to_process(self) -> list[FileState]:
+        """
+        Flag all the downloaded files as PROCESSING at once. The files locked by a concurrent run are skipped, so
+        every file is processed by a single run. The files of a station are only ordered within a run, a concurrent
+        run can claim the files of the same station downloaded after this claim.
+        """
+        with transaction.atomic():
+            filestates = list(self.files_to_process.select_for_update(skip_locked=True).order_by("filename"))
+            FileState.objects.filter(id__in=[filestate.id for filestate in filestates]).update(
+                state=FileState.States.PROCESSING, state_timestamp=datetime.now(tz=ZoneInfo("UTC"))
+            )
+        for filestate in filestates:
+            filestate.state = FileState.States.PROCESSING
+        self._filestate_ids.update(filestate.id for filestate in filestates)
+        return filestates
+
+    @staticmethod
+    def _summarize(parser: BaseParser) -> FileSummary:
+        try:
+            return parser.summarize()
+        except Exception as e:
+            # the file fails once it's parsed, until then it doesn't have to wait for any other file
+            logging.warning(f"Could not summarize {parser.file_name}: {e!r}")
+            return FileSummary(station_codes=set(), first_timestamp=None)
+
+    def _plan_lanes(self, filestates: list[FileState]) -> list[list[tuple[FileState, BaseParser]]]:
+        """
+        Group the files into lanes which are processed concurrently. Files sharing a station code are in the same
+        lane, applied one after another in the order of their first timestamp, so the newest value of a station
+        wins. The files whose stations the parser can't tell all share one lane.
+        """
+        files = [
+            (
+                filestate,
+                self.parser(file_path=filestate.local_path, filestate=filestate, organization=self._organization),
+            )
+            for filestate in filestates
+        ]
+        if self._workers > 1:
+            with ThreadPoolExecutor(max_workers=self._workers) as executor:
+                summaries = list(executor.map(self._summarize, [parser for _, parser in files]))
+        else:
+            summaries = [self._summarize(parser) for _, parser in files]
+
+        # union-find of the files over their station codes
+        parents = list(range(len(files)))
+
+        def find(idx: int) -> int:
+            while parents[idx] != idx:
+                parents[idx] = parents[parents[idx]]
+                idx = parents[idx]
+            return idx
+
+        first_file_of_station = {}
+        for idx, summary in enumerate(summaries):
+            station_codes = summary["station_codes"] if summary["station_codes"] is not None else {None}
+            for station_code in station_codes:
+                if station_code in first_file_of_station:
+                    parents[find(idx)] = find(first_file_of_station[station_code])
+                else:
+                    first_file_of_station[station_code] = idx
+
+        lanes = defaultdict(list)
+        for idx in range(len(files)):
+            lanes[find(idx)].append(idx)
+
+        min_timestamp = datetime.min.replace(tzinfo=ZoneInfo("UTC"))
+        ordered_lanes = []
+        for lane in lanes.values():
+            lane.sort(key=lambda idx: (summaries[idx]["first_timestamp"] or min_timestamp, files[idx][0].filename))
+            ordered_lanes.append([files[idx] for idx in lane])
+        # the longest lanes first, they bound the duration of the run
+        return sorted(ordered_lanes, key=len, reverse=True)
+
+    def _parse_files(self):
+        filestates = self._claim_files_to_process()
+        lanes = self._plan_lanes(filestates)
+        logging.info(f"Parsing {len(filestates)} files in {len(lanes)} lanes with {self._workers} worker(s)")
+        self._cnt_parsed_files = 0
+        if self._workers == 1:
+            for lane in lanes:
+                self._parse_lane(lane, len(filestates))
+            return
+
+        lanes_queue = queue.SimpleQueue()
+        for lane in lanes:
+            lanes_queue.put(lane)
+        with ThreadPoolExecutor(max_workers=self._workers) as executor:
+            futures = [
+                executor.submit(self._parse_worker, lanes_queue, len(filestates))
+                for _ in range(min(self._workers, len(lanes)))
+            ]
+            for future in futures:
+                future.result()
+
+    def _parse_worker(self, lanes_queue: queue.SimpleQueue, cnt_files: int):
+        try:
+            # the dirty days of the aggregate are refreshed once the worker is done
+            with refresh_queue.deferred():
+                while True:
+                    try:
+                        lane = lanes_queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    self._parse_lane(lane, cnt_files)
+        finally:
+            # every thread has its own database connection
+            connection.close()
+
+    def _parse_lane(self, lane: list[tuple[FileState, BaseParser]], cnt_files: int):
+        for filestate, parser in lane:
+            self._parse_file(filestate, parser)
+            with self._progress_lock:
+                self._cnt_parsed_files += 1
+                if self._cnt_parsed_files % 10 == 0:
+                    logging.info(f"Parsing file {self._cnt_parsed_files}/{cnt_files}")
+
+    @staticmethod
+    def _parse_file(filestate: FileState, parser: BaseParser):
+        """
+        Parse a file in its own transaction, holding the lock of its FileState until the records are committed
+        """
+        try:
+            with transaction.atomic():
+                # a concurrent run flagged the file as failed in the meantime, it's tried again by the next run
+                if not FileState.objects.select_for_update(skip_locked=True).filter(
+                    id=filestate.id, state=FileState.States.PROCESSING
+                ):
+                    logging.warning(f"Skipping {filestate.filename}, it's not flagged as processing anymore")
+                    return
                 parser.run()
                 filestate.state = FileState.States.PROCESSED
                 filestate.save()
-            except Exception as e:
-                logging.exception(e)
-                filestate.state = FileState.States.FAILED
-                filestate.save()
+        except Exception as e:
+            logging.exception(e)
+            FileState.objects.filter(id=filestate.id, state=FileState.States.PROCESSING).update(
+                state=FileState.States.FAILED, state_timestamp=datetime.now(tz=ZoneInfo("UTC"))
+            )
+
+    def _flag_as_failed(self, filestates: QuerySet):
+        # the files claimed by a concurrent run are left to it, whether it's parsing them right now (and holds their
+        # locks) or not yet, unless the claim is stale because that run was killed
+        filestates = filestates.exclude(
+            Q(state=FileState.States.PROCESSING)
+            & ~Q(id__in=self._filestate_ids)
+            & Q(state_timestamp__gte=datetime.now(tz=ZoneInfo("UTC")) - FILE_PROCESSING_STALE_AFTER)
+        )
+        with transaction.atomic():
+            filestate_ids = list(filestates.select_for_update(skip_locked=True).values_list("id", flat=True))
+            FileState.objects.filter(id__in=filestate_ids).update(
+                state=FileState.States.FAILED, state_timestamp=datetime.now(tz=ZoneInfo("UTC"))
+            )
 
     @property
     def flag_save_offline(self) -> bool:
@@ -150,6 +308,7 @@ class BaseIngester(ABC):
             filestate_obj.state = FileState.States.DOWNLOADED
             filestate_obj.local_path = os.path.join(self.local_dest_dir, f"{filestate_obj.filename}.gz")
             filestate_obj.save()
+            self._filestate_ids.add(filestate_obj.id)
 
         logging.info(f"Synced {len(filenames_to_mark_as_downloaded)} offline files.")
 
@@ -166,6 +325,9 @@ class BaseIngester(ABC):
             files_downloaded_chunk = self.client.get_files(remote_files_chunk, self.local_dest_dir)
 
             for remote_path, local_path in zip(remote_files_chunk, files_downloaded_chunk):
+                if local_path is None:
+                    # the download failed, the file stays DISCOVERED and is tried again by the next run
+                    continue
                 filestate_obj = FileState.objects.get(
                     remote_path=remote_path,
                     state=FileState.States.DISCOVERED,
@@ -174,6 +336,7 @@ class BaseIngester(ABC):
                 filestate_obj.state = FileState.States.DOWNLOADED
                 filestate_obj.local_path = local_path
                 filestate_obj.save()
+                self._filestate_ids.add(filestate_obj.id)
 
         logging.info(f"Downloaded {self.files_downloaded.count()} files.")
 
@@ -188,9 +351,10 @@ class BaseIngester(ABC):
             # here we don't need to run post save signals since the state is not changed, we can use .update()
             file_states_with_local_path.update(local_path="")
 
-            # in this case everything that's not PROCESSED should be FAILED
-            self.files_unprocessed.update(
-                state=FileState.States.FAILED, state_timestamp=datetime.now(tz=ZoneInfo("UTC"))
+            # in this case everything of this run that's not PROCESSED should be FAILED, the files discovered or
+            # downloaded by a concurrent run are left to it
+            self._flag_as_failed(
+                self.files_unprocessed.filter(Q(id__in=self._filestate_ids) | Q(state=FileState.States.PROCESSING))
             )
 
             self._temp_dir.cleanup()
@@ -201,9 +365,7 @@ class BaseIngester(ABC):
                 state=FileState.States.PROCESSING,
                 ingester_name=self.ingester_name,
             )
-            filtered_file_states.update(
-                state=FileState.States.FAILED, state_timestamp=datetime.now(tz=ZoneInfo("UTC"))
-            )
+            self._flag_as_failed(filtered_file_states)
 
         if self.files_failed.exists():
             logging.warning(f"Flagged {self.files_failed.count()} as failed.")
@@ -244,6 +406,7 @@ class ImomoAutoXMLIngester(BaseIngester):
                     )
                 )
         new_discovered = FileState.objects.bulk_create(new_filestate_objs)
+        self._filestate_ids.update(filestate.id for filestate in new_discovered)
         logging.info(f"Discovered {len(new_discovered)} new xml files")
 
     def run(self):
@@ -293,6 +456,7 @@ class ImomoTelegramIngester(BaseIngester):
                     )
                 )
         new_discovered = FileState.objects.bulk_create(new_filestate_objs)
+        self._filestate_ids.update(filestate.id for filestate in new_discovered)
         logging.info(f"Discovered {len(new_discovered)} new telegram files")
 
     def run(self):
@@ -5,21 +5,44 @@ import os
 import re
 import xml.etree.ElementTree as ET
 from abc import ABC, abstractmethod
+from collections.abc import Iterator
+from itertools import islice
 from types import NoneType
-from typing import TypedDict
+from typing import IO, TypedDict
 
 import zoneinfo
+from django.db import transaction
 from django.utils import timezone
 
 from sapphire_backend.ingestion.models import FileState
-from sapphire_backend.ingestion.utils.helper import get_or_create_auto_station_by_code
+from sapphire_backend.ingestion.utils.helper import AutoStationCache
 from sapphire_backend.metrics.choices import HydrologicalMeasurementType, HydrologicalMetricName, MetricUnit
 from sapphire_backend.metrics.models import HydrologicalMetric
+from sapphire_backend.metrics.timeseries.refresh import refresh_queue
 from sapphire_backend.organizations.models import Organization
 from sapphire_backend.stations.models import HydrologicalStation
 from sapphire_backend.telegrams.models import TelegramReceived
 from sapphire_backend.telegrams.parser import KN15TelegramParser
 
+# records transformed and written at once, a file is streamed through in batches of this size
+XML_PARSER_BATCH_SIZE = 5000
+# the raw file is scanned in chunks, a tag cut at the end of a chunk is matched with the overlap to the next one
+XML_SCAN_CHUNK_SIZE = 1024 * 1024
+XML_SCAN_OVERLAP = 256
+XML_STATION_ID_PATTERN = re.compile(rb'<station\b[^>]*?\bID="([^"]*)"')
+XML_REPORT_TIME_PATTERN = re.compile(rb'<report\b[^>]*?\bTIME="([^"]*)"')
+
+
+class ParserResult(TypedDict):
+    inserted: int
+    updated: int
+    skipped: int
+
+
+class FileSummary(TypedDict):
+    station_codes: set[str] | None
+    first_timestamp: datetime.datetime | None
+
 
 class MetricRecord(TypedDict):
     timestamp: datetime.datetime
@@ -48,6 +71,13 @@ class BaseParser(ABC):
         dir, file_name = os.path.split(self.file_path)
         return file_name
 
+    def summarize(self) -> FileSummary:
+        """
+        Station codes and first timestamp of the records of the file, read before it is parsed to order the files
+        of an ingestion run. None if the parser can't tell them.
+        """
+        return FileSummary(station_codes=None, first_timestamp=None)
+
     @abstractmethod
     def run(self):
         """
@@ -74,8 +104,13 @@ class XMLParser(BaseParser):
         min_value: str
         max_value: str
 
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, batch_size: int = XML_PARSER_BATCH_SIZE, **kwargs):
         super().__init__(*args, **kwargs)
+        self.batch_size = batch_size
+        self._cnt_parsed_records = 0
+        self._cnt_inserted_records = 0
+        self._cnt_updated_records = 0
+        self._station_cache = AutoStationCache(self._organization)
         self.map_xml_var_to_model_var = {
             "LW": (HydrologicalMetricName.WATER_LEVEL_DAILY, MetricUnit.WATER_LEVEL),
             "TW": (HydrologicalMetricName.WATER_TEMPERATURE, MetricUnit.TEMPERATURE),
@@ -96,12 +131,20 @@ class XMLParser(BaseParser):
 
     @property
     def count_parsed_records(self) -> int:
-        return len(self.input_records)
+        return self._cnt_parsed_records
 
     @property
     def count_skipped_records(self) -> int:
         return self._cnt_skipped_records
 
+    @property
+    def result(self) -> ParserResult:
+        return ParserResult(
+            inserted=self._cnt_inserted_records,
+            updated=self._cnt_updated_records,
+            skipped=self.count_skipped_records,
+        )
+
     @staticmethod
     def create_metric_object(record: MetricRecord) -> HydrologicalMetric:
         new_hydro_metric = HydrologicalMetric(
@@ -132,17 +175,17 @@ class XMLParser(BaseParser):
         return dt_object_utc
 
     def save(self):
-        for metric_object in self.output_metric_objects:
-            metric_object.save()
+        # one set-based upsert of the batch, a record repeated in the batch is written once
+        result = HydrologicalMetric.objects.bulk_upsert(self.output_metric_objects, batch_size=self.batch_size)
+        self._cnt_inserted_records += result["inserted"]
+        self._cnt_updated_records += result["updated"]
+        self._cnt_skipped_records += len(self.output_metric_objects) - result["inserted"] - result["updated"]
 
     def transform_record(self, record_raw: InputRecord) -> MetricRecord | NoneType:
         datetime_object = self.convert_str_to_datetime(record_raw["timestamp"])
-        # in case of a 6-digit station id, take only the first five digits
-        station_id_5digit = record_raw["station_id"][:5]
+        station_id_5digit = self.get_station_code(record_raw)
 
-        hydro_station_obj = get_or_create_auto_station_by_code(
-            station_code=station_id_5digit, organization=self._organization
-        )
+        hydro_station_obj = self._station_cache.get(station_id_5digit)
         if hydro_station_obj is None:
             self.log_unknown_stations.add(station_id_5digit)
             return
@@ -179,68 +222,114 @@ class XMLParser(BaseParser):
 
         return record_transformed
 
+    @staticmethod
+    def get_station_code(record_raw: InputRecord) -> str:
+        # in case of a 6-digit station id, take only the first five digits
+        return record_raw["station_id"][:5]
+
     def transform(self):
+        # a file covers a handful of stations, they are loaded once instead of per record
+        self._station_cache.load(self.get_station_code(record_raw) for record_raw in self.input_records)
         for record_serialized in self.input_records:
             record_transformed = self.transform_record(record_serialized)
             if record_transformed is not None:
                 new_hydro_metric = self.create_metric_object(record_transformed)
                 self.output_metric_objects.append(new_hydro_metric)
+            else:
+                self.increment_skipped()
 
-    def _read_xml_data(self) -> str:
+    def _open_xml_data(self) -> IO[bytes]:
         """
-        Read a file either raw or gzipped and return data as string
+        Open a file either raw or gzipped, a gzipped file is decompressed while it is read
         """
         filename, ext = os.path.splitext(self.file_path)
         if ext == ".gz":
-            with gzip.open(self.file_path, "rb") as f_gzipped:
-                xml_data = f_gzipped.read().decode("utf-8")
-        else:
-            with open(self.file_path) as f_raw:
-                xml_data = f_raw.read()
-        return xml_data
-
-    def extract(self, xml_data: str):
-        root = ET.fromstring(xml_data)
-        for report in root:
-            timestamp = report.attrib["TIME"]
-            for child in report:
-                if child.tag == "station":
-                    station_id = child.attrib["ID"]
-                elif child.tag == "parameter":
-                    parameter = child
-                    var_name = parameter.attrib["VAR"]
-                    sensor_type = parameter.attrib.get("SENSTYPE", "")
-                    sensor_identifier = parameter.attrib.get("SENSID", "")  # TODO so far no xml files with this
-                    if self.is_var_name_supported(var_name):
-                        for value in parameter:
-                            if value.attrib["PROC"] == "AVE":
-                                avg_value = value.text
-                            elif value.attrib["PROC"] == "MIN":
-                                min_value = value.text
-                            elif value.attrib["PROC"] == "MAX":
-                                max_value = value.text
-
-                        new_record = self.InputRecord(
-                            timestamp=timestamp,
-                            station_id=station_id,
-                            var_name=var_name,
-                            sensor_type=sensor_type,
-                            sensor_identifier=sensor_identifier,
-                            avg_value=avg_value,
-                            min_value=min_value,
-                            max_value=max_value,
-                        )
-                        self.input_records.append(new_record)
-                    else:
-                        self.increment_skipped()
-                        self.log_unsupported_variables.add(var_name)
+            return gzip.open(self.file_path, "rb")
+        return open(self.file_path, "rb")
+
+    def summarize(self) -> FileSummary:
+        """
+        Scan the raw file for the station codes and the time of the first report, without parsing the XML
+        """
+        station_codes = set()
+        first_timestamp = None
+        tail = b""
+        with self._open_xml_data() as xml_file:
+            while chunk := xml_file.read(XML_SCAN_CHUNK_SIZE):
+                data = tail + chunk
+                # in case of a 6-digit station id, take only the first five digits
+                station_codes.update(station_id[:5].decode() for station_id in XML_STATION_ID_PATTERN.findall(data))
+                if first_timestamp is None and (match := XML_REPORT_TIME_PATTERN.search(data)):
+                    first_timestamp = self.convert_str_to_datetime(match.group(1).decode())
+                tail = data[-XML_SCAN_OVERLAP:]
+        return FileSummary(station_codes=station_codes, first_timestamp=first_timestamp)
+
+    def extract(self) -> Iterator[InputRecord]:
+        """
+        Stream the records of the file. Every report is parsed once its closing tag is read and cleared after its
+        records are yielded, so the memory doesn't grow with the size of the file.
+        """
+        with self._open_xml_data() as xml_file:
+            depth = 0
+            root = None
+            for event, element in ET.iterparse(xml_file, events=("start", "end")):
+                if event == "start":
+                    if root is None:
+                        root = element
+                    depth += 1
+                    continue
+                depth -= 1
+                # only the reports, the children of the root, are processed, once they are complete
+                if depth != 1:
+                    continue
+
+                report = element
+                timestamp = report.attrib["TIME"]
+                for child in report:
+                    if child.tag == "station":
+                        station_id = child.attrib["ID"]
+                    elif child.tag == "parameter":
+                        parameter = child
+                        var_name = parameter.attrib["VAR"]
+                        sensor_type = parameter.attrib.get("SENSTYPE", "")
+                        sensor_identifier = parameter.attrib.get("SENSID", "")  # TODO so far no xml files with this
+                        if self.is_var_name_supported(var_name):
+                            for value in parameter:
+                                if value.attrib["PROC"] == "AVE":
+                                    avg_value = value.text
+                                elif value.attrib["PROC"] == "MIN":
+                                    min_value = value.text
+                                elif value.attrib["PROC"] == "MAX":
+                                    max_value = value.text
+
+                            self._cnt_parsed_records += 1
+                            yield self.InputRecord(
+                                timestamp=timestamp,
+                                station_id=station_id,
+                                var_name=var_name,
+                                sensor_type=sensor_type,
+                                sensor_identifier=sensor_identifier,
+                                avg_value=avg_value,
+                                min_value=min_value,
+                                max_value=max_value,
+                            )
+                        else:
+                            self.increment_skipped()
+                            self.log_unsupported_variables.add(var_name)
+                # drop the processed reports, the root keeps a reference to every child
+                root.clear()
 
     def run(self):
         logging.info(f"Begin parsing {self.file_name}")
-        xml_data = self._read_xml_data()
-        self.extract(xml_data)
-        self.transform()
-        self.save()
+        records = self.extract()
+        # a file is written in one transaction, the dirty days of the aggregate are refreshed once it commits
+        with refresh_queue.deferred(), transaction.atomic():
+            while batch := list(islice(records, self.batch_size)):
+                self._input_records = batch
+                self.transform()
+                self.save()
+                self.output_metric_objects.clear()
+        self._input_records = []
         self.post_run()
         logging.info(f"Done parsing {self.file_name}")
 
@@ -248,7 +337,10 @@ class XMLParser(BaseParser):
         """
         Logging processed and skipped records number.
         """
-        logging.info(f"Imported {self.count_parsed_records} records")
+        logging.info(
+            f"Imported {self.count_parsed_records} records, {self.result['inserted']} inserted "
+            f"and {self.result['updated']} updated"
+        )
         if len(self.log_unknown_stations) > 0:
             logging.error(f"Unknown stations: {self.log_unknown_stations}")
         if len(self.log_unsupported_variables) > 0:
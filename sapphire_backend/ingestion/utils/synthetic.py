@@ -0,0 +1,44 @@
+import gzip
+from datetime import datetime, timedelta
+
+
+def render_report(timestamp: datetime, station_code: str, idx: int) -> str:
+    """
+    A report of an automatic station in the IMOMO XML format: water level, water and air temperature and an
+    unsupported variable, every one with its average, minimum and maximum
+    """
+    water_level = 200 + idx % 50
+    values = [
+        ("LW", "PLS", water_level, water_level - 1.5, water_level + 1.5),
+        ("TW", "PT100", 5 + idx % 7, 4.8 + idx % 7, 5.2 + idx % 7),
+        ("TA", "PT100", -3 + idx % 11, -3.4 + idx % 11, -2.6 + idx % 11),
+        ("HU", "HYG", 60 + idx % 30, 58 + idx % 30, 62 + idx % 30),
+    ]
+    parameters = "".join(
+        f'    <parameter VAR="{var_name}" SENSTYPE="{sensor_type}">\n'
+        f'      <value PROC="AVE">{avg_value:.1f}</value>\n'
+        f'      <value PROC="MIN">{min_value:.1f}</value>\n'
+        f'      <value PROC="MAX">{max_value:.1f}</value>\n'
+        "    </parameter>\n"
+        for var_name, sensor_type, avg_value, min_value, max_value in values
+    )
+    return (
+        f'  <report TIME="{timestamp.strftime("%d-%m-%YT%H:%M:%SZ")}">\n'
+        f'    <station ID="{station_code}"/>\n'
+        f"{parameters}"
+        "  </report>\n"
+    )
+
+
+def write_synthetic_xml(file_path: str, station_codes: list[str], reports: int, start: datetime) -> None:
+    """
+    Write an XML file (gzipped if the path ends with .gz) with the given number of reports, the stations take
+    turns every 10 minutes from the start
+    """
+    open_file = gzip.open if file_path.endswith(".gz") else open
+    with open_file(file_path, "wt", encoding="utf-8") as xml_file:
+        xml_file.write('<?xml version="1.0" encoding="UTF-8"?>\n<reports>\n')
+        for idx in range(reports):
+            timestamp = start + timedelta(minutes=10 * (idx // len(station_codes)))
+            xml_file.write(render_report(timestamp, station_codes[idx % len(station_codes)], idx))
+        xml_file.write("</reports>\n")
@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import HydrologicalMetric, HydrologicalNorm, MeteorologicalMetric, MeteorologicalNorm
+from .models import BulkDataExportJob, HydrologicalMetric, HydrologicalNorm, MeteorologicalMetric, MeteorologicalNorm
 
 
 @admin.register(HydrologicalMetric)
@@ -25,3 +25,10 @@ class HydrologicalNormAdmin(admin.ModelAdmin):
 class MeteorologicalNormAdmin(admin.ModelAdmin):
     list_display = ["station", "value", "ordinal_number", "norm_type", "norm_metric"]
     list_filter = ["norm_type", "norm_metric"]
+
+
+@admin.register(BulkDataExportJob)
+class BulkDataExportJobAdmin(admin.ModelAdmin):
+    list_display = ["uuid", "organization", "status", "sheets_done", "rows_written", "created_date", "finished_date"]
+    list_filter = ["status"]
+    readonly_fields = ["uuid", "parameters_hash", "created_date", "last_modified"]
@@ -1,18 +1,20 @@
 import io
 import math
 import os
+import tempfile
 from collections import defaultdict
 from datetime import datetime as dt
 from typing import Any
 
+import numpy as np
 import pandas as pd
 from dateutil.relativedelta import relativedelta
 from django.conf import settings
 from django.core.exceptions import PermissionDenied
-from django.db import transaction
+from django.db import connection, transaction
 from django.db.models import Avg, Case, Count, DecimalField, Max, Min, QuerySet, Sum, Value, When
 from django.db.models.functions import Round
-from django.http import FileResponse
+from django.http import FileResponse, StreamingHttpResponse
 from django.templatetags.static import static
 from ninja import File, Query
 from ninja.errors import ValidationError
@@ -20,6 +22,7 @@ from ninja.files import UploadedFile
 from ninja_extra import api_controller, route
 from ninja_extra.pagination import PageNumberPaginationExtra, paginate
 from ninja_jwt.authentication import JWTAuth
+from openpyxl import Workbook
 from zoneinfo import ZoneInfo
 
 from sapphire_backend.estimations.models import DischargeCalculationPeriod
@@ -48,6 +51,7 @@ from ..estimations.models import (
     HydrologicalNormVirtual,
 )
 from .choices import (
+    BulkDataExportStatus,
     HydrologicalMeasurementType,
     HydrologicalMetricName,
     HydrologicalNormMetric,
@@ -56,14 +60,22 @@ from .choices import (
     MeteorologicalNormMetric,
     MetricUnit,
     NormType,
+    TimeseriesResolution,
 )
-from .models import HydrologicalMetric, HydrologicalNorm, MeteorologicalMetric, MeteorologicalNorm
+from .exceptions import SDKDataError
+from .models import BulkDataExportJob, HydrologicalMetric, HydrologicalNorm, MeteorologicalMetric, MeteorologicalNorm
 from .schema import (
     BulkDataDownloadInputSchema,
+    BulkDataExportJobOutputSchema,
+    ChartBatchQueryParams,
+    ChartQueryParams,
     DetailedDailyHydroMetricFilterSchema,
     DetailedDailyHydroMetricSchema,
     DisplayType,
+    ExportFormat,
+    ExportFormatQueryParams,
     HFChartSchema,
+    HFChartSeriesSchema,
     HydrologicalMetricOutputSchema,
     HydrologicalNormMetricFiltersSchema,
     HydrologicalNormOutputSchema,
@@ -87,6 +99,8 @@ from .schema import (
     OperationalJournalDischargeDataSchema,
     OrderQueryParamSchema,
     PaginatedSDKOutputSchema,
+    SDKCursorOutputSchema,
+    SDKCursorQueryParams,
     SDKDataFiltersSchema,
     TimeBucketQueryParams,
     TimestampGroupedHydroMetricSchema,
@@ -94,14 +108,18 @@ from .schema import (
     UpdateHydrologicalMetricSchema,
     ViewType,
 )
+from .timeseries.downsampling import downsample_min_max
 from .timeseries.query import TimeseriesQueryManager
 from .utils.bulk_data import (
-    write_bulk_data_hydro_auto_sheets,
-    write_bulk_data_hydro_manual_sheets,
-    write_bulk_data_meteo_sheets,
-    write_bulk_data_virtual_sheets,
+    BULK_DATA_EXPORT_FRESHNESS,
+    BULK_DATA_FILENAME,
+    get_bulk_data_parameters,
+    get_bulk_data_parameters_hash,
+    write_bulk_data_workbook,
 )
+from .utils.export import HYDRO_METRIC_EXPORT_FIELDS, aiter_export, iter_queryset_export
 from .utils.helpers import (
+    METRIC_UNITS,
     HydrologicalYearResolver,
     OperationalJournalDataTransformer,
     OperationalJournalVirtualDataTransformer,
@@ -144,15 +162,15 @@ class HydroMetricsAPIController:
         filter_dict: dict,
         order_param: str,
         order_direction: str,
+        resolution: TimeseriesResolution | None = TimeseriesResolution.RAW,
     ) -> QuerySet:
-        """Get the appropriate queryset based on view type and display type."""
-
-        if view_type == ViewType.MEASUREMENTS:
-            self._validate_datetime_range(filter_dict, allowed_days=30)  # 30 days for raw data
-        else:  # ViewType.DAILY
-            self._validate_datetime_range(filter_dict, allowed_days=365)  # 365 days for daily data
+        """
+        Get the appropriate queryset based on view type and display type. Measurements are read at the given
+        resolution, or at the one the query router picks for the date range if it is None.
+        """
 
         if view_type == "daily":
+            self._validate_datetime_range(filter_dict, allowed_days=365)  # 365 days for daily data
             model_mapping = {
                 HydrologicalMetricName.WATER_LEVEL_DAILY_AVERAGE: EstimationsWaterLevelDailyAverage,
                 HydrologicalMetricName.WATER_DISCHARGE_DAILY: EstimationsWaterDischargeDaily,
@@ -177,12 +195,17 @@ class HydroMetricsAPIController:
             qs = queries[0].union(*queries[1:]) if len(queries) > 1 else queries[0]
             return qs.order_by(f"{'-' if order_direction.lower() == 'desc' else ''}{order_param}")
 
-        # For raw/grouped views
-        return (
-            HydrologicalMetric.objects.select_related("station")
-            .filter(**filter_dict)
-            .order_by(f"{'-' if order_direction.lower() == 'desc' else ''}{order_param}")
+        # For raw/grouped views, up to 30 days of raw data or a few years of the hourly aggregate
+        query_manager = TimeseriesQueryManager(
+            model=HydrologicalMetric,
+            filter_dict=filter_dict,
+            order_param=order_param,
+            order_direction=order_direction.upper(),
         )
+        try:
+            return query_manager.execute_routed_query(resolution).select_related("station")
+        except ValueError as e:
+            raise ValidationError(str(e))
 
     def _prepare_annotations(self, filter_dict: dict) -> dict:
         """Prepare annotations for grouped views."""
@@ -261,6 +284,7 @@ class HydroMetricsAPIController:
         organization_uuid: str,
         view_type: MetricViewTypeSchema,
         filters: Query[HydroMetricFilterSchema] = None,
+        chart: Query[ChartQueryParams] = None,
     ):
         filter_dict = filters.dict(exclude_none=True)
         filter_dict["station__site__organization"] = organization_uuid
@@ -270,6 +294,7 @@ class HydroMetricsAPIController:
             filter_dict=filter_dict,
             order_param="timestamp_local",
             order_direction="ASC",
+            resolution=chart.resolution,
         )
 
         if view_type.view_type == ViewType.DAILY:
@@ -278,17 +303,90 @@ class HydroMetricsAPIController:
             for record in qs:
                 results[record.timestamp_local][record.metric_name] = record.avg_value
 
-            return [HFChartSchema(timestamp_local=ts, **values) for ts, values in results.items()]
+            points = list(results.items())
         else:
             annotations = self._prepare_annotations(filter_dict)
-            return [
-                HFChartSchema(
-                    timestamp_local=record["timestamp_local"],
-                    **{k: v for k, v in record.items() if k != "timestamp_local"},
-                )
+            points = [
+                (record["timestamp_local"], {k: v for k, v in record.items() if k != "timestamp_local"})
                 for record in qs.values("timestamp_local").annotate(**annotations)
             ]
 
+        if chart.max_points:
+            values = np.array([HFChartSchema.resolve_y(values) for _, values in points], dtype=float)
+            points = [points[idx] for idx in downsample_min_max(values, chart.max_points)]
+
+        return [HFChartSchema(timestamp_local=ts, **values) for ts, values in points]
+
+    @route.get("{view_type}/chart/batch", response={200: list[HFChartSeriesSchema]})
+    def get_hydro_metrics_chart_batch(
+        self,
+        organization_uuid: str,
+        view_type: MetricViewTypeSchema,
+        chart: Query[ChartBatchQueryParams],
+        filters: Query[HydroMetricFilterSchema] = None,
+    ):
+        """
+        Chart series of several stations for dashboards, one per station and metric in the requested order. The
+        stations are checked against the organization with a single query and every source is read once for all.
+        """
+        if not filters.metric_name__in:
+            raise ValidationError("metric_name__in is required for the chart of several stations")
+
+        station_ids = dict(
+            HydrologicalStation.objects.filter(
+                uuid__in=chart.station_uuids, site__organization=organization_uuid
+            ).values_list("uuid", "id")
+        )
+        if len(station_ids) != len(set(chart.station_uuids)):
+            raise PermissionDenied("The provided station UUIDs do not belong to the organization.")
+
+        filter_dict = filters.dict(
+            exclude_none=True, exclude={"station", "station__in", "station__station_code", "station__station_code__in"}
+        )
+        filter_dict["station__in"] = list(station_ids.values())
+
+        qs = self._get_queryset(
+            view_type=view_type.view_type,
+            filter_dict=filter_dict,
+            order_param="timestamp_local",
+            order_direction="ASC",
+            resolution=chart.resolution,
+        )
+
+        if view_type.view_type == ViewType.DAILY:
+            records = (
+                (record.station_id, record.metric_name, record.timestamp_local, record.avg_value) for record in qs
+            )
+        else:
+            records = qs.values_list("station_id", "metric_name", "timestamp_local").annotate(
+                value=Max(Round("avg_value", precision=1))
+            )
+
+        series = {
+            (station_uuid, metric_name): []
+            for station_uuid in dict.fromkeys(chart.station_uuids)
+            for metric_name in dict.fromkeys(filters.metric_name__in)
+        }
+        station_uuids = {station_id: station_uuid for station_uuid, station_id in station_ids.items()}
+        for station_id, metric_name, timestamp_local, value in records:
+            if value is not None:
+                series[(station_uuids[station_id], metric_name)].append((timestamp_local, value))
+
+        response = []
+        for (station_uuid, metric_name), points in series.items():
+            if chart.max_points:
+                values = np.array([value for _, value in points], dtype=float)
+                points = [points[idx] for idx in downsample_min_max(values, chart.max_points)]
+            response.append(
+                {
+                    "station_uuid": station_uuid,
+                    "metric_name": metric_name,
+                    "unit": METRIC_UNITS.get(metric_name, ""),
+                    "data": [{"timestamp_local": ts, "y": value} for ts, value in points],
+                }
+            )
+        return response
+
     @route.get("{view_type}/{display_type}")
     @paginate(PageNumberPaginationExtra, page_size=100, max_page_size=101)
     def get_hydro_metrics(
@@ -333,6 +431,29 @@ class HydroMetricsAPIController:
 
             return [HydrologicalMetricOutputSchema(**record) for record in qs.values(*fields_to_retrieve)]
 
+    @route.get("export")
+    def export_hydro_metrics(
+        self,
+        organization_uuid: str,
+        export: Query[ExportFormatQueryParams],
+        filters: Query[HydroMetricFilterSchema] = None,
+    ):
+        """
+        Stream the raw hydro metrics as NDJSON or CSV, without the date range limits of the paginated views.
+        """
+        filter_dict = filters.dict(exclude_none=True)
+        filter_dict["station__site__organization"] = organization_uuid
+        queryset = HydrologicalMetric.objects.filter(**filter_dict).order_by("timestamp_local", "station_id")
+
+        export_format = export.export_format
+        chunks = iter_queryset_export(queryset, HYDRO_METRIC_EXPORT_FIELDS, export_format)
+        response = StreamingHttpResponse(
+            aiter_export(chunks),
+            content_type="text/csv" if export_format == ExportFormat.CSV else "application/x-ndjson",
+        )
+        response["Content-Disposition"] = f'attachment; filename="hydro-metrics.{export_format.value}"'
+        return response
+
     @route.get("detailed-daily", response={200: list[DetailedDailyHydroMetricSchema]})
     def get_detailed_daily_hydro_metrics(
         self,
@@ -497,6 +618,34 @@ class SDKDataValuesAPIController:
 
         return data
 
+    @route.get("{organization_uuid}/cursor", response={200: SDKCursorOutputSchema, 400: Message})
+    def get_sdk_data_page(
+        self,
+        organization_uuid: str,
+        filters: Query[SDKDataFiltersSchema],
+        page: Query[SDKCursorQueryParams],
+    ):
+        """
+        Get a keyset page of SDK data values for the specified organization and filters.
+
+        Args:
+            organization_uuid (str): The UUID of the organization.
+            filters (Query[SDKDataFiltersSchema]): The filters to apply.
+            page (Query[SDKCursorQueryParams]): The cursor of the previous page and the maximum number of values.
+
+        Returns:
+            SDKCursorOutputSchema: The values of the page and the cursor of the next page.
+        """
+        organization = Organization.objects.get(uuid=organization_uuid)
+
+        filters_dict = filters.dict(exclude_none=True)
+        try:
+            # the filters are validated by the helper
+            sdk_helper = SDKDataHelper(organization, filters_dict)
+            return sdk_helper.get_page(page.cursor, page.limit)
+        except SDKDataError as e:
+            return 400, {"detail": e.message, "code": "sdk_data_error"}
+
 
 @api_controller(
     "metrics/{organization_uuid}/meteo",
@@ -579,7 +728,6 @@ class MeteoMetricsAPIController:
             value_type=MeteorologicalMeasurementType.MANUAL,
             unit=MetricUnit.PRECIPITATION,
         )
-        precipitation_metric.save()
         air_temperature_metric = MeteorologicalMetric(
             value=meteo_data.temperature,
             timestamp_local=ts,
@@ -590,7 +738,7 @@ class MeteoMetricsAPIController:
             value_type=MeteorologicalMeasurementType.MANUAL,
             unit=MetricUnit.TEMPERATURE,
         )
-        air_temperature_metric.save()
+        MeteorologicalMetric.objects.bulk_upsert([precipitation_metric, air_temperature_metric])
 
         return 201, [precipitation_metric, air_temperature_metric]
 
@@ -1027,45 +1175,76 @@ class OperationalJournalAPIController:
     "bulk-data/{organization_uuid}", tags=["Bulk data download"], auth=JWTAuth(), permissions=regular_permissions
 )
 class BulkDataAPIController:
-    @route.post("download")
-    def download_bulk_data(self, request, organization_uuid: str, payload: BulkDataDownloadInputSchema):
-        all = False
-        if (
-            len(
-                payload.hydro_station_manual_uuids
-                + payload.hydro_station_auto_uuids
-                + payload.meteo_station_uuids
-                + payload.virtual_station_uuids
-            )
-            == 0
-        ):
-            all = True
-        else:
-            hydro_station_uuids = payload.hydro_station_manual_uuids + payload.hydro_station_auto_uuids
+    @staticmethod
+    def _get_station_parameters(organization_uuid: str, payload: BulkDataDownloadInputSchema) -> dict[str, list[str]]:
+        parameters = get_bulk_data_parameters(**payload.dict())
+        # no selected stations means all the organization's stations
+        if any(parameters.values()):
+            hydro_station_uuids = parameters["hydro_station_manual_uuids"] + parameters["hydro_station_auto_uuids"]
             if (
                 not hydro_station_uuids_belong_to_organization_uuid(hydro_station_uuids, organization_uuid)
-                and meteo_station_uuids_belong_to_organization_uuid(payload.meteo_station_uuids, organization_uuid)
-                and virtual_station_uuids_belong_to_organization_uuid(payload.virtual_station_uuids, organization_uuid)
+                and meteo_station_uuids_belong_to_organization_uuid(
+                    parameters["meteo_station_uuids"], organization_uuid
+                )
+                and virtual_station_uuids_belong_to_organization_uuid(
+                    parameters["virtual_station_uuids"], organization_uuid
+                )
             ):
                 raise PermissionDenied("The provided station UUIDs do not belong to the organization.")
+        return parameters
 
-        buffer = io.BytesIO()
-        with pd.ExcelWriter(buffer, engine="openpyxl") as writer:
-            write_bulk_data_hydro_manual_sheets(
-                writer=writer, station_uuids=payload.hydro_station_manual_uuids, org_uuid=organization_uuid, all=all
-            )
-            write_bulk_data_meteo_sheets(
-                writer=writer, station_uuids=payload.meteo_station_uuids, org_uuid=organization_uuid, all=all
-            )
-            write_bulk_data_virtual_sheets(
-                writer=writer, station_uuids=payload.virtual_station_uuids, org_uuid=organization_uuid, all=all
+    @route.post("download")
+    def download_bulk_data(self, request, organization_uuid: str, payload: BulkDataDownloadInputSchema):
+        parameters = self._get_station_parameters(organization_uuid, payload)
+
+        # the write-only workbook spools the sheets to temporary files and is saved to one as well
+        workbook = Workbook(write_only=True)
+        write_bulk_data_workbook(workbook, organization_uuid, **parameters)
+
+        output = tempfile.TemporaryFile()
+        workbook.save(output)
+        output.seek(0)
+        response = FileResponse(output, as_attachment=True, filename=BULK_DATA_FILENAME)
+
+        return response
+
+    @route.post("exports", response={200: BulkDataExportJobOutputSchema, 201: BulkDataExportJobOutputSchema})
+    def create_bulk_data_export(self, request, organization_uuid: str, payload: BulkDataDownloadInputSchema):
+        parameters = self._get_station_parameters(organization_uuid, payload)
+        parameters_hash = get_bulk_data_parameters_hash(organization_uuid, parameters)
+
+        with transaction.atomic():
+            # identical submissions wait for each other until the transaction ends, so only one job is created
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", [parameters_hash])
+            job = (
+                BulkDataExportJob.objects.fresh(organization_uuid, parameters_hash, BULK_DATA_EXPORT_FRESHNESS)
+                .order_by("-created_date")
+                .first()
             )
-            write_bulk_data_hydro_auto_sheets(
-                writer=writer, station_uuids=payload.hydro_station_auto_uuids, org_uuid=organization_uuid, all=all
+            if job is not None:
+                return 200, job
+
+            job = BulkDataExportJob.objects.create(
+                organization_id=organization_uuid,
+                user=request.user,
+                parameters=parameters,
+                parameters_hash=parameters_hash,
             )
+        return 201, job
 
-        output_filename = "bulk-data.xlsx"
-        buffer.seek(0)
-        response = FileResponse(buffer, as_attachment=True, filename=output_filename)
+    @route.get("exports/{job_uuid}", response={200: BulkDataExportJobOutputSchema})
+    def get_bulk_data_export(self, request, organization_uuid: str, job_uuid: str):
+        return BulkDataExportJob.objects.for_organization(organization_uuid).get(uuid=job_uuid)
 
-        return response
+    @route.get("exports/{job_uuid}/download", response={200: None, 404: Message})
+    def download_bulk_data_export(self, request, organization_uuid: str, job_uuid: str):
+        job = BulkDataExportJob.objects.for_organization(organization_uuid).get(uuid=job_uuid)
+        if job.status != BulkDataExportStatus.DONE:
+            return 404, {"detail": "The export is not finished", "code": "export_not_finished"}
+
+        try:
+            file = job.file.open("rb")
+        except FileNotFoundError:
+            return 404, {"detail": "Could not retrieve the file", "code": "file_not_found"}
+        return FileResponse(file, as_attachment=True, filename=BULK_DATA_FILENAME)
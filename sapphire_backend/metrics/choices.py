@@ -70,3 +70,15 @@ class HydrologicalNormMetric(models.TextChoices):
 class MeteorologicalNormMetric(models.TextChoices):
     PRECIPITATION = "precipitation", _("Precipitation")
     TEMPERATURE = "temperature", _("Temperature")
+
+
+class BulkDataExportStatus(models.TextChoices):
+    QUEUED = "queued", _("Queued")
+    RUNNING = "running", _("Running")
+    DONE = "done", _("Done")
+    FAILED = "failed", _("Failed")
+
+
+class TimeseriesResolution(models.TextChoices):
+    RAW = "raw", _("Raw")
+    HOURLY = "hourly", _("Hourly")
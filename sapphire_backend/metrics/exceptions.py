@@ -67,3 +67,9 @@ class SDKDataError(Exception):
         self.message = message
         logger.error(f"{message}")
         super().__init__(f"{message}")
+
+
+class BulkDataExportJobReclaimed(Exception):
+    """
+    Raised when a running bulk data export job was claimed again by another worker, which now owns its result.
+    """
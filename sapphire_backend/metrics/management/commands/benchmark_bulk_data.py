@@ -0,0 +1,149 @@
+import io
+import math
+import statistics
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from openpyxl import Workbook
+
+from sapphire_backend.metrics.models import BulkDataHydroManual
+from sapphire_backend.metrics.utils.bulk_data import (
+    transform_code_value_columns,
+    transform_decimal_columns,
+    transform_timestamp_local_format,
+    write_bulk_data_hydro_manual_sheets,
+)
+from sapphire_backend.organizations.models import Organization
+from sapphire_backend.stations.models import HydrologicalStation
+
+CODE_VALUE_COLUMNS = ["ice_phenomena", "precipitation_daily"]
+DECIMAL_COLUMNS = [
+    field.name
+    for field in BulkDataHydroManual._meta.concrete_fields
+    if field.name not in ["id", "station", "timestamp_local", *CODE_VALUE_COLUMNS]
+]
+DF_COLUMNS = ["station", "timestamp_local", *DECIMAL_COLUMNS, *CODE_VALUE_COLUMNS]
+
+
+def write_with_data_frame(station_codes: dict[int, str]) -> int:
+    # previous behaviour, the whole selection in one data frame written through pandas into memory
+    buffer = io.BytesIO()
+    with pd.ExcelWriter(buffer, engine="openpyxl") as writer:
+        queryset = (
+            BulkDataHydroManual.objects.filter(station_id__in=list(station_codes))
+            .values_list(*DF_COLUMNS)
+            .order_by("timestamp_local")
+        )
+        df = pd.DataFrame.from_records(queryset, columns=DF_COLUMNS)
+        df = transform_timestamp_local_format(df)
+        df = transform_decimal_columns(df, decimal_columns=DECIMAL_COLUMNS)
+        df = transform_code_value_columns(df, columns=CODE_VALUE_COLUMNS)
+        for station, group in df.groupby("station"):
+            group.drop(columns=["station"]).to_excel(
+                writer, sheet_name=f"{station_codes[station]} (manual)", index=False
+            )
+    return buffer.getbuffer().nbytes
+
+
+def write_streaming(station_uuids: list[str], org_uuid: str) -> int:
+    workbook = Workbook(write_only=True)
+    write_bulk_data_hydro_manual_sheets(workbook, station_uuids, org_uuid)
+    with tempfile.TemporaryFile() as output:
+        workbook.save(output)
+        return output.tell()
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the manual hydro sheets of the bulk data download for synthetic station-years, once building "
+        "the workbook from one data frame in memory (previous behaviour) and once streaming it in chunks to a "
+        "temporary file. The synthetic data is rolled back after every size."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--organization_uuid", type=str, required=True, help="UUID of the organization whose stations are used"
+        )
+        parser.add_argument(
+            "--station_years", type=int, nargs="+", default=[10, 100, 500], help="Sizes of the downloads"
+        )
+        parser.add_argument("--years", type=int, default=10, help="Number of years of data per station")
+        parser.add_argument("--repeats", type=int, default=3, help="Number of timed runs per variant")
+
+    @staticmethod
+    def _insert_synthetic_data(station_ids: list[int], years: int):
+        # morning and evening water levels, air and water temperatures in the morning
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                INSERT INTO metrics_hydrologicalmetric (
+                    timestamp_local, timestamp, avg_value, min_value, max_value, unit, value_type, metric_name,
+                    sensor_identifier, sensor_type, station_id, value_code, source_type, source_id
+                )
+                SELECT ts, ts - INTERVAL '6 hours', (random() * 300)::numeric(15, 5), NULL, NULL, metric.unit, 'M',
+                    metric.name, '', '', station_id, NULL, 'IN', 0
+                FROM unnest(%s::int[]) AS station_id
+                CROSS JOIN (VALUES ('WLD', 'cm', '12 hours'), ('ATO', 'degC', '1 day'), ('WTO', 'degC', '1 day'))
+                    AS metric (name, unit, step)
+                CROSS JOIN LATERAL generate_series(
+                    '1950-01-01 08:00'::timestamptz,
+                    '1950-01-01 08:00'::timestamptz + make_interval(years => %s) - INTERVAL '1 second',
+                    metric.step::interval
+                ) AS ts
+                """,
+                [station_ids, years],
+            )
+
+    def _measure(self, label: str, func, repeats: int, *args):
+        durations_ms = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            func(*args)
+            durations_ms.append((time.perf_counter() - start) * 1000)
+
+        tracemalloc.start()
+        size = func(*args)
+        _, peak_memory = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        self.stdout.write(
+            f"  {label:<12} median {statistics.median(durations_ms):>10.1f} ms"
+            f"  peak memory {peak_memory / 1024 / 1024:>8.1f} MiB  file {size / 1024 / 1024:>7.1f} MiB"
+        )
+
+    def handle(self, *args, **options):
+        try:
+            organization = Organization.objects.get(uuid=options["organization_uuid"])
+        except Organization.DoesNotExist:
+            raise CommandError(f"Organization with UUID {options['organization_uuid']} does not exist")
+        if min(*options["station_years"], options["years"], options["repeats"]) < 1:
+            raise CommandError("Station-years, years and repeats must be positive integers")
+
+        stations = list(
+            HydrologicalStation.objects.filter(
+                site__organization=organization, station_type=HydrologicalStation.StationType.MANUAL
+            )
+            .order_by("id")
+            .values_list("id", "uuid", "station_code")
+        )
+        for station_years in options["station_years"]:
+            stations_count = math.ceil(station_years / options["years"])
+            if stations_count > len(stations):
+                raise CommandError(
+                    f"{station_years} station-years need {stations_count} manual hydro stations, "
+                    f"the organization has {len(stations)}"
+                )
+            selected = stations[:stations_count]
+            station_codes = {station_id: station_code for station_id, _, station_code in selected}
+            station_uuids = [str(station_uuid) for _, station_uuid, _ in selected]
+
+            with transaction.atomic():
+                self._insert_synthetic_data(list(station_codes), options["years"])
+                self.stdout.write(f"{station_years} station-years, {stations_count} stations")
+                self._measure("data frame", write_with_data_frame, options["repeats"], station_codes)
+                self._measure("streaming", write_streaming, options["repeats"], station_uuids, str(organization.uuid))
+                transaction.set_rollback(True)
@@ -0,0 +1,93 @@
+import random
+import statistics
+import time
+from decimal import Decimal
+
+import pandas as pd
+from django.core.management.base import BaseCommand, CommandError
+
+from sapphire_backend.metrics.utils.bulk_data import transform_code_value_columns, transform_decimal_columns
+
+DECIMAL_COLUMNS = ["water_level_daily", "discharge_daily", "air_temperature", "water_temperature"]
+CODE_VALUE_COLUMNS = ["ice_phenomena", "precipitation_daily"]
+
+
+def transform_decimal_columns_per_cell(df: pd.DataFrame, decimal_columns: list[str]) -> pd.DataFrame:
+    # previous behaviour
+    for col in decimal_columns:
+        df[col] = df[col].apply(lambda x: float(x) if x is not None else "")
+
+    return df
+
+
+def transform_code_value_columns_per_cell(df: pd.DataFrame, columns: list[str]) -> pd.DataFrame:
+    # previous behaviour
+    def remove_trailing_zeros(number_str: str):
+        code, value = number_str.split(":")
+        if "." in value:
+            value = value.rstrip("0").rstrip(".")
+        return f"{code}:{value}"
+
+    for col in columns:
+        df[col] = df[col].apply(lambda x: remove_trailing_zeros(x) if x is not None else "")
+
+    return df
+
+
+def build_frame(rows: int, rng: random.Random) -> pd.DataFrame:
+    """
+    Synthetic chunk shaped like the bulk views return it, roughly a third of the values missing
+    """
+    decimals = [None] + [Decimal(value) / 1000 for value in rng.sample(range(-50000, 500000), 1000)]
+    code_values = [None, None] + [f"{rng.randint(1, 30)}:{rng.randint(0, 99999) / 1000:.5f}" for _ in range(200)]
+    data = {col: [rng.choice(decimals) for _ in range(rows)] for col in DECIMAL_COLUMNS}
+    data.update({col: [rng.choice(code_values) for _ in range(rows)] for col in CODE_VALUE_COLUMNS})
+    return pd.DataFrame(data)
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the cell formatting of the bulk data sheets on a synthetic frame, once formatting every cell with "
+        "DataFrame.apply (previous behaviour) and once column-wise"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1_000_000, help="Number of rows of the synthetic frame")
+        parser.add_argument("--repeats", type=int, default=3, help="Number of timed runs per variant")
+
+    @staticmethod
+    def _format_per_cell(df: pd.DataFrame) -> pd.DataFrame:
+        df = transform_decimal_columns_per_cell(df, decimal_columns=DECIMAL_COLUMNS)
+        return transform_code_value_columns_per_cell(df, columns=CODE_VALUE_COLUMNS)
+
+    @staticmethod
+    def _format_vectorized(df: pd.DataFrame) -> pd.DataFrame:
+        df = transform_decimal_columns(df, decimal_columns=DECIMAL_COLUMNS)
+        return transform_code_value_columns(df, columns=CODE_VALUE_COLUMNS)
+
+    def _time(self, repeats: int, func, df: pd.DataFrame) -> tuple[float, pd.DataFrame]:
+        durations = []
+        for _ in range(repeats):
+            frame = df.copy()
+            start = time.perf_counter()
+            frame = func(frame)
+            durations.append((time.perf_counter() - start) * 1000)
+        return statistics.median(durations), frame
+
+    def handle(self, *args, **options):
+        if options["rows"] < 1 or options["repeats"] < 1:
+            raise CommandError("Number of rows and repeats must be positive integers")
+
+        df = build_frame(options["rows"], random.Random(2020))
+        per_cell_ms, per_cell = self._time(options["repeats"], self._format_per_cell, df)
+        vectorized_ms, vectorized = self._time(options["repeats"], self._format_vectorized, df)
+
+        # the cells are compared by value and type, 1.0 == 1 but they're written differently
+        identical = all(
+            [(type(value), value) for value in per_cell[col]] == [(type(value), value) for value in vectorized[col]]
+            for col in DECIMAL_COLUMNS + CODE_VALUE_COLUMNS
+        )
+        self.stdout.write(
+            f"{options['rows']} rows  per cell {per_cell_ms:>10.1f} ms  vectorized {vectorized_ms:>10.1f} ms"
+            f"  speedup {per_cell_ms / vectorized_ms:>5.1f}x  identical cells {identical}"
+        )
@@ -0,0 +1,95 @@
+import statistics
+import time
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from zoneinfo import ZoneInfo
+
+from sapphire_backend.estimations.materialization import MaterializedEstimation
+from sapphire_backend.metrics.materialization import BULK_DATA_TABLES
+from sapphire_backend.organizations.models import Organization
+from sapphire_backend.stations.models import HydrologicalStation, MeteorologicalStation, VirtualStation
+
+
+def read_bulk_data(relation: str, columns: list[str], station_ids: list[int], start: datetime, end: datetime) -> list:
+    # the query of the bulk data sheets, reading everything the export writes
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            SELECT {", ".join(columns)} FROM {relation}
+            WHERE station_id = ANY(%s) AND timestamp_local >= %s AND timestamp_local < %s
+            ORDER BY station_id, timestamp_local
+            """,
+            [station_ids, start, end],
+        )
+        return cursor.fetchall()
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure reading the bulk data of an organization's stations from the bulk data tables and from the legacy "
+        "pivot views they replaced, and check that both return the same rows"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--organization_uuid", type=str, required=True, help="UUID of the organization whose stations are read"
+        )
+        parser.add_argument("--start", type=str, default="2010-01-01", help="Read from this date on (YYYY-MM-DD)")
+        parser.add_argument("--end", type=str, help="Read until this date, exclusive (YYYY-MM-DD), now by default")
+        parser.add_argument("--repeats", type=int, default=3, help="Number of timed runs per source")
+
+    @staticmethod
+    def _parse_date(value: str) -> datetime:
+        try:
+            return datetime.strptime(value, "%Y-%m-%d").replace(tzinfo=ZoneInfo("UTC"))
+        except ValueError:
+            raise CommandError(f"Invalid date {value}, expected YYYY-MM-DD")
+
+    @staticmethod
+    def _get_station_ids(name: str, organization: Organization) -> list[int]:
+        match name:
+            case "hydro_manual":
+                stations = HydrologicalStation.objects.filter(
+                    site__organization=organization, station_type=HydrologicalStation.StationType.MANUAL
+                )
+            case "hydro_auto":
+                stations = HydrologicalStation.objects.filter(
+                    site__organization=organization, station_type=HydrologicalStation.StationType.AUTOMATIC
+                )
+            case "virtual":
+                stations = VirtualStation.objects.filter(organization=organization)
+            case _:
+                stations = MeteorologicalStation.objects.filter(site__organization=organization)
+        return list(stations.values_list("id", flat=True))
+
+    @staticmethod
+    def _time(repeats: int, relation: str, table: MaterializedEstimation, *args) -> tuple[float, list]:
+        durations_ms = []
+        rows = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            rows = read_bulk_data(relation, table.columns, *args)
+            durations_ms.append((time.perf_counter() - start) * 1000)
+        return statistics.median(durations_ms), rows
+
+    def handle(self, *args, **options):
+        try:
+            organization = Organization.objects.get(uuid=options["organization_uuid"])
+        except Organization.DoesNotExist:
+            raise CommandError(f"Organization with UUID {options['organization_uuid']} does not exist")
+        if options["repeats"] < 1:
+            raise CommandError("Number of repeats must be a positive integer")
+        start = self._parse_date(options["start"])
+        end = self._parse_date(options["end"]) if options["end"] else datetime.now(tz=ZoneInfo("UTC"))
+
+        for name, table in BULK_DATA_TABLES.items():
+            station_ids = self._get_station_ids(name, organization)
+            view_ms, view_rows = self._time(options["repeats"], table.legacy_view, table, station_ids, start, end)
+            table_ms, table_rows = self._time(options["repeats"], table.table, table, station_ids, start, end)
+            self.stdout.write(
+                f"{name:<12} {len(station_ids):>4} stations {len(table_rows):>9} rows"
+                f"  legacy view {view_ms:>10.1f} ms  table {table_ms:>8.1f} ms"
+                f"  speedup {view_ms / max(table_ms, 0.001):>7.1f}x  identical rows {view_rows == table_rows}"
+            )
@@ -0,0 +1,121 @@
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from ninja_jwt.tokens import AccessToken
+from zoneinfo import ZoneInfo
+
+from sapphire_backend.metrics.choices import HydrologicalMeasurementType, HydrologicalMetricName
+from sapphire_backend.organizations.models import Organization
+from sapphire_backend.stations.models import HydrologicalStation
+
+User = get_user_model()
+
+BENCHMARK_SENSOR_IDENTIFIER = "benchmark"
+# far before any real data, the rows are rolled back at the end
+BENCHMARK_START = datetime(1900, 1, 1, tzinfo=ZoneInfo("UTC"))
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the chart of a dashboard of hydro stations with 10-minute synthetic water levels, once requesting "
+        "the chart endpoint per station and once requesting the batch endpoint for all of them"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--organization_uuid", type=str, required=True, help="UUID of the organization to query")
+        parser.add_argument("--stations", type=int, default=30, help="Number of hydro stations of the dashboard")
+        parser.add_argument("--days", type=int, default=7, help="Number of days of the chart")
+        parser.add_argument("--repeats", type=int, default=5, help="Number of timed dashboard loads per variant")
+
+    @staticmethod
+    def _insert_synthetic_data(station_ids: list[int], end: datetime):
+        # imported values, the metrics triggers skip the imported value type
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                INSERT INTO metrics_hydrologicalmetric (
+                    timestamp_local, timestamp, avg_value, min_value, max_value, unit, value_type, metric_name,
+                    sensor_identifier, sensor_type, station_id, value_code, source_type, source_id
+                )
+                SELECT ts, ts - INTERVAL '6 hours', round((200 + 50 * sin(extract(epoch FROM ts) / 86400)
+                    + random() * 5)::numeric, 1), NULL, NULL, 'cm', %s, %s, %s, '', station_id, NULL, 'IN', 0
+                FROM unnest(%s::integer[]) AS station_id,
+                    generate_series(%s::timestamptz, %s::timestamptz - INTERVAL '10 minutes', INTERVAL '10 minutes')
+                    AS ts
+                """,
+                [
+                    HydrologicalMeasurementType.IMPORTED,
+                    HydrologicalMetricName.WATER_LEVEL_DAILY,
+                    BENCHMARK_SENSOR_IDENTIFIER,
+                    station_ids,
+                    BENCHMARK_START,
+                    end,
+                ],
+            )
+
+    def _measure(self, label: str, load_dashboard, repeats: int):
+        durations_ms = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            load_dashboard()
+            durations_ms.append((time.perf_counter() - start) * 1000)
+
+        with CaptureQueriesContext(connection) as context:
+            requests, points = load_dashboard()
+        self.stdout.write(
+            f"{label:<12} median {statistics.median(durations_ms):>9.1f} ms  requests {requests:>4}"
+            f"  queries {len(context.captured_queries):>5}  points {points:>8}"
+        )
+
+    def handle(self, *args, **options):
+        try:
+            organization = Organization.objects.get(uuid=options["organization_uuid"])
+        except Organization.DoesNotExist:
+            raise CommandError(f"Organization with UUID {options['organization_uuid']} does not exist")
+        if min(options["stations"], options["days"], options["repeats"]) < 1:
+            raise CommandError("Number of stations, days and repeats must be positive integers")
+        if options["days"] > 30:
+            raise CommandError("Number of days cannot be more than 30, longer charts are read from the aggregate")
+
+        user = User.objects.filter(organization=organization, is_active=True, is_deleted=False).first()
+        if user is None:
+            raise CommandError("The organization doesn't have any active users")
+        stations = list(
+            HydrologicalStation.objects.filter(site__organization=organization).order_by("id")[: options["stations"]]
+        )
+        if not stations:
+            raise CommandError("The organization doesn't have any hydro stations")
+
+        end = BENCHMARK_START + timedelta(days=options["days"])
+        params = {
+            "timestamp_local__gte": BENCHMARK_START.isoformat(),
+            "timestamp_local__lt": end.isoformat(),
+            "metric_name__in": [HydrologicalMetricName.WATER_LEVEL_DAILY],
+            "sensor_identifier": BENCHMARK_SENSOR_IDENTIFIER,
+        }
+        url = f"/api/v1/metrics/{organization.uuid}/hydro/measurements/chart"
+        client = Client(SERVER_NAME="localhost", HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user)}")
+
+        def load_per_station():
+            points = 0
+            for station in stations:
+                points += len(client.get(url, {**params, "station": station.id}).json())
+            return len(stations), points
+
+        def load_batch():
+            series = client.get(f"{url}/batch", {**params, "station_uuids": [station.uuid for station in stations]})
+            return 1, sum(len(station_series["data"]) for station_series in series.json())
+
+        self.stdout.write(f"{len(stations)} stations, {options['days']} days of 10-minute water levels")
+        # the requests' transactions are savepoints of this one, nothing is written
+        with transaction.atomic():
+            self._insert_synthetic_data([station.id for station in stations], end)
+            self._measure("per station", load_per_station, options["repeats"])
+            self._measure("batch", load_batch, options["repeats"])
+            transaction.set_rollback(True)
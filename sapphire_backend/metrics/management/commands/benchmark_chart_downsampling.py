@@ -0,0 +1,69 @@
+import json
+import statistics
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+from ninja.responses import NinjaJSONEncoder
+from zoneinfo import ZoneInfo
+
+from sapphire_backend.metrics.schema import HFChartSchema
+from sapphire_backend.metrics.timeseries.downsampling import MIN_MAX_POINTS, downsample_min_max
+
+
+def build_points(count: int) -> list[tuple[datetime, dict]]:
+    # 10-minute water levels with a daily cycle, noise and a flood peak
+    start = datetime(2024, 1, 1, tzinfo=ZoneInfo("UTC"))
+    rng = np.random.default_rng(0)
+    values = 200 + 20 * np.sin(np.arange(count) * 2 * np.pi / 144) + rng.normal(scale=2, size=count)
+    values[count // 2] = 450
+    return [(start + timedelta(minutes=10 * idx), {"WLD": round(value, 1)}) for idx, value in enumerate(values)]
+
+
+def render_chart(points: list[tuple[datetime, dict]], max_points: int | None) -> str:
+    # the tail of the chart endpoint, after the series is read
+    if max_points:
+        values = np.array([HFChartSchema.resolve_y(values) for _, values in points], dtype=float)
+        points = [points[idx] for idx in downsample_min_max(values, max_points)]
+    schemas = [HFChartSchema(timestamp_local=ts, **values) for ts, values in points]
+    return json.dumps([schema.model_dump(by_alias=False) for schema in schemas], cls=NinjaJSONEncoder)
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the payload size and the time to render a chart series of synthetic 10-minute water levels, "
+        "once with every point and once downsampled to max_points, and check the peak survives"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--points", type=int, nargs="+", default=[10_000, 50_000, 160_000], help="Lengths of the series"
+        )
+        parser.add_argument("--max_points", type=int, default=1000, help="Points of the downsampled series")
+        parser.add_argument("--repeats", type=int, default=5, help="Number of timed runs per variant")
+
+    def _measure(self, label: str, points: list, max_points: int | None, repeats: int):
+        durations_ms = []
+        payload = ""
+        for _ in range(repeats):
+            start = time.perf_counter()
+            payload = render_chart(points, max_points)
+            durations_ms.append((time.perf_counter() - start) * 1000)
+        series = json.loads(payload)
+        self.stdout.write(
+            f"  {label:<12} {len(series):>7} points  median {statistics.median(durations_ms):>9.1f} ms"
+            f"  payload {len(payload) / 1024:>9.1f} KiB  peak {max(point['y'] for point in series)}"
+        )
+
+    def handle(self, *args, **options):
+        if options["max_points"] < MIN_MAX_POINTS:
+            raise CommandError(f"max_points must be at least {MIN_MAX_POINTS}")
+        if min(*options["points"], options["repeats"]) < 1:
+            raise CommandError("Points and repeats must be positive integers")
+
+        for count in options["points"]:
+            points = build_points(count)
+            self.stdout.write(f"{count} points")
+            self._measure("full", points, None, options["repeats"])
+            self._measure("downsampled", points, options["max_points"], options["repeats"])
@@ -0,0 +1,86 @@
+import statistics
+import time
+from contextlib import contextmanager
+from datetime import date
+
+from dateutil.relativedelta import relativedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from sapphire_backend.estimations.materialization import water_discharge_decade_average, water_level_decade_average
+from sapphire_backend.estimations.models import (
+    EstimationsWaterDischargeDecadeAverage,
+    EstimationsWaterLevelDecadeAverage,
+)
+from sapphire_backend.metrics.api import OperationalJournalAPIController
+from sapphire_backend.stations.models import HydrologicalStation
+
+DECADE_SOURCES = {
+    EstimationsWaterLevelDecadeAverage: water_level_decade_average,
+    EstimationsWaterDischargeDecadeAverage: water_discharge_decade_average,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the decadal operational journal of a hydro station for a range of months, once reading the legacy "
+        "decade average views (previous behaviour) and once reading the materialized tables"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--station_id", type=int, required=True, help="ID of the hydro station to query")
+        parser.add_argument("--year", type=int, default=date.today().year, help="Year of the last month")
+        parser.add_argument("--month", type=int, default=date.today().month, help="Last month of the range")
+        parser.add_argument("--months", type=int, default=12, help="Number of months, one request per month")
+        parser.add_argument("--repeats", type=int, default=5, help="Number of times the range is requested per mode")
+
+    @staticmethod
+    @contextmanager
+    def _read_legacy_views():
+        for model, estimation in DECADE_SOURCES.items():
+            model._meta.db_table = estimation.legacy_view
+        try:
+            yield
+        finally:
+            for model, estimation in DECADE_SOURCES.items():
+                model._meta.db_table = estimation.table
+
+    def _request_range(self, station: HydrologicalStation, months: list[date]) -> float:
+        start = time.perf_counter()
+        for month in months:
+            # ATOMIC_REQUESTS wraps every view in a transaction, the endpoint doesn't use the controller instance
+            with transaction.atomic():
+                OperationalJournalAPIController.get_hydro_decadal_data(
+                    None, str(station.uuid), month.year, month.month
+                )
+        return time.perf_counter() - start
+
+    def _report(self, label: str, durations: list[float], requests: int):
+        durations_ms = [duration * 1000 for duration in durations]
+        self.stdout.write(
+            f"{label:<20} range mean {statistics.mean(durations_ms):>9.2f} ms  min {min(durations_ms):>9.2f} ms"
+            f"  per request {statistics.mean(durations_ms) / requests:>8.2f} ms"
+        )
+
+    def handle(self, *args, **options):
+        try:
+            station = HydrologicalStation.objects.get(id=options["station_id"])
+        except HydrologicalStation.DoesNotExist:
+            raise CommandError(f"Hydro station with ID {options['station_id']} does not exist")
+        if options["months"] < 1 or options["repeats"] < 1:
+            raise CommandError("Number of months and repeats must be positive integers")
+
+        last_month = date(options["year"], options["month"], 1)
+        months = [last_month - relativedelta(months=offset) for offset in reversed(range(options["months"]))]
+
+        with self._read_legacy_views():
+            legacy_durations = [self._request_range(station, months) for _ in range(options["repeats"])]
+        self._report("legacy views", legacy_durations, len(months))
+
+        table_durations = [self._request_range(station, months) for _ in range(options["repeats"])]
+        self._report("materialized tables", table_durations, len(months))
+
+        self.stdout.write(
+            f"speedup {statistics.mean(legacy_durations) / statistics.mean(table_durations):.1f}x "
+            f"for {len(months)} months starting {months[0].isoformat()}"
+        )
@@ -0,0 +1,127 @@
+import random
+import statistics
+import time
+from datetime import date, datetime, timedelta
+
+from dateutil.relativedelta import relativedelta
+from django.core.management.base import BaseCommand, CommandError
+from zoneinfo import ZoneInfo
+
+from sapphire_backend.metrics.choices import HydrologicalMetricName
+from sapphire_backend.metrics.utils.helpers import OperationalJournalDataTransformer
+from sapphire_backend.stations.models import HydrologicalStation
+
+
+def build_daily_data(days: list[date]) -> list[dict]:
+    """
+    Synthetic rows shaped like the daily-data endpoint builds them, the observed metrics first and the estimations
+    after
+    """
+    metrics, estimations = [], []
+    for day in days:
+        morning = datetime(day.year, day.month, day.day, 8, tzinfo=ZoneInfo("UTC"))
+        evening = morning + timedelta(hours=12)
+        midday = morning + timedelta(hours=4)
+        for timestamp_local in (morning, evening):
+            metrics.append(
+                {
+                    "timestamp_local": timestamp_local,
+                    "avg_value": random.randint(100, 300),
+                    "metric_name": HydrologicalMetricName.WATER_LEVEL_DAILY,
+                    "value_code": None,
+                    "sensor_identifier": "",
+                    "has_history": False,
+                }
+            )
+            estimations.append(
+                {
+                    "timestamp_local": timestamp_local,
+                    "avg_value": random.uniform(1, 50),
+                    "metric_name": HydrologicalMetricName.WATER_DISCHARGE_DAILY,
+                }
+            )
+        for metric_name in (HydrologicalMetricName.WATER_TEMPERATURE, HydrologicalMetricName.AIR_TEMPERATURE):
+            metrics.append(
+                {
+                    "timestamp_local": morning,
+                    "avg_value": random.uniform(-5, 25),
+                    "metric_name": metric_name,
+                    "value_code": None,
+                    "sensor_identifier": "",
+                    "has_history": False,
+                }
+            )
+        for metric_name in (
+            HydrologicalMetricName.WATER_LEVEL_DAILY_AVERAGE,
+            HydrologicalMetricName.WATER_DISCHARGE_DAILY_AVERAGE,
+        ):
+            estimations.append(
+                {"timestamp_local": midday, "avg_value": random.uniform(1, 300), "metric_name": metric_name}
+            )
+    return metrics + estimations
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the daily operational journal transformation of synthetic data for ranges of months, once per "
+        "month like the endpoint is requested and once for the whole range in one pass"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--station_id", type=int, required=True, help="ID of the hydro station whose calculation periods are used"
+        )
+        parser.add_argument("--months", type=int, nargs="+", default=[1, 12, 120], help="Lengths of the ranges")
+        parser.add_argument("--repeats", type=int, default=3, help="Number of timed runs per variant")
+
+    def _time(self, repeats: int, func, *args) -> float:
+        durations = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            func(*args)
+            durations.append((time.perf_counter() - start) * 1000)
+        return statistics.median(durations)
+
+    @staticmethod
+    def _transform_per_month(monthly_data: list[tuple[date, list[dict]]], station: HydrologicalStation):
+        for month, rows in monthly_data:
+            OperationalJournalDataTransformer(rows, month.month, station).get_daily_data()
+
+    @staticmethod
+    def _transform_in_one_pass(data: list[dict], station: HydrologicalStation):
+        OperationalJournalDataTransformer(data, 1, station).get_daily_data_per_month()
+
+    def handle(self, *args, **options):
+        try:
+            station = HydrologicalStation.objects.get(id=options["station_id"])
+        except HydrologicalStation.DoesNotExist:
+            raise CommandError(f"Hydro station with ID {options['station_id']} does not exist")
+        if min(options["months"]) < 1 or options["repeats"] < 1:
+            raise CommandError("Number of months and repeats must be positive integers")
+
+        for months_count in options["months"]:
+            first_month = date(2010, 1, 1)
+            months = [first_month + relativedelta(months=offset) for offset in range(months_count)]
+            end = months[-1] + relativedelta(months=1)
+            data = build_daily_data(
+                [first_month + timedelta(days=offset) for offset in range(-1, (end - first_month).days)]
+            )
+            # the rows the endpoint reads for every month, including the last day of the previous month
+            monthly_data = [
+                (
+                    month,
+                    [
+                        row
+                        for row in data
+                        if month - timedelta(days=1) <= row["timestamp_local"].date() < month + relativedelta(months=1)
+                    ],
+                )
+                for month in months
+            ]
+
+            per_month_ms = self._time(options["repeats"], self._transform_per_month, monthly_data, station)
+            one_pass_ms = self._time(options["repeats"], self._transform_in_one_pass, data, station)
+            self.stdout.write(
+                f"{months_count:>4} months  per month {per_month_ms:>10.2f} ms  one pass {one_pass_ms:>10.2f} ms"
+                f"  speedup {per_month_ms / one_pass_ms:>5.1f}x"
+            )
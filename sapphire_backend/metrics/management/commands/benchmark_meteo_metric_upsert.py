@@ -0,0 +1,108 @@
+import time
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from zoneinfo import ZoneInfo
+
+from sapphire_backend.metrics.choices import MeteorologicalMeasurementType, MeteorologicalMetricName, MetricUnit
+from sapphire_backend.metrics.models import MeteorologicalMetric
+from sapphire_backend.stations.models import MeteorologicalStation
+
+BENCHMARK_START_YEAR = 1850
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the rows/sec of the per-row MeteorologicalMetric.save() path against the bulk upsert "
+        f"on synthetic decadal data written from {BENCHMARK_START_YEAR} onwards"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--station_ids", type=int, nargs="+", required=True, help="IDs of the meteo stations to write for"
+        )
+        parser.add_argument("--years", type=int, default=30, help="Number of synthetic years per station")
+        parser.add_argument("--batch_size", type=int, default=5000, help="Batch size of the bulk upsert")
+        parser.add_argument(
+            "--skip_per_row", action="store_true", default=False, help="Only benchmark the bulk upsert"
+        )
+
+    @staticmethod
+    def _build_metrics(
+        stations: list[MeteorologicalStation], years: int, offset: float = 0.0
+    ) -> list[MeteorologicalMetric]:
+        metrics = []
+        for station in stations:
+            for year in range(BENCHMARK_START_YEAR, BENCHMARK_START_YEAR + years):
+                for month in range(1, 13):
+                    for decade, day in enumerate([5, 15, 25], start=1):
+                        timestamp_local = datetime(year, month, day, 12, tzinfo=ZoneInfo("UTC"))
+                        metrics.extend(
+                            [
+                                MeteorologicalMetric(
+                                    timestamp_local=timestamp_local,
+                                    value=offset + decade + month,
+                                    value_type=MeteorologicalMeasurementType.MANUAL,
+                                    metric_name=MeteorologicalMetricName.AIR_TEMPERATURE_DECADE_AVERAGE,
+                                    unit=MetricUnit.TEMPERATURE,
+                                    station=station,
+                                ),
+                                MeteorologicalMetric(
+                                    timestamp_local=timestamp_local,
+                                    value=offset + decade * month,
+                                    value_type=MeteorologicalMeasurementType.MANUAL,
+                                    metric_name=MeteorologicalMetricName.PRECIPITATION_DECADE_AVERAGE,
+                                    unit=MetricUnit.PRECIPITATION,
+                                    station=station,
+                                ),
+                            ]
+                        )
+        return metrics
+
+    @staticmethod
+    def _cleanup(station_ids: list[int], years: int):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                DELETE FROM metrics_meteorologicalmetric
+                WHERE station_id = ANY(%s) AND timestamp_local >= %s AND timestamp_local < %s
+                """,
+                [
+                    station_ids,
+                    datetime(BENCHMARK_START_YEAR, 1, 1, tzinfo=ZoneInfo("UTC")),
+                    datetime(BENCHMARK_START_YEAR + years, 1, 1, tzinfo=ZoneInfo("UTC")),
+                ],
+            )
+
+    def _report(self, label: str, rows: int, seconds: float):
+        self.stdout.write(f"{label:<28} {rows:>8} rows {seconds:>9.3f} s {rows / seconds:>12.0f} rows/s")
+
+    def handle(self, *args, **options):
+        stations = list(MeteorologicalStation.objects.filter(id__in=options["station_ids"]))
+        if len(stations) != len(set(options["station_ids"])):
+            raise CommandError("Some of the meteo station IDs do not exist")
+
+        station_ids = [station.id for station in stations]
+        years = options["years"]
+        self._cleanup(station_ids, years)
+        try:
+            if not options["skip_per_row"]:
+                metrics = self._build_metrics(stations, years)
+                start = time.perf_counter()
+                for metric in metrics:
+                    metric.save()
+                self._report("per-row save (insert)", len(metrics), time.perf_counter() - start)
+                self._cleanup(station_ids, years)
+
+            metrics = self._build_metrics(stations, years)
+            start = time.perf_counter()
+            result = MeteorologicalMetric.objects.bulk_upsert(metrics, batch_size=options["batch_size"])
+            self._report("bulk upsert (insert)", result["inserted"], time.perf_counter() - start)
+
+            metrics = self._build_metrics(stations, years, offset=1.0)
+            start = time.perf_counter()
+            result = MeteorologicalMetric.objects.bulk_upsert(metrics, batch_size=options["batch_size"])
+            self._report("bulk upsert (re-send)", result["updated"], time.perf_counter() - start)
+        finally:
+            self._cleanup(station_ids, years)
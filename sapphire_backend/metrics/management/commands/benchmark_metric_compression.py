@@ -0,0 +1,125 @@
+import statistics
+import time
+from datetime import datetime
+
+from dateutil.relativedelta import relativedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from zoneinfo import ZoneInfo
+
+from sapphire_backend.metrics.timeseries.compression import compress_chunks, get_chunks
+from sapphire_backend.organizations.models import Organization
+from sapphire_backend.stations.models import HydrologicalStation
+
+# long before any real data, so that the synthetic rows get chunks of their own
+BENCHMARK_START = datetime(1900, 1, 1, tzinfo=ZoneInfo("UTC"))
+
+QUERIES = {
+    "raw series": """
+        SELECT timestamp_local, avg_value FROM metrics_hydrologicalmetric
+        WHERE station_id = %s AND metric_name = 'WLD' AND value_type = 'I'
+            AND timestamp_local >= %s AND timestamp_local < %s
+        ORDER BY timestamp_local
+    """,
+    "monthly average": """
+        SELECT time_bucket('1 month', timestamp_local) AS bucket, avg(avg_value) FROM metrics_hydrologicalmetric
+        WHERE station_id = %s AND metric_name = 'WLD' AND value_type = 'I'
+            AND timestamp_local >= %s AND timestamp_local < %s
+        GROUP BY bucket ORDER BY bucket
+    """,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the disk footprint of synthetic hydro metrics and the latency of multi-year queries of a station, "
+        "once uncompressed and once with the synthetic chunks compressed. The synthetic data is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--organization_uuid", type=str, required=True, help="UUID of the organization whose stations are used"
+        )
+        parser.add_argument("--stations", type=int, default=10, help="Number of hydro stations to write for")
+        parser.add_argument("--years", type=int, default=10, help="Number of years of data per station")
+        parser.add_argument("--step", type=str, default="10 minutes", help="Interval between the synthetic rows")
+        parser.add_argument("--repeats", type=int, default=5, help="Number of timed runs per query")
+
+    @staticmethod
+    def _insert_synthetic_data(station_ids: list[int], end: datetime, step: str):
+        # imported water levels and temperatures, the metrics triggers skip the imported value type
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                INSERT INTO metrics_hydrologicalmetric (
+                    timestamp_local, timestamp, avg_value, min_value, max_value, unit, value_type, metric_name,
+                    sensor_identifier, sensor_type, station_id, value_code, source_type, source_id
+                )
+                SELECT ts, ts - INTERVAL '6 hours', round((200 + 50 * sin(extract(epoch FROM ts) / 86400)
+                    + random() * metric.noise)::numeric, 1), NULL, NULL, metric.unit, 'I', metric.name, '', '',
+                    station_id, NULL, 'IN', 0
+                FROM unnest(%s::int[]) AS station_id
+                CROSS JOIN (VALUES ('WLD', 'cm', 5), ('WTO', 'degC', 1), ('ATO', 'degC', 2)) AS metric (name, unit, noise)
+                CROSS JOIN LATERAL generate_series(%s::timestamptz, %s::timestamptz, %s::interval) AS ts
+                WHERE ts < %s::timestamptz
+                """,
+                [station_ids, BENCHMARK_START, end, step, end],
+            )
+            return cursor.rowcount
+
+    @staticmethod
+    def _get_size(chunks: list[str]) -> int:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT COALESCE(sum(CASE WHEN compression_status = 'Compressed' THEN after_compression_total_bytes
+                    ELSE pg_total_relation_size(format('%%I.%%I', chunk_schema, chunk_name)) END), 0)
+                FROM chunk_compression_stats('metrics_hydrologicalmetric')
+                WHERE format('%%I.%%I', chunk_schema, chunk_name) = ANY(%s)
+                """,
+                [chunks],
+            )
+            return cursor.fetchone()[0]
+
+    def _measure(self, label: str, station_id: int, end: datetime, repeats: int, chunks: list[str]):
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE metrics_hydrologicalmetric")
+        self.stdout.write(f"{label}: {self._get_size(chunks) / 2**20:.1f} MiB in {len(chunks)} chunks")
+        for name, query in QUERIES.items():
+            durations_ms = []
+            for _ in range(repeats):
+                start = time.perf_counter()
+                with connection.cursor() as cursor:
+                    cursor.execute(query, [station_id, BENCHMARK_START, end])
+                    rows = len(cursor.fetchall())
+                durations_ms.append((time.perf_counter() - start) * 1000)
+            self.stdout.write(f"  {name:<16} {rows:>9} rows  median {statistics.median(durations_ms):>10.1f} ms")
+
+    def handle(self, *args, **options):
+        try:
+            organization = Organization.objects.get(uuid=options["organization_uuid"])
+        except Organization.DoesNotExist:
+            raise CommandError(f"Organization with UUID {options['organization_uuid']} does not exist")
+        if min(options["stations"], options["years"], options["repeats"]) < 1:
+            raise CommandError("Stations, years and repeats must be positive integers")
+
+        station_ids = list(
+            HydrologicalStation.objects.filter(site__organization=organization)
+            .order_by("id")
+            .values_list("id", flat=True)[: options["stations"]]
+        )
+        if not station_ids:
+            raise CommandError("The organization has no hydro stations")
+        end = BENCHMARK_START + relativedelta(years=options["years"])
+
+        with transaction.atomic():
+            rows = self._insert_synthetic_data(station_ids, end, options["step"])
+            chunks = get_chunks("metrics_hydrologicalmetric", BENCHMARK_START, end)
+            self.stdout.write(f"{rows} rows for {len(station_ids)} stations over {options['years']} years")
+            self._measure("uncompressed", station_ids[0], end, options["repeats"], chunks)
+
+            start = time.perf_counter()
+            compress_chunks("metrics_hydrologicalmetric", BENCHMARK_START, end)
+            self.stdout.write(f"compressed in {time.perf_counter() - start:.1f} s")
+            self._measure("compressed", station_ids[0], end, options["repeats"], chunks)
+            transaction.set_rollback(True)
@@ -0,0 +1,86 @@
+import time
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from zoneinfo import ZoneInfo
+
+from sapphire_backend.metrics.choices import HydrologicalMeasurementType, HydrologicalMetricName, MetricUnit
+from sapphire_backend.metrics.models import HydrologicalMetric
+from sapphire_backend.stations.models import HydrologicalStation
+
+BENCHMARK_SENSOR_IDENTIFIER = "benchmark"
+BENCHMARK_START = datetime(1990, 1, 1, tzinfo=ZoneInfo("UTC"))
+
+
+class Command(BaseCommand):
+    help = "Compare the rows/sec of the per-row HydrologicalMetric.save() path against the bulk upsert"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--station_id", type=int, required=True, help="ID of the hydro station to write for")
+        parser.add_argument("--rows", type=int, default=5000, help="Number of synthetic 10-minute rows")
+        parser.add_argument("--batch_size", type=int, default=5000, help="Batch size of the bulk upsert")
+        parser.add_argument(
+            "--skip_per_row", action="store_true", default=False, help="Only benchmark the bulk upsert"
+        )
+
+    @staticmethod
+    def _build_metrics(station: HydrologicalStation, rows: int, offset: float = 0.0) -> list[HydrologicalMetric]:
+        return [
+            HydrologicalMetric(
+                timestamp_local=BENCHMARK_START + timedelta(minutes=10 * idx),
+                min_value=offset + idx % 100,
+                avg_value=offset + idx % 100 + 0.5,
+                max_value=offset + idx % 100 + 1,
+                unit=MetricUnit.TEMPERATURE,
+                value_type=HydrologicalMeasurementType.AUTOMATIC,
+                metric_name=HydrologicalMetricName.AIR_TEMPERATURE,
+                station=station,
+                sensor_identifier=BENCHMARK_SENSOR_IDENTIFIER,
+            )
+            for idx in range(rows)
+        ]
+
+    @staticmethod
+    def _cleanup(station_id: int):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "DELETE FROM metrics_hydrologicalmetric WHERE station_id = %s AND sensor_identifier = %s",
+                [station_id, BENCHMARK_SENSOR_IDENTIFIER],
+            )
+
+    def _report(self, label: str, rows: int, seconds: float):
+        self.stdout.write(f"{label:<28} {rows:>8} rows {seconds:>9.3f} s {rows / seconds:>12.0f} rows/s")
+
+    def handle(self, *args, **options):
+        try:
+            station = HydrologicalStation.objects.get(id=options["station_id"])
+        except HydrologicalStation.DoesNotExist:
+            raise CommandError(f"Hydro station with ID {options['station_id']} does not exist")
+
+        rows = options["rows"]
+        self._cleanup(station.id)
+        try:
+            if not options["skip_per_row"]:
+                metrics = self._build_metrics(station, rows)
+                start = time.perf_counter()
+                for metric in metrics:
+                    metric.save(refresh_view=False)
+                self._report("per-row save (insert)", rows, time.perf_counter() - start)
+                self._cleanup(station.id)
+
+            metrics = self._build_metrics(station, rows)
+            start = time.perf_counter()
+            result = HydrologicalMetric.objects.bulk_upsert(
+                metrics, batch_size=options["batch_size"], refresh_view=False
+            )
+            self._report("bulk upsert (insert)", result["inserted"], time.perf_counter() - start)
+
+            metrics = self._build_metrics(station, rows, offset=1.0)
+            start = time.perf_counter()
+            result = HydrologicalMetric.objects.bulk_upsert(
+                metrics, batch_size=options["batch_size"], refresh_view=False
+            )
+            self._report("bulk upsert (update)", result["updated"], time.perf_counter() - start)
+        finally:
+            self._cleanup(station.id)
@@ -0,0 +1,90 @@
+import statistics
+import time
+from contextlib import contextmanager
+from datetime import date
+
+import pandas as pd
+from dateutil.relativedelta import relativedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from sapphire_backend.estimations.models import DischargeCalculationPeriod
+from sapphire_backend.metrics.api import OperationalJournalAPIController
+from sapphire_backend.metrics.utils.helpers import OperationalJournalDataTransformer
+from sapphire_backend.stations.models import HydrologicalStation
+
+
+def _get_manual_calculation_per_row(transformer: OperationalJournalDataTransformer, data: pd.DataFrame) -> pd.Series:
+    # previous behaviour, the transformer passes the first morning and the first evening row of every day
+    return pd.Series(
+        [
+            DischargeCalculationPeriod.is_manual_calculation(transformer.station.id, timestamp)
+            for timestamp in data["timestamp_local"]
+        ],
+        index=data.index,
+        dtype=bool,
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the daily operational journal of a hydro station for a range of months, once querying the "
+        "discharge calculation periods per morning and evening row (previous behaviour) and once loading them "
+        "once per request"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--station_id", type=int, required=True, help="ID of the hydro station to query")
+        parser.add_argument("--year", type=int, default=date.today().year, help="Year of the last month")
+        parser.add_argument("--month", type=int, default=date.today().month, help="Last month of the range")
+        parser.add_argument("--months", type=int, default=12, help="Number of months, one request per month")
+        parser.add_argument("--repeats", type=int, default=5, help="Number of times the range is requested per mode")
+
+    @staticmethod
+    @contextmanager
+    def _query_per_row():
+        original = OperationalJournalDataTransformer._get_manual_calculation
+        OperationalJournalDataTransformer._get_manual_calculation = _get_manual_calculation_per_row
+        try:
+            yield
+        finally:
+            OperationalJournalDataTransformer._get_manual_calculation = original
+
+    def _request_range(self, station: HydrologicalStation, months: list[date]) -> tuple[float, int]:
+        start = time.perf_counter()
+        with CaptureQueriesContext(connection) as context:
+            for month in months:
+                # ATOMIC_REQUESTS wraps every view in a transaction, the endpoint doesn't use the controller instance
+                with transaction.atomic():
+                    OperationalJournalAPIController.get_daily_data(None, str(station.uuid), month.year, month.month)
+        return time.perf_counter() - start, len(context.captured_queries)
+
+    def _measure(self, label: str, station: HydrologicalStation, months: list[date], repeats: int) -> float:
+        runs = [self._request_range(station, months) for _ in range(repeats)]
+        durations_ms = [duration * 1000 for duration, _ in runs]
+        queries = runs[0][1]
+        self.stdout.write(
+            f"{label:<16} range mean {statistics.mean(durations_ms):>9.2f} ms  min {min(durations_ms):>9.2f} ms"
+            f"  queries per request {queries / len(months):>6.1f}"
+        )
+        return statistics.mean(durations_ms)
+
+    def handle(self, *args, **options):
+        try:
+            station = HydrologicalStation.objects.get(id=options["station_id"])
+        except HydrologicalStation.DoesNotExist:
+            raise CommandError(f"Hydro station with ID {options['station_id']} does not exist")
+        if options["months"] < 1 or options["repeats"] < 1:
+            raise CommandError("Number of months and repeats must be positive integers")
+
+        last_month = date(options["year"], options["month"], 1)
+        months = [last_month - relativedelta(months=offset) for offset in reversed(range(options["months"]))]
+
+        with self._query_per_row():
+            per_row_ms = self._measure("query per row", station, months, options["repeats"])
+        interval_ms = self._measure("interval index", station, months, options["repeats"])
+
+        self.stdout.write(
+            f"speedup {per_row_ms / interval_ms:.1f}x for {len(months)} months starting {months[0].isoformat()}"
+        )
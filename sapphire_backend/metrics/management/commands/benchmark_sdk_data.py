@@ -0,0 +1,115 @@
+import statistics
+import time
+import tracemalloc
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from zoneinfo import ZoneInfo
+
+from sapphire_backend.metrics.choices import HydrologicalMetricName
+from sapphire_backend.metrics.exceptions import SDKDataError
+from sapphire_backend.metrics.utils.helpers import SDK_CURSOR_MAX_PAGE_SIZE, SDK_CURSOR_PAGE_SIZE, SDKDataHelper
+from sapphire_backend.organizations.models import Organization
+from sapphire_backend.stations.models import HydrologicalStation
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure an SDK data pull of an organization's hydro stations, once reading the whole range the way the "
+        "paginated endpoint does for every page and once reading it in keyset pages"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--organization_uuid", type=str, required=True, help="UUID of the organization to query")
+        parser.add_argument("--stations", type=int, default=50, help="Number of manual hydro stations to pull")
+        parser.add_argument("--years", type=int, default=5, help="Number of years to pull")
+        parser.add_argument("--end_year", type=int, default=datetime.now().year, help="Last year of the range")
+        parser.add_argument(
+            "--metrics",
+            type=str,
+            nargs="+",
+            default=[
+                HydrologicalMetricName.WATER_LEVEL_DAILY,
+                HydrologicalMetricName.WATER_LEVEL_DAILY_AVERAGE,
+                HydrologicalMetricName.WATER_DISCHARGE_DAILY,
+                HydrologicalMetricName.WATER_DISCHARGE_DAILY_AVERAGE,
+            ],
+            help="Metric names to pull",
+        )
+        parser.add_argument("--limit", type=int, default=SDK_CURSOR_PAGE_SIZE, help="Number of values per page")
+        parser.add_argument("--repeats", type=int, default=3, help="Number of timed runs per variant")
+
+    @staticmethod
+    def _read_full_range(helper: SDKDataHelper, limit: int) -> tuple[int, int]:
+        data = helper.get_data()
+        return 1, sum(len(variable["values"]) for station in data for variable in station["data"])
+
+    @staticmethod
+    def _read_pages(helper: SDKDataHelper, limit: int) -> tuple[int, int]:
+        pages = values = 0
+        cursor = None
+        while True:
+            page = helper.get_page(cursor, limit)
+            pages += 1
+            values += sum(len(variable["values"]) for station in page["results"] for variable in station["data"])
+            cursor = page["next_cursor"]
+            if cursor is None:
+                return pages, values
+
+    def _measure(self, label: str, func, helper: SDKDataHelper, limit: int, repeats: int):
+        durations_ms = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            func(helper, limit)
+            durations_ms.append((time.perf_counter() - start) * 1000)
+
+        tracemalloc.start()
+        with CaptureQueriesContext(connection) as context:
+            pages, values = func(helper, limit)
+        _, peak_memory = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        self.stdout.write(
+            f"{label:<12} median {statistics.median(durations_ms):>10.1f} ms  queries {len(context.captured_queries):>6}"
+            f"  pages {pages:>5}  values {values:>8}  peak memory {peak_memory / 1024 / 1024:>8.1f} MiB"
+        )
+
+    def handle(self, *args, **options):
+        try:
+            organization = Organization.objects.get(uuid=options["organization_uuid"])
+        except Organization.DoesNotExist:
+            raise CommandError(f"Organization with UUID {options['organization_uuid']} does not exist")
+        if min(options["stations"], options["years"], options["repeats"]) < 1:
+            raise CommandError("Number of stations, years and repeats must be positive integers")
+        if not 1 <= options["limit"] <= SDK_CURSOR_MAX_PAGE_SIZE:
+            raise CommandError(f"Limit must be between 1 and {SDK_CURSOR_MAX_PAGE_SIZE}")
+
+        station_ids = list(
+            HydrologicalStation.objects.filter(
+                site__organization=organization, station_type=HydrologicalStation.StationType.MANUAL
+            )
+            .order_by("id")
+            .values_list("id", flat=True)[: options["stations"]]
+        )
+        if not station_ids:
+            raise CommandError("The organization doesn't have any manual hydro stations")
+
+        filters = {
+            "station__in": station_ids,
+            "metric_name__in": options["metrics"],
+            "timestamp_local__gte": datetime(options["end_year"] - options["years"] + 1, 1, 1, tzinfo=ZoneInfo("UTC")),
+            "timestamp_local__lt": datetime(options["end_year"] + 1, 1, 1, tzinfo=ZoneInfo("UTC")),
+        }
+        try:
+            helper = SDKDataHelper(organization, filters)
+        except SDKDataError as e:
+            raise CommandError(e.message)
+        self.stdout.write(
+            f"{len(station_ids)} stations, {options['years']} years from {filters['timestamp_local__gte'].date()}, "
+            f"metrics {', '.join(options['metrics'])}"
+        )
+
+        self._measure("full range", self._read_full_range, helper, options["limit"], options["repeats"])
+        self._measure("keyset pages", self._read_pages, helper, options["limit"], options["repeats"])
@@ -0,0 +1,62 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.signals import request_finished, request_started
+from django.db import connection, transaction
+
+from sapphire_backend.metrics.models import HydrologicalMetric
+from sapphire_backend.metrics.timeseries.query import TimeseriesQueryManager
+from sapphire_backend.stations.models import HydrologicalStation
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the latency of the time-bucket query in a request-like cycle, once closing the connection after "
+        "every request (previous behaviour) and once keeping the persistent connection (CONN_MAX_AGE)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--station_id", type=int, required=True, help="ID of the hydro station to query")
+        parser.add_argument("--requests", type=int, default=200, help="Number of simulated requests per mode")
+        parser.add_argument("--interval", type=str, default="1 day", help="Time bucket interval")
+        parser.add_argument("--agg_func", type=str, default="avg", help="Aggregation function")
+        parser.add_argument("--limit", type=int, default=100, help="Number of buckets")
+
+    def _simulate_request(self, query_manager: TimeseriesQueryManager, options: dict, close_connection: bool):
+        request_started.send(sender=self.__class__)
+        start = time.perf_counter()
+        # ATOMIC_REQUESTS wraps every view in a transaction
+        with transaction.atomic():
+            query_manager.time_bucket(options["interval"], options["agg_func"], options["limit"])
+        if close_connection:
+            connection.close()
+        elapsed = time.perf_counter() - start
+        request_finished.send(sender=self.__class__)
+        return elapsed
+
+    def _report(self, label: str, latencies: list[float]):
+        latencies_ms = sorted(latency * 1000 for latency in latencies)
+        p95 = latencies_ms[max(int(len(latencies_ms) * 0.95) - 1, 0)]
+        self.stdout.write(
+            f"{label:<24} mean {statistics.mean(latencies_ms):>8.2f} ms  p50 {statistics.median(latencies_ms):>8.2f} ms"
+            f"  p95 {p95:>8.2f} ms  max {latencies_ms[-1]:>8.2f} ms"
+        )
+
+    def handle(self, *args, **options):
+        try:
+            station = HydrologicalStation.objects.get(id=options["station_id"])
+        except HydrologicalStation.DoesNotExist:
+            raise CommandError(f"Hydro station with ID {options['station_id']} does not exist")
+        if options["requests"] < 1:
+            raise CommandError("Number of requests must be a positive integer")
+
+        query_manager = TimeseriesQueryManager(
+            model=HydrologicalMetric,
+            filter_dict={"station": station.id, "station__site__organization": station.site.organization.uuid},
+        )
+        for label, close_connection in [("close per request", True), ("persistent connection", False)]:
+            latencies = [
+                self._simulate_request(query_manager, options, close_connection) for _ in range(options["requests"])
+            ]
+            self._report(label, latencies)
@@ -0,0 +1,112 @@
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from zoneinfo import ZoneInfo
+
+from sapphire_backend.metrics.choices import HydrologicalMeasurementType, HydrologicalMetricName
+from sapphire_backend.metrics.models import HydrologicalMetric
+from sapphire_backend.metrics.timeseries.query import TimeseriesQueryManager
+from sapphire_backend.stations.models import HydrologicalStation
+from sapphire_backend.utils.db_pool import autocommit_connection
+
+BENCHMARK_SENSOR_IDENTIFIER = "benchmark"
+BENCHMARK_END = datetime(1995, 1, 1, tzinfo=ZoneInfo("UTC"))
+BENCHMARK_START = BENCHMARK_END - timedelta(days=3 * 365)
+WINDOWS_DAYS = [7, 90, 3 * 365]
+
+
+def refresh_hourly_aggregate(start: datetime, end: datetime):
+    # the procedure cannot run inside a transaction block
+    with autocommit_connection() as conn, conn.cursor() as cursor:
+        cursor.execute("CALL refresh_continuous_aggregate('metrics_hydrologicalmetric_hourly', %s, %s)", [start, end])
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the latency of reading 7-day, 90-day and 3-year windows of 10-minute synthetic data of a station, "
+        "once from the raw rows and once from the source the query router picks (the hourly aggregate beyond 30 days)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--station_id", type=int, required=True, help="ID of the hydro station to write for")
+        parser.add_argument("--repeats", type=int, default=5, help="Number of timed runs per window and source")
+
+    @staticmethod
+    def _insert_synthetic_data(station_id: int):
+        # imported values, the metrics triggers skip the imported value type
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                INSERT INTO metrics_hydrologicalmetric (
+                    timestamp_local, timestamp, avg_value, min_value, max_value, unit, value_type, metric_name,
+                    sensor_identifier, sensor_type, station_id, value_code, source_type, source_id
+                )
+                SELECT ts, ts - INTERVAL '6 hours', round((200 + 50 * sin(extract(epoch FROM ts) / 86400)
+                    + random() * 5)::numeric, 1), NULL, NULL, 'cm', %s, %s, %s, '', %s, NULL, 'IN', 0
+                FROM generate_series(%s::timestamptz, %s::timestamptz - INTERVAL '10 minutes', INTERVAL '10 minutes')
+                    AS ts
+                """,
+                [
+                    HydrologicalMeasurementType.IMPORTED,
+                    HydrologicalMetricName.WATER_LEVEL_DAILY,
+                    BENCHMARK_SENSOR_IDENTIFIER,
+                    station_id,
+                    BENCHMARK_START,
+                    BENCHMARK_END,
+                ],
+            )
+        refresh_hourly_aggregate(BENCHMARK_START, BENCHMARK_END)
+
+    @staticmethod
+    def _cleanup(station_id: int):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "DELETE FROM metrics_hydrologicalmetric WHERE station_id = %s AND sensor_identifier = %s",
+                [station_id, BENCHMARK_SENSOR_IDENTIFIER],
+            )
+        refresh_hourly_aggregate(BENCHMARK_START, BENCHMARK_END)
+
+    @staticmethod
+    def _time(repeats: int, read) -> tuple[float, int]:
+        durations_ms = []
+        rows = 0
+        for _ in range(repeats):
+            start = time.perf_counter()
+            rows = len(list(read().values_list("timestamp_local", "avg_value")))
+            durations_ms.append((time.perf_counter() - start) * 1000)
+        return statistics.median(durations_ms), rows
+
+    def handle(self, *args, **options):
+        try:
+            station = HydrologicalStation.objects.get(id=options["station_id"])
+        except HydrologicalStation.DoesNotExist:
+            raise CommandError(f"Hydro station with ID {options['station_id']} does not exist")
+        if options["repeats"] < 1:
+            raise CommandError("Number of repeats must be a positive integer")
+
+        self._cleanup(station.id)
+        try:
+            self._insert_synthetic_data(station.id)
+            for days in WINDOWS_DAYS:
+                query_manager = TimeseriesQueryManager(
+                    model=HydrologicalMetric,
+                    filter_dict={
+                        "station": station.id,
+                        "metric_name__in": [HydrologicalMetricName.WATER_LEVEL_DAILY],
+                        "sensor_identifier": BENCHMARK_SENSOR_IDENTIFIER,
+                        "timestamp_local__gte": BENCHMARK_END - timedelta(days=days),
+                        "timestamp_local__lt": BENCHMARK_END,
+                    },
+                    order_direction="ASC",
+                )
+                raw_ms, raw_rows = self._time(options["repeats"], query_manager.execute_query)
+                routed_ms, routed_rows = self._time(options["repeats"], query_manager.execute_routed_query)
+                self.stdout.write(
+                    f"{days:>5} days  raw {raw_rows:>7} rows {raw_ms:>9.1f} ms"
+                    f"  routed ({query_manager.resolve_resolution()}) {routed_rows:>7} rows {routed_ms:>9.1f} ms"
+                )
+        finally:
+            self._cleanup(station.id)
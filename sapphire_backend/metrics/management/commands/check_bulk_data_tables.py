@@ -0,0 +1,60 @@
+from django.core.management.base import CommandError
+
+from sapphire_backend.estimations.management.commands.check_estimations_tables import (
+    Command as CheckEstimationsTablesCommand,
+)
+from sapphire_backend.metrics.materialization import BULK_DATA_TABLES
+
+
+class Command(CheckEstimationsTablesCommand):
+    help = (
+        "Report the stale rows of the bulk data tables per station, compared with their legacy views, and "
+        "optionally recompute them"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--tables",
+            nargs="+",
+            choices=list(BULK_DATA_TABLES),
+            default=list(BULK_DATA_TABLES),
+            help="Tables to check, all by default",
+        )
+        parser.add_argument(
+            "--station_ids",
+            type=int,
+            nargs="+",
+            help="Only check these station IDs, virtual and meteo stations have IDs of their own",
+        )
+        parser.add_argument("--start", type=str, help="Only check from this date on (YYYY-MM-DD)")
+        parser.add_argument("--end", type=str, help="Only check until this date, exclusive (YYYY-MM-DD)")
+        parser.add_argument(
+            "--fix", action="store_true", default=False, help="Recompute the checked range of stale stations"
+        )
+
+    def handle(self, *args, **options):
+        start = self._parse_date(options["start"])
+        end = self._parse_date(options["end"])
+        stale = False
+
+        for name in options["tables"]:
+            table = BULK_DATA_TABLES[name]
+            differences = table.diff(station_ids=options["station_ids"], start=start, end=end)
+            if not differences:
+                self.stdout.write(self.style.SUCCESS(f"{table.table} is up to date"))
+                continue
+
+            stale = True
+            for station_id, count in differences.items():
+                self.stdout.write(f"{table.table}: station {station_id} has {count} stale rows")
+                if options["fix"]:
+                    table.refresh(station_id, start or "-infinity", end or "infinity")
+            self.stdout.write(
+                self.style.WARNING(
+                    f"{table.table}: {sum(differences.values())} stale rows in {len(differences)} stations"
+                    + (", recomputed" if options["fix"] else "")
+                )
+            )
+
+        if stale and not options["fix"]:
+            raise CommandError("Stale rows found, rerun with --fix to recompute the affected stations")
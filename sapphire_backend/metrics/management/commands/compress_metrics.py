@@ -0,0 +1,72 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from zoneinfo import ZoneInfo
+
+from sapphire_backend.metrics.timeseries.compression import (
+    compress_chunks,
+    decompress_chunks,
+    get_compression_stats,
+)
+
+METRIC_TABLES = {
+    "hydro": "metrics_hydrologicalmetric",
+    "meteo": "metrics_meteorologicalmetric",
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Compress or decompress the metric chunks overlapping a time range ahead of the compression policy, "
+        "e.g. before correcting a lot of historical data, and report the compression of the tables"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--tables",
+            nargs="+",
+            choices=list(METRIC_TABLES),
+            default=list(METRIC_TABLES),
+            help="Metric tables to process, all by default",
+        )
+        parser.add_argument("--start", type=str, help="Only process chunks from this date on (YYYY-MM-DD)")
+        parser.add_argument("--end", type=str, help="Only process chunks until this date, exclusive (YYYY-MM-DD)")
+        parser.add_argument("--decompress", action="store_true", default=False, help="Decompress the chunks instead")
+        parser.add_argument(
+            "--stats", action="store_true", default=False, help="Only report the compression of the tables"
+        )
+
+    @staticmethod
+    def _parse_date(value: str | None) -> datetime | None:
+        if value is None:
+            return None
+        try:
+            return datetime.strptime(value, "%Y-%m-%d").replace(tzinfo=ZoneInfo("UTC"))
+        except ValueError:
+            raise CommandError(f"Invalid date {value}, expected YYYY-MM-DD")
+
+    def _report(self, table: str):
+        stats = get_compression_stats(table)
+        ratio = stats["before_compression_bytes"] / max(stats["after_compression_bytes"], 1)
+        self.stdout.write(
+            f"{table}: {stats['compressed_chunks']}/{stats['total_chunks']} chunks compressed, "
+            f"{stats['before_compression_bytes'] / 2**20:.1f} MiB -> {stats['after_compression_bytes'] / 2**20:.1f} MiB"
+            f" ({ratio:.1f}x)"
+        )
+
+    def handle(self, *args, **options):
+        start = self._parse_date(options["start"])
+        end = self._parse_date(options["end"])
+        if start and end and start >= end:
+            raise CommandError("Start date must be before the end date")
+
+        for name in options["tables"]:
+            table = METRIC_TABLES[name]
+            if not options["stats"]:
+                if options["decompress"]:
+                    chunks = decompress_chunks(table, start, end)
+                    self.stdout.write(self.style.SUCCESS(f"{table}: decompressed {len(chunks)} chunks"))
+                else:
+                    chunks = compress_chunks(table, start, end)
+                    self.stdout.write(self.style.SUCCESS(f"{table}: compressed {len(chunks)} chunks"))
+            self._report(table)
@@ -0,0 +1,86 @@
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from dateutil.relativedelta import relativedelta
+from django.core.management.base import CommandError
+from zoneinfo import ZoneInfo
+
+from sapphire_backend.estimations.management.commands.backfill_estimations_tables import (
+    Command as BackfillEstimationsTablesCommand,
+)
+from sapphire_backend.metrics.materialization import BULK_DATA_TABLES
+from sapphire_backend.stations.models import HydrologicalStation, MeteorologicalStation, VirtualStation
+
+
+class Command(BackfillEstimationsTablesCommand):
+    help = (
+        "Recompute the bulk data tables from their legacy views, in chunks of one station and a few months which "
+        "are processed in parallel and committed one by one"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--tables",
+            nargs="+",
+            choices=list(BULK_DATA_TABLES),
+            default=list(BULK_DATA_TABLES),
+            help="Tables to refresh, all by default",
+        )
+        parser.add_argument(
+            "--station_ids",
+            type=int,
+            nargs="+",
+            help="Only refresh these station IDs, virtual and meteo stations have IDs of their own",
+        )
+        parser.add_argument(
+            "--start", type=str, default="2010-01-01", help="Refresh from the month of this date (YYYY-MM-DD)"
+        )
+        parser.add_argument(
+            "--end", type=str, help="Refresh until this date, exclusive (YYYY-MM-DD), the next month by default"
+        )
+        parser.add_argument("--chunk_months", type=int, default=12, help="Number of months per chunk")
+        parser.add_argument("--workers", type=int, default=4, help="Number of parallel database connections")
+
+    @staticmethod
+    def _get_station_ids(name: str) -> list[int]:
+        match name:
+            case "hydro_manual":
+                stations = HydrologicalStation.objects.filter(station_type=HydrologicalStation.StationType.MANUAL)
+            case "hydro_auto":
+                stations = HydrologicalStation.objects.filter(station_type=HydrologicalStation.StationType.AUTOMATIC)
+            case "virtual":
+                stations = VirtualStation.objects.all()
+            case _:
+                stations = MeteorologicalStation.objects.all()
+        return list(stations.values_list("id", flat=True))
+
+    def handle(self, *args, **options):
+        start = self._parse_date(options["start"]).replace(day=1)
+        if options["end"] is None:
+            end = datetime.now(tz=ZoneInfo("UTC")).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+            end += relativedelta(months=1)
+        else:
+            end = self._parse_date(options["end"])
+        if start >= end:
+            raise CommandError("Start date must be before the end date")
+        if options["chunk_months"] < 1 or options["workers"] < 1:
+            raise CommandError("Number of months per chunk and number of workers must be positive integers")
+
+        for name in options["tables"]:
+            table = BULK_DATA_TABLES[name]
+            station_ids = options["station_ids"] or self._get_station_ids(name)
+            pending = queue.SimpleQueue()
+            for chunk in self._get_chunks(station_ids, start, end, options["chunk_months"]):
+                pending.put(chunk)
+
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=options["workers"]) as executor:
+                futures = [executor.submit(self._refresh_chunks, table, pending) for _ in range(options["workers"])]
+                refreshed = sum(future.result() for future in futures)
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"{table.table}: {refreshed} chunks recomputed in {time.perf_counter() - started:.1f} s"
+                )
+            )
@@ -0,0 +1,57 @@
+import logging
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from sapphire_backend.metrics.choices import BulkDataExportStatus
+from sapphire_backend.metrics.exceptions import BulkDataExportJobReclaimed
+from sapphire_backend.metrics.models import BulkDataExportJob
+from sapphire_backend.metrics.utils.bulk_data import BULK_DATA_EXPORT_STALE_AFTER, run_bulk_data_export_job
+
+
+class Command(BaseCommand):
+    help = (
+        "Run the queued bulk data export jobs. Keeps polling the queue unless --once is given, any number of "
+        "workers can run at the same time."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once", action="store_true", default=False, help="Exit once there are no more queued jobs"
+        )
+        parser.add_argument(
+            "--poll_interval", type=float, default=5, help="Seconds to wait before polling an empty queue again"
+        )
+
+    @staticmethod
+    def _run_job(job: BulkDataExportJob):
+        logging.info(f"Running bulk data export {job.uuid}")
+        try:
+            run_bulk_data_export_job(job)
+        except BulkDataExportJobReclaimed:
+            logging.warning(f"Bulk data export {job.uuid} was claimed by another worker, stopping")
+        except Exception as e:
+            logging.exception(f"Bulk data export {job.uuid} failed")
+            # only if no other worker claimed the job in the meantime
+            BulkDataExportJob.objects.filter(pk=job.pk, claim_id=job.claim_id).update(
+                status=BulkDataExportStatus.FAILED,
+                error=str(e),
+                finished_date=timezone.now(),
+                last_modified=timezone.now(),
+            )
+        else:
+            logging.info(f"Bulk data export {job.uuid} done, {job.sheets_done} sheets, {job.rows_written} rows")
+
+    def handle(self, *args, **options):
+        if options["poll_interval"] <= 0:
+            raise CommandError("Poll interval must be a positive number")
+
+        while True:
+            job = BulkDataExportJob.objects.claim_next(BULK_DATA_EXPORT_STALE_AFTER)
+            if job is not None:
+                self._run_job(job)
+            elif options["once"]:
+                return
+            else:
+                time.sleep(options["poll_interval"])
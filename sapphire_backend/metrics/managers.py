@@ -1,6 +1,13 @@
-from django.db.models import QuerySet
+import uuid
+from collections.abc import Iterable
+from datetime import timedelta
 
-from .choices import HydrologicalMeasurementType, MeteorologicalNormMetric, NormType
+from django.db import transaction
+from django.db.models import Q, QuerySet
+from django.utils import timezone
+
+from .choices import BulkDataExportStatus, HydrologicalMeasurementType, MeteorologicalNormMetric, NormType
+from .timeseries.upsert import HydrologicalMetricBulkUpserter, MeteorologicalMetricBulkUpserter, UpsertResult
 
 
 class TimeSeriesQuerySet(QuerySet):
@@ -24,9 +31,21 @@ class HydrologicalMetricQuerySet(TimeSeriesQuerySet):
     def for_sensor(self, sensor_identifier: str):
         return self.filter(sensor_identifier=sensor_identifier)
 
+    def bulk_upsert(self, metrics: Iterable, batch_size: int = 5000, refresh_view: bool = True) -> UpsertResult:
+        """
+        Insert or update the given HydrologicalMetric instances on their composite key using COPY and one
+        INSERT ... ON CONFLICT statement per batch, instead of a separate connection and statement per row.
+        """
+        return HydrologicalMetricBulkUpserter(batch_size=batch_size, refresh_view=refresh_view).upsert(metrics)
+
 
 class MeteorologicalMetricQuerySet(TimeSeriesQuerySet):
-    pass
+    def bulk_upsert(self, metrics: Iterable, batch_size: int = 5000) -> UpsertResult:
+        """
+        Insert or update the given MeteorologicalMetric instances on (timestamp_local, station_id, metric_name)
+        using COPY and one INSERT ... ON CONFLICT statement per batch. Re-sending the same metrics only updates them.
+        """
+        return MeteorologicalMetricBulkUpserter(batch_size=batch_size, refresh_view=False).upsert(metrics)
 
 
 class NormQuerySet(QuerySet):
@@ -53,3 +72,47 @@ class MeteorologicalNormQuerySet(NormQuerySet):
 
     def precipitation(self):
         return self.filter(norm_metric=MeteorologicalNormMetric.PRECIPITATION)
+
+
+class BulkDataExportJobQuerySet(QuerySet):
+    def for_organization(self, organization_uuid: str):
+        return self.filter(organization=organization_uuid)
+
+    def fresh(self, organization_uuid: str, parameters_hash: str, freshness: timedelta):
+        """
+        Jobs of the same parameters created within the freshness window which are still pending or succeeded
+        """
+        return self.for_organization(organization_uuid).filter(
+            parameters_hash=parameters_hash,
+            created_date__gte=timezone.now() - freshness,
+            status__in=[BulkDataExportStatus.QUEUED, BulkDataExportStatus.RUNNING, BulkDataExportStatus.DONE],
+        )
+
+    def claim_next(self, stale_after: timedelta):
+        """
+        Marks the oldest queued job as running and returns it, or None if there's nothing to do. Running jobs whose
+        progress wasn't updated within stale_after are considered abandoned by a stopped worker and claimed again.
+        Rows locked by other workers are skipped, so any number of workers can poll the same table. Every claim gets
+        a new claim_id, a worker whose job was claimed again can't write to it anymore.
+        """
+        with transaction.atomic():
+            job = (
+                self.select_for_update(skip_locked=True)
+                .filter(
+                    Q(status=BulkDataExportStatus.QUEUED)
+                    | Q(status=BulkDataExportStatus.RUNNING, last_modified__lt=timezone.now() - stale_after)
+                )
+                .order_by("created_date")
+                .first()
+            )
+            if job is None:
+                return None
+            job.status = BulkDataExportStatus.RUNNING
+            job.started_date = timezone.now()
+            job.sheets_done = 0
+            job.rows_written = 0
+            job.claim_id = uuid.uuid4()
+            job.save(
+                update_fields=["status", "started_date", "sheets_done", "rows_written", "claim_id", "last_modified"]
+            )
+        return job
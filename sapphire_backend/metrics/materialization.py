@@ -0,0 +1,28 @@
+from django.db import models
+
+from sapphire_backend.estimations.materialization import MaterializedEstimation
+from sapphire_backend.metrics.models import BulkDataHydroAuto, BulkDataHydroManual, BulkDataMeteo, BulkDataVirtual
+
+
+def get_bulk_data_columns(model: type[models.Model]) -> list[str]:
+    # the tables have no id column, Django only adds the field since none is declared
+    return [field.column for field in model._meta.concrete_fields if not field.primary_key]
+
+
+def get_bulk_data_table(model: type[models.Model]) -> MaterializedEstimation:
+    table = model._meta.db_table
+    return MaterializedEstimation(
+        table=table,
+        legacy_view=f"{table}_legacy",
+        refresh_function=f"refresh_{table.removeprefix('metrics_')}",
+        columns=get_bulk_data_columns(model),
+    )
+
+
+# the wide tables are maintained like the estimation tables, see migration 0014
+BULK_DATA_TABLES = {
+    "hydro_manual": get_bulk_data_table(BulkDataHydroManual),
+    "hydro_auto": get_bulk_data_table(BulkDataHydroAuto),
+    "virtual": get_bulk_data_table(BulkDataVirtual),
+    "meteo": get_bulk_data_table(BulkDataMeteo),
+}
@@ -0,0 +1,45 @@
+# Generated by Django 5.1.1 on 2026-10-17 01:47
+
+import django.db.models.deletion
+import sapphire_backend.metrics.models
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('metrics', '0012_alter_hydrologicalnorm_options_and_more'),
+        ('organizations', '0004_alter_organization_discharge_norm_type'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BulkDataExportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_date', models.DateTimeField(auto_now_add=True, verbose_name='Date created')),
+                ('last_modified', models.DateTimeField(auto_now=True, verbose_name='Modified date')),
+                ('uuid', models.UUIDField(default=uuid.uuid4, editable=False, unique=True, verbose_name='UUID')),
+                ('parameters', models.JSONField(verbose_name='Export parameters')),
+                ('parameters_hash', models.CharField(max_length=64, verbose_name='Export parameters hash')),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='queued', max_length=10, verbose_name='Status')),
+                ('sheets_done', models.PositiveIntegerField(default=0, verbose_name='Sheets written')),
+                ('rows_written', models.PositiveIntegerField(default=0, verbose_name='Rows written')),
+                ('file', models.FileField(blank=True, upload_to=sapphire_backend.metrics.models.bulk_data_export_upload_path, verbose_name='Export file')),
+                ('error', models.TextField(blank=True, verbose_name='Error')),
+                ('started_date', models.DateTimeField(blank=True, null=True, verbose_name='Date started')),
+                ('finished_date', models.DateTimeField(blank=True, null=True, verbose_name='Date finished')),
+                ('organization', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='bulk_data_export_jobs', to='organizations.organization', to_field='uuid', verbose_name='Organization')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='bulk_data_export_jobs', to=settings.AUTH_USER_MODEL, to_field='uuid', verbose_name='Requested by')),
+            ],
+            options={
+                'verbose_name': 'Bulk data export job',
+                'verbose_name_plural': 'Bulk data export jobs',
+                'ordering': ['-created_date'],
+                'indexes': [models.Index(fields=['status', 'created_date'], name='bulk_data_export_status_idx'), models.Index(fields=['organization', 'parameters_hash'], name='bulk_data_export_params_idx')],
+            },
+        ),
+    ]
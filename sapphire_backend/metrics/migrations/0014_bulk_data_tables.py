@@ -0,0 +1,422 @@
+# Generated by Django 5.1.1 on 2026-10-17 15:00
+
+from django.db import migrations
+
+BULK_DATA_TABLES = [
+    "metrics_bulk_data_hydro_manual",
+    "metrics_bulk_data_hydro_auto",
+    "metrics_bulk_data_virtual",
+    "metrics_bulk_data_meteo",
+]
+
+# estimation tables feeding the bulk data tables and the unit of time their refreshes cover, the period averages
+# are always recomputed for whole months and so are the days of the bulk data tables which depend on them
+BULK_DATA_ESTIMATION_TABLES = {
+    "estimations_water_discharge_daily": "day",
+    "estimations_water_level_decade_average": "month",
+    "estimations_water_discharge_fiveday_average": "month",
+    "estimations_water_discharge_decade_average": "month",
+}
+
+CREATE_TABLES_SQL = "".join(
+    f"""
+    ALTER VIEW {table} RENAME TO {table}_legacy;
+
+    CREATE TABLE {table} AS SELECT * FROM {table}_legacy WITH NO DATA;
+    CREATE UNIQUE INDEX {table}_station_ts_idx ON {table} (station_id, timestamp_local);
+    INSERT INTO {table} SELECT * FROM {table}_legacy;
+    """
+    for table in BULK_DATA_TABLES
+)
+
+DROP_TABLES_SQL = "".join(
+    f"""
+    DROP TABLE IF EXISTS {table};
+    ALTER VIEW {table}_legacy RENAME TO {table};
+    """
+    for table in BULK_DATA_TABLES
+)
+
+# The queries repeat the pivots of the legacy views, but filter every source by station and time range before
+# grouping so that only the refreshed rows are read. The column order has to match the one of the tables.
+ROW_FILTER = "station_id = p_station_id AND timestamp_local >= p_start AND timestamp_local < p_end"
+
+HYDRO_MANUAL_SQL = f"""
+    SELECT station_id,
+           timestamp_local::timestamp without time zone,
+           MAX(CASE WHEN metric_name = 'WLD' AND value_type = 'M' THEN avg_value END)   AS water_level_daily,
+           MAX(CASE WHEN metric_name = 'WLDA' AND value_type = 'E' THEN avg_value END)  AS water_level_daily_average,
+           MAX(CASE WHEN metric_name = 'WDD' AND value_type = 'M' THEN avg_value END)   AS discharge_measurement,
+           MAX(CASE WHEN metric_name = 'WDD' AND value_type = 'E' THEN avg_value END)   AS discharge_daily,
+           MAX(CASE WHEN metric_name = 'RCSA' AND value_type = 'M' THEN avg_value END)  AS free_river_area,
+           MAX(CASE WHEN metric_name = 'WDDCA' AND value_type = 'E' THEN avg_value END) AS decade_discharge,
+           MAX(CASE WHEN metric_name = 'WDDA' AND value_type = 'E' THEN avg_value END)  AS discharge_daily_average,
+           MAX(CASE
+                   WHEN metric_name = 'IPO' AND value_type = 'M'
+                       THEN value_code || ':' || avg_value::text END)                   AS ice_phenomena,
+           MAX(CASE WHEN metric_name = 'WLDC' AND value_type = 'M' THEN avg_value END)  AS water_level_measurement,
+           MAX(CASE WHEN metric_name = 'WDFA' AND value_type = 'E' THEN avg_value END)  AS fiveday_discharge,
+           MAX(CASE WHEN metric_name = 'ATO' AND value_type = 'M' THEN avg_value END)   AS air_temperature,
+           MAX(CASE WHEN metric_name = 'WTO' AND value_type = 'M' THEN avg_value END)   AS water_temperature,
+           MAX(CASE
+                   WHEN metric_name = 'PD' AND value_type = 'M'
+                       THEN value_code || ':' || avg_value::text END)                   AS precipitation_daily
+    FROM (SELECT station_id, timestamp_local, metric_name, value_type, avg_value, value_code
+          FROM metrics_hydrologicalmetric
+          WHERE value_type = 'M'
+            AND metric_name IN ('WLD', 'RCSA', 'IPO', 'WTO', 'ATO', 'PD')
+            AND {ROW_FILTER}
+          UNION ALL
+          SELECT station_id, timestamp_local, metric_name, value_type, avg_value, NULL as value_code
+          FROM estimations_water_discharge_daily
+          WHERE {ROW_FILTER}
+          UNION ALL
+          SELECT station_id, timestamp_local, metric_name, value_type, avg_value, NULL as value_code
+          FROM estimations_water_level_daily_average_with_periods
+          WHERE {ROW_FILTER}
+          UNION ALL
+          SELECT station_id, timestamp_local, metric_name, value_type, avg_value, NULL as value_code
+          FROM estimations_water_discharge_daily_average
+          WHERE {ROW_FILTER}
+          UNION ALL
+          SELECT station_id, timestamp_local, metric_name, value_type, avg_value, NULL as value_code
+          FROM estimations_water_discharge_fiveday_average
+          WHERE {ROW_FILTER}
+          UNION ALL
+          SELECT station_id, timestamp_local, metric_name, value_type, avg_value, NULL as value_code
+          FROM estimations_water_discharge_decade_average
+          WHERE {ROW_FILTER}) AS sub
+    WHERE station_id IN (SELECT id FROM stations_hydrologicalstation WHERE station_type = 'M')
+    GROUP BY station_id, timestamp_local::timestamp without time zone
+"""
+
+HYDRO_AUTO_SQL = f"""
+    SELECT station_id,
+           timestamp_local::timestamp without time zone,
+           MAX(CASE WHEN metric_name = 'WLD' AND value_type = 'A' THEN min_value END)   AS water_level_daily_min,
+           MAX(CASE WHEN metric_name = 'WLD' AND value_type = 'A' THEN avg_value END)   AS water_level_daily_average,
+           MAX(CASE WHEN metric_name = 'WLD' AND value_type = 'A' THEN max_value END)   AS water_level_daily_max,
+           MAX(CASE WHEN metric_name = 'ATO' AND value_type = 'A' THEN min_value END)   AS air_temperature_min,
+           MAX(CASE WHEN metric_name = 'ATO' AND value_type = 'A' THEN avg_value END)   AS air_temperature_average,
+           MAX(CASE WHEN metric_name = 'ATO' AND value_type = 'A' THEN max_value END)   AS air_temperature_max,
+           MAX(CASE WHEN metric_name = 'WTO' AND value_type = 'A' THEN min_value END)   AS water_temperature_min,
+           MAX(CASE WHEN metric_name = 'WTO' AND value_type = 'A' THEN avg_value END)   AS water_temperature_average,
+           MAX(CASE WHEN metric_name = 'WTO' AND value_type = 'A' THEN max_value END)   AS water_temperature_max,
+           MAX(CASE WHEN metric_name = 'WDDA' AND value_type = 'E' THEN avg_value END)  AS discharge_daily_average,
+           MAX(CASE WHEN metric_name = 'WDFA' AND value_type = 'E' THEN avg_value END)  AS fiveday_discharge,
+           MAX(CASE WHEN metric_name = 'WDDCA' AND value_type = 'E' THEN avg_value END) AS decade_discharge
+    FROM (SELECT station_id, timestamp_local, metric_name, value_type, min_value, avg_value, max_value
+          FROM metrics_hydrologicalmetric
+          WHERE value_type = 'A'
+            AND metric_name IN ('WLD', 'WTO', 'ATO')
+            AND {ROW_FILTER}
+          UNION ALL
+          SELECT station_id, timestamp_local, metric_name, value_type, min_value, avg_value, max_value
+          FROM estimations_water_discharge_daily_average
+          WHERE {ROW_FILTER}
+          UNION ALL
+          SELECT station_id, timestamp_local, metric_name, value_type, min_value, avg_value, max_value
+          FROM estimations_water_discharge_fiveday_average
+          WHERE {ROW_FILTER}
+          UNION ALL
+          SELECT station_id, timestamp_local, metric_name, value_type, min_value, avg_value, max_value
+          FROM estimations_water_discharge_decade_average
+          WHERE {ROW_FILTER}) AS sub
+    WHERE station_id IN (SELECT id FROM stations_hydrologicalstation WHERE station_type = 'A')
+    GROUP BY station_id, timestamp_local::timestamp without time zone
+"""
+
+VIRTUAL_SQL = f"""
+    SELECT station_id,
+           timestamp_local::timestamp without time zone,
+           MAX(CASE WHEN metric_name = 'WDD' AND value_type = 'E' THEN avg_value END)   AS discharge_daily,
+           MAX(CASE WHEN metric_name = 'WDDCA' AND value_type = 'E' THEN avg_value END) AS decade_discharge,
+           MAX(CASE WHEN metric_name = 'WDDA' AND value_type = 'E' THEN avg_value END)  AS discharge_daily_average,
+           MAX(CASE WHEN metric_name = 'WDFA' AND value_type = 'E' THEN avg_value END)  AS fiveday_discharge
+    FROM (SELECT station_id, timestamp_local, metric_name, value_type, avg_value
+          FROM estimations_water_discharge_daily_virtual
+          WHERE {ROW_FILTER}
+          UNION ALL
+          SELECT station_id, timestamp_local, metric_name, value_type, avg_value
+          FROM estimations_water_discharge_daily_average_virtual
+          WHERE {ROW_FILTER}
+          UNION ALL
+          SELECT station_id, timestamp_local, metric_name, value_type, avg_value
+          FROM estimations_water_discharge_fiveday_average_virtual
+          WHERE {ROW_FILTER}
+          UNION ALL
+          SELECT station_id, timestamp_local, metric_name, value_type, avg_value
+          FROM estimations_water_discharge_decade_average_virtual
+          WHERE {ROW_FILTER}) AS sub
+    GROUP BY station_id, timestamp_local::timestamp without time zone
+"""
+
+METEO_SQL = f"""
+    SELECT station_id,
+           timestamp_local::timestamp without time zone,
+           MAX(CASE WHEN metric_name = 'PDCA' AND value_type = 'M' THEN hydrological_round(value) END)  AS precipitation_decade_average,
+           MAX(CASE WHEN metric_name = 'PMA' AND value_type = 'M' THEN hydrological_round(value) END)   AS precipitation_month_average,
+           MAX(CASE WHEN metric_name = 'ATDCA' AND value_type = 'M' THEN hydrological_round(value) END) AS air_temperature_decade_average,
+           MAX(CASE WHEN metric_name = 'ATMA' AND value_type = 'M' THEN hydrological_round(value) END)  AS air_temperature_month_average
+    FROM metrics_meteorologicalmetric
+    WHERE {ROW_FILTER}
+    GROUP BY station_id, timestamp_local::timestamp without time zone
+"""
+
+REFRESH_FUNCTION_SQL = """
+    -- recompute the rows of one station in [p_start, p_end)
+    CREATE OR REPLACE FUNCTION refresh_{name}(p_station_id bigint, p_start timestamptz, p_end timestamptz)
+    RETURNS void AS $$
+    BEGIN
+        DELETE FROM metrics_{name}
+        WHERE station_id = p_station_id
+            AND timestamp_local >= p_start::timestamp without time zone
+            AND timestamp_local < p_end::timestamp without time zone;
+
+        INSERT INTO metrics_{name}
+        {query};
+    END;
+    $$ LANGUAGE plpgsql;
+"""
+
+REFRESH_FUNCTIONS_SQL = "".join(
+    REFRESH_FUNCTION_SQL.format(name=name, query=query)
+    for name, query in [
+        ("bulk_data_hydro_manual", HYDRO_MANUAL_SQL),
+        ("bulk_data_hydro_auto", HYDRO_AUTO_SQL),
+        ("bulk_data_virtual", VIRTUAL_SQL),
+        ("bulk_data_meteo", METEO_SQL),
+    ]
+)
+
+ESTIMATION_TRIGGERS_SQL = "".join(
+    f"""
+    CREATE TRIGGER bulk_data_estimation_insert
+        AFTER INSERT ON {table}
+        REFERENCING NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION bulk_data_estimation_changed('{unit}');
+    CREATE TRIGGER bulk_data_estimation_update
+        AFTER UPDATE ON {table}
+        REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION bulk_data_estimation_changed('{unit}');
+    CREATE TRIGGER bulk_data_estimation_delete
+        AFTER DELETE ON {table}
+        REFERENCING OLD TABLE AS old_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION bulk_data_estimation_changed('{unit}');
+    """
+    for table, unit in BULK_DATA_ESTIMATION_TABLES.items()
+)
+
+DROP_ESTIMATION_TRIGGERS_SQL = "".join(
+    f"""
+    DROP TRIGGER IF EXISTS bulk_data_estimation_delete ON {table};
+    DROP TRIGGER IF EXISTS bulk_data_estimation_update ON {table};
+    DROP TRIGGER IF EXISTS bulk_data_estimation_insert ON {table};
+    """
+    for table in BULK_DATA_ESTIMATION_TABLES
+)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('estimations', '0011_period_average_tables'),
+        ('metrics', '0013_bulk_data_export_job'),
+    ]
+
+    operations = [
+        migrations.RunSQL(CREATE_TABLES_SQL, reverse_sql=DROP_TABLES_SQL),
+        migrations.RunSQL(
+            REFRESH_FUNCTIONS_SQL,
+            reverse_sql="""
+            DROP FUNCTION IF EXISTS refresh_bulk_data_meteo(bigint, timestamptz, timestamptz);
+            DROP FUNCTION IF EXISTS refresh_bulk_data_virtual(bigint, timestamptz, timestamptz);
+            DROP FUNCTION IF EXISTS refresh_bulk_data_hydro_auto(bigint, timestamptz, timestamptz);
+            DROP FUNCTION IF EXISTS refresh_bulk_data_hydro_manual(bigint, timestamptz, timestamptz);
+            """,
+        ),
+        migrations.RunSQL(
+            """
+            -- the station type decides which of the two tables holds the rows of a hydro station
+            CREATE OR REPLACE FUNCTION refresh_bulk_data_hydro(
+                p_station_id bigint, p_start timestamptz, p_end timestamptz
+            )
+            RETURNS void AS $$
+            BEGIN
+                PERFORM refresh_bulk_data_hydro_manual(p_station_id, p_start, p_end);
+                PERFORM refresh_bulk_data_hydro_auto(p_station_id, p_start, p_end);
+            END;
+            $$ LANGUAGE plpgsql;
+
+            -- the estimations of a hydro station also feed the virtual stations it is associated with
+            CREATE OR REPLACE FUNCTION refresh_bulk_data_estimations(
+                p_station_id bigint, p_start timestamptz, p_end timestamptz
+            )
+            RETURNS void AS $$
+            DECLARE
+                v_virtual_station_id bigint;
+            BEGIN
+                PERFORM refresh_bulk_data_hydro(p_station_id, p_start, p_end);
+                FOR v_virtual_station_id IN
+                    SELECT virtual_station_id FROM stations_virtualstationassociation WHERE hydro_station_id = p_station_id
+                LOOP
+                    PERFORM refresh_bulk_data_virtual(v_virtual_station_id, p_start, p_end);
+                END LOOP;
+            END;
+            $$ LANGUAGE plpgsql;
+
+            -- the metrics are pivoted per exact timestamp, a changed row only affects its own timestamp
+            CREATE OR REPLACE FUNCTION bulk_data_hydro_metric_changed()
+            RETURNS trigger AS $$
+            BEGIN
+                IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                    PERFORM refresh_bulk_data_hydro(
+                        OLD.station_id, OLD.timestamp_local, OLD.timestamp_local + INTERVAL '1 microsecond'
+                    );
+                END IF;
+                IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                    PERFORM refresh_bulk_data_hydro(
+                        NEW.station_id, NEW.timestamp_local, NEW.timestamp_local + INTERVAL '1 microsecond'
+                    );
+                END IF;
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql;
+
+            CREATE OR REPLACE FUNCTION bulk_data_meteo_metric_changed()
+            RETURNS trigger AS $$
+            BEGIN
+                IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                    PERFORM refresh_bulk_data_meteo(
+                        OLD.station_id, OLD.timestamp_local, OLD.timestamp_local + INTERVAL '1 microsecond'
+                    );
+                END IF;
+                IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                    PERFORM refresh_bulk_data_meteo(
+                        NEW.station_id, NEW.timestamp_local, NEW.timestamp_local + INTERVAL '1 microsecond'
+                    );
+                END IF;
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql;
+
+            -- Statement level, the refresh functions of the estimation tables delete and insert a whole range at
+            -- once. The changed rows are collected per station and the days (or months, TG_ARGV[0]) between the
+            -- first and the last one are recomputed.
+            CREATE OR REPLACE FUNCTION bulk_data_estimation_changed()
+            RETURNS trigger AS $$
+            DECLARE
+                v_station_ids bigint[] := '{}';
+                v_timestamps timestamptz[] := '{}';
+                v_change record;
+            BEGIN
+                IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                    SELECT v_station_ids || array_agg(station_id::bigint), v_timestamps || array_agg(timestamp_local)
+                    INTO v_station_ids, v_timestamps
+                    FROM old_rows;
+                END IF;
+                IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                    SELECT v_station_ids || array_agg(station_id::bigint), v_timestamps || array_agg(timestamp_local)
+                    INTO v_station_ids, v_timestamps
+                    FROM new_rows;
+                END IF;
+
+                FOR v_change IN
+                    SELECT station_id,
+                           date_trunc(TG_ARGV[0], MIN(timestamp_local)) AS start_date,
+                           date_trunc(TG_ARGV[0], MAX(timestamp_local)) + ('1 ' || TG_ARGV[0])::interval AS end_date
+                    FROM unnest(v_station_ids, v_timestamps) AS changed (station_id, timestamp_local)
+                    GROUP BY station_id
+                LOOP
+                    PERFORM refresh_bulk_data_estimations(v_change.station_id, v_change.start_date, v_change.end_date);
+                END LOOP;
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql;
+
+            CREATE OR REPLACE FUNCTION bulk_data_virtual_association_changed()
+            RETURNS trigger AS $$
+            BEGIN
+                IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                    PERFORM refresh_bulk_data_virtual(OLD.virtual_station_id, '-infinity', 'infinity');
+                END IF;
+                IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                    PERFORM refresh_bulk_data_virtual(NEW.virtual_station_id, '-infinity', 'infinity');
+                END IF;
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql;
+
+            CREATE OR REPLACE FUNCTION bulk_data_station_type_changed()
+            RETURNS trigger AS $$
+            BEGIN
+                PERFORM refresh_bulk_data_hydro(NEW.id, '-infinity', 'infinity');
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql;
+
+            -- Triggers of one event fire in name order, these run before the ones maintaining the estimation
+            -- tables. The daily discharge recomputed afterwards reaches the bulk data tables through the statement
+            -- triggers of the estimation tables, so does the water level daily average continuous aggregate
+            -- through refresh_period_averages().
+            CREATE TRIGGER bulk_data_hydro_metric_insert
+                AFTER INSERT ON metrics_hydrologicalmetric
+                FOR EACH ROW
+                WHEN (
+                    (NEW.value_type = 'M' AND NEW.metric_name IN ('WLD', 'RCSA', 'IPO', 'WTO', 'ATO', 'PD'))
+                    OR (NEW.value_type = 'A' AND NEW.metric_name IN ('WLD', 'WTO', 'ATO'))
+                )
+                EXECUTE FUNCTION bulk_data_hydro_metric_changed();
+            CREATE TRIGGER bulk_data_hydro_metric_update
+                AFTER UPDATE ON metrics_hydrologicalmetric
+                FOR EACH ROW
+                WHEN (
+                    (OLD.value_type = 'M' AND OLD.metric_name IN ('WLD', 'RCSA', 'IPO', 'WTO', 'ATO', 'PD'))
+                    OR (OLD.value_type = 'A' AND OLD.metric_name IN ('WLD', 'WTO', 'ATO'))
+                    OR (NEW.value_type = 'M' AND NEW.metric_name IN ('WLD', 'RCSA', 'IPO', 'WTO', 'ATO', 'PD'))
+                    OR (NEW.value_type = 'A' AND NEW.metric_name IN ('WLD', 'WTO', 'ATO'))
+                )
+                EXECUTE FUNCTION bulk_data_hydro_metric_changed();
+            CREATE TRIGGER bulk_data_hydro_metric_delete
+                AFTER DELETE ON metrics_hydrologicalmetric
+                FOR EACH ROW
+                WHEN (
+                    (OLD.value_type = 'M' AND OLD.metric_name IN ('WLD', 'RCSA', 'IPO', 'WTO', 'ATO', 'PD'))
+                    OR (OLD.value_type = 'A' AND OLD.metric_name IN ('WLD', 'WTO', 'ATO'))
+                )
+                EXECUTE FUNCTION bulk_data_hydro_metric_changed();
+
+            -- every meteo metric creates a row, even one without a value in the pivoted columns
+            CREATE TRIGGER bulk_data_meteo_metric_changed
+                AFTER INSERT OR UPDATE OR DELETE ON metrics_meteorologicalmetric
+                FOR EACH ROW EXECUTE FUNCTION bulk_data_meteo_metric_changed();
+
+            CREATE TRIGGER bulk_data_virtual_association_changed
+                AFTER INSERT OR UPDATE OR DELETE ON stations_virtualstationassociation
+                FOR EACH ROW EXECUTE FUNCTION bulk_data_virtual_association_changed();
+
+            CREATE TRIGGER bulk_data_station_type_changed
+                AFTER UPDATE OF station_type ON stations_hydrologicalstation
+                FOR EACH ROW
+                WHEN (OLD.station_type IS DISTINCT FROM NEW.station_type)
+                EXECUTE FUNCTION bulk_data_station_type_changed();
+            """
+            + ESTIMATION_TRIGGERS_SQL,
+            reverse_sql=DROP_ESTIMATION_TRIGGERS_SQL
+            + """
+            DROP TRIGGER IF EXISTS bulk_data_station_type_changed ON stations_hydrologicalstation;
+            DROP TRIGGER IF EXISTS bulk_data_virtual_association_changed ON stations_virtualstationassociation;
+            DROP TRIGGER IF EXISTS bulk_data_meteo_metric_changed ON metrics_meteorologicalmetric;
+            DROP TRIGGER IF EXISTS bulk_data_hydro_metric_delete ON metrics_hydrologicalmetric;
+            DROP TRIGGER IF EXISTS bulk_data_hydro_metric_update ON metrics_hydrologicalmetric;
+            DROP TRIGGER IF EXISTS bulk_data_hydro_metric_insert ON metrics_hydrologicalmetric;
+            DROP FUNCTION IF EXISTS bulk_data_station_type_changed();
+            DROP FUNCTION IF EXISTS bulk_data_virtual_association_changed();
+            DROP FUNCTION IF EXISTS bulk_data_estimation_changed();
+            DROP FUNCTION IF EXISTS bulk_data_meteo_metric_changed();
+            DROP FUNCTION IF EXISTS bulk_data_hydro_metric_changed();
+            DROP FUNCTION IF EXISTS refresh_bulk_data_estimations(bigint, timestamptz, timestamptz);
+            DROP FUNCTION IF EXISTS refresh_bulk_data_hydro(bigint, timestamptz, timestamptz);
+            """,
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.1.1 on 2026-10-17 17:00
+
+from django.db import migrations
+
+# Every column of a unique constraint has to be a segment by or an order by column of the compression. The charts
+# and exports read a single station and metric over a time range, so those segment the data and the rows of a
+# segment are stored by time, newest first like most of the queries read them.
+COMPRESSION_SETTINGS = {
+    "metrics_hydrologicalmetric": {
+        "segmentby": "station_id, metric_name",
+        "orderby": "timestamp_local DESC, value_type, sensor_identifier",
+    },
+    "metrics_meteorologicalmetric": {
+        "segmentby": "station_id, metric_name",
+        "orderby": "timestamp_local DESC",
+    },
+}
+
+# recent data is still being corrected, only compress chunks whose whole range is older than this
+COMPRESS_AFTER = "1 year"
+
+ENABLE_COMPRESSION_SQL = "".join(
+    f"""
+    ALTER TABLE public.{table} SET (
+        timescaledb.compress,
+        timescaledb.compress_segmentby = '{settings["segmentby"]}',
+        timescaledb.compress_orderby = '{settings["orderby"]}'
+    );
+    SELECT add_compression_policy('public.{table}', compress_after => INTERVAL '{COMPRESS_AFTER}');
+    """
+    for table, settings in COMPRESSION_SETTINGS.items()
+)
+
+DISABLE_COMPRESSION_SQL = "".join(
+    f"""
+    SELECT remove_compression_policy('public.{table}', if_exists => true);
+    SELECT decompress_chunk(chunk, if_compressed => true) FROM show_chunks('public.{table}') AS chunk;
+    ALTER TABLE public.{table} SET (timescaledb.compress = false);
+    """
+    for table in COMPRESSION_SETTINGS
+)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("metrics", "0014_bulk_data_tables"),
+    ]
+
+    operations = [
+        migrations.RunSQL(sql=ENABLE_COMPRESSION_SQL, reverse_sql=DISABLE_COMPRESSION_SQL),
+    ]
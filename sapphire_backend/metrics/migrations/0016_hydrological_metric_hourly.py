@@ -0,0 +1,118 @@
+# Generated by Django 5.1.1 on 2026-10-17 18:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("metrics", "0015_metric_compression"),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            # automatic stations deliver a reading every 10 minutes, charts of longer ranges read the hourly buckets;
+            # the hours the policy has not materialized yet are computed from the raw rows (real-time aggregation)
+            sql="""
+            CREATE MATERIALIZED VIEW metrics_hydrologicalmetric_hourly
+            WITH (timescaledb.continuous, timescaledb.materialized_only = false) AS
+            SELECT
+                time_bucket('1 hour', timestamp_local) AS timestamp_local,
+                station_id,
+                metric_name,
+                value_type,
+                sensor_identifier,
+                MIN(COALESCE(min_value, avg_value)) AS min_value,
+                AVG(avg_value) AS avg_value,
+                MAX(COALESCE(max_value, avg_value)) AS max_value,
+                COUNT(avg_value) AS value_count
+            FROM metrics_hydrologicalmetric
+            GROUP BY time_bucket('1 hour', timestamp_local), station_id, metric_name, value_type, sensor_identifier
+            WITH NO DATA;
+
+            CREATE INDEX metrics_hydrologicalmetric_hourly_station_metric_idx
+                ON metrics_hydrologicalmetric_hourly (station_id, metric_name, timestamp_local DESC);
+
+            SELECT add_continuous_aggregate_policy(
+                'metrics_hydrologicalmetric_hourly',
+                start_offset => NULL,
+                end_offset => INTERVAL '1 hour',
+                schedule_interval => INTERVAL '30 minutes'
+            );
+            """,
+            reverse_sql="""
+            SELECT remove_continuous_aggregate_policy('metrics_hydrologicalmetric_hourly', if_exists => true);
+            DROP MATERIALIZED VIEW IF EXISTS metrics_hydrologicalmetric_hourly;
+            """,
+        ),
+        migrations.CreateModel(
+            name="HydrologicalMetricHourly",
+            fields=[
+                (
+                    "min_value",
+                    models.DecimalField(
+                        blank=True, decimal_places=5, max_digits=15, null=True, verbose_name="Minimum value"
+                    ),
+                ),
+                (
+                    "max_value",
+                    models.DecimalField(
+                        blank=True, decimal_places=5, max_digits=15, null=True, verbose_name="Maximum value"
+                    ),
+                ),
+                (
+                    "timestamp_local",
+                    models.DateTimeField(
+                        primary_key=True, serialize=False, verbose_name="Timestamp local without timezone"
+                    ),
+                ),
+                (
+                    "metric_name",
+                    models.CharField(
+                        choices=[
+                            ("WLD", "Water level daily"),
+                            ("WLDA", "Water level daily average"),
+                            ("WLDC", "Water level decadal"),
+                            ("WLDCA", "Water level decade average"),
+                            ("WDD", "Water discharge daily"),
+                            ("WDDA", "Water discharge daily average"),
+                            ("WDFA", "Water discharge fiveday average"),
+                            ("WDDCA", "Water discharge decade average"),
+                            ("WDDCAH", "Water discharge decade average historical"),
+                            ("WTO", "Water temperature observation"),
+                            ("ATO", "Air temperature observation"),
+                            ("IPO", "Ice phenomena observation"),
+                            ("PD", "Precipitation daily"),
+                            ("WTDA", "Water temperature daily average"),
+                            ("ATDA", "Air temperature daily average"),
+                            ("RCSA", "River cross section area"),
+                            ("MD", "Maximum depth"),
+                        ],
+                        max_length=20,
+                        verbose_name="Metric name",
+                    ),
+                ),
+                (
+                    "value_type",
+                    models.CharField(
+                        choices=[
+                            ("M", "Manual"),
+                            ("A", "Automatic"),
+                            ("E", "Estimated"),
+                            ("I", "Imported"),
+                            ("U", "Unknown"),
+                            ("O", "Override"),
+                        ],
+                        max_length=2,
+                        verbose_name="Value type",
+                    ),
+                ),
+                ("sensor_identifier", models.CharField(blank=True, max_length=50, verbose_name="Sensor identifier")),
+                ("avg_value", models.DecimalField(decimal_places=5, max_digits=15, verbose_name="Average value")),
+                ("value_count", models.IntegerField(verbose_name="Number of values")),
+            ],
+            options={
+                "db_table": "metrics_hydrologicalmetric_hourly",
+                "managed": False,
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.1 on 2026-10-17 20:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("metrics", "0016_hydrological_metric_hourly"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="bulkdataexportjob",
+            name="claim_id",
+            field=models.UUIDField(blank=True, editable=False, null=True, verbose_name="Claim ID"),
+        ),
+    ]
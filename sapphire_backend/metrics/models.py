@@ -3,16 +3,18 @@ from datetime import datetime, timedelta
 
 import psycopg
 from django import db
-from django.db import connection, models
+from django.db import connection, models, transaction
 from django.utils.translation import gettext_lazy as _
 
 from sapphire_backend.quality_control.choices import HistoryLogStationType
 from sapphire_backend.quality_control.models import HistoryLogEntry
-from sapphire_backend.utils.mixins.models import SourceTypeMixin
+from sapphire_backend.utils.mixins.models import CreateLastModifiedDateMixin, SourceTypeMixin, UUIDMixin
 
 from ..stations.models import HydrologicalStation, MeteorologicalStation
 from ..utils.datetime_helper import SmartDatetime
+from ..utils.db_pool import autocommit_connection
 from .choices import (
+    BulkDataExportStatus,
     HydrologicalMeasurementType,
     HydrologicalMetricName,
     HydrologicalNormMetric,
@@ -22,12 +24,15 @@ from .choices import (
     MetricUnit,
 )
 from .managers import (
+    BulkDataExportJobQuerySet,
     HydrologicalMetricQuerySet,
     HydrologicalNormQuerySet,
     MeteorologicalMetricQuerySet,
     MeteorologicalNormQuerySet,
 )
 from .mixins import BaseHydroMetricMixin, MinMaxValueMixin, NormModelMixin, SensorInfoMixin
+from .timeseries.compression import decompress_chunks, is_compressed_chunk_error
+from .timeseries.refresh import refresh_queue
 
 
 def resolve_timestamp_local_tz_pair(
@@ -126,37 +131,37 @@ class HydrologicalMetric(BaseHydroMetricMixin, MinMaxValueMixin, SensorInfoMixin
                 value_code = EXCLUDED.value_code;
         """
 
-        try:  # TODO this is horrible, the metrics test factory only transactional block, need to find a better way
-            if connection.client.connection.settings_dict["NAME"] == "test_sapphire_backend":
-                conn = connection
-            else:
-                conn = psycopg.connect(self.conn_string, autocommit=True)
-            with conn.cursor() as cursor:
-                if upsert:
-                    cursor.execute(sql_query_upsert)
-                else:
-                    cursor.execute(sql_query_insert)
-            if connection.client.connection.settings_dict["NAME"] != "test_sapphire_backend":
-                conn.close()
-        except db.utils.NotSupportedError as e:
+        sql_query = sql_query_upsert if upsert else sql_query_insert
+        try:
+            with autocommit_connection() as conn, conn.cursor() as cursor:
+                cursor.execute(sql_query)
+        except (db.utils.NotSupportedError, psycopg.NotSupportedError) as e:
             """
             Handle specific error. Timescale has this bug, hyper chunks should not have insert blockers.
             E.g.:
             invalid INSERT on the root table of hypertable "_hyper_1_104_chunk"
             HINT:  Make sure the TimescaleDB extension has been preloaded.
             """
-            if 'invalid INSERT on the root table of hypertable "' in str(e):
+            if is_compressed_chunk_error(e):
+                # decompressing locks the chunk until the transaction of the request ends, so the write has to go
+                # through the same connection
+                decompress_chunks(
+                    "metrics_hydrologicalmetric",
+                    self.timestamp_local,
+                    self.timestamp_local + timedelta(microseconds=1),
+                )
+                with connection.cursor() as cursor:
+                    cursor.execute(sql_query)
+            elif 'invalid INSERT on the root table of hypertable "' in str(e):
                 hyper_chunk_name = str(e).split('invalid INSERT on the root table of hypertable "')[1].split('"')[0]
                 if hyper_chunk_name.startswith("_hyper") and hyper_chunk_name.endswith("_chunk"):
                     sql_query_remove_trigger = (
                         f"drop trigger ts_insert_blocker on _timescaledb_internal.{hyper_chunk_name}; "
                     )
-                    conn = psycopg.connect(self.conn_string, autocommit=True)
-                    with conn.cursor() as cursor:
+                    with autocommit_connection() as conn, conn.cursor() as cursor:
                         cursor.execute(sql_query_remove_trigger)
                         logging.info(f"Removed unwanted ts_insert_blocker on {hyper_chunk_name}")
-                        cursor.execute(sql_query_insert)
-                    conn.close()
+                        cursor.execute(sql_query)
                 else:
                     raise Exception(e)
             else:
@@ -171,26 +176,9 @@ class HydrologicalMetric(BaseHydroMetricMixin, MinMaxValueMixin, SensorInfoMixin
             ):
                 self._refresh_view()
 
-    @property
-    def conn_string(self):
-        CONN_STRING = (
-            f"host={connection.client.connection.settings_dict['HOST']} "
-            f"port={connection.client.connection.settings_dict['PORT']} "
-            f"user={connection.client.connection.settings_dict['USER']} "
-            f"password={connection.client.connection.settings_dict['PASSWORD']} "
-            f"dbname={connection.client.connection.settings_dict['NAME']}"
-        )
-        return CONN_STRING
-
     def _refresh_view(self):
-        # cannot be in the same transaction block so we ensure this by creating a new connection with autocommit
-        start_date_str = self.timestamp_local.strftime("%Y-%m-%d")
-        end_date_str = (self.timestamp_local + timedelta(days=1)).strftime("%Y-%m-%d")
-        sql_refresh_view = f"CALL refresh_continuous_aggregate('estimations_water_level_daily_average', '{start_date_str}', '{end_date_str}');"
-        conn = psycopg.connect(self.conn_string, autocommit=True)
-        with conn.cursor() as cursor:
-            cursor.execute(sql_refresh_view)
-        conn.close()
+        # queued so that consecutive writes of the same days share one refresh after the transaction commits
+        refresh_queue.add(self.timestamp_local.date())
 
     @property
     def history_logs(self):
@@ -212,6 +200,25 @@ class HydrologicalMetric(BaseHydroMetricMixin, MinMaxValueMixin, SensorInfoMixin
         return HistoryLogEntry.objects.create(**self.pk_fields, **log_entry_values)
 
 
+class HydrologicalMetricHourly(MinMaxValueMixin, models.Model):
+    """
+    Hourly continuous aggregate of the hydrological metrics, see migration 0016. The charts read it for ranges
+    too long for the raw rows, the query router of TimeseriesQueryManager picks the source.
+    """
+
+    timestamp_local = models.DateTimeField(primary_key=True, verbose_name=_("Timestamp local without timezone"))
+    station = models.ForeignKey("stations.HydrologicalStation", verbose_name=_("Station"), on_delete=models.DO_NOTHING)
+    metric_name = models.CharField(verbose_name=_("Metric name"), choices=HydrologicalMetricName, max_length=20)
+    value_type = models.CharField(verbose_name=_("Value type"), choices=HydrologicalMeasurementType, max_length=2)
+    sensor_identifier = models.CharField(verbose_name=_("Sensor identifier"), blank=True, max_length=50)
+    avg_value = models.DecimalField(verbose_name=_("Average value"), max_digits=15, decimal_places=5)
+    value_count = models.IntegerField(verbose_name=_("Number of values"))
+
+    class Meta:
+        managed = False
+        db_table = "metrics_hydrologicalmetric_hourly"
+
+
 class MeteorologicalMetric(SourceTypeMixin, models.Model):
     timestamp_local = models.DateTimeField(primary_key=True, verbose_name=_("Timestamp local without timezone"))
     timestamp = models.DateTimeField(verbose_name=_("Timestamp with timezone"))
@@ -311,11 +318,20 @@ class MeteorologicalMetric(SourceTypeMixin, models.Model):
         source_id = EXCLUDED.source_id;
         """
 
+        sql_query = sql_query_upsert if upsert else sql_query_insert
         with connection.cursor() as cursor:
-            if upsert:
-                cursor.execute(sql_query_upsert)
-            else:
-                cursor.execute(sql_query_insert)
+            try:
+                with transaction.atomic():
+                    cursor.execute(sql_query)
+            except db.utils.NotSupportedError as e:
+                if not is_compressed_chunk_error(e):
+                    raise
+                decompress_chunks(
+                    "metrics_meteorologicalmetric",
+                    self.timestamp_local,
+                    self.timestamp_local + timedelta(microseconds=1),
+                )
+                cursor.execute(sql_query)
 
 
 class HydrologicalNorm(NormModelMixin, models.Model):
@@ -386,6 +402,8 @@ class MeteorologicalNorm(NormModelMixin, models.Model):
         return f"Meteo norm {self.station.name} ({self.norm_type}, {self.norm_metric} - {self.ordinal_number})"
 
 
+# the bulk data models read wide tables which database triggers keep up to date, see migration 0014,
+# the original pivot views remain as metrics_bulk_data_*_legacy
 class BulkDataHydroManual(models.Model):
     station = models.ForeignKey("stations.HydrologicalStation", on_delete=models.DO_NOTHING)
     timestamp_local = models.DateTimeField()
@@ -453,3 +471,53 @@ class BulkDataMeteo(models.Model):
     class Meta:
         managed = False
         db_table = "metrics_bulk_data_meteo"
+
+
+def bulk_data_export_upload_path(instance, filename):
+    return f"bulk_data_exports/{instance.organization_id}/{instance.uuid}/{filename}"
+
+
+class BulkDataExportJob(UUIDMixin, CreateLastModifiedDateMixin, models.Model):
+    organization = models.ForeignKey(
+        "organizations.Organization",
+        to_field="uuid",
+        verbose_name=_("Organization"),
+        on_delete=models.CASCADE,
+        related_name="bulk_data_export_jobs",
+    )
+    user = models.ForeignKey(
+        "users.User",
+        to_field="uuid",
+        verbose_name=_("Requested by"),
+        on_delete=models.SET_NULL,
+        related_name="bulk_data_export_jobs",
+        null=True,
+        blank=True,
+    )
+    parameters = models.JSONField(verbose_name=_("Export parameters"))
+    parameters_hash = models.CharField(verbose_name=_("Export parameters hash"), max_length=64)
+    status = models.CharField(
+        verbose_name=_("Status"), choices=BulkDataExportStatus, default=BulkDataExportStatus.QUEUED, max_length=10
+    )
+    sheets_done = models.PositiveIntegerField(verbose_name=_("Sheets written"), default=0)
+    rows_written = models.PositiveIntegerField(verbose_name=_("Rows written"), default=0)
+    file = models.FileField(verbose_name=_("Export file"), upload_to=bulk_data_export_upload_path, blank=True)
+    error = models.TextField(verbose_name=_("Error"), blank=True)
+    started_date = models.DateTimeField(verbose_name=_("Date started"), null=True, blank=True)
+    finished_date = models.DateTimeField(verbose_name=_("Date finished"), null=True, blank=True)
+    # changed on every claim, only the worker holding the current one may write the progress and the result
+    claim_id = models.UUIDField(verbose_name=_("Claim ID"), null=True, blank=True, editable=False)
+
+    objects = BulkDataExportJobQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = _("Bulk data export job")
+        verbose_name_plural = _("Bulk data export jobs")
+        ordering = ["-created_date"]
+        indexes = [
+            models.Index(fields=["status", "created_date"], name="bulk_data_export_status_idx"),
+            models.Index(fields=["organization", "parameters_hash"], name="bulk_data_export_params_idx"),
+        ]
+
+    def __str__(self):
+        return f"Bulk data export {self.uuid} ({self.status})"
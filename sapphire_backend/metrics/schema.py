@@ -1,6 +1,7 @@
 from datetime import datetime, timezone
 from enum import Enum
 from typing import Literal
+from uuid import UUID
 
 from ninja import Field, FilterSchema, ModelSchema, Schema
 from ninja.errors import ValidationError
@@ -14,9 +15,14 @@ from .choices import (
     MeteorologicalMetricName,
     MeteorologicalNormMetric,
     NormType,
+    TimeseriesResolution,
 )
-from .models import HydrologicalNorm, MeteorologicalNorm
-from .utils.helpers import PentadDecadeHelper
+from .models import BulkDataExportJob, HydrologicalNorm, MeteorologicalNorm
+from .timeseries.downsampling import MIN_MAX_POINTS
+from .utils.helpers import SDK_CURSOR_MAX_PAGE_SIZE, SDK_CURSOR_PAGE_SIZE, PentadDecadeHelper
+
+# stations of one chart request of a dashboard, their UUIDs are repeated in the query string
+CHART_BATCH_MAX_STATIONS = 100
 
 
 class BaseTimeseriesFilterSchema(FilterSchema):
@@ -88,7 +94,15 @@ class HFChartSchema(Schema):
 
     @staticmethod
     def resolve_y(obj):
-        return obj.get("WLD") or obj.get("WLDA") or obj.get("WDDA")
+        # points of a single metric series already carry their value
+        return obj.get("WLD") or obj.get("WLDA") or obj.get("WDDA") or obj.get("y")
+
+
+class HFChartSeriesSchema(Schema):
+    station_uuid: UUID
+    metric_name: HydrologicalMetricName
+    unit: str
+    data: list[HFChartSchema]
 
 
 class MeasuredDischargeMeasurementSchema(Schema):
@@ -221,6 +235,17 @@ class TimeBucketQueryParams(Schema):
     limit: int = 100
 
 
+class ChartQueryParams(Schema):
+    # picked by the query router from the date range if not given
+    resolution: TimeseriesResolution = None
+    # downsample longer series, keeping the minimum and the maximum of every bucket
+    max_points: int = Field(None, ge=MIN_MAX_POINTS)
+
+
+class ChartBatchQueryParams(ChartQueryParams):
+    station_uuids: list[UUID] = Field(..., min_length=1, max_length=CHART_BATCH_MAX_STATIONS)
+
+
 class HydrologicalNormTypeFiltersSchema(FilterSchema):
     norm_type: NormType
 
@@ -284,6 +309,20 @@ class BulkDataDownloadInputSchema(Schema):
     virtual_station_uuids: list[str] = None
 
 
+class BulkDataExportJobOutputSchema(ModelSchema):
+    class Meta:
+        model = BulkDataExportJob
+        fields = [
+            "uuid",
+            "status",
+            "sheets_done",
+            "rows_written",
+            "created_date",
+            "started_date",
+            "finished_date",
+        ]
+
+
 class ViewType(str, Enum):
     MEASUREMENTS = "measurements"  # Raw measurements from HydrologicalMetric
     DAILY = "daily"  # Daily averages from estimation models
@@ -294,6 +333,15 @@ class DisplayType(str, Enum):
     GROUPED = "grouped"  # Metrics grouped by timestamp
 
 
+class ExportFormat(str, Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+
+class ExportFormatQueryParams(Schema):
+    export_format: ExportFormat = ExportFormat.NDJSON
+
+
 class MetricViewTypeSchema(Schema):
     view_type: ViewType
 
@@ -392,6 +440,16 @@ class PaginatedSDKOutputSchema(Schema):
     results: list[SDKOutputSchema]
 
 
+class SDKCursorOutputSchema(Schema):
+    next_cursor: str | None = None
+    results: list[SDKOutputSchema]
+
+
+class SDKCursorQueryParams(Schema):
+    cursor: str = None
+    limit: int = Field(SDK_CURSOR_PAGE_SIZE, ge=1, le=SDK_CURSOR_MAX_PAGE_SIZE)
+
+
 class SDKDataFiltersSchema(FilterSchema):
     timestamp_local: datetime = None
     timestamp_local__gt: datetime = None
@@ -1,3 +1,5 @@
+import datetime as dt
+
 import factory
 from faker import Faker
 from zoneinfo import ZoneInfo
@@ -9,6 +11,7 @@ from ..choices import (
     HydrologicalMetricName,
     MeteorologicalMeasurementType,
     MeteorologicalMetricName,
+    MetricUnit,
 )
 from ..models import HydrologicalMetric, HydrologicalNorm, MeteorologicalMetric, MeteorologicalNorm
 
@@ -55,3 +58,21 @@ class MeteorologicalNormFactory(factory.django.DjangoModelFactory):
     class Meta:
         model = MeteorologicalNorm
         django_get_or_create = ("station", "norm_type", "norm_metric", "ordinal_number")
+
+
+def build_hydro_metrics(station, count: int, avg_value: float = 10.0, start: dt.datetime = None):
+    start = start or dt.datetime(2024, 5, 1, 0, 0, tzinfo=ZoneInfo("UTC"))
+    return [
+        HydrologicalMetric(
+            timestamp_local=start + dt.timedelta(minutes=10 * idx),
+            avg_value=avg_value + idx,
+            min_value=None,
+            max_value=None,
+            unit=MetricUnit.TEMPERATURE,
+            metric_name=HydrologicalMetricName.AIR_TEMPERATURE,
+            value_type=HydrologicalMeasurementType.AUTOMATIC,
+            station=station,
+            sensor_identifier="",
+        )
+        for idx in range(count)
+    ]
@@ -1,4 +1,5 @@
 import datetime as dt
+import io
 import os
 import uuid
 from decimal import Decimal
@@ -7,11 +8,26 @@ from unittest.mock import patch
 
 import pytest
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from openpyxl import load_workbook
 
 from sapphire_backend.estimations.models import EstimationsWaterDischargeDailyAverage
-from sapphire_backend.metrics.choices import HydrologicalMeasurementType, HydrologicalMetricName, NormType
+from sapphire_backend.metrics.choices import (
+    BulkDataExportStatus,
+    HydrologicalMeasurementType,
+    HydrologicalMetricName,
+    NormType,
+)
 from sapphire_backend.metrics.exceptions import FileTooBigException, SDKDataError
-from sapphire_backend.metrics.models import HydrologicalNorm
+from sapphire_backend.metrics.management.commands.run_bulk_data_exports import Command as RunBulkDataExportsCommand
+from sapphire_backend.metrics.models import BulkDataExportJob, HydrologicalNorm
+from sapphire_backend.metrics.utils.bulk_data import (
+    BULK_DATA_EXPORT_FRESHNESS,
+    BULK_DATA_EXPORT_STALE_AFTER,
+    run_bulk_data_export_job,
+)
 from sapphire_backend.utils.rounding import custom_round
 
 
@@ -233,6 +249,178 @@ class TestHydroMetricsAPI:
                 for key in expected_keys:
                     assert key in data[0]
 
+    @pytest.mark.django_db(transaction=True)
+    @pytest.mark.parametrize("water_level_metrics_daily_generator", [(start_date, end_date)], indirect=True)
+    @pytest.mark.parametrize(
+        "end_date, resolution, expected_status",
+        [
+            (dt.datetime(2020, 3, 1, tzinfo=dt.timezone.utc), None, 200),  # raw data
+            (dt.datetime(2022, 2, 1, tzinfo=dt.timezone.utc), None, 200),  # hourly aggregate
+            (dt.datetime(2022, 2, 1, tzinfo=dt.timezone.utc), "raw", 422),
+            (dt.datetime(2024, 2, 1, tzinfo=dt.timezone.utc), None, 422),
+        ],
+    )
+    def test_get_hydro_metrics_chart_resolution(
+        self,
+        regular_user_kyrgyz_api_client,
+        organization_kyrgyz,
+        manual_hydro_station_kyrgyz,
+        water_level_metrics_daily_generator,
+        end_date,
+        resolution,
+        expected_status,
+    ):
+        params = {
+            "station": manual_hydro_station_kyrgyz.id,
+            "timestamp_local__gte": "2020-02-01T00:00:00Z",
+            "timestamp_local__lt": end_date.isoformat(),
+            "metric_name__in": ["WLD"],
+        }
+        if resolution:
+            params["resolution"] = resolution
+
+        response = regular_user_kyrgyz_api_client.get(
+            f"{self.endpoint.format(organization_kyrgyz.uuid)}/measurements/chart", params
+        )
+
+        assert response.status_code == expected_status
+        if expected_status == 200:
+            # both sources have the manual morning and evening readings in separate hours
+            assert len(response.json()) == 2 * len(water_level_metrics_daily_generator)
+
+    @pytest.mark.django_db(transaction=True)
+    @pytest.mark.parametrize("water_level_metrics_daily_generator", [(start_date, end_date)], indirect=True)
+    def test_get_hydro_metrics_chart_max_points(
+        self,
+        regular_user_kyrgyz_api_client,
+        organization_kyrgyz,
+        manual_hydro_station_kyrgyz,
+        water_level_metrics_daily_generator,
+    ):
+        params = {
+            "station": manual_hydro_station_kyrgyz.id,
+            "timestamp_local__gte": "2020-02-01T00:00:00Z",
+            "timestamp_local__lt": "2020-03-01T00:00:00Z",
+            "metric_name__in": ["WLD"],
+        }
+        url = f"{self.endpoint.format(organization_kyrgyz.uuid)}/measurements/chart"
+
+        full = regular_user_kyrgyz_api_client.get(url, params).json()
+        downsampled = regular_user_kyrgyz_api_client.get(url, {**params, "max_points": 8}).json()
+
+        assert len(full) == 2 * len(water_level_metrics_daily_generator)
+        assert len(downsampled) <= 8
+        assert [point["x"] for point in downsampled] == sorted(point["x"] for point in downsampled)
+        assert max(point["y"] for point in downsampled) == max(point["y"] for point in full)
+        assert min(point["y"] for point in downsampled) == min(point["y"] for point in full)
+        assert regular_user_kyrgyz_api_client.get(url, {**params, "max_points": 2}).status_code == 422
+
+    @pytest.mark.django_db(transaction=True)
+    @pytest.mark.parametrize("water_level_metrics_daily_generator", [(start_date, end_date)], indirect=True)
+    @pytest.mark.parametrize(
+        "water_level_metrics_daily_generator_second_station", [(start_date, end_date)], indirect=True
+    )
+    @pytest.mark.parametrize("view_type, metric_name", [("measurements", "WLD"), ("daily", "WLDA")])
+    def test_get_hydro_metrics_chart_batch(
+        self,
+        regular_user_kyrgyz_api_client,
+        organization_kyrgyz,
+        manual_hydro_station_kyrgyz,
+        manual_second_hydro_station_kyrgyz,
+        water_level_metrics_daily_generator,
+        water_level_metrics_daily_generator_second_station,
+        view_type,
+        metric_name,
+    ):
+        params = {
+            "timestamp_local__gte": "2020-02-01T00:00:00Z",
+            "timestamp_local__lt": "2020-03-01T00:00:00Z",
+            "metric_name__in": [metric_name],
+        }
+        url = f"{self.endpoint.format(organization_kyrgyz.uuid)}/{view_type}/chart"
+        stations = [manual_second_hydro_station_kyrgyz, manual_hydro_station_kyrgyz]
+
+        response = regular_user_kyrgyz_api_client.get(
+            f"{url}/batch", {**params, "station_uuids": [station.uuid for station in stations]}
+        )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert [(series["station_uuid"], series["metric_name"], series["unit"]) for series in data] == [
+            (str(station.uuid), metric_name, "cm") for station in stations
+        ]
+        # every series is the one the chart of the single station returns
+        for series, station in zip(data, stations):
+            single = regular_user_kyrgyz_api_client.get(url, {**params, "station": station.id}).json()
+            assert len(series["data"]) > 0
+            assert series["data"] == single
+
+    def test_get_hydro_metrics_chart_batch_query_count(
+        self,
+        regular_user_kyrgyz_api_client,
+        organization_kyrgyz,
+        manual_hydro_station_kyrgyz,
+        manual_second_hydro_station_kyrgyz,
+        manual_third_hydro_station_kyrgyz,
+    ):
+        url = f"{self.endpoint.format(organization_kyrgyz.uuid)}/measurements/chart/batch"
+        params = {
+            "timestamp_local__gte": "2020-02-01T00:00:00Z",
+            "timestamp_local__lt": "2020-02-15T00:00:00Z",
+            "metric_name__in": ["WLD", "WTO"],
+        }
+
+        # the first request of the client fills the caches of the process
+        regular_user_kyrgyz_api_client.get(url, {**params, "station_uuids": [manual_hydro_station_kyrgyz.uuid]})
+        query_counts = []
+        for stations in [
+            [manual_hydro_station_kyrgyz],
+            [manual_hydro_station_kyrgyz, manual_second_hydro_station_kyrgyz, manual_third_hydro_station_kyrgyz],
+        ]:
+            with CaptureQueriesContext(connection) as context:
+                response = regular_user_kyrgyz_api_client.get(
+                    url, {**params, "station_uuids": [station.uuid for station in stations]}
+                )
+            assert response.status_code == 200
+            assert len(response.json()) == 2 * len(stations)
+            query_counts.append(len(context.captured_queries))
+
+        assert query_counts[0] == query_counts[1]
+
+    @pytest.mark.parametrize(
+        "metric_names, other_organization, expected_status",
+        [
+            (["WLD"], False, 200),
+            ([], False, 422),
+            (["WLD"], True, 403),
+        ],
+    )
+    def test_get_hydro_metrics_chart_batch_validation(
+        self,
+        regular_user_kyrgyz_api_client,
+        organization_kyrgyz,
+        manual_hydro_station_kyrgyz,
+        manual_hydro_station_other_organization,
+        metric_names,
+        other_organization,
+        expected_status,
+    ):
+        stations = [manual_hydro_station_kyrgyz]
+        if other_organization:
+            stations.append(manual_hydro_station_other_organization)
+
+        response = regular_user_kyrgyz_api_client.get(
+            f"{self.endpoint.format(organization_kyrgyz.uuid)}/measurements/chart/batch",
+            {
+                "timestamp_local__gte": "2020-02-01T00:00:00Z",
+                "timestamp_local__lt": "2020-02-15T00:00:00Z",
+                "metric_name__in": metric_names,
+                "station_uuids": [station.uuid for station in stations],
+            },
+        )
+
+        assert response.status_code == expected_status
+
     @pytest.mark.django_db(transaction=True)
     @pytest.mark.parametrize(
         "view_type, start_date, end_date, expected_status",
@@ -1776,3 +1964,403 @@ class TestSDKDataValuesAPIController:
         assert station_data[1]["variable_code"] == "PD"
         assert station_data[1]["unit"] == "mm/day"
         assert len(station_data[1]["values"]) == 0  # no precipitation because it's a meteo station
+
+
+class TestSDKDataValuesCursorAPIController:
+    endpoint = "/api/v1/sdk-data-values/{organization_uuid}"
+    start_date = dt.date(2025, 4, 1)
+    end_date = dt.date(2025, 4, 5)
+
+    @staticmethod
+    def _collect_values(results: list[dict]) -> dict[tuple[int, str], list[dict]]:
+        values = {}
+        for station in results:
+            for variable in station["data"]:
+                values.setdefault((station["station_id"], variable["variable_code"]), []).extend(variable["values"])
+        return values
+
+    @pytest.mark.django_db(transaction=True)
+    @pytest.mark.parametrize("water_level_metrics_daily_generator", [(start_date, end_date)], indirect=True)
+    def test_pages_match_the_full_response(
+        self,
+        regular_user_kyrgyz_api_client,
+        organization_kyrgyz,
+        manual_hydro_station_kyrgyz,
+        discharge_model_manual_hydro_station_kyrgyz,
+        manual_second_hydro_station_kyrgyz,
+        water_level_metrics_daily_generator,
+    ):
+        filters = {
+            "station__station_code__in": [
+                manual_hydro_station_kyrgyz.station_code,
+                manual_second_hydro_station_kyrgyz.station_code,
+            ],
+            "metric_name__in": ["WLD", "WLDA", "WDD", "WDDA"],
+            "timestamp_local__gte": "2025-04-01T00:00:00Z",
+            "timestamp_local__lte": "2025-04-05T23:59:59Z",
+        }
+        full_response = regular_user_kyrgyz_api_client.get(
+            self.endpoint.format(organization_uuid=organization_kyrgyz.uuid), filters
+        )
+        expected = {
+            key: values for key, values in self._collect_values(full_response.json()["results"]).items() if values
+        }
+
+        pages = []
+        cursor = None
+        while True:
+            params = {**filters, "limit": 7}
+            if cursor:
+                params["cursor"] = cursor
+            response = regular_user_kyrgyz_api_client.get(
+                f"{self.endpoint.format(organization_uuid=organization_kyrgyz.uuid)}/cursor", params
+            )
+            assert response.status_code == 200
+            page = response.json()
+            pages.append(page)
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+
+        collected = {}
+        for page in pages:
+            assert sum(len(variable["values"]) for station in page["results"] for variable in station["data"]) <= 7
+            for key, values in self._collect_values(page["results"]).items():
+                collected.setdefault(key, []).extend(values)
+
+        # 10 water levels and discharges and 5 daily averages of each for the first station
+        assert len(pages) == 5
+        assert collected == expected
+        assert list(collected) == [
+            (manual_hydro_station_kyrgyz.id, "WLD"),
+            (manual_hydro_station_kyrgyz.id, "WLDA"),
+            (manual_hydro_station_kyrgyz.id, "WDD"),
+            (manual_hydro_station_kyrgyz.id, "WDDA"),
+        ]
+
+    def test_single_page_with_complex_values(
+        self,
+        regular_user_kyrgyz_api_client,
+        organization_kyrgyz,
+        manual_hydro_station_kyrgyz,
+        water_level_manual_hydro_station_kyrgyz,
+        daily_precipitation_manual_station_kyrgyz,
+        ice_phenomena_manual_station_kyrgyz,
+    ):
+        response = regular_user_kyrgyz_api_client.get(
+            f"{self.endpoint.format(organization_uuid=organization_kyrgyz.uuid)}/cursor",
+            {
+                "station": manual_hydro_station_kyrgyz.id,
+                "metric_name__in": ["IPO", "WLD", "PD"],
+                "timestamp_local__gte": "2024-09-01T00:00:00Z",
+                "timestamp_local__lte": "2024-09-03T23:59:59Z",
+            },
+        )
+        assert response.status_code == 200
+        data = response.json()
+
+        assert data["next_cursor"] is None
+        assert len(data["results"]) == 1
+        # the variables keep the requested order
+        assert [variable["variable_code"] for variable in data["results"][0]["data"]] == ["IPO", "WLD", "PD"]
+        assert data["results"][0]["data"][2]["values"] == [
+            {
+                "timestamp_local": daily_precipitation_manual_station_kyrgyz.timestamp_local.replace(
+                    tzinfo=organization_kyrgyz.timezone
+                ).isoformat(),
+                "timestamp_utc": daily_precipitation_manual_station_kyrgyz.timestamp.isoformat().replace(
+                    "+00:00", "Z"
+                ),
+                "value": daily_precipitation_manual_station_kyrgyz.avg_value,
+                "value_type": "M",
+                "value_code": daily_precipitation_manual_station_kyrgyz.value_code,
+            }
+        ]
+
+    def test_hydro_metric_for_meteo_station(
+        self,
+        regular_user_kyrgyz_api_client,
+        organization_kyrgyz,
+        manual_meteo_station_kyrgyz,
+        precipitation_meteo_station_kyrgyz,
+    ):
+        response = regular_user_kyrgyz_api_client.get(
+            f"{self.endpoint.format(organization_uuid=organization_kyrgyz.uuid)}/cursor",
+            {
+                "station": manual_meteo_station_kyrgyz.id,
+                "metric_name__in": ["PD", "PDCA"],
+                "timestamp_local__gte": "2024-09-01T00:00:00Z",
+                "timestamp_local__lte": "2024-09-03T23:59:59Z",
+            },
+        )
+        assert response.status_code == 200
+        data = response.json()
+
+        assert data["results"][0]["station_type"] == "meteo"
+        assert [variable["variable_code"] for variable in data["results"][0]["data"]] == ["PDCA"]
+        assert data["results"][0]["data"][0]["values"][0]["value"] == precipitation_meteo_station_kyrgyz.value
+
+    @pytest.mark.parametrize("cursor", ["invalid", "e30="])
+    def test_invalid_cursor(
+        self, regular_user_kyrgyz_api_client, organization_kyrgyz, manual_hydro_station_kyrgyz, cursor
+    ):
+        response = regular_user_kyrgyz_api_client.get(
+            f"{self.endpoint.format(organization_uuid=organization_kyrgyz.uuid)}/cursor",
+            {
+                "station": manual_hydro_station_kyrgyz.id,
+                "metric_name__in": ["WLD"],
+                "timestamp_local__gte": "2024-09-01T00:00:00Z",
+                "cursor": cursor,
+            },
+        )
+
+        assert response.status_code == 400
+        assert response.json()["detail"] == "Invalid cursor"
+
+    @pytest.mark.parametrize(
+        "filters, detail",
+        [
+            ({"metric_name__in": ["WLD"]}, "At least one timestamp filter must be present"),
+            ({"timestamp_local__gte": "2024-09-01T00:00:00Z"}, "You must specify at least one metric name"),
+        ],
+    )
+    def test_invalid_filters(
+        self, regular_user_kyrgyz_api_client, organization_kyrgyz, manual_hydro_station_kyrgyz, filters, detail
+    ):
+        response = regular_user_kyrgyz_api_client.get(
+            f"{self.endpoint.format(organization_uuid=organization_kyrgyz.uuid)}/cursor",
+            {"station": manual_hydro_station_kyrgyz.id, **filters},
+        )
+
+        assert response.status_code == 400
+        assert response.json() == {"detail": detail, "code": "sdk_data_error"}
+
+    def test_cursor_of_other_filters(
+        self,
+        regular_user_kyrgyz_api_client,
+        organization_kyrgyz,
+        manual_hydro_station_kyrgyz,
+        water_level_manual_hydro_station_kyrgyz,
+        water_discharge_manual_hydro_station_kyrgyz,
+    ):
+        endpoint = f"{self.endpoint.format(organization_uuid=organization_kyrgyz.uuid)}/cursor"
+        filters = {
+            "station": manual_hydro_station_kyrgyz.id,
+            "metric_name__in": ["WLD", "WDD"],
+            "timestamp_local__gte": "2024-09-01T00:00:00Z",
+        }
+        first_page = regular_user_kyrgyz_api_client.get(endpoint, {**filters, "limit": 1}).json()
+        assert first_page["next_cursor"] is not None
+
+        response = regular_user_kyrgyz_api_client.get(
+            endpoint, {**filters, "metric_name__in": ["WDD"], "cursor": first_page["next_cursor"]}
+        )
+
+        assert response.status_code == 400
+        assert response.json()["detail"] == "The cursor was issued for different filters"
+
+
+class TestBulkDataAPIController:
+    endpoint = "/api/v1/bulk-data/{}/download"
+    exports_endpoint = "/api/v1/bulk-data/{}/exports"
+
+    @staticmethod
+    def _get_payload(*stations) -> dict:
+        return {
+            "hydro_station_manual_uuids": [str(station.uuid) for station in stations if station.station_type == "M"],
+            "hydro_station_auto_uuids": [str(station.uuid) for station in stations if station.station_type == "A"],
+            "meteo_station_uuids": [],
+            "virtual_station_uuids": [],
+        }
+
+    def test_download_bulk_data(
+        self,
+        authenticated_regular_user_api_client,
+        organization,
+        manual_hydro_station,
+        automatic_hydro_station,
+        water_level_manual,
+        water_level_manual_other,
+        water_level_automatic,
+    ):
+        response = authenticated_regular_user_api_client.post(
+            self.endpoint.format(organization.uuid),
+            data=self._get_payload(manual_hydro_station, automatic_hydro_station),
+            content_type="application/json",
+        )
+
+        assert response.status_code == 200
+        assert response["Content-Disposition"] == 'attachment; filename="bulk-data.xlsx"'
+        workbook = load_workbook(io.BytesIO(b"".join(response.streaming_content)))
+        assert workbook.sheetnames == [
+            f"{manual_hydro_station.station_code} (manual)",
+            f"{automatic_hydro_station.station_code} (auto)",
+        ]
+
+        manual_sheet, auto_sheet = workbook.worksheets
+        header = manual_sheet[1]
+        assert [cell.value for cell in header[:2]] == ["\n\nDate / Unit", "Water level\ndaily\n(cm)"]
+        assert all(cell.font.b and cell.border.left.style == "thin" for cell in header)
+        assert manual_sheet.row_dimensions[1].height == 45
+        assert manual_sheet.column_dimensions["A"].width == 20
+        assert manual_sheet.column_dimensions["B"].width == 18
+        water_levels = [row[:2] for row in manual_sheet.iter_rows(min_row=2, values_only=True) if row[1] is not None]
+        # oldest first
+        assert water_levels == [
+            (water_level_manual.timestamp_local.strftime("%d.%m.%Y. %H:%M:%S"), 10.0),
+            (water_level_manual_other.timestamp_local.strftime("%d.%m.%Y. %H:%M:%S"), 10.0),
+        ]
+        assert auto_sheet["C2"].value == 9.8
+
+    def test_export_job(
+        self,
+        authenticated_regular_user_api_client,
+        organization,
+        manual_hydro_station,
+        automatic_hydro_station,
+        water_level_manual,
+        water_level_manual_other,
+        water_level_automatic,
+        settings,
+        tmp_path,
+    ):
+        settings.MEDIA_ROOT = tmp_path
+        response = authenticated_regular_user_api_client.post(
+            self.exports_endpoint.format(organization.uuid),
+            data=self._get_payload(manual_hydro_station, automatic_hydro_station),
+            content_type="application/json",
+        )
+        assert response.status_code == 201
+        job_endpoint = f"{self.exports_endpoint.format(organization.uuid)}/{response.json()['uuid']}"
+        assert response.json()["status"] == BulkDataExportStatus.QUEUED
+
+        response = authenticated_regular_user_api_client.get(f"{job_endpoint}/download")
+        assert response.status_code == 404
+        assert response.json()["code"] == "export_not_finished"
+
+        call_command("run_bulk_data_exports", "--once")
+
+        response = authenticated_regular_user_api_client.get(job_endpoint)
+        assert response.status_code == 200
+        job = response.json()
+        assert job["status"] == BulkDataExportStatus.DONE
+        assert job["sheets_done"] == 2
+        assert job["rows_written"] >= 3
+        assert job["finished_date"] is not None
+
+        response = authenticated_regular_user_api_client.get(f"{job_endpoint}/download")
+        assert response.status_code == 200
+        assert response["Content-Disposition"] == 'attachment; filename="bulk-data.xlsx"'
+        workbook = load_workbook(io.BytesIO(b"".join(response.streaming_content)))
+        assert workbook.sheetnames == [
+            f"{manual_hydro_station.station_code} (manual)",
+            f"{automatic_hydro_station.station_code} (auto)",
+        ]
+        assert (tmp_path / "bulk_data_exports" / str(organization.uuid) / job["uuid"] / "bulk-data.xlsx").exists()
+
+    def test_export_job_deduplication(
+        self, authenticated_regular_user_api_client, organization, manual_hydro_station, automatic_hydro_station
+    ):
+        endpoint = self.exports_endpoint.format(organization.uuid)
+        payload = self._get_payload(manual_hydro_station)
+
+        first = authenticated_regular_user_api_client.post(endpoint, data=payload, content_type="application/json")
+        # the order and duplicates of the station UUIDs don't matter
+        payload["hydro_station_manual_uuids"] *= 2
+        second = authenticated_regular_user_api_client.post(endpoint, data=payload, content_type="application/json")
+        other = authenticated_regular_user_api_client.post(
+            endpoint,
+            data=self._get_payload(manual_hydro_station, automatic_hydro_station),
+            content_type="application/json",
+        )
+
+        assert (first.status_code, second.status_code, other.status_code) == (201, 200, 201)
+        assert first.json()["uuid"] == second.json()["uuid"] != other.json()["uuid"]
+
+        BulkDataExportJob.objects.update(created_date=dt.datetime.now(dt.timezone.utc) - BULK_DATA_EXPORT_FRESHNESS)
+        expired = authenticated_regular_user_api_client.post(endpoint, data=payload, content_type="application/json")
+        assert expired.status_code == 201
+        assert expired.json()["uuid"] != first.json()["uuid"]
+
+    def test_failed_export_job_is_not_reused(
+        self, authenticated_regular_user_api_client, organization, manual_hydro_station
+    ):
+        endpoint = self.exports_endpoint.format(organization.uuid)
+        payload = self._get_payload(manual_hydro_station)
+        first = authenticated_regular_user_api_client.post(endpoint, data=payload, content_type="application/json")
+
+        with patch(
+            "sapphire_backend.metrics.management.commands.run_bulk_data_exports.run_bulk_data_export_job",
+            side_effect=RuntimeError("Export failed"),
+        ):
+            call_command("run_bulk_data_exports", "--once")
+
+        job = BulkDataExportJob.objects.get(uuid=first.json()["uuid"])
+        assert (job.status, job.error) == (BulkDataExportStatus.FAILED, "Export failed")
+        second = authenticated_regular_user_api_client.post(endpoint, data=payload, content_type="application/json")
+        assert second.status_code == 201
+
+    @pytest.mark.parametrize("progress_after_reclaim", [True, False])
+    def test_reclaimed_export_job(
+        self,
+        authenticated_regular_user_api_client,
+        organization,
+        manual_hydro_station,
+        water_level_manual,
+        settings,
+        tmp_path,
+        progress_after_reclaim,
+    ):
+        settings.MEDIA_ROOT = tmp_path
+        authenticated_regular_user_api_client.post(
+            self.exports_endpoint.format(organization.uuid),
+            data=self._get_payload(manual_hydro_station),
+            content_type="application/json",
+        )
+        stale_job = BulkDataExportJob.objects.claim_next(BULK_DATA_EXPORT_STALE_AFTER)
+        reclaimed_jobs = []
+
+        def write_while_reclaimed(workbook, org_uuid, on_chunk, **parameters):
+            on_chunk(1, 10)
+            # the worker went quiet for too long and another one claimed the job
+            BulkDataExportJob.objects.update(
+                last_modified=dt.datetime.now(dt.timezone.utc) - BULK_DATA_EXPORT_STALE_AFTER
+            )
+            reclaimed_jobs.append(BulkDataExportJob.objects.claim_next(BULK_DATA_EXPORT_STALE_AFTER))
+            if progress_after_reclaim:
+                on_chunk(1, 10)
+
+        with patch(
+            "sapphire_backend.metrics.utils.bulk_data.write_bulk_data_workbook", side_effect=write_while_reclaimed
+        ):
+            RunBulkDataExportsCommand._run_job(stale_job)
+
+        # the stale worker neither counted its progress, nor stored its file, nor failed the job
+        job = BulkDataExportJob.objects.get()
+        assert reclaimed_jobs[0].uuid == job.uuid
+        assert (job.status, job.sheets_done, job.rows_written, job.file.name, job.error) == (
+            BulkDataExportStatus.RUNNING,
+            0,
+            0,
+            "",
+            "",
+        )
+        assert job.claim_id == reclaimed_jobs[0].claim_id != stale_job.claim_id
+        assert not list((tmp_path / "bulk_data_exports").rglob("*.xlsx"))
+
+        run_bulk_data_export_job(reclaimed_jobs[0])
+
+        job.refresh_from_db()
+        assert (job.status, job.sheets_done) == (BulkDataExportStatus.DONE, 1)
+        assert len(list((tmp_path / "bulk_data_exports").rglob("*.xlsx"))) == 1
+
+    def test_export_job_of_other_organization(
+        self, authenticated_regular_user_other_organization_api_client, organization, manual_hydro_station
+    ):
+        response = authenticated_regular_user_other_organization_api_client.post(
+            self.exports_endpoint.format(organization.uuid),
+            data=self._get_payload(manual_hydro_station),
+            content_type="application/json",
+        )
+
+        assert response.status_code == 403
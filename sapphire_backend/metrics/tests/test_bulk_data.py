@@ -0,0 +1,110 @@
+import io
+import random
+import zipfile
+from datetime import datetime, timedelta
+from decimal import Decimal
+from pathlib import Path
+
+import pandas as pd
+import pytest
+from openpyxl import Workbook
+
+from sapphire_backend.metrics.utils.bulk_data import (
+    transform_code_value_columns,
+    transform_decimal_columns,
+    write_station_sheets,
+)
+
+GOLDEN_WORKBOOK = Path(__file__).parent / "data" / "bulk_data_golden.xlsx"
+# generated by build_workbook with the per-cell formatting the sheet writers used to have
+
+STATION_CODES = {11: "15102", 12: "15149", 13: "16936"}
+DECIMAL_COLUMNS = ["water_level_daily", "discharge_daily", "free_river_area", "air_temperature"]
+CODE_VALUE_COLUMNS = ["ice_phenomena", "precipitation_daily"]
+DF_COLUMNS = ["station", "timestamp_local", *DECIMAL_COLUMNS, *CODE_VALUE_COLUMNS]
+EXCEL_SHEET_HEADERS = [
+    "\n\nDate / Unit",
+    "Water level\ndaily\n(cm)",
+    "Discharge\ndaily\n(m^3/s)",
+    "Free river area\n\n(m^2)",
+    "Air\ntemperature\n(°C)",
+    "Ice phenomena\n\n(code:intensity)",
+    "Daily\nprecipitation\n(code:mm)",
+]
+
+
+def build_rows(rng: random.Random) -> list[tuple]:
+    """
+    Rows shaped like the manual bulk view returns them, ordered by station and timestamp
+    """
+    decimals = [Decimal("12.300"), Decimal("0.000"), Decimal("-3.500"), Decimal("98765.432"), Decimal("7")]
+    code_values = ["2:2.50000", "10:10", "3:0.00000", "14:3.10000", "4:100.00000", "5:0.12500"]
+    rows = []
+    for station in STATION_CODES:
+        start = datetime(2020, 12, 20, 8)
+        for offset in range(40):
+            for hour in (0, 12):
+                rows.append(
+                    (
+                        station,
+                        start + timedelta(days=offset, hours=hour),
+                        rng.choice([None, *decimals]),
+                        rng.choice([None, Decimal(rng.randint(0, 10**6)) / 1000]),
+                        None,
+                        rng.choice([None, None, *decimals]),
+                        rng.choice([None, None, None, *code_values]),
+                        # no precipitation at the last station
+                        rng.choice([None, *code_values]) if station != 13 else None,
+                    )
+                )
+    return rows
+
+
+def build_workbook(rows: list[tuple], chunk_size: int) -> bytes:
+    chunks = [
+        pd.DataFrame.from_records(rows[start : start + chunk_size], columns=DF_COLUMNS)
+        for start in range(0, len(rows), chunk_size)
+    ]
+    workbook = Workbook(write_only=True)
+    write_station_sheets(
+        workbook,
+        chunks,
+        station_codes=STATION_CODES,
+        sheet_suffix="manual",
+        excel_sheet_headers=EXCEL_SHEET_HEADERS,
+        decimal_columns=DECIMAL_COLUMNS,
+        code_value_columns=CODE_VALUE_COLUMNS,
+    )
+    output = io.BytesIO()
+    workbook.save(output)
+    return output.getvalue()
+
+
+def read_workbook_parts(content: bytes) -> dict[str, bytes]:
+    with zipfile.ZipFile(io.BytesIO(content)) as archive:
+        # the document properties hold the creation and modification time
+        return {name: archive.read(name) for name in archive.namelist() if name != "docProps/core.xml"}
+
+
+class TestBulkDataSheets:
+    @pytest.mark.parametrize("chunk_size", [1, 7, 10000])
+    def test_workbook_matches_golden_workbook(self, chunk_size):
+        workbook = build_workbook(build_rows(random.Random(2020)), chunk_size)
+
+        assert read_workbook_parts(workbook) == read_workbook_parts(GOLDEN_WORKBOOK.read_bytes())
+
+    def test_transform_decimal_columns(self):
+        df = pd.DataFrame({"value": [Decimal("1.100"), None, Decimal("-0.333")], "empty": [None, None, None]})
+
+        df = transform_decimal_columns(df, decimal_columns=["value", "empty"])
+
+        assert df["value"].tolist() == [1.1, "", -0.333]
+        assert df["empty"].tolist() == ["", "", ""]
+
+    def test_transform_code_value_columns(self):
+        df = pd.DataFrame({"value": ["1:2.500", None, "3:10", "4:0.000"], "empty": [None, None, None, None]})
+
+        df = transform_code_value_columns(df, columns=["value", "empty"])
+
+        assert df["value"].tolist() == ["1:2.5", "", "3:10", "4:0"]
+        assert df["empty"].tolist() == ["", "", "", ""]
@@ -0,0 +1,204 @@
+from datetime import date, datetime
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from zoneinfo import ZoneInfo
+
+from sapphire_backend.estimations.tests.factories import DischargeCalculationPeriodFactory
+from sapphire_backend.metrics.choices import (
+    HydrologicalMeasurementType,
+    HydrologicalMetricName,
+    MeteorologicalMeasurementType,
+    MeteorologicalMetricName,
+)
+from sapphire_backend.metrics.materialization import BULK_DATA_TABLES
+from sapphire_backend.metrics.models import BulkDataHydroManual, BulkDataMeteo, BulkDataVirtual
+from sapphire_backend.metrics.tests.factories import HydrologicalMetricFactory, MeteorologicalMetricFactory
+from sapphire_backend.stations.tests.factories import VirtualStationAssociationFactory, VirtualStationFactory
+from sapphire_backend.utils.db_pool import configure_session
+
+
+def assert_up_to_date():
+    for table in BULK_DATA_TABLES.values():
+        assert table.diff() == {}, table.table
+
+
+@pytest.fixture
+def virtual_station_association(db, manual_hydro_station_kyrgyz):
+    virtual_station = VirtualStationFactory(
+        name="Virtual Station", organization=manual_hydro_station_kyrgyz.site.organization, station_code="77777"
+    )
+    return VirtualStationAssociationFactory(
+        virtual_station=virtual_station, hydro_station=manual_hydro_station_kyrgyz, weight=100
+    )
+
+
+@pytest.fixture
+def precipitation_decade_average(db, manual_meteo_station_kyrgyz):
+    return MeteorologicalMetricFactory(
+        timestamp=datetime(2020, 2, 5, 12, tzinfo=ZoneInfo("UTC")),
+        station=manual_meteo_station_kyrgyz,
+        value=12.345,
+        value_type=MeteorologicalMeasurementType.MANUAL,
+        metric_name=MeteorologicalMetricName.PRECIPITATION_DECADE_AVERAGE,
+    )
+
+
+class TestBulkDataTables:
+    @pytest.mark.django_db(transaction=True)
+    @pytest.mark.parametrize(
+        "water_level_metrics_daily_generator", [(date(2020, 2, 1), date(2020, 3, 31))], indirect=True
+    )
+    def test_tables_match_legacy_views(
+        self,
+        discharge_model_manual_hydro_station_kyrgyz,
+        virtual_station_association,
+        water_level_metrics_daily_generator,
+        precipitation_decade_average,
+    ):
+        days = len(water_level_metrics_daily_generator)
+        assert BulkDataHydroManual.objects.filter(water_level_daily_average__isnull=False).count() == days
+        assert BulkDataHydroManual.objects.filter(decade_discharge__isnull=False).count() == 6
+        assert BulkDataVirtual.objects.filter(discharge_daily__isnull=False).exists()
+        assert BulkDataMeteo.objects.get().precipitation_decade_average is not None
+        assert_up_to_date()
+
+    @pytest.mark.django_db(transaction=True)
+    @pytest.mark.parametrize(
+        "water_level_metrics_daily_generator", [(date(2020, 2, 1), date(2020, 3, 31))], indirect=True
+    )
+    def test_metric_changes_update_tables(
+        self,
+        discharge_model_manual_hydro_station_kyrgyz,
+        manual_hydro_station_kyrgyz,
+        water_level_metrics_daily_generator,
+        precipitation_decade_average,
+    ):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "UPDATE metrics_hydrologicalmetric SET avg_value = avg_value + 1 "
+                "WHERE station_id = %s AND timestamp_local < '2020-02-10'",
+                [manual_hydro_station_kyrgyz.id],
+            )
+            cursor.execute(
+                "DELETE FROM metrics_hydrologicalmetric WHERE station_id = %s AND timestamp_local >= '2020-03-20'",
+                [manual_hydro_station_kyrgyz.id],
+            )
+            cursor.execute("DELETE FROM metrics_meteorologicalmetric")
+
+        assert not BulkDataMeteo.objects.exists()
+        assert_up_to_date()
+
+    @pytest.mark.django_db
+    def test_metric_saved_in_other_session_time_zone(self, manual_hydro_station_kyrgyz):
+        # a pool connection of a database server which runs in the stations' time zone
+        with connection.cursor() as cursor:
+            cursor.execute("SET TIME ZONE 'Asia/Bishkek'")
+        configure_session(connection.connection)
+
+        timestamp_local = datetime(2020, 2, 1, 20, tzinfo=ZoneInfo("UTC"))
+        HydrologicalMetricFactory(
+            timestamp_local=timestamp_local,
+            station=manual_hydro_station_kyrgyz,
+            avg_value=100,
+            value_type=HydrologicalMeasurementType.MANUAL,
+            metric_name=HydrologicalMetricName.WATER_LEVEL_DAILY,
+        )
+
+        row = BulkDataHydroManual.objects.get(station=manual_hydro_station_kyrgyz)
+        assert (row.timestamp_local, row.water_level_daily) == (timestamp_local, 100)
+        assert_up_to_date()
+
+    @pytest.mark.django_db(transaction=True)
+    @pytest.mark.parametrize(
+        "water_level_metrics_daily_generator", [(date(2020, 2, 1), date(2020, 3, 31))], indirect=True
+    )
+    def test_estimation_changes_update_tables(
+        self,
+        discharge_model_manual_hydro_station_kyrgyz,
+        manual_hydro_station_kyrgyz,
+        virtual_station_association,
+        water_level_metrics_daily_generator,
+        regular_user_kyrgyz,
+    ):
+        discharge_model_manual_hydro_station_kyrgyz.param_c = 0.01
+        discharge_model_manual_hydro_station_kyrgyz.save()
+        DischargeCalculationPeriodFactory(
+            station=manual_hydro_station_kyrgyz,
+            user=regular_user_kyrgyz,
+            start_date_local=datetime(2020, 2, 10, tzinfo=ZoneInfo("UTC")),
+            end_date_local=datetime(2020, 2, 25, tzinfo=ZoneInfo("UTC")),
+            state=DischargeCalculationPeriodFactory._meta.model.CalculationState.SUSPENDED,
+            reason=DischargeCalculationPeriodFactory._meta.model.CalculationReason.ICE,
+            is_active=True,
+        )
+
+        assert_up_to_date()
+
+    @pytest.mark.django_db(transaction=True)
+    @pytest.mark.parametrize(
+        "water_level_metrics_daily_generator", [(date(2020, 2, 1), date(2020, 3, 31))], indirect=True
+    )
+    def test_virtual_association_change_updates_table(
+        self,
+        discharge_model_manual_hydro_station_kyrgyz,
+        virtual_station_association,
+        water_level_metrics_daily_generator,
+    ):
+        virtual_station_association.delete()
+
+        assert not BulkDataVirtual.objects.exists()
+        assert_up_to_date()
+
+
+class TestBulkDataTablesCommands:
+    @pytest.mark.django_db(transaction=True)
+    @pytest.mark.parametrize(
+        "water_level_metrics_daily_generator", [(date(2020, 2, 1), date(2020, 3, 31))], indirect=True
+    )
+    def test_check_reports_and_fixes_stale_rows(
+        self, discharge_model_manual_hydro_station_kyrgyz, water_level_metrics_daily_generator
+    ):
+        with connection.cursor() as cursor:
+            cursor.execute("UPDATE metrics_bulk_data_hydro_manual SET water_level_daily = water_level_daily + 1")
+
+        with pytest.raises(CommandError, match="Stale rows found"):
+            call_command("check_bulk_data_tables", "--tables", "hydro_manual")
+        call_command("check_bulk_data_tables", "--tables", "hydro_manual", "--fix")
+
+        assert_up_to_date()
+
+    @pytest.mark.django_db(transaction=True)
+    @pytest.mark.parametrize(
+        "water_level_metrics_daily_generator", [(date(2020, 2, 1), date(2020, 3, 31))], indirect=True
+    )
+    def test_refresh_in_parallel_chunks(
+        self,
+        discharge_model_manual_hydro_station_kyrgyz,
+        manual_hydro_station_kyrgyz,
+        water_level_metrics_daily_generator,
+    ):
+        rows = BulkDataHydroManual.objects.count()
+        with connection.cursor() as cursor:
+            cursor.execute("DELETE FROM metrics_bulk_data_hydro_manual")
+
+        call_command(
+            "refresh_bulk_data_tables",
+            "--tables",
+            "hydro_manual",
+            "--station_ids",
+            str(manual_hydro_station_kyrgyz.id),
+            "--start",
+            "2020-01-15",
+            "--end",
+            "2020-06-01",
+            "--chunk_months",
+            "1",
+            "--workers",
+            "2",
+        )
+
+        assert BulkDataHydroManual.objects.count() == rows
+        assert_up_to_date()
@@ -0,0 +1,156 @@
+import datetime as dt
+from decimal import Decimal
+
+import pytest
+from zoneinfo import ZoneInfo
+
+from sapphire_backend.metrics.choices import (
+    HydrologicalMeasurementType,
+    HydrologicalMetricName,
+    MeteorologicalMeasurementType,
+    MeteorologicalMetricName,
+    MetricUnit,
+)
+from sapphire_backend.metrics.models import HydrologicalMetric, MeteorologicalMetric
+from sapphire_backend.metrics.tests.factories import build_hydro_metrics
+from sapphire_backend.metrics.timeseries.upsert import get_hyper_chunk_name_from_error
+
+
+class TestHydrologicalMetricBulkUpsert:
+    @pytest.mark.django_db
+    def test_bulk_upsert_inserts_all_rows(self, automatic_hydro_station):
+        metrics = build_hydro_metrics(automatic_hydro_station, 25)
+
+        result = HydrologicalMetric.objects.bulk_upsert(metrics, batch_size=10)
+
+        assert result == {"inserted": 25, "updated": 0}
+        assert HydrologicalMetric.objects.count() == 25
+
+    @pytest.mark.django_db
+    def test_bulk_upsert_updates_existing_rows(self, automatic_hydro_station):
+        HydrologicalMetric.objects.bulk_upsert(build_hydro_metrics(automatic_hydro_station, 5))
+
+        result = HydrologicalMetric.objects.bulk_upsert(
+            build_hydro_metrics(automatic_hydro_station, 8, avg_value=100.0), batch_size=3
+        )
+
+        assert result == {"inserted": 3, "updated": 5}
+        assert HydrologicalMetric.objects.count() == 8
+        assert list(HydrologicalMetric.objects.order_by("timestamp_local").values_list("avg_value", flat=True)) == [
+            Decimal(100 + idx) for idx in range(8)
+        ]
+
+    @pytest.mark.django_db
+    def test_bulk_upsert_matches_save(self, automatic_hydro_station):
+        saved = build_hydro_metrics(automatic_hydro_station, 1)[0]
+        bulk = build_hydro_metrics(automatic_hydro_station, 1, avg_value=12.5)[0]
+        saved.save(refresh_view=False)
+
+        result = HydrologicalMetric.objects.bulk_upsert([bulk])
+
+        assert result == {"inserted": 0, "updated": 1}
+        assert HydrologicalMetric.objects.get(**bulk.pk_fields).avg_value == Decimal("12.5")
+
+    @pytest.mark.django_db
+    def test_bulk_upsert_last_duplicate_wins(self, automatic_hydro_station):
+        first = build_hydro_metrics(automatic_hydro_station, 1, avg_value=1.0)
+        second = build_hydro_metrics(automatic_hydro_station, 1, avg_value=2.0)
+
+        result = HydrologicalMetric.objects.bulk_upsert(first + second)
+
+        assert result == {"inserted": 1, "updated": 0}
+        assert HydrologicalMetric.objects.get().avg_value == Decimal("2.0")
+
+    @pytest.mark.django_db
+    def test_bulk_upsert_keeps_sensors_apart(self, automatic_hydro_station):
+        metrics = build_hydro_metrics(automatic_hydro_station, 1) + build_hydro_metrics(automatic_hydro_station, 1)
+        metrics[1].sensor_identifier = "second-sensor"
+
+        result = HydrologicalMetric.objects.bulk_upsert(metrics)
+
+        assert result == {"inserted": 2, "updated": 0}
+
+    @pytest.mark.django_db
+    def test_bulk_upsert_resolves_timestamp(self, manual_hydro_station_kyrgyz):
+        timestamp_local = dt.datetime(2020, 1, 1, 8, 0, 0, tzinfo=ZoneInfo("UTC"))
+        metric = HydrologicalMetric(
+            timestamp_local=timestamp_local,
+            avg_value=12.7,
+            unit=MetricUnit.WATER_LEVEL,
+            metric_name=HydrologicalMetricName.WATER_LEVEL_DAILY,
+            value_type=HydrologicalMeasurementType.MANUAL,
+            station=manual_hydro_station_kyrgyz,
+        )
+
+        HydrologicalMetric.objects.bulk_upsert([metric])
+
+        stored = HydrologicalMetric.objects.get()
+        assert stored.timestamp_local == timestamp_local
+        assert stored.timestamp == dt.datetime(2020, 1, 1, 8, 0, 0, tzinfo=manual_hydro_station_kyrgyz.timezone)
+
+    @pytest.mark.django_db
+    def test_bulk_upsert_empty_iterable(self, automatic_hydro_station):
+        assert HydrologicalMetric.objects.bulk_upsert([]) == {"inserted": 0, "updated": 0}
+
+    def test_bulk_upsert_invalid_batch_size(self):
+        with pytest.raises(ValueError, match="Batch size must be a positive integer."):
+            HydrologicalMetric.objects.bulk_upsert([], batch_size=0)
+
+
+class TestHyperChunkNameFromError:
+    def test_root_table_error(self):
+        error = Exception('invalid INSERT on the root table of hypertable "_hyper_1_104_chunk"')
+
+        assert get_hyper_chunk_name_from_error(error) == "_hyper_1_104_chunk"
+
+    def test_other_error(self):
+        assert get_hyper_chunk_name_from_error(Exception("duplicate key value")) is None
+
+
+def build_meteo_metrics(stations, years: int, value: float = 5.0):
+    return [
+        MeteorologicalMetric(
+            timestamp_local=dt.datetime(2000 + year, month, day, 12, tzinfo=ZoneInfo("UTC")),
+            value=value,
+            value_type=MeteorologicalMeasurementType.MANUAL,
+            metric_name=metric_name,
+            unit=MetricUnit.TEMPERATURE,
+            station=station,
+        )
+        for station in stations
+        for year in range(years)
+        for month in range(1, 13)
+        for day in [5, 15, 25]
+        for metric_name in [
+            MeteorologicalMetricName.AIR_TEMPERATURE_DECADE_AVERAGE,
+            MeteorologicalMetricName.PRECIPITATION_DECADE_AVERAGE,
+        ]
+    ]
+
+
+class TestMeteorologicalMetricBulkUpsert:
+    @pytest.mark.django_db
+    def test_bulk_upsert_inserts_all_rows(self, manual_meteo_station, manual_meteo_station_kyrgyz):
+        metrics = build_meteo_metrics([manual_meteo_station, manual_meteo_station_kyrgyz], years=2)
+
+        result = MeteorologicalMetric.objects.bulk_upsert(metrics, batch_size=50)
+
+        assert result == {"inserted": 288, "updated": 0}
+        assert MeteorologicalMetric.objects.count() == 288
+
+    @pytest.mark.django_db
+    def test_bulk_upsert_resend_is_idempotent(self, manual_meteo_station):
+        MeteorologicalMetric.objects.bulk_upsert(build_meteo_metrics([manual_meteo_station], years=1))
+
+        result = MeteorologicalMetric.objects.bulk_upsert(build_meteo_metrics([manual_meteo_station], years=1))
+
+        assert result == {"inserted": 0, "updated": 72}
+        assert MeteorologicalMetric.objects.count() == 72
+
+    @pytest.mark.django_db
+    def test_bulk_upsert_updates_value(self, manual_meteo_station):
+        MeteorologicalMetric.objects.bulk_upsert(build_meteo_metrics([manual_meteo_station], years=1))
+
+        MeteorologicalMetric.objects.bulk_upsert(build_meteo_metrics([manual_meteo_station], years=1, value=7.5))
+
+        assert set(MeteorologicalMetric.objects.values_list("value", flat=True)) == {Decimal("7.5")}
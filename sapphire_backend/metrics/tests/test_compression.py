@@ -0,0 +1,120 @@
+import datetime as dt
+from decimal import Decimal
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from zoneinfo import ZoneInfo
+
+from sapphire_backend.metrics.choices import MeteorologicalMeasurementType, MeteorologicalMetricName, MetricUnit
+from sapphire_backend.metrics.models import HydrologicalMetric, MeteorologicalMetric
+from sapphire_backend.metrics.tests.factories import build_hydro_metrics
+from sapphire_backend.metrics.timeseries.compression import (
+    compress_chunks,
+    get_chunks,
+    get_compression_stats,
+    is_compressed_chunk_error,
+)
+from sapphire_backend.metrics.utils.helpers import save_metric_and_create_log
+
+START = dt.datetime(2015, 3, 1, tzinfo=ZoneInfo("UTC"))
+END = dt.datetime(2015, 4, 1, tzinfo=ZoneInfo("UTC"))
+
+
+class TestHydrologicalMetricCompression:
+    @pytest.mark.django_db
+    def test_compress_only_overlapping_chunks(self, automatic_hydro_station):
+        HydrologicalMetric.objects.bulk_upsert(build_hydro_metrics(automatic_hydro_station, 10, start=START))
+        HydrologicalMetric.objects.bulk_upsert(build_hydro_metrics(automatic_hydro_station, 10))
+
+        compressed = compress_chunks("metrics_hydrologicalmetric", START, END)
+
+        assert len(compressed) == 1
+        assert get_chunks("metrics_hydrologicalmetric", compressed=True) == compressed
+        assert get_compression_stats("metrics_hydrologicalmetric")["compressed_chunks"] == 1
+        assert HydrologicalMetric.objects.count() == 20
+
+    @pytest.mark.django_db
+    def test_bulk_upsert_into_compressed_chunk(self, automatic_hydro_station):
+        HydrologicalMetric.objects.bulk_upsert(build_hydro_metrics(automatic_hydro_station, 5, start=START))
+        compress_chunks("metrics_hydrologicalmetric", START, END)
+
+        result = HydrologicalMetric.objects.bulk_upsert(
+            build_hydro_metrics(automatic_hydro_station, 8, avg_value=100.0, start=START)
+        )
+
+        assert result == {"inserted": 3, "updated": 5}
+        assert list(HydrologicalMetric.objects.order_by("timestamp_local").values_list("avg_value", flat=True)) == [
+            Decimal(100 + idx) for idx in range(8)
+        ]
+
+    @pytest.mark.django_db(transaction=True)
+    def test_journal_edit_of_compressed_chunk(self, automatic_hydro_station):
+        HydrologicalMetric.objects.bulk_upsert(build_hydro_metrics(automatic_hydro_station, 5, start=START))
+        compress_chunks("metrics_hydrologicalmetric", START, END)
+        metric = build_hydro_metrics(automatic_hydro_station, 1, avg_value=50.0, start=START)[0]
+
+        _, log = save_metric_and_create_log(metric, description="Historical correction")
+
+        assert log is not None
+        assert HydrologicalMetric.objects.get(**metric.pk_fields).avg_value == Decimal("50.0")
+        assert HydrologicalMetric.objects.count() == 5
+
+
+class TestMeteorologicalMetricCompression:
+    @pytest.mark.django_db
+    def test_save_into_compressed_chunk(self, manual_meteo_station):
+        metrics = [
+            MeteorologicalMetric(
+                timestamp_local=START + dt.timedelta(days=10 * idx),
+                value=value,
+                value_type=MeteorologicalMeasurementType.MANUAL,
+                metric_name=MeteorologicalMetricName.AIR_TEMPERATURE_DECADE_AVERAGE,
+                unit=MetricUnit.TEMPERATURE,
+                station=manual_meteo_station,
+            )
+            for idx, value in enumerate([1.0, 2.0])
+        ]
+        metrics[0].save()
+        compress_chunks("metrics_meteorologicalmetric", START, END)
+
+        for metric in metrics:
+            metric.value += 10
+            metric.save()
+
+        assert list(MeteorologicalMetric.objects.order_by("timestamp_local").values_list("value", flat=True)) == [
+            Decimal("11.0"),
+            Decimal("12.0"),
+        ]
+
+
+class TestCompressMetricsCommand:
+    @pytest.mark.django_db
+    def test_compress_and_decompress(self, automatic_hydro_station):
+        HydrologicalMetric.objects.bulk_upsert(build_hydro_metrics(automatic_hydro_station, 10, start=START))
+
+        call_command("compress_metrics", "--tables", "hydro", "--start", "2015-01-01", "--end", "2016-01-01")
+        assert len(get_chunks("metrics_hydrologicalmetric", compressed=True)) == 1
+
+        call_command("compress_metrics", "--tables", "hydro", "--decompress")
+        assert get_chunks("metrics_hydrologicalmetric", compressed=True) == []
+        assert HydrologicalMetric.objects.count() == 10
+
+    def test_invalid_range(self):
+        with pytest.raises(CommandError, match="Start date must be before the end date"):
+            call_command("compress_metrics", "--start", "2016-01-01", "--end", "2015-01-01")
+
+
+class TestIsCompressedChunkError:
+    def test_compressed_chunk_error(self):
+        assert is_compressed_chunk_error(
+            Exception('cannot update/delete rows from chunk "_hyper_1_2_chunk" as it is compressed')
+        )
+        assert is_compressed_chunk_error(
+            Exception("insert with ON CONFLICT clause is not supported on compressed chunks")
+        )
+
+    def test_other_error(self):
+        assert not is_compressed_chunk_error(
+            Exception('invalid INSERT on the root table of hypertable "_hyper_1_104_chunk"')
+        )
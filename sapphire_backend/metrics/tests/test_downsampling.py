@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+from sapphire_backend.metrics.timeseries.downsampling import downsample_min_max
+
+
+class TestDownsampleMinMax:
+    def test_short_series_is_kept(self):
+        values = np.array([1.0, 3.0, 2.0])
+
+        assert downsample_min_max(values, 10).tolist() == [0, 1, 2]
+
+    @pytest.mark.parametrize("max_points", [4, 11, 100, 1000])
+    def test_number_of_points(self, max_points):
+        values = np.random.default_rng(0).normal(size=10_000)
+
+        indices = downsample_min_max(values, max_points)
+
+        assert len(indices) <= max_points
+        assert indices[0] == 0
+        assert indices[-1] == len(values) - 1
+        assert np.all(np.diff(indices) > 0)
+
+    def test_peaks_are_preserved(self):
+        # a flood wave and a drop of the water level in a series of 10-minute readings
+        values = 200 + 10 * np.sin(np.linspace(0, 20, 50_000))
+        values[12_345] = 480
+        values[40_001] = 20
+
+        indices = downsample_min_max(values, 200)
+
+        assert 12_345 in indices
+        assert 40_001 in indices
+        assert values[indices].max() == values.max()
+        assert values[indices].min() == values.min()
+
+    def test_every_bucket_keeps_its_extremes(self):
+        values = np.random.default_rng(1).normal(size=1_000)
+
+        indices = downsample_min_max(values, 102)
+
+        for bucket in np.array_split(np.arange(1_000), 50):
+            assert bucket[np.argmax(values[bucket])] in indices
+            assert bucket[np.argmin(values[bucket])] in indices
+
+    def test_missing_values_are_skipped(self):
+        values = np.arange(100, dtype=float)
+        values[1:50] = np.nan
+
+        indices = downsample_min_max(values, 6)
+
+        assert not np.isnan(values[indices]).any()
+        assert indices.tolist() == [0, 50, 99]
+
+    def test_too_few_points(self):
+        with pytest.raises(ValueError, match="At least 4 points are needed"):
+            downsample_min_max(np.arange(10, dtype=float), 3)
@@ -0,0 +1,158 @@
+import csv
+import io
+import json
+import os
+import threading
+from pathlib import Path
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.db import connection
+from django.http import StreamingHttpResponse
+
+from sapphire_backend.metrics.models import HydrologicalMetric
+from sapphire_backend.metrics.utils.export import HYDRO_METRIC_EXPORT_FIELDS, iter_queryset_export
+
+SYNTHETIC_ROWS = 1_000_000
+MAX_RSS_GROWTH = 64 * 1024 * 1024
+
+
+def read_rss() -> int:
+    with open("/proc/self/statm") as statm:
+        return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def read_streaming_content(response: StreamingHttpResponse) -> bytes:
+    # the export is streamed from an asynchronous iterator, the chunks are pulled in this thread like under ASGI
+    async def collect_chunks() -> bytes:
+        return b"".join([chunk async for chunk in response.streaming_content])
+
+    return async_to_sync(collect_chunks)()
+
+
+class PeakRSSSampler:
+    """
+    Samples the resident set size of the process in a background thread until the context exits
+    """
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, read_rss())
+
+    def __enter__(self):
+        self.peak = read_rss()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, read_rss())
+
+
+class TestHydroMetricsExportAPI:
+    endpoint = "/api/v1/metrics/{}/hydro/export"
+
+    @pytest.mark.parametrize(
+        "client_fixture, expected_status_code",
+        [
+            ("api_client", 401),
+            ("authenticated_regular_user_other_organization_api_client", 403),
+            ("authenticated_regular_user_api_client", 200),
+            ("authenticated_superadmin_user_api_client", 200),
+        ],
+    )
+    def test_permissions(self, client_fixture, expected_status_code, organization, request):
+        client = request.getfixturevalue(client_fixture)
+
+        response = client.get(self.endpoint.format(organization.uuid))
+
+        assert response.status_code == expected_status_code
+
+    def test_ndjson_export(
+        self,
+        authenticated_regular_user_api_client,
+        organization,
+        manual_hydro_station,
+        water_level_manual,
+        water_discharge,
+        water_level_manual_other,
+        water_level_manual_other_organization,
+    ):
+        response = authenticated_regular_user_api_client.get(
+            self.endpoint.format(organization.uuid), {"station": manual_hydro_station.id}
+        )
+
+        assert response.status_code == 200
+        assert response["Content-Type"] == "application/x-ndjson"
+        rows = [json.loads(line) for line in read_streaming_content(response).decode().splitlines()]
+        # oldest first and without the other organization's metric
+        assert [row["avg_value"] for row in rows] == [10.0, 10.0, 2.0]
+        assert list(rows[0]) == list(HYDRO_METRIC_EXPORT_FIELDS)
+        assert rows[0]["timestamp"] == water_level_manual.timestamp.isoformat()
+        assert rows[0]["station_id"] == manual_hydro_station.id
+        assert rows[0]["station_code"] == manual_hydro_station.station_code
+        assert (rows[0]["metric_name"], rows[0]["value_type"], rows[0]["unit"]) == ("WLD", "M", "cm")
+        assert rows[0]["value_code"] is None
+
+    def test_csv_export(
+        self,
+        authenticated_regular_user_api_client,
+        organization,
+        water_level_manual,
+        water_level_automatic,
+        water_level_manual_other_organization,
+    ):
+        response = authenticated_regular_user_api_client.get(
+            self.endpoint.format(organization.uuid), {"export_format": "csv", "metric_name__in": "WLD"}
+        )
+
+        assert response.status_code == 200
+        assert response["Content-Type"] == "text/csv"
+        assert response["Content-Disposition"] == 'attachment; filename="hydro-metrics.csv"'
+        rows = list(csv.DictReader(io.StringIO(read_streaming_content(response).decode())))
+        assert [(row["station_id"], row["value_type"]) for row in rows] == [
+            (str(water_level_manual.station_id), "M"),
+            (str(water_level_automatic.station_id), "A"),
+        ]
+        assert list(rows[0]) == list(HYDRO_METRIC_EXPORT_FIELDS)
+
+
+class TestQuerysetExport:
+    @pytest.mark.skipif(not Path("/proc/self/statm").exists(), reason="Reads the resident set size from procfs")
+    def test_memory_is_bounded(self, automatic_hydro_station):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                INSERT INTO metrics_hydrologicalmetric (
+                    timestamp_local, timestamp, avg_value, min_value, max_value, unit, value_type, metric_name,
+                    sensor_identifier, sensor_type, station_id, value_code, source_type, source_id
+                )
+                SELECT ts, ts - INTERVAL '6 hours', (random() * 300)::numeric(15, 5), NULL, NULL, 'cm', 'A', 'WLD',
+                    '', '', %s, NULL, 'IN', 0
+                FROM generate_series(
+                    '2000-01-01'::timestamptz, '2000-01-01'::timestamptz + INTERVAL '10 minutes' * (%s - 1),
+                    INTERVAL '10 minutes'
+                ) AS ts
+                """,
+                [automatic_hydro_station.id, SYNTHETIC_ROWS],
+            )
+        queryset = HydrologicalMetric.objects.filter(station=automatic_hydro_station).order_by("timestamp_local")
+
+        exported_rows = exported_bytes = 0
+        baseline = read_rss()
+        with PeakRSSSampler() as sampler:
+            for chunk in iter_queryset_export(queryset, HYDRO_METRIC_EXPORT_FIELDS, "ndjson"):
+                exported_rows += chunk.count(b"\n")
+                exported_bytes += len(chunk)
+
+        assert exported_rows == SYNTHETIC_ROWS
+        # the whole export is a few hundred megabytes
+        assert exported_bytes > 4 * MAX_RSS_GROWTH
+        assert sampler.peak - baseline < MAX_RSS_GROWTH
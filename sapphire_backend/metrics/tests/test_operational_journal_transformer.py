@@ -0,0 +1,303 @@
+import json
+import random
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+from dateutil.relativedelta import relativedelta
+from zoneinfo import ZoneInfo
+
+from sapphire_backend.metrics.choices import HydrologicalMetricName, MeteorologicalMetricName
+from sapphire_backend.metrics.utils.helpers import (
+    OperationalJournalDataTransformer,
+    OperationalJournalVirtualDataTransformer,
+)
+
+GOLDEN_OUTPUTS = Path(__file__).parent / "data" / "operational_journal_golden.json"
+# generated by transform_journals with the per-date filtering implementation the transformers used to have
+GOLDEN_MONTHS = [(2020, 2), (2021, 7)]
+
+
+def timestamp(day: date, hour: int) -> datetime:
+    return datetime(day.year, day.month, day.day, hour, tzinfo=ZoneInfo("UTC"))
+
+
+def month_days(year: int, month: int, include_previous_day: bool = False) -> list[date]:
+    first_day = date(year, month, 1)
+    start = first_day - timedelta(days=1) if include_previous_day else first_day
+    return [start + timedelta(days=offset) for offset in range((first_day + relativedelta(months=1) - start).days)]
+
+
+def build_daily_data(days: list[date], rng: random.Random) -> list[dict]:
+    """
+    Rows shaped like the daily-data endpoint builds them, the observed metrics first and the estimations after
+    """
+    metrics, estimations = [], []
+    for day in days:
+        observed = {}
+        for hour in (8, 20):
+            if rng.random() < 0.85:
+                observed[hour] = rng.randint(100, 300) + rng.choice([0, 0.5])
+                metrics.append(
+                    {
+                        "timestamp_local": timestamp(day, hour),
+                        "avg_value": observed[hour],
+                        "metric_name": HydrologicalMetricName.WATER_LEVEL_DAILY,
+                        "value_code": None,
+                        "sensor_identifier": "",
+                        "has_history": rng.random() < 0.2,
+                    }
+                )
+        for metric_name in (HydrologicalMetricName.WATER_TEMPERATURE, HydrologicalMetricName.AIR_TEMPERATURE):
+            if rng.random() < 0.6:
+                metrics.append(
+                    {
+                        "timestamp_local": timestamp(day, 8),
+                        "avg_value": round(rng.uniform(-5, 25), 3),
+                        "metric_name": metric_name,
+                        "value_code": None,
+                        "sensor_identifier": "",
+                        "has_history": False,
+                    }
+                )
+        if rng.random() < 0.3:
+            metrics.append(
+                {
+                    "timestamp_local": timestamp(day, 8),
+                    "avg_value": round(rng.uniform(0, 30), 1),
+                    "metric_name": HydrologicalMetricName.PRECIPITATION_DAILY,
+                    "value_code": rng.randint(0, 4),
+                    "sensor_identifier": "",
+                    "has_history": False,
+                }
+            )
+        for _ in range(rng.choice([0, 0, 1, 2])):
+            metrics.append(
+                {
+                    "timestamp_local": timestamp(day, 8),
+                    "avg_value": rng.randint(1, 100),
+                    "metric_name": HydrologicalMetricName.ICE_PHENOMENA_OBSERVATION,
+                    "value_code": rng.randint(11, 20),
+                    "sensor_identifier": "",
+                    "has_history": False,
+                }
+            )
+
+        for hour, water_level in observed.items():
+            estimations.append(
+                {
+                    "timestamp_local": timestamp(day, hour),
+                    "avg_value": round(water_level * rng.uniform(0.05, 0.2), 4),
+                    "metric_name": HydrologicalMetricName.WATER_DISCHARGE_DAILY,
+                }
+            )
+        if observed or rng.random() < 0.3:
+            estimations.append(
+                {
+                    "timestamp_local": timestamp(day, 12),
+                    "avg_value": rng.randint(100, 300) + 0.5,
+                    "metric_name": HydrologicalMetricName.WATER_LEVEL_DAILY_AVERAGE,
+                }
+            )
+            estimations.append(
+                {
+                    "timestamp_local": timestamp(day, 12),
+                    "avg_value": round(rng.uniform(0.5, 60), 4),
+                    "metric_name": HydrologicalMetricName.WATER_DISCHARGE_DAILY_AVERAGE,
+                }
+            )
+    return metrics + estimations
+
+
+def build_discharge_data(days: list[date], rng: random.Random) -> list[dict]:
+    data = []
+    for day in days:
+        for metric_name in (
+            HydrologicalMetricName.WATER_LEVEL_DECADAL,
+            HydrologicalMetricName.WATER_DISCHARGE_DAILY,
+            HydrologicalMetricName.RIVER_CROSS_SECTION_AREA,
+        ):
+            if rng.random() < 0.25:
+                data.append(
+                    {
+                        "timestamp_local": timestamp(day, 8),
+                        "avg_value": round(rng.uniform(0.5, 300), 3),
+                        "metric_name": metric_name,
+                        "sensor_identifier": "",
+                        "has_history": rng.random() < 0.2,
+                    }
+                )
+    return data
+
+
+def build_decadal_data(days: list[date], rng: random.Random, metric_names: list[str], value_key: str) -> list[dict]:
+    data = []
+    for metric_name in metric_names:
+        for day in days:
+            if day.day in (5, 15, 25) and rng.random() < 0.8:
+                data.append(
+                    {
+                        "timestamp_local": timestamp(day, 12),
+                        value_key: round(rng.uniform(0.5, 300), 3),
+                        "metric_name": metric_name,
+                    }
+                )
+    return data
+
+
+def build_virtual_daily_data(days: list[date], rng: random.Random) -> list[dict]:
+    discharges = [
+        {
+            "timestamp_local": timestamp(day, hour),
+            "avg_value": round(rng.uniform(0.5, 60), 4),
+            "metric_name": HydrologicalMetricName.WATER_DISCHARGE_DAILY,
+        }
+        for day in days
+        for hour in (8, 20)
+        if rng.random() < 0.85
+    ]
+    averages = [
+        {
+            "timestamp_local": timestamp(day, 12),
+            "avg_value": round(rng.uniform(0.5, 60), 4),
+            "metric_name": HydrologicalMetricName.WATER_DISCHARGE_DAILY_AVERAGE,
+        }
+        for day in days
+        if rng.random() < 0.9
+    ]
+    return discharges + averages
+
+
+def build_journal_inputs(year: int, month: int) -> dict[str, list[dict]]:
+    rng = random.Random(year * 100 + month)
+    days = month_days(year, month)
+    return {
+        "daily": build_daily_data(month_days(year, month, include_previous_day=True), rng),
+        "discharge": build_discharge_data(days, rng),
+        "hydro_decadal": build_decadal_data(
+            days,
+            rng,
+            [HydrologicalMetricName.WATER_LEVEL_DECADE_AVERAGE, HydrologicalMetricName.WATER_DISCHARGE_DECADE_AVERAGE],
+            "avg_value",
+        ),
+        "meteo_decadal": build_decadal_data(
+            days,
+            rng,
+            [
+                MeteorologicalMetricName.AIR_TEMPERATURE_DECADE_AVERAGE,
+                MeteorologicalMetricName.PRECIPITATION_DECADE_AVERAGE,
+            ],
+            "value",
+        ),
+        "virtual_daily": build_virtual_daily_data(days, rng),
+        "virtual_decadal": build_decadal_data(
+            days, rng, [HydrologicalMetricName.WATER_DISCHARGE_DECADE_AVERAGE], "avg_value"
+        ),
+    }
+
+
+def transform_journals(inputs: dict[str, list[dict]], month: int, station) -> dict[str, list[dict]]:
+    return {
+        "daily": OperationalJournalDataTransformer(inputs["daily"], month, station).get_daily_data(),
+        "discharge": OperationalJournalDataTransformer(inputs["discharge"], month, station).get_discharge_data(),
+        "hydro_decadal": OperationalJournalDataTransformer(
+            inputs["hydro_decadal"], month, station
+        ).get_hydro_decadal_data(),
+        "meteo_decadal": OperationalJournalDataTransformer(
+            inputs["meteo_decadal"], month, station
+        ).get_meteo_decadal_data(),
+        "virtual_daily": OperationalJournalVirtualDataTransformer(
+            inputs["virtual_daily"], month, station
+        ).get_daily_data(),
+        "virtual_decadal": OperationalJournalVirtualDataTransformer(
+            inputs["virtual_decadal"], month, station
+        ).get_hydro_decadal_data(),
+    }
+
+
+def normalize(value, station_id: int):
+    """
+    JSON representation of a journal which doesn't depend on numpy/python scalar types or the station ID
+    """
+
+    def default(obj):
+        if isinstance(obj, np.generic):
+            return obj.item()
+        if isinstance(obj, Decimal):
+            return str(obj)
+        if isinstance(obj, (datetime, date, pd.Timestamp)):
+            return obj.isoformat()
+        raise TypeError(type(obj))
+
+    def replace_station_id(obj):
+        if isinstance(obj, dict):
+            return {
+                key: "<station>" if key == "station_id" and item == station_id else replace_station_id(item)
+                for key, item in obj.items()
+            }
+        if isinstance(obj, list):
+            return [replace_station_id(item) for item in obj]
+        return obj
+
+    return replace_station_id(json.loads(json.dumps(value, default=default)))
+
+
+class TestOperationalJournalTransformer:
+    @pytest.mark.parametrize("year, month", GOLDEN_MONTHS)
+    def test_journals_match_golden_outputs(self, manual_hydro_station_kyrgyz, year, month):
+        golden = json.loads(GOLDEN_OUTPUTS.read_text())[f"{year}-{month:02d}"]
+
+        journals = transform_journals(build_journal_inputs(year, month), month, manual_hydro_station_kyrgyz)
+
+        assert normalize(journals, manual_hydro_station_kyrgyz.id) == golden
+
+    def test_empty_data(self, manual_hydro_station_kyrgyz):
+        transformer = OperationalJournalDataTransformer([], 2, manual_hydro_station_kyrgyz)
+
+        assert transformer.get_daily_data() == []
+        assert transformer.get_daily_data_per_month() == {}
+        assert transformer.get_discharge_data_per_month() == {}
+
+    def test_whole_year_in_one_pass(self, manual_hydro_station_kyrgyz, manual_calculation_period):
+        rng = random.Random(2020)
+        year_days = [date(2019, 12, 31)] + [day for month in range(1, 13) for day in month_days(2020, month)]
+        daily_data = build_daily_data(year_days, rng)
+        decadal_data = build_decadal_data(
+            year_days,
+            rng,
+            [HydrologicalMetricName.WATER_LEVEL_DECADE_AVERAGE, HydrologicalMetricName.WATER_DISCHARGE_DECADE_AVERAGE],
+            "avg_value",
+        )
+
+        daily_per_month = OperationalJournalDataTransformer(
+            daily_data, 1, manual_hydro_station_kyrgyz
+        ).get_daily_data_per_month()
+        decadal_per_month = OperationalJournalDataTransformer(
+            decadal_data, 1, manual_hydro_station_kyrgyz
+        ).get_hydro_decadal_data_per_month()
+
+        for month in range(1, 13):
+            month_start = date(2020, month, 1)
+            window = month_days(2020, month, include_previous_day=True)
+            month_daily_data = [row for row in daily_data if row["timestamp_local"].date() in window]
+            month_decadal_data = [row for row in decadal_data if row["timestamp_local"].date() in window[1:]]
+
+            assert (
+                daily_per_month[month_start]
+                == OperationalJournalDataTransformer(
+                    month_daily_data, month, manual_hydro_station_kyrgyz
+                ).get_daily_data()
+            )
+            assert (
+                decadal_per_month[month_start]
+                == OperationalJournalDataTransformer(
+                    month_decadal_data, month, manual_hydro_station_kyrgyz
+                ).get_hydro_decadal_data()
+            )
+        # the February rows with a manual calculation period
+        assert any(
+            row["water_discharge_morning"].get("allow_manual_override") for row in daily_per_month[date(2020, 2, 1)]
+        )
@@ -2,8 +2,9 @@ import datetime as dt
 
 import pytest
 
-from sapphire_backend.metrics.choices import HydrologicalMeasurementType, HydrologicalMetricName
-from sapphire_backend.metrics.models import HydrologicalMetric, MeteorologicalMetric
+from sapphire_backend.metrics.choices import HydrologicalMeasurementType, HydrologicalMetricName, TimeseriesResolution
+from sapphire_backend.metrics.models import HydrologicalMetric, HydrologicalMetricHourly, MeteorologicalMetric
+from sapphire_backend.metrics.tests.factories import build_hydro_metrics
 from sapphire_backend.metrics.timeseries.query import TimeseriesQueryManager
 
 
@@ -271,6 +272,17 @@ class TestTimeseriesQueryManager:
         with pytest.raises(ValueError, match="Invalid aggregation function"):
             _ = query_manager.time_bucket("1 day", "error")
 
+    def test_query_manager_time_bucket_error_keeps_connection_usable(
+        self, organization, water_level_manual, water_level_manual_other, water_level_automatic, water_discharge
+    ):
+        query_manager = TimeseriesQueryManager(HydrologicalMetric)
+
+        with pytest.raises(ValueError, match="Invalid time bucket interval"):
+            _ = query_manager.time_bucket("error", "avg")
+
+        assert HydrologicalMetric.objects.count() == 4
+        assert len(query_manager.time_bucket("1 day", "count")) > 0
+
     def test_query_manager_time_bucket_for_daily_count_interval(
         self,
         organization,
@@ -381,3 +393,72 @@ class TestTimeseriesQueryManager:
                 "value": 1,
             }
         ]
+
+    @pytest.mark.parametrize(
+        "days, resolution, expected",
+        [
+            (7, None, TimeseriesResolution.RAW),
+            (30, None, TimeseriesResolution.RAW),
+            (31, None, TimeseriesResolution.HOURLY),
+            (3 * 365, None, TimeseriesResolution.HOURLY),
+            (7, TimeseriesResolution.HOURLY, TimeseriesResolution.HOURLY),
+        ],
+    )
+    def test_query_router_resolution(self, organization, days, resolution, expected):
+        start = dt.datetime(2020, 1, 1, tzinfo=dt.timezone.utc)
+        query_manager = TimeseriesQueryManager(
+            HydrologicalMetric,
+            filter_dict={"timestamp_local__gte": start, "timestamp_local__lt": start + dt.timedelta(days=days)},
+        )
+
+        assert query_manager.resolve_resolution(resolution) == expected
+
+    @pytest.mark.parametrize(
+        "days, resolution, message",
+        [
+            (31, TimeseriesResolution.RAW, "Date range cannot be more than 30 days for raw data"),
+            (4 * 365, None, "Date range cannot be more than 1098 days for hourly data"),
+            (None, None, "Both the start and the end of the date range are required"),
+        ],
+    )
+    def test_query_router_invalid_range(self, organization, days, resolution, message):
+        start = dt.datetime(2020, 1, 1, tzinfo=dt.timezone.utc)
+        filter_dict = {"timestamp_local__gte": start}
+        if days is not None:
+            filter_dict["timestamp_local__lte"] = start + dt.timedelta(days=days)
+        query_manager = TimeseriesQueryManager(HydrologicalMetric, filter_dict=filter_dict)
+
+        with pytest.raises(ValueError, match=message):
+            query_manager.resolve_resolution(resolution)
+
+    def test_query_router_meteo_is_raw(self, organization):
+        query_manager = TimeseriesQueryManager(MeteorologicalMetric)
+
+        assert query_manager.resolve_resolution() == TimeseriesResolution.RAW
+        with pytest.raises(ValueError, match="hourly resolution is not available for meteorological metrics"):
+            query_manager.resolve_resolution(TimeseriesResolution.HOURLY)
+
+    def test_execute_routed_query_reads_hourly_aggregate(self, organization, automatic_hydro_station):
+        start = dt.datetime(2024, 5, 1, tzinfo=dt.timezone.utc)
+        HydrologicalMetric.objects.bulk_upsert(build_hydro_metrics(automatic_hydro_station, 24, start=start))
+        query_manager = TimeseriesQueryManager(
+            HydrologicalMetric,
+            filter_dict={
+                "station": automatic_hydro_station.id,
+                "timestamp_local__gte": start,
+                "timestamp_local__lt": start + dt.timedelta(days=90),
+            },
+            order_direction="ASC",
+        )
+
+        results = query_manager.execute_routed_query()
+        hourly = list(results)
+
+        assert results.model == HydrologicalMetricHourly
+        assert [(metric.timestamp_local, metric.value_count) for metric in hourly] == [
+            (start + dt.timedelta(hours=hour), 6) for hour in range(4)
+        ]
+        # the 10-minute readings of the first hour have the averages 10.0 to 15.0
+        assert float(hourly[0].avg_value) == 12.5
+        assert float(hourly[0].min_value) == 10.0
+        assert float(hourly[0].max_value) == 15.0
@@ -0,0 +1,142 @@
+import datetime as dt
+
+import pytest
+from django.db import transaction
+from zoneinfo import ZoneInfo
+
+from sapphire_backend.metrics.choices import HydrologicalMeasurementType, HydrologicalMetricName, MetricUnit
+from sapphire_backend.metrics.models import HydrologicalMetric
+from sapphire_backend.metrics.timeseries.refresh import ContinuousAggregateRefreshQueue, coalesce_windows
+from sapphire_backend.metrics.timeseries.refresh import refresh_queue as global_refresh_queue
+
+
+class RefreshRecorder:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, start_date: str, end_date: str):
+        self.calls.append((start_date, end_date))
+
+
+@pytest.fixture
+def recorder():
+    return RefreshRecorder()
+
+
+@pytest.fixture
+def refresh_queue(recorder):
+    return ContinuousAggregateRefreshQueue(refresh=recorder)
+
+
+class TestCoalesceWindows:
+    def test_adjacent_and_overlapping_windows_are_merged(self):
+        windows = [
+            (dt.date(2024, 5, 2), dt.date(2024, 5, 2)),
+            (dt.date(2024, 5, 1), dt.date(2024, 5, 1)),
+            (dt.date(2024, 5, 2), dt.date(2024, 5, 4)),
+            (dt.date(2024, 5, 3), dt.date(2024, 5, 3)),
+        ]
+
+        assert coalesce_windows(windows) == [(dt.date(2024, 5, 1), dt.date(2024, 5, 4))]
+
+    def test_gaps_are_kept(self):
+        windows = [(dt.date(2024, 5, 10), dt.date(2024, 5, 10)), (dt.date(2024, 5, 1), dt.date(2024, 5, 2))]
+
+        assert coalesce_windows(windows) == [
+            (dt.date(2024, 5, 1), dt.date(2024, 5, 2)),
+            (dt.date(2024, 5, 10), dt.date(2024, 5, 10)),
+        ]
+
+    def test_empty(self):
+        assert coalesce_windows([]) == []
+
+
+class TestContinuousAggregateRefreshQueue:
+    @pytest.mark.django_db
+    def test_flush_after_commit(self, refresh_queue, recorder, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            for _ in range(144):
+                refresh_queue.add(dt.date(2024, 5, 1))
+            assert recorder.calls == []
+
+        assert recorder.calls == [("2024-05-01", "2024-05-01")]
+        assert refresh_queue.stats == {"requested": 144, "executed": 1, "avoided": 143}
+
+    @pytest.mark.django_db
+    def test_rollback_keeps_windows_pending(self, refresh_queue, recorder, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    refresh_queue.add(dt.date(2024, 5, 1))
+                    raise ValueError
+            except ValueError:
+                pass
+
+        assert recorder.calls == []
+        assert refresh_queue.pending == [(dt.date(2024, 5, 1), dt.date(2024, 5, 1))]
+
+    @pytest.mark.django_db
+    def test_deferred_flushes_once_for_outermost_block(
+        self, refresh_queue, recorder, django_capture_on_commit_callbacks
+    ):
+        with django_capture_on_commit_callbacks(execute=True):
+            with refresh_queue.deferred():
+                with refresh_queue.deferred():
+                    refresh_queue.add(dt.date(2024, 5, 1))
+                    refresh_queue.add(dt.date(2024, 5, 3))
+                refresh_queue.add(dt.date(2024, 5, 2))
+                refresh_queue.add(dt.date(2024, 6, 1), dt.date(2024, 6, 5))
+
+        assert recorder.calls == [("2024-05-01", "2024-05-03"), ("2024-06-01", "2024-06-05")]
+        assert refresh_queue.stats == {"requested": 4, "executed": 2, "avoided": 2}
+        assert refresh_queue.pending == []
+
+    def test_reset_stats(self, refresh_queue):
+        refresh_queue.flush()
+        refresh_queue.reset_stats()
+
+        assert refresh_queue.stats == {"requested": 0, "executed": 0, "avoided": 0}
+
+
+class TestHydrologicalMetricRefresh:
+    @pytest.mark.django_db
+    def test_water_level_saves_share_one_refresh(
+        self, manual_hydro_station, recorder, monkeypatch, django_capture_on_commit_callbacks
+    ):
+        monkeypatch.setattr(global_refresh_queue, "_refresh", recorder)
+        start = dt.datetime(2024, 5, 1, 0, 0, tzinfo=ZoneInfo("UTC"))
+
+        with django_capture_on_commit_callbacks(execute=True):
+            for idx in range(6 * 24):
+                HydrologicalMetric(
+                    timestamp_local=start + dt.timedelta(minutes=10 * idx),
+                    avg_value=100 + idx,
+                    unit=MetricUnit.WATER_LEVEL,
+                    metric_name=HydrologicalMetricName.WATER_LEVEL_DAILY,
+                    value_type=HydrologicalMeasurementType.MANUAL,
+                    station=manual_hydro_station,
+                ).save()
+
+        assert recorder.calls == [("2024-05-01", "2024-05-01")]
+
+    @pytest.mark.django_db
+    def test_bulk_upsert_refreshes_dirty_days_once(
+        self, manual_hydro_station, recorder, monkeypatch, django_capture_on_commit_callbacks
+    ):
+        monkeypatch.setattr(global_refresh_queue, "_refresh", recorder)
+        metrics = [
+            HydrologicalMetric(
+                timestamp_local=dt.datetime(2024, 5, day, 8, 0, tzinfo=ZoneInfo("UTC")),
+                avg_value=100,
+                unit=MetricUnit.WATER_LEVEL,
+                metric_name=HydrologicalMetricName.WATER_LEVEL_DAILY,
+                value_type=HydrologicalMeasurementType.MANUAL,
+                station=manual_hydro_station,
+            )
+            for day in [1, 2, 3, 10]
+        ]
+
+        with django_capture_on_commit_callbacks(execute=True):
+            HydrologicalMetric.objects.bulk_upsert(metrics, batch_size=2)
+
+        assert recorder.calls == [("2024-05-01", "2024-05-03"), ("2024-05-10", "2024-05-10")]
@@ -0,0 +1,80 @@
+from datetime import datetime
+from typing import TypedDict
+
+from django.db import connection
+
+# TimescaleDB before 2.11 cannot modify compressed chunks, newer versions decompress the affected rows on their own
+COMPRESSED_CHUNK_ERRORS = ("not supported on compressed chunks", "as it is compressed")
+
+
+class CompressionStats(TypedDict):
+    total_chunks: int
+    compressed_chunks: int
+    before_compression_bytes: int
+    after_compression_bytes: int
+
+
+def is_compressed_chunk_error(error: Exception) -> bool:
+    message = str(error)
+    return any(compressed_chunk_error in message for compressed_chunk_error in COMPRESSED_CHUNK_ERRORS)
+
+
+def get_chunks(
+    table: str, start: datetime | None = None, end: datetime | None = None, compressed: bool | None = None
+) -> list[str]:
+    """
+    Qualified names of the chunks of the hypertable overlapping [start, end), oldest first.
+    """
+    query = """
+        SELECT format('%%I.%%I', chunk_schema, chunk_name)
+        FROM timescaledb_information.chunks
+        WHERE hypertable_schema = 'public' AND hypertable_name = %s
+            AND (%s::timestamptz IS NULL OR range_end > %s::timestamptz)
+            AND (%s::timestamptz IS NULL OR range_start < %s::timestamptz)
+            AND (%s::boolean IS NULL OR is_compressed = %s::boolean)
+        ORDER BY range_start
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(query, [table, start, start, end, end, compressed, compressed])
+        return [chunk for (chunk,) in cursor.fetchall()]
+
+
+def compress_chunks(table: str, start: datetime | None = None, end: datetime | None = None) -> list[str]:
+    chunks = get_chunks(table, start, end, compressed=False)
+    with connection.cursor() as cursor:
+        for chunk in chunks:
+            cursor.execute("SELECT compress_chunk(%s::regclass, if_not_compressed => true)", [chunk])
+    return chunks
+
+
+def decompress_chunks(table: str, start: datetime | None = None, end: datetime | None = None) -> list[str]:
+    """
+    The compression policy compresses the chunks again once it runs.
+    """
+    chunks = get_chunks(table, start, end, compressed=True)
+    with connection.cursor() as cursor:
+        for chunk in chunks:
+            cursor.execute("SELECT decompress_chunk(%s::regclass, if_compressed => true)", [chunk])
+    return chunks
+
+
+def get_compression_stats(table: str) -> CompressionStats:
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT COALESCE(total_chunks, 0),
+                   COALESCE(number_compressed_chunks, 0),
+                   COALESCE(before_compression_total_bytes, 0),
+                   COALESCE(after_compression_total_bytes, 0)
+            FROM hypertable_compression_stats(%s::regclass)
+            """,
+            [table],
+        )
+        # no row while the hypertable has no chunks
+        total_chunks, compressed_chunks, before_bytes, after_bytes = cursor.fetchone() or (0, 0, 0, 0)
+    return CompressionStats(
+        total_chunks=total_chunks,
+        compressed_chunks=compressed_chunks,
+        before_compression_bytes=before_bytes,
+        after_compression_bytes=after_bytes,
+    )
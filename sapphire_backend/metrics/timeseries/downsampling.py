@@ -0,0 +1,33 @@
+import numpy as np
+
+# the first and the last point plus a minimum and a maximum per bucket
+MIN_MAX_POINTS = 4
+
+
+def downsample_min_max(values: np.ndarray, max_points: int) -> np.ndarray:
+    """
+    Indices of at most max_points values which keep the shape of the series: the first and the last value and
+    the minimum and the maximum of every one of (max_points - 2) // 2 equally sized buckets, in their original
+    order. Peaks and troughs always survive, unlike with plain decimation. Missing values (NaN) never win a bucket
+    unless the whole bucket is missing.
+    """
+    if max_points < MIN_MAX_POINTS:
+        raise ValueError(f"At least {MIN_MAX_POINTS} points are needed to keep the shape of a series")
+    count = len(values)
+    if count <= max_points:
+        return np.arange(count)
+
+    buckets = (max_points - 2) // 2
+    starts = np.linspace(0, count, buckets + 1).astype(int)[:-1]
+    positions = np.arange(count)
+    sizes = np.diff(np.append(starts, count))
+
+    lows = np.where(np.isnan(values), np.inf, values)
+    highs = np.where(np.isnan(values), -np.inf, values)
+    # the first position per bucket which has the bucket's extremum
+    is_min = lows == np.repeat(np.minimum.reduceat(lows, starts), sizes)
+    is_max = highs == np.repeat(np.maximum.reduceat(highs, starts), sizes)
+    min_positions = np.minimum.reduceat(np.where(is_min, positions, count), starts)
+    max_positions = np.minimum.reduceat(np.where(is_max, positions, count), starts)
+
+    return np.unique(np.concatenate([[0, count - 1], min_positions, max_positions]))
@@ -1,14 +1,22 @@
 from typing import Any
 
-from django.db import connection
-from django.db.models import Count, Exists, OuterRef
+from django.db import connection, transaction
+from django.db.models import Count, Exists, OuterRef, QuerySet
 from django.db.utils import DataError, ProgrammingError
 
 from sapphire_backend.organizations.models import Organization
 from sapphire_backend.quality_control.models import HistoryLogEntry
 from sapphire_backend.stations.models import HydrologicalStation, MeteorologicalStation, Site
 
-from ..models import HydrologicalMetric, MeteorologicalMetric
+from ..choices import TimeseriesResolution
+from ..models import HydrologicalMetric, HydrologicalMetricHourly, MeteorologicalMetric
+
+# longest date range (in days) of hydrological data read per resolution, the raw 10-minute readings of a month and
+# the hourly aggregate of a few years keep the number of rows per station and metric in the same order
+RESOLUTION_MAX_DAYS = {
+    TimeseriesResolution.RAW: 30,
+    TimeseriesResolution.HOURLY: 3 * 366,
+}
 
 
 class TimeseriesQueryManager:
@@ -165,6 +173,43 @@ class TimeseriesQueryManager:
             )
         )
 
+    def _get_date_range_days(self) -> int:
+        start = self.filter_dict.get("timestamp_local__gte") or self.filter_dict.get("timestamp_local__gt")
+        end = self.filter_dict.get("timestamp_local__lt") or self.filter_dict.get("timestamp_local__lte")
+        if start is None or end is None:
+            raise ValueError("Both the start and the end of the date range are required")
+        return (end - start).days
+
+    def resolve_resolution(self, resolution: TimeseriesResolution | None = None) -> TimeseriesResolution:
+        """
+        Query router, return the resolution the filtered date range is read at: the raw rows if the range is short
+        enough for them, the hourly aggregate otherwise. A requested resolution is only checked against the range.
+        Meteorological metrics are always read raw, they have no aggregate.
+        """
+        if self.model == MeteorologicalMetric:
+            if resolution not in [None, TimeseriesResolution.RAW]:
+                raise ValueError(f"{resolution} resolution is not available for meteorological metrics")
+            return TimeseriesResolution.RAW
+
+        days = self._get_date_range_days()
+        if resolution is None:
+            if days <= RESOLUTION_MAX_DAYS[TimeseriesResolution.RAW]:
+                return TimeseriesResolution.RAW
+            resolution = TimeseriesResolution.HOURLY
+        if days > RESOLUTION_MAX_DAYS[resolution]:
+            raise ValueError(
+                f"Date range cannot be more than {RESOLUTION_MAX_DAYS[resolution]} days for {resolution} data"
+            )
+        return resolution
+
+    def execute_routed_query(self, resolution: TimeseriesResolution | None = None) -> QuerySet:
+        """
+        Same as execute_query, but read from the source picked by resolve_resolution.
+        """
+        if self.resolve_resolution(resolution) == TimeseriesResolution.HOURLY:
+            return HydrologicalMetricHourly.objects.filter(**self.filter_dict).order_by(self.order)
+        return self.execute_query()
+
     def get_total(self):
         return self.model.objects.filter(**self.filter_dict).count()
 
@@ -204,16 +249,15 @@ class TimeseriesQueryManager:
             LIMIT %s
         """
 
+        # the savepoint keeps the request transaction usable if the query fails
         try:
-            with connection.cursor() as cursor:
+            with transaction.atomic(), connection.cursor() as cursor:
                 cursor.execute(query, [interval, *params, limit])
                 rows = cursor.fetchall()
         except DataError:
             raise ValueError("Invalid time bucket interval")
         except ProgrammingError:
             raise ValueError("Invalid aggregation function")
-        finally:
-            connection.close()
 
         results = [{"bucket": row[0], "value": row[1]} for row in rows]
         return results
@@ -282,13 +326,11 @@ class TimeseriesQueryManager:
             ORDER BY wlda.timestamp_local {self.order_direction}
         """
         try:
-            with connection.cursor() as cursor:
+            with transaction.atomic(), connection.cursor() as cursor:
                 cursor.execute(query, all_params)
                 columns = [col[0] for col in cursor.description]
                 rows = cursor.fetchall()
         except (DataError, ProgrammingError) as e:
             raise ValueError(f"Query execution failed: {str(e)}")
-        finally:
-            connection.close()
 
         return [dict(zip(columns, row)) for row in rows]
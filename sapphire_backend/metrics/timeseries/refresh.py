@@ -0,0 +1,119 @@
+import logging
+import threading
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from datetime import date, timedelta
+from typing import TypedDict
+
+from django.db import transaction
+
+from sapphire_backend.utils.db_helper import refresh_continuous_aggregate
+
+
+class RefreshStats(TypedDict):
+    requested: int
+    executed: int
+    avoided: int
+
+
+def coalesce_windows(windows: list[tuple[date, date]]) -> list[tuple[date, date]]:
+    """
+    Merge overlapping and adjacent (inclusive) day windows into the minimal list of windows, e.g.
+    [(1.5., 1.5.), (2.5., 2.5.), (4.5., 6.5.)] -> [(1.5., 2.5.), (4.5., 6.5.)]
+    """
+    merged = []
+    for start_date, end_date in sorted(windows):
+        if merged and start_date <= merged[-1][1] + timedelta(days=1):
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end_date))
+        else:
+            merged.append((start_date, end_date))
+    return merged
+
+
+class ContinuousAggregateRefreshQueue:
+    """
+    Process-local queue of dirty day windows of the estimations_water_level_daily_average continuous aggregate.
+    The windows are flushed after the current transaction commits, or right away in autocommit mode. Within the
+    deferred() context manager the flush waits until the outermost block exits, so a whole batch or command run
+    results in one refresh per coalesced window.
+    """
+
+    def __init__(self, refresh: Callable[[str, str], None] = refresh_continuous_aggregate):
+        self._refresh = refresh
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._requested = 0
+        self._executed = 0
+
+    @property
+    def _windows(self) -> list[tuple[date, date]]:
+        if not hasattr(self._local, "windows"):
+            self._local.windows = []
+        return self._local.windows
+
+    @property
+    def _deferred_depth(self) -> int:
+        return getattr(self._local, "deferred_depth", 0)
+
+    @_deferred_depth.setter
+    def _deferred_depth(self, value: int):
+        self._local.deferred_depth = value
+
+    @property
+    def pending(self) -> list[tuple[date, date]]:
+        return coalesce_windows(self._windows)
+
+    @property
+    def stats(self) -> RefreshStats:
+        with self._lock:
+            return RefreshStats(
+                requested=self._requested, executed=self._executed, avoided=self._requested - self._executed
+            )
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self._requested = 0
+            self._executed = 0
+
+    def add(self, start_date: date, end_date: date = None) -> None:
+        """
+        Mark the days from start_date to end_date (inclusive) as dirty.
+        """
+        self._windows.append((start_date, end_date or start_date))
+        with self._lock:
+            self._requested += 1
+        if not self._deferred_depth:
+            # runs immediately in autocommit mode, otherwise after the commit where all but the first flush are no-ops
+            transaction.on_commit(self.flush)
+
+    def flush(self) -> int:
+        """
+        Refresh the continuous aggregate once for every coalesced dirty window, return the number of refreshes.
+        """
+        windows = coalesce_windows(self._windows)
+        self._local.windows = []
+        for start_date, end_date in windows:
+            self._refresh(start_date.isoformat(), end_date.isoformat())
+            with self._lock:
+                self._executed += 1
+        if windows:
+            stats = self.stats
+            logging.info(
+                f"Refreshed estimations_water_level_daily_average for {len(windows)} window(s), "
+                f"{stats['executed']} refreshes executed for {stats['requested']} requested, "
+                f"{stats['avoided']} avoided"
+            )
+        return len(windows)
+
+    @contextmanager
+    def deferred(self) -> Iterator["ContinuousAggregateRefreshQueue"]:
+        self._deferred_depth += 1
+        try:
+            yield self
+        finally:
+            self._deferred_depth -= 1
+            if not self._deferred_depth:
+                transaction.on_commit(self.flush)
+
+
+refresh_queue = ContinuousAggregateRefreshQueue()
@@ -0,0 +1,189 @@
+import logging
+from collections.abc import Iterable, Iterator
+from datetime import timedelta
+from itertools import islice
+from typing import TypedDict
+
+from django.db import connection, transaction
+from django.db.utils import NotSupportedError
+
+from ..choices import HydrologicalMeasurementType, HydrologicalMetricName
+from .compression import decompress_chunks, is_compressed_chunk_error
+from .refresh import refresh_queue
+
+ROOT_TABLE_INSERT_ERROR = 'invalid INSERT on the root table of hypertable "'
+
+
+class UpsertResult(TypedDict):
+    inserted: int
+    updated: int
+
+
+def get_hyper_chunk_name_from_error(error: Exception) -> str | None:
+    """
+    Timescale sometimes leaves the ts_insert_blocker trigger on a chunk, e.g.:
+    invalid INSERT on the root table of hypertable "_hyper_1_104_chunk"
+    Return the chunk name from such an error or None if the error is of a different kind.
+    """
+    message = str(error)
+    if ROOT_TABLE_INSERT_ERROR not in message:
+        return None
+    hyper_chunk_name = message.split(ROOT_TABLE_INSERT_ERROR)[1].split('"')[0]
+    if hyper_chunk_name.startswith("_hyper") and hyper_chunk_name.endswith("_chunk"):
+        return hyper_chunk_name
+    return None
+
+
+def batched(iterable: Iterable, batch_size: int) -> Iterator[list]:
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, batch_size)):
+        yield batch
+
+
+class MetricBulkUpserter:
+    """
+    Set-based upsert of metrics. Every batch is streamed with COPY into a temporary staging table
+    and merged into the hypertable with a single INSERT ... ON CONFLICT statement.
+    """
+
+    db_table: str
+    staging_table: str
+    key_columns: list[str]
+    insert_only_columns = ["timestamp"]
+    update_columns: list[str]
+    max_trigger_removals = 10
+
+    def __init__(self, batch_size: int = 5000, refresh_view: bool = True):
+        if batch_size < 1:
+            raise ValueError("Batch size must be a positive integer.")
+        self.batch_size = batch_size
+        self.refresh_view = refresh_view
+
+    @property
+    def columns(self) -> list[str]:
+        return self.key_columns + self.insert_only_columns + self.update_columns
+
+    @property
+    def merge_sql(self) -> str:
+        columns = ", ".join(self.columns)
+        update_set = ", ".join(f"{column} = EXCLUDED.{column}" for column in self.update_columns)
+        return f"""
+            WITH upserted AS (
+                INSERT INTO {self.db_table} ({columns})
+                SELECT {columns} FROM {self.staging_table}
+                ON CONFLICT ({", ".join(self.key_columns)})
+                DO UPDATE SET {update_set}
+                RETURNING (xmax = 0) AS inserted
+            )
+            SELECT
+                COUNT(*) FILTER (WHERE inserted),
+                COUNT(*) FILTER (WHERE NOT inserted)
+            FROM upserted;
+        """
+
+    def get_row(self, metric) -> tuple:
+        return tuple(getattr(metric, column) for column in self.columns)
+
+    def track_refresh(self, metric) -> None:
+        """
+        Override in case writing the metric should refresh a continuous aggregate.
+        """
+        pass
+
+    def prepare_batch(self, metrics: list) -> list[tuple]:
+        """
+        Convert the metrics to rows, the last occurrence of a composite key wins since a single
+        INSERT ... ON CONFLICT statement cannot affect the same row twice.
+        """
+        key_length = len(self.key_columns)
+        rows = {}
+        for metric in metrics:
+            row = self.get_row(metric)
+            rows[row[:key_length]] = row
+            if self.refresh_view:
+                self.track_refresh(metric)
+        return list(rows.values())
+
+    def _create_staging_table(self, cursor) -> None:
+        cursor.execute(
+            f"CREATE TEMP TABLE IF NOT EXISTS {self.staging_table} "
+            f"(LIKE {self.db_table} INCLUDING DEFAULTS) ON COMMIT DROP;"
+        )
+
+    def _merge_batch(self, cursor, rows: list[tuple]) -> tuple[int, int]:
+        cursor.execute(f"TRUNCATE {self.staging_table};")
+        with cursor.copy(f"COPY {self.staging_table} ({', '.join(self.columns)}) FROM STDIN") as copy:
+            for row in rows:
+                copy.write_row(row)
+        cursor.execute(self.merge_sql)
+        inserted, updated = cursor.fetchone()
+        return inserted, updated
+
+    def _decompress_batch_chunks(self, rows: list[tuple]) -> None:
+        timestamp_index = self.columns.index("timestamp_local")
+        timestamps = [row[timestamp_index] for row in rows]
+        # end is exclusive, the chunk of the latest row has to be included
+        chunks = decompress_chunks(self.db_table, min(timestamps), max(timestamps) + timedelta(microseconds=1))
+        logging.info(f"Decompressed {len(chunks)} chunk(s) of {self.db_table} to upsert into them")
+
+    def _upsert_batch(self, cursor, rows: list[tuple]) -> tuple[int, int]:
+        decompressed = False
+        for _ in range(self.max_trigger_removals):
+            try:
+                with transaction.atomic():
+                    return self._merge_batch(cursor, rows)
+            except NotSupportedError as e:
+                if is_compressed_chunk_error(e) and not decompressed:
+                    self._decompress_batch_chunks(rows)
+                    decompressed = True
+                    continue
+                hyper_chunk_name = get_hyper_chunk_name_from_error(e)
+                if hyper_chunk_name is None:
+                    raise
+                cursor.execute(
+                    f"DROP TRIGGER IF EXISTS ts_insert_blocker ON _timescaledb_internal.{hyper_chunk_name};"
+                )
+                logging.info(f"Removed unwanted ts_insert_blocker on {hyper_chunk_name}")
+        raise Exception(f"Bulk upsert into {self.db_table} failed, too many chunks with ts_insert_blocker triggers.")
+
+    def upsert(self, metrics: Iterable) -> UpsertResult:
+        result = UpsertResult(inserted=0, updated=0)
+        # the dirty days are refreshed once, after the transaction with the new rows commits
+        with transaction.atomic(), refresh_queue.deferred():
+            with connection.cursor() as cursor:
+                self._create_staging_table(cursor)
+                for batch in batched(metrics, self.batch_size):
+                    inserted, updated = self._upsert_batch(cursor, self.prepare_batch(batch))
+                    result["inserted"] += inserted
+                    result["updated"] += updated
+        return result
+
+
+class HydrologicalMetricBulkUpserter(MetricBulkUpserter):
+    db_table = "metrics_hydrologicalmetric"
+    staging_table = "metrics_hydrologicalmetric_staging"
+    key_columns = ["timestamp_local", "station_id", "metric_name", "value_type", "sensor_identifier"]
+    update_columns = [
+        "min_value",
+        "avg_value",
+        "max_value",
+        "source_type",
+        "source_id",
+        "unit",
+        "sensor_type",
+        "value_code",
+    ]
+
+    def track_refresh(self, metric) -> None:
+        if metric.metric_name == HydrologicalMetricName.WATER_LEVEL_DAILY and metric.value_type in [
+            HydrologicalMeasurementType.MANUAL,
+            HydrologicalMeasurementType.AUTOMATIC,
+        ]:
+            refresh_queue.add(metric.timestamp_local.date())
+
+
+class MeteorologicalMetricBulkUpserter(MetricBulkUpserter):
+    db_table = "metrics_meteorologicalmetric"
+    staging_table = "metrics_meteorologicalmetric_staging"
+    key_columns = ["timestamp_local", "station_id", "metric_name"]
+    update_columns = ["value", "value_type", "unit", "source_type", "source_id"]
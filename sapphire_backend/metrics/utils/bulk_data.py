@@ -1,13 +1,60 @@
+import hashlib
+import json
+import tempfile
+import threading
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import contextmanager
+from datetime import timedelta
+from itertools import islice
+
+import numpy as np
 import pandas as pd
+from django.core.files import File
+from django.db import connection
+from django.db.models import F, QuerySet
+from django.utils import timezone
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Border, Font, Side
 from openpyxl.utils import get_column_letter
-
-from sapphire_backend.metrics.models import BulkDataHydroAuto, BulkDataHydroManual, BulkDataMeteo, BulkDataVirtual
+from openpyxl.worksheet._write_only import WriteOnlyWorksheet
+
+from sapphire_backend.metrics.choices import BulkDataExportStatus
+from sapphire_backend.metrics.exceptions import BulkDataExportJobReclaimed
+from sapphire_backend.metrics.models import (
+    BulkDataExportJob,
+    BulkDataHydroAuto,
+    BulkDataHydroManual,
+    BulkDataMeteo,
+    BulkDataVirtual,
+)
 from sapphire_backend.stations.models import HydrologicalStation, MeteorologicalStation, VirtualStation
 
-
-def add_sheet_column_styling(writer: pd.ExcelWriter, sheet_name: str, sheet_headers: list):
-    worksheet = writer.sheets[sheet_name]
-
+BULK_DATA_CHUNK_SIZE = 5000
+BULK_DATA_FILENAME = "bulk-data.xlsx"
+# identical exports requested within the window are served by the same job
+BULK_DATA_EXPORT_FRESHNESS = timedelta(minutes=15)
+# a running job is reclaimed when its progress hasn't been updated for this long
+BULK_DATA_EXPORT_STALE_AFTER = timedelta(minutes=10)
+# a running job touches its last_modified this often, also while no progress is written
+BULK_DATA_EXPORT_HEARTBEAT_INTERVAL = timedelta(minutes=1)
+BULK_DATA_STATION_PARAMETERS = [
+    "hydro_station_manual_uuids",
+    "hydro_station_auto_uuids",
+    "meteo_station_uuids",
+    "virtual_station_uuids",
+]
+
+# the header style pandas applies when writing a data frame to an Excel sheet
+HEADER_FONT = Font(bold=True)
+HEADER_BORDER = Border(
+    left=Side(style="thin"), right=Side(style="thin"), top=Side(style="thin"), bottom=Side(style="thin")
+)
+HEADER_ALIGNMENT = Alignment(horizontal="center", vertical="top")
+
+
+def add_sheet_column_styling(worksheet: WriteOnlyWorksheet, sheet_headers: list):
+    # a write-only sheet only takes the column and row dimensions before the first row is appended
     column_letter = get_column_letter(1)
     worksheet.column_dimensions[column_letter].width = 20
     for col_num in range(2, len(sheet_headers) + 1):
@@ -16,34 +63,112 @@ def add_sheet_column_styling(writer: pd.ExcelWriter, sheet_name: str, sheet_head
     worksheet.row_dimensions[1].height = 45
 
 
+def get_header_row(worksheet: WriteOnlyWorksheet, sheet_headers: list) -> list[WriteOnlyCell]:
+    header_row = []
+    for header in sheet_headers:
+        cell = WriteOnlyCell(worksheet, value=header)
+        cell.font = HEADER_FONT
+        cell.border = HEADER_BORDER
+        cell.alignment = HEADER_ALIGNMENT
+        header_row.append(cell)
+    return header_row
+
+
 def transform_timestamp_local_format(df: pd.DataFrame) -> pd.DataFrame:
     df["timestamp_local"] = pd.to_datetime(df["timestamp_local"]).dt.strftime("%d.%m.%Y. %H:%M:%S")
     return df
 
 
+def format_column_values(column: pd.Series, format_value: Callable, missing_value="") -> pd.Series:
+    """
+    Formats every distinct value of the column once and spreads the results over the rows with one array lookup,
+    missing values become missing_value. Daily values repeat a lot, so there are far fewer distinct values than
+    rows.
+    """
+    codes, uniques = pd.factorize(column)
+    formatted = np.array([format_value(value) for value in uniques] + [missing_value], dtype=object)
+    # the missing values have the code -1, which picks the last item
+    return pd.Series(formatted[codes], index=column.index, dtype=object)
+
+
+def remove_trailing_zeros(code_value: str) -> str:
+    code, value = code_value.split(":")
+    if "." in value:
+        value = value.rstrip("0").rstrip(".")
+    return f"{code}:{value}"
+
+
 def transform_decimal_columns(df: pd.DataFrame, decimal_columns: list[str]) -> pd.DataFrame:
     for col in decimal_columns:
-        df[col] = df[col].apply(lambda x: float(x) if x is not None else "")
+        df[col] = format_column_values(df[col], float)
 
     return df
 
 
 def transform_code_value_columns(df: pd.DataFrame, columns: list[str]) -> pd.DataFrame:
-    def remove_trailing_zeros(number_str: str):
-        code, value = number_str.split(":")
-        if "." in value:
-            value = value.rstrip("0").rstrip(".")
-        return f"{code}:{value}"
-
     for col in columns:
-        df[col] = df[col].apply(lambda x: remove_trailing_zeros(x) if x is not None else "")
+        df[col] = format_column_values(df[col], remove_trailing_zeros)
 
     return df
 
 
+def iter_bulk_data_chunks(
+    queryset: QuerySet, columns: list[str], chunk_size: int = BULK_DATA_CHUNK_SIZE
+) -> Iterator[pd.DataFrame]:
+    """
+    Reads the bulk view rows ordered by station and timestamp, chunk_size rows per data frame
+    """
+    rows = queryset.order_by("station", "timestamp_local").values_list(*columns).iterator(chunk_size=chunk_size)
+    while chunk := list(islice(rows, chunk_size)):
+        yield pd.DataFrame.from_records(chunk, columns=columns)
+
+
+def write_station_sheets(
+    workbook: Workbook,
+    chunks: Iterable[pd.DataFrame],
+    station_codes: dict[int, str],
+    sheet_suffix: str,
+    excel_sheet_headers: list[str],
+    decimal_columns: list[str],
+    code_value_columns: list[str] = None,
+    on_chunk: Callable[[int, int], None] = None,
+):
+    """
+    Writes one sheet per station from chunks of rows ordered by station and timestamp, the first column of the
+    chunks being the station ID.
+
+    Only the current chunk is held in memory, the write-only workbook spools every sheet to a temporary file
+    and the rows are formatted per chunk. on_chunk is called after every chunk with the number of sheets started
+    and rows written in it.
+    """
+    worksheet = None
+    current_station = None
+    for df in chunks:
+        df = transform_timestamp_local_format(df)
+        df = transform_decimal_columns(df, decimal_columns=decimal_columns)
+        if code_value_columns:
+            df = transform_code_value_columns(df, columns=code_value_columns)
+
+        sheets = 0
+        for station, *row in df.itertuples(index=False, name=None):
+            if station != current_station:
+                current_station = station
+                sheets += 1
+                worksheet = workbook.create_sheet(f"{station_codes[station]} ({sheet_suffix})")
+                add_sheet_column_styling(worksheet, excel_sheet_headers)
+                worksheet.append(get_header_row(worksheet, excel_sheet_headers))
+            worksheet.append(row)
+        if on_chunk is not None:
+            on_chunk(sheets, len(df))
+
+
 def write_bulk_data_hydro_manual_sheets(
-    writer: pd.ExcelWriter, station_uuids: list[str], org_uuid: str, all: bool = False
-) -> pd.DataFrame:
+    workbook: Workbook,
+    station_uuids: list[str],
+    org_uuid: str,
+    all: bool = False,
+    on_chunk: Callable[[int, int], None] = None,
+):
     if not all and len(station_uuids) == 0:
         return
     excel_sheet_headers = [
@@ -84,24 +209,19 @@ def write_bulk_data_hydro_manual_sheets(
     if not all:
         hydro_stations = HydrologicalStation.objects.filter(
             uuid__in=station_uuids, station_type="M", site__organization__uuid=org_uuid
-        ).values("id", "station_code")
+        ).values_list("id", "station_code")
     else:
         hydro_stations = HydrologicalStation.objects.filter(
             station_type="M", site__organization__uuid=org_uuid
-        ).values("id", "station_code")
-
-    hydro_station_ids = tuple(hydro_stations.values_list("id", flat=True))
-    hydro_queryset = (
-        BulkDataHydroManual.objects.filter(station_id__in=hydro_station_ids)
-        .values_list(*df_columns)
-        .order_by("timestamp_local")
-    )
-
-    df = pd.DataFrame.from_records(hydro_queryset, columns=df_columns)
-
-    df = transform_timestamp_local_format(df)
-    df = transform_decimal_columns(
-        df,
+        ).values_list("id", "station_code")
+
+    station_codes = dict(hydro_stations)
+    write_station_sheets(
+        workbook,
+        iter_bulk_data_chunks(BulkDataHydroManual.objects.filter(station_id__in=list(station_codes)), df_columns),
+        station_codes=station_codes,
+        sheet_suffix="manual",
+        excel_sheet_headers=excel_sheet_headers,
         decimal_columns=[
             "water_level_daily",
             "water_level_daily_average",
@@ -115,24 +235,18 @@ def write_bulk_data_hydro_manual_sheets(
             "water_temperature",
             "fiveday_discharge",
         ],
+        code_value_columns=["ice_phenomena", "precipitation_daily"],
+        on_chunk=on_chunk,
     )
-    df = transform_code_value_columns(df, columns=["ice_phenomena", "precipitation_daily"])
-
-    grouped = df.groupby("station")
-
-    for station, group in grouped:
-        group = group.drop(columns=["station"])
-        group.columns = excel_sheet_headers
-        station_code = hydro_stations.get(id=station)["station_code"]
-        sheet_name = f"{station_code} (manual)"
-
-        group.to_excel(writer, sheet_name=sheet_name, index=False)
-        add_sheet_column_styling(writer, sheet_name, excel_sheet_headers)
 
 
 def write_bulk_data_hydro_auto_sheets(
-    writer: pd.ExcelWriter, station_uuids: list[str], org_uuid: str, all: bool = False
-) -> pd.DataFrame:
+    workbook: Workbook,
+    station_uuids: list[str],
+    org_uuid: str,
+    all: bool = False,
+    on_chunk: Callable[[int, int], None] = None,
+):
     if not all and len(station_uuids) == 0:
         return
     excel_sheet_headers = [
@@ -171,24 +285,19 @@ def write_bulk_data_hydro_auto_sheets(
     if not all:
         hydro_stations = HydrologicalStation.objects.filter(
             uuid__in=station_uuids, site__organization__uuid=org_uuid, station_type="A"
-        ).values("id", "station_code")
+        ).values_list("id", "station_code")
     else:
         hydro_stations = HydrologicalStation.objects.filter(
             site__organization__uuid=org_uuid, station_type="A"
-        ).values("id", "station_code")
-
-    hydro_station_ids = tuple(hydro_stations.values_list("id", flat=True))
-    hydro_queryset = (
-        BulkDataHydroAuto.objects.filter(station_id__in=hydro_station_ids)
-        .values_list(*df_columns)
-        .order_by("timestamp_local")
-    )
-
-    df = pd.DataFrame.from_records(hydro_queryset, columns=df_columns)
-
-    df = transform_timestamp_local_format(df)
-    df = transform_decimal_columns(
-        df,
+        ).values_list("id", "station_code")
+
+    station_codes = dict(hydro_stations)
+    write_station_sheets(
+        workbook,
+        iter_bulk_data_chunks(BulkDataHydroAuto.objects.filter(station_id__in=list(station_codes)), df_columns),
+        station_codes=station_codes,
+        sheet_suffix="auto",
+        excel_sheet_headers=excel_sheet_headers,
         decimal_columns=[
             "water_level_daily_min",
             "water_level_daily_average",
@@ -203,23 +312,17 @@ def write_bulk_data_hydro_auto_sheets(
             "fiveday_discharge",
             "decade_discharge",
         ],
+        on_chunk=on_chunk,
     )
 
-    grouped = df.groupby("station")
-
-    for station, group in grouped:
-        group = group.drop(columns=["station"])
-        group.columns = excel_sheet_headers
-        station_code = hydro_stations.get(id=station)["station_code"]
-        sheet_name = f"{station_code} (auto)"
-
-        group.to_excel(writer, sheet_name=sheet_name, index=False)
-        add_sheet_column_styling(writer, sheet_name, excel_sheet_headers)
-
 
 def write_bulk_data_meteo_sheets(
-    writer: pd.ExcelWriter, station_uuids: list[str], org_uuid: str, all: bool = False
-) -> pd.DataFrame:
+    workbook: Workbook,
+    station_uuids: list[str],
+    org_uuid: str,
+    all: bool = False,
+    on_chunk: Callable[[int, int], None] = None,
+):
     if not all and len(station_uuids) == 0:
         return
     excel_sheet_headers = [
@@ -242,46 +345,36 @@ def write_bulk_data_meteo_sheets(
     if not all:
         meteo_stations = MeteorologicalStation.objects.filter(
             uuid__in=station_uuids, site__organization__uuid=org_uuid
-        ).values("id", "station_code")
+        ).values_list("id", "station_code")
     else:
-        meteo_stations = MeteorologicalStation.objects.filter(site__organization__uuid=org_uuid).values(
+        meteo_stations = MeteorologicalStation.objects.filter(site__organization__uuid=org_uuid).values_list(
             "id", "station_code"
         )
 
-    meteo_station_ids = tuple(meteo_stations.values_list("id", flat=True))
-    meteo_queryset = (
-        BulkDataMeteo.objects.filter(station_id__in=meteo_station_ids)
-        .values_list(*df_columns)
-        .order_by("timestamp_local")
-    )
-    df = pd.DataFrame.from_records(meteo_queryset, columns=df_columns)
-
-    df = transform_timestamp_local_format(df)
-    df = transform_decimal_columns(
-        df,
+    station_codes = dict(meteo_stations)
+    write_station_sheets(
+        workbook,
+        iter_bulk_data_chunks(BulkDataMeteo.objects.filter(station_id__in=list(station_codes)), df_columns),
+        station_codes=station_codes,
+        sheet_suffix="meteo",
+        excel_sheet_headers=excel_sheet_headers,
         decimal_columns=[
             "precipitation_decade_average",
             "precipitation_month_average",
             "air_temperature_decade_average",
             "air_temperature_month_average",
         ],
+        on_chunk=on_chunk,
     )
 
-    grouped = df.groupby("station")
-
-    for station, group in grouped:
-        group = group.drop(columns=["station"])
-        group.columns = excel_sheet_headers
-        station_code = meteo_stations.get(id=station)["station_code"]
-        sheet_name = f"{station_code} (meteo)"
-
-        group.to_excel(writer, sheet_name=sheet_name, index=False)
-        add_sheet_column_styling(writer, sheet_name, excel_sheet_headers)
-
 
 def write_bulk_data_virtual_sheets(
-    writer: pd.ExcelWriter, station_uuids: list[str], org_uuid: str, all: bool = False
-) -> pd.DataFrame:
+    workbook: Workbook,
+    station_uuids: list[str],
+    org_uuid: str,
+    all: bool = False,
+    on_chunk: Callable[[int, int], None] = None,
+):
     if not all and len(station_uuids) == 0:
         return
     excel_sheet_headers = [
@@ -302,40 +395,109 @@ def write_bulk_data_virtual_sheets(
     ]
 
     if not all:
-        virtual_stations = VirtualStation.objects.filter(uuid__in=station_uuids, organization__uuid=org_uuid).values(
-            "id", "station_code"
-        )
+        virtual_stations = VirtualStation.objects.filter(
+            uuid__in=station_uuids, organization__uuid=org_uuid
+        ).values_list("id", "station_code")
     else:
-        virtual_stations = VirtualStation.objects.filter(organization__uuid=org_uuid).values("id", "station_code")
-
-    virtual_station_ids = tuple(virtual_stations.values_list("id", flat=True))
-
-    virtual_queryset = (
-        BulkDataVirtual.objects.filter(station_id__in=virtual_station_ids)
-        .values_list(*df_columns)
-        .order_by("timestamp_local")
-    )
-
-    df = pd.DataFrame.from_records(virtual_queryset, columns=df_columns)
-
-    df = transform_timestamp_local_format(df)
-    df = transform_decimal_columns(
-        df,
+        virtual_stations = VirtualStation.objects.filter(organization__uuid=org_uuid).values_list("id", "station_code")
+
+    station_codes = dict(virtual_stations)
+    write_station_sheets(
+        workbook,
+        iter_bulk_data_chunks(BulkDataVirtual.objects.filter(station_id__in=list(station_codes)), df_columns),
+        station_codes=station_codes,
+        sheet_suffix="virtual",
+        excel_sheet_headers=excel_sheet_headers,
         decimal_columns=[
             "discharge_daily",
             "decade_discharge",
             "discharge_daily_average",
             "fiveday_discharge",
         ],
+        on_chunk=on_chunk,
     )
 
-    grouped = df.groupby("station")
-
-    for station, group in grouped:
-        group = group.drop(columns=["station"])
-        group.columns = excel_sheet_headers
-        station_code = virtual_stations.get(id=station)["station_code"]
-        sheet_name = f"{station_code} (virtual)"
 
-        group.to_excel(writer, sheet_name=sheet_name, index=False)
-        add_sheet_column_styling(writer, sheet_name, excel_sheet_headers)
+def write_bulk_data_workbook(
+    workbook: Workbook,
+    org_uuid: str,
+    hydro_station_manual_uuids: list[str],
+    hydro_station_auto_uuids: list[str],
+    meteo_station_uuids: list[str],
+    virtual_station_uuids: list[str],
+    on_chunk: Callable[[int, int], None] = None,
+):
+    # no stations selected means all the organization's stations
+    all = not (hydro_station_manual_uuids or hydro_station_auto_uuids or meteo_station_uuids or virtual_station_uuids)
+    write_bulk_data_hydro_manual_sheets(workbook, hydro_station_manual_uuids, org_uuid, all=all, on_chunk=on_chunk)
+    write_bulk_data_meteo_sheets(workbook, meteo_station_uuids, org_uuid, all=all, on_chunk=on_chunk)
+    write_bulk_data_virtual_sheets(workbook, virtual_station_uuids, org_uuid, all=all, on_chunk=on_chunk)
+    write_bulk_data_hydro_auto_sheets(workbook, hydro_station_auto_uuids, org_uuid, all=all, on_chunk=on_chunk)
+
+
+def get_bulk_data_parameters(**station_uuids: list[str] | None) -> dict[str, list[str]]:
+    return {parameter: sorted(set(station_uuids.get(parameter) or [])) for parameter in BULK_DATA_STATION_PARAMETERS}
+
+
+def get_bulk_data_parameters_hash(org_uuid: str, parameters: dict[str, list[str]]) -> str:
+    return hashlib.sha256(json.dumps([str(org_uuid), parameters], sort_keys=True).encode()).hexdigest()
+
+
+@contextmanager
+def bulk_data_export_heartbeat(job: BulkDataExportJob, interval: timedelta = BULK_DATA_EXPORT_HEARTBEAT_INTERVAL):
+    """
+    Touches the job's last_modified from a background thread while the block runs, so the job isn't reclaimed while
+    no chunk arrives, e.g. while the database builds the result or the workbook is saved. The thread stops once the
+    job was claimed again.
+    """
+    stop = threading.Event()
+
+    def beat():
+        try:
+            while not stop.wait(interval.total_seconds()):
+                if not BulkDataExportJob.objects.filter(pk=job.pk, claim_id=job.claim_id).update(
+                    last_modified=timezone.now()
+                ):
+                    return
+        finally:
+            # the thread's own connection
+            connection.close()
+
+    thread = threading.Thread(target=beat, name=f"bulk-data-export-{job.uuid}", daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def run_bulk_data_export_job(job: BulkDataExportJob):
+    """
+    Builds the job's workbook and saves it to the media storage, the progress is stored after every chunk. Raises
+    BulkDataExportJobReclaimed as soon as another worker claimed the job again, without touching its result.
+    """
+    claimed_job = BulkDataExportJob.objects.filter(pk=job.pk, claim_id=job.claim_id)
+
+    def update_progress(sheets: int, rows: int):
+        if not claimed_job.update(
+            sheets_done=F("sheets_done") + sheets, rows_written=F("rows_written") + rows, last_modified=timezone.now()
+        ):
+            raise BulkDataExportJobReclaimed(f"Bulk data export {job.uuid} was claimed by another worker")
+
+    with bulk_data_export_heartbeat(job):
+        workbook = Workbook(write_only=True)
+        write_bulk_data_workbook(workbook, str(job.organization_id), **job.parameters, on_chunk=update_progress)
+        with tempfile.TemporaryFile() as output:
+            workbook.save(output)
+            job.file.save(BULK_DATA_FILENAME, File(output, name=BULK_DATA_FILENAME), save=False)
+
+    job.status = BulkDataExportStatus.DONE
+    job.finished_date = timezone.now()
+    if not claimed_job.update(
+        file=job.file.name, status=job.status, finished_date=job.finished_date, last_modified=timezone.now()
+    ):
+        # the file name is unique, the other worker saves its own
+        job.file.delete(save=False)
+        raise BulkDataExportJobReclaimed(f"Bulk data export {job.uuid} was claimed by another worker")
+    job.refresh_from_db(fields=["sheets_done", "rows_written", "last_modified"])
@@ -0,0 +1,93 @@
+import csv
+import io
+import json
+from collections.abc import AsyncIterator, Iterator
+from datetime import datetime
+from decimal import Decimal
+
+from asgiref.sync import sync_to_async
+from django.db import transaction
+from django.db.models import QuerySet
+
+EXPORT_CHUNK_SIZE = 5000
+
+# output column and the field it's read from
+HYDRO_METRIC_EXPORT_FIELDS = {
+    "timestamp_local": "timestamp_local",
+    "timestamp": "timestamp",
+    "station_id": "station_id",
+    "station_code": "station__station_code",
+    "metric_name": "metric_name",
+    "value_type": "value_type",
+    "sensor_identifier": "sensor_identifier",
+    "avg_value": "avg_value",
+    "min_value": "min_value",
+    "max_value": "max_value",
+    "unit": "unit",
+    "value_code": "value_code",
+}
+
+
+def _serialize_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+
+def _ndjson_lines(rows: Iterator[tuple], columns: list[str]) -> Iterator[str]:
+    for row in rows:
+        yield json.dumps(dict(zip(columns, row)), default=_serialize_value) + "\n"
+
+
+def _csv_lines(rows: Iterator[tuple], columns: list[str]) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(columns)
+    yield buffer.getvalue()
+    for row in rows:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerow([value.isoformat() if isinstance(value, datetime) else value for value in row])
+        yield buffer.getvalue()
+
+
+def iter_queryset_export(
+    queryset: QuerySet, fields: dict[str, str], export_format: str, chunk_size: int = EXPORT_CHUNK_SIZE
+) -> Iterator[bytes]:
+    """
+    Encodes the queryset rows as NDJSON or CSV, chunk_size rows per yielded chunk.
+
+    The rows are fetched from a server-side cursor in batches of chunk_size, so the memory doesn't depend on
+    the number of exported rows. The cursor is declared inside a transaction which stays open until the
+    generator is exhausted or closed, the caller must close it if it stops early.
+    """
+    columns = list(fields)
+    with transaction.atomic():
+        rows = queryset.values_list(*fields.values()).iterator(chunk_size=chunk_size)
+        lines = _csv_lines(rows, columns) if export_format == "csv" else _ndjson_lines(rows, columns)
+        chunk = []
+        for line in lines:
+            chunk.append(line)
+            if len(chunk) >= chunk_size:
+                yield "".join(chunk).encode()
+                chunk = []
+        if chunk:
+            yield "".join(chunk).encode()
+
+
+async def aiter_export(chunks: Iterator[bytes]) -> AsyncIterator[bytes]:
+    """
+    Serves a synchronous export chunk by chunk under ASGI.
+
+    StreamingHttpResponse consumes synchronous iterators into a list when served asynchronously, so every chunk
+    is pulled separately in the request's thread, which keeps the database connection and the export's
+    transaction of the request.
+    """
+    next_chunk = sync_to_async(next, thread_sensitive=True)
+    try:
+        while (chunk := await next_chunk(chunks, None)) is not None:
+            yield chunk
+    finally:
+        await sync_to_async(chunks.close, thread_sensitive=True)()
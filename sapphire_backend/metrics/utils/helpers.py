@@ -1,11 +1,17 @@
-from datetime import datetime, timezone
+import base64
+import binascii
+import hashlib
+import json
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
 from math import ceil
 from typing import Any
 
+import numpy as np
 import pandas as pd
+from django.db.models import DateTimeField, F, IntegerField, Q, Value
 
 from sapphire_backend.estimations.models import (
-    DischargeCalculationPeriod,
     EstimationsAirTemperatureDaily,
     EstimationsWaterDischargeDaily,
     EstimationsWaterDischargeDailyAverage,
@@ -15,7 +21,8 @@ from sapphire_backend.estimations.models import (
     EstimationsWaterLevelDecadeAverage,
     EstimationsWaterTemperatureDaily,
 )
-from sapphire_backend.metrics.choices import NormType
+from sapphire_backend.estimations.utils import DischargeCalculationPeriodIndex
+from sapphire_backend.metrics.choices import MetricUnit, NormType
 from sapphire_backend.metrics.exceptions import SDKDataError
 from sapphire_backend.metrics.managers import HydrologicalNormQuerySet, MeteorologicalNormQuerySet
 from sapphire_backend.organizations.models import Organization
@@ -26,6 +33,51 @@ from ...stations.models import HydrologicalStation, MeteorologicalStation, Virtu
 from ..choices import HydrologicalMetricName, MeteorologicalMetricName
 from ..models import HydrologicalMetric, MeteorologicalMetric
 
+MORNING = "morning"
+EVENING = "evening"
+
+SDK_CURSOR_PAGE_SIZE = 1000
+SDK_CURSOR_MAX_PAGE_SIZE = 10000
+SDK_STATION_TYPES = ["hydro", "meteo"]
+# sort key of the keyset pages, the station type, metric and source are constants of every union branch
+SDK_CURSOR_ORDERING = [
+    "sdk_station_type",
+    "sdk_station_id",
+    "sdk_metric",
+    "-sdk_timestamp_local",
+    "sdk_source",
+    "sdk_value_type",
+    "sdk_sensor_identifier",
+]
+
+# units of the metrics which are delivered without one, e.g. by the SDK and the charts
+METRIC_UNITS = {
+    # Water levels
+    HydrologicalMetricName.WATER_LEVEL_DAILY: MetricUnit.WATER_LEVEL,
+    HydrologicalMetricName.WATER_LEVEL_DAILY_AVERAGE: MetricUnit.WATER_LEVEL,
+    HydrologicalMetricName.WATER_LEVEL_DECADAL: MetricUnit.WATER_LEVEL,
+    HydrologicalMetricName.WATER_LEVEL_DECADE_AVERAGE: MetricUnit.WATER_LEVEL,
+    # Water discharges
+    HydrologicalMetricName.WATER_DISCHARGE_DAILY: MetricUnit.WATER_DISCHARGE,
+    HydrologicalMetricName.WATER_DISCHARGE_DAILY_AVERAGE: MetricUnit.WATER_DISCHARGE,
+    HydrologicalMetricName.WATER_DISCHARGE_FIVEDAY_AVERAGE: MetricUnit.WATER_DISCHARGE,
+    HydrologicalMetricName.WATER_DISCHARGE_DECADE_AVERAGE: MetricUnit.WATER_DISCHARGE,
+    # Temperatures
+    HydrologicalMetricName.WATER_TEMPERATURE: MetricUnit.TEMPERATURE,
+    HydrologicalMetricName.AIR_TEMPERATURE: MetricUnit.TEMPERATURE,
+    HydrologicalMetricName.WATER_TEMPERATURE_DAILY_AVERAGE: MetricUnit.TEMPERATURE,
+    HydrologicalMetricName.AIR_TEMPERATURE_DAILY_AVERAGE: MetricUnit.TEMPERATURE,
+    # Precipitation
+    HydrologicalMetricName.PRECIPITATION_DAILY: MetricUnit.PRECIPITATION,
+    # Ice phenomena
+    HydrologicalMetricName.ICE_PHENOMENA_OBSERVATION: MetricUnit.ICE_PHENOMENA_OBSERVATION,
+    # Meteorological metrics
+    MeteorologicalMetricName.AIR_TEMPERATURE_DECADE_AVERAGE: MetricUnit.TEMPERATURE,
+    MeteorologicalMetricName.AIR_TEMPERATURE_MONTH_AVERAGE: MetricUnit.TEMPERATURE,
+    MeteorologicalMetricName.PRECIPITATION_DECADE_AVERAGE: MetricUnit.PRECIPITATION,
+    MeteorologicalMetricName.PRECIPITATION_MONTH_AVERAGE: MetricUnit.PRECIPITATION,
+}
+
 
 class PentadDecadeHelper:
     days_in_pentad = [3, 8, 13, 18, 23, 28]
@@ -147,6 +199,13 @@ class PentadDecadeHelper:
 
 
 class OperationalJournalDataTransformer:
+    """
+    Builds the operational journals of a station out of its metric rows. A journal cell is the first row of a
+    metric within a date (or within its morning or evening), those rows are picked for all dates at once by
+    dropping the duplicates of the grouping columns, so a range of several months, e.g. a whole year, is
+    transformed in one pass by the *_per_month variants.
+    """
+
     def __init__(
         self,
         data: list[dict[str, float | None]],
@@ -158,119 +217,166 @@ class OperationalJournalDataTransformer:
         self.is_empty = self.df.empty
         self.requested_month = target_month
         self.station = station
+        self._cache = {}
 
     def _convert_data_to_dataframe(self):
         df = pd.DataFrame(self.original_data)
         if not df.empty:
             df["timestamp_local"] = pd.to_datetime(df["timestamp_local"])
             df["date"] = df["timestamp_local"].dt.date
-            df["time"] = df["timestamp_local"].dt.strftime("%H:%M")
+            df["time_of_day"] = self._get_time_of_day(df["timestamp_local"])
 
         return df
 
     @staticmethod
-    def _get_morning_data(data: pd.DataFrame | pd.Series) -> pd.DataFrame | pd.Series:
-        return data[data["time"] == "08:00"]
+    def _get_time_of_day(timestamps: pd.Series) -> np.ndarray:
+        minutes = timestamps.dt.hour * 60 + timestamps.dt.minute
+        return np.select([minutes == 8 * 60, minutes == 20 * 60], [MORNING, EVENING], default="")
 
-    @staticmethod
-    def _get_evening_data(data: pd.DataFrame | pd.Series) -> pd.DataFrame | pd.Series:
-        return data[data["time"] == "20:00"]
+    def _get_first_rows(self, *by: str) -> dict[tuple, dict[str, Any]]:
+        """
+        First row of every group in the order of the data, keyed by the values of the grouping columns
+        """
+        if by not in self._cache:
+            if "records" not in self._cache:
+                # the rows are converted once and shared by all the groupings
+                self._cache["records"] = self.df.to_dict("records")
+            records = self._cache["records"]
+            positions = np.flatnonzero(~self.df.duplicated(list(by)).to_numpy())
+            keys = self.df[list(by)].iloc[positions].itertuples(index=False, name=None)
+            self._cache[by] = {key: records[position] for key, position in zip(keys, positions)}
+        return self._cache[by]
+
+    def _get_dates(self) -> list:
+        # in the order of their first row, like the journals always listed them
+        return list(self.df["date"].unique())
+
+    def _get_dates_per_month(self) -> dict:
+        if self.is_empty:
+            return {}
+        dates_per_month = defaultdict(list)
+        for date in self._get_dates():
+            dates_per_month[date.replace(day=1)].append(date)
+        return dict(sorted(dates_per_month.items()))
 
     def _get_metric_value(
-        self, data: pd.DataFrame | pd.Series, metric: str, include_metadata: bool = False
+        self, metric: str, date, time_of_day: str | None = None, include_metadata: bool = False
     ) -> dict[str, Any]:
-        if not data.empty:
-            metric_data = data[data["metric_name"] == metric]
-            try:
-                metric_value = metric_data["avg_value"]
-            except KeyError:
-                metric_value = metric_data["value"]
-
-            if metric_value.empty:
-                return {"value": "--", "timestamp_local": data.iloc[0]["timestamp_local"]}
-
-            # Get the value based on metric type
-            if metric in [
-                HydrologicalMetricName.WATER_LEVEL_DAILY,
-                HydrologicalMetricName.WATER_LEVEL_DAILY_AVERAGE,
-                HydrologicalMetricName.WATER_LEVEL_DECADE_AVERAGE,
-            ]:
-                value = ceil(metric_value.iloc[0])
-            elif metric in [
-                HydrologicalMetricName.WATER_DISCHARGE_DAILY,
-                HydrologicalMetricName.WATER_DISCHARGE_DAILY_AVERAGE,
-                HydrologicalMetricName.WATER_DISCHARGE_DECADE_AVERAGE,
-            ]:
-                value = hydrological_round(metric_value.iloc[0])
-            else:
-                value = round(metric_value.iloc[0], 1) if metric_value.iloc[0] is not None else "--"
-
-            if not include_metadata:
-                return {"value": value}
-
-            # Include metadata if requested
-            sensor_identifier = metric_data.iloc[0].get("sensor_identifier", "")
-            has_history = metric_data.iloc[0].get("has_history", False)
-
-            # Handle NaN values
-            if pd.isna(sensor_identifier):
-                sensor_identifier = ""
-            if pd.isna(has_history):
-                has_history = False
-
-            return {
-                "value": value,
-                "timestamp_local": metric_data.iloc[0]["timestamp_local"],
-                "sensor_identifier": sensor_identifier,
-                "has_history": has_history,
-            }
+        if time_of_day is None:
+            group_first_row = self._get_first_rows("date").get((date,))
+            metric_row = self._get_first_rows("date", "metric_name").get((date, metric))
+        else:
+            group_first_row = self._get_first_rows("date", "time_of_day").get((date, time_of_day))
+            metric_row = self._get_first_rows("date", "time_of_day", "metric_name").get((date, time_of_day, metric))
+
+        if group_first_row is None:
+            return {"value": "--"}
+
+        if metric_row is None:
+            return {"value": "--", "timestamp_local": group_first_row["timestamp_local"]}
+
+        metric_value = metric_row["avg_value"] if "avg_value" in metric_row else metric_row["value"]
+
+        # Get the value based on metric type
+        if metric in [
+            HydrologicalMetricName.WATER_LEVEL_DAILY,
+            HydrologicalMetricName.WATER_LEVEL_DAILY_AVERAGE,
+            HydrologicalMetricName.WATER_LEVEL_DECADE_AVERAGE,
+        ]:
+            value = ceil(metric_value)
+        elif metric in [
+            HydrologicalMetricName.WATER_DISCHARGE_DAILY,
+            HydrologicalMetricName.WATER_DISCHARGE_DAILY_AVERAGE,
+            HydrologicalMetricName.WATER_DISCHARGE_DECADE_AVERAGE,
+        ]:
+            value = hydrological_round(metric_value)
+        else:
+            value = round(metric_value, 1) if metric_value is not None else "--"
 
-        return {"value": "--"}
+        if not include_metadata:
+            return {"value": value}
 
-    @staticmethod
-    def _get_ice_phenomena(data: pd.DataFrame | pd.Series) -> dict[str, list | str]:
+        # Include metadata if requested
+        sensor_identifier = metric_row.get("sensor_identifier", "")
+        has_history = metric_row.get("has_history", False)
+
+        # Handle NaN values
+        if pd.isna(sensor_identifier):
+            sensor_identifier = ""
+        if pd.isna(has_history):
+            has_history = False
+
+        return {
+            "value": value,
+            "timestamp_local": metric_row["timestamp_local"],
+            "sensor_identifier": sensor_identifier,
+            "has_history": has_history,
+        }
+
+    def _get_manual_calculation(self, data: pd.DataFrame) -> pd.Series:
+        """
+        Whether the discharge is calculated manually at the timestamp of every row, the calculation periods of the
+        station are loaded once for the whole window
+        """
+        periods = DischargeCalculationPeriodIndex(
+            self.station.id,
+            data["timestamp_local"].min().to_pydatetime(),
+            data["timestamp_local"].max().to_pydatetime(),
+        )
+        return pd.Series(periods.is_manual_calculation_many(data["timestamp_local"]), index=data.index)
+
+    def _get_manual_calculation_per_time_of_day(self) -> dict[tuple, bool]:
+        if "manual_calculation" not in self._cache:
+            first_rows = self.df.drop_duplicates(["date", "time_of_day"])
+            first_rows = first_rows[first_rows["time_of_day"] != ""]
+            manual_calculation = self._get_manual_calculation(first_rows) if not first_rows.empty else []
+            self._cache["manual_calculation"] = dict(
+                zip(zip(first_rows["date"], first_rows["time_of_day"]), [bool(value) for value in manual_calculation])
+            )
+        return self._cache["manual_calculation"]
+
+    def _get_ice_phenomena(self, date) -> dict[str, list | str]:
         result = {"ice_phenomena_values": [], "ice_phenomena_codes": []}
-        if not data.empty:
-            ice_phenomena_data = data[data["metric_name"] == HydrologicalMetricName.ICE_PHENOMENA_OBSERVATION]
+        if "ice_phenomena" not in self._cache:
+            ice_phenomena_data = self.df[self.df["metric_name"] == HydrologicalMetricName.ICE_PHENOMENA_OBSERVATION]
+            values_per_date = defaultdict(list)
             if not ice_phenomena_data.empty:
-                values = ice_phenomena_data[
-                    ["avg_value", "value_code", "sensor_identifier", "timestamp_local", "has_history"]
-                ].to_dict("records")
-                if values:
-                    result.update(
-                        {
-                            "ice_phenomena_values": [v["avg_value"] for v in values],
-                            "ice_phenomena_codes": [v["value_code"] for v in values],
-                            "sensor_identifiers": [v["sensor_identifier"] for v in values],
-                            "timestamps_local": [v["timestamp_local"] for v in values],
-                            "has_history": [v["has_history"] for v in values],
-                        }
-                    )
+                for date_value, values in zip(
+                    ice_phenomena_data["date"],
+                    ice_phenomena_data[
+                        ["avg_value", "value_code", "sensor_identifier", "timestamp_local", "has_history"]
+                    ].to_dict("records"),
+                ):
+                    values_per_date[date_value].append(values)
+            self._cache["ice_phenomena"] = values_per_date
+
+        values = self._cache["ice_phenomena"].get(date)
+        if values:
+            result.update(
+                {
+                    "ice_phenomena_values": [v["avg_value"] for v in values],
+                    "ice_phenomena_codes": [v["value_code"] for v in values],
+                    "sensor_identifiers": [v["sensor_identifier"] for v in values],
+                    "timestamps_local": [v["timestamp_local"] for v in values],
+                    "has_history": [v["has_history"] for v in values],
+                }
+            )
 
         return result
 
-    @staticmethod
-    def _get_daily_precipitation(data: pd.DataFrame | pd.Series) -> dict[str, float | int | str]:
+    def _get_daily_precipitation(self, date) -> dict[str, float | int | str]:
         result = {"daily_precipitation_value": None, "daily_precipitation_code": None}
-        if not data.empty:
-            daily_precipitation_data = data[data["metric_name"] == HydrologicalMetricName.PRECIPITATION_DAILY]
-            if not daily_precipitation_data.empty:
-                value = (
-                    daily_precipitation_data[
-                        ["avg_value", "value_code", "sensor_identifier", "timestamp_local", "has_history"]
-                    ]
-                    .iloc[0]
-                    .to_dict()
-                )
-                result.update(
-                    {
-                        "daily_precipitation_value": value["avg_value"],
-                        "daily_precipitation_code": value["value_code"],
-                        "sensor_identifier": value["sensor_identifier"],
-                        "timestamp_local": value["timestamp_local"],
-                        "has_history": value["has_history"],
-                    }
-                )
+        value = self._get_first_rows("date", "metric_name").get((date, HydrologicalMetricName.PRECIPITATION_DAILY))
+        if value is not None:
+            result.update(
+                {
+                    "daily_precipitation_value": value["avg_value"],
+                    "daily_precipitation_code": value["value_code"],
+                    "sensor_identifier": value["sensor_identifier"],
+                    "timestamp_local": value["timestamp_local"],
+                    "has_history": value["has_history"],
+                }
+            )
 
         return result
 
@@ -343,51 +449,32 @@ class OperationalJournalDataTransformer:
 
         return avg_row
 
-    def get_daily_data(self) -> list[dict[str, Any]]:
-        results = []
-        df = self.df
-        results = []
-        if self.is_empty:
-            return results
-
-        previous_month_last_day = df["date"].min()
-        previous_day_water_level = None
-
-        if previous_month_last_day.month != self.requested_month:
-            previous_month_last_day_data = df[df["date"] == previous_month_last_day]
-
-            # get morning water_level to be able to calculate the trend on the first day of the given month
-            if not previous_month_last_day_data.empty:
-                morning_data = self._get_morning_data(previous_month_last_day_data)
-                previous_day_water_level = self._get_metric_value(
-                    morning_data, HydrologicalMetricName.WATER_LEVEL_DAILY
-                )
+    def _get_morning_water_level(self, date) -> dict[str, Any] | None:
+        if (date, MORNING) not in self._get_first_rows("date", "time_of_day"):
+            return None
+        return self._get_metric_value(HydrologicalMetricName.WATER_LEVEL_DAILY, date, MORNING)
 
-            # exclude the last day of the previous month from the dataframe
-            df = df[df["date"] != previous_month_last_day]
+    def _build_daily_data(self, dates: list, previous_day_water_level: dict[str, Any] | None) -> list[dict[str, Any]]:
+        results = []
+        first_rows = self._get_first_rows("date", "time_of_day")
+        manual_calculation = self._get_manual_calculation_per_time_of_day()
 
         # iterate over the existing dates
-        for date in df["date"].unique():
-            daily_data = df[df["date"] == date]
+        for date in dates:
             day_dict = {}
 
             # get morning data first
-            morning_data = self._get_morning_data(daily_data)
-            if not morning_data.empty:
-                morning_manual_calculation = DischargeCalculationPeriod.is_manual_calculation(
-                    self.station.id, morning_data.iloc[0]["timestamp_local"]
-                )
-
+            if (date, MORNING) in first_rows:
                 water_level_morning = self._get_metric_value(
-                    morning_data, HydrologicalMetricName.WATER_LEVEL_DAILY, True
+                    HydrologicalMetricName.WATER_LEVEL_DAILY, date, MORNING, True
                 )
 
                 water_discharge_morning = self._get_metric_value(
-                    morning_data, HydrologicalMetricName.WATER_DISCHARGE_DAILY, True
+                    HydrologicalMetricName.WATER_DISCHARGE_DAILY, date, MORNING, True
                 )
                 day_dict["water_level_morning"] = water_level_morning
                 day_dict["water_discharge_morning"] = water_discharge_morning
-                day_dict["water_discharge_morning"]["allow_manual_override"] = morning_manual_calculation
+                day_dict["water_discharge_morning"]["allow_manual_override"] = manual_calculation[(date, MORNING)]
                 if (
                     previous_day_water_level
                     and previous_day_water_level["value"] != "--"
@@ -402,27 +489,22 @@ class OperationalJournalDataTransformer:
                 day_dict["water_discharge_morning"] = {"value": "--"}
 
             # get evening data next
-            evening_data = self._get_evening_data(daily_data)
-            if not evening_data.empty:
-                evening_manual_calculation = DischargeCalculationPeriod.is_manual_calculation(
-                    self.station.id, evening_data.iloc[0]["timestamp_local"]
-                )
-
+            if (date, EVENING) in first_rows:
                 water_level_evening = self._get_metric_value(
-                    evening_data, HydrologicalMetricName.WATER_LEVEL_DAILY, True
+                    HydrologicalMetricName.WATER_LEVEL_DAILY, date, EVENING, True
                 )
                 water_discharge_evening = self._get_metric_value(
-                    evening_data, HydrologicalMetricName.WATER_DISCHARGE_DAILY, True
+                    HydrologicalMetricName.WATER_DISCHARGE_DAILY, date, EVENING, True
                 )
                 day_dict["water_level_evening"] = water_level_evening
                 day_dict["water_discharge_evening"] = water_discharge_evening
-                day_dict["water_discharge_evening"]["allow_manual_override"] = evening_manual_calculation
+                day_dict["water_discharge_evening"]["allow_manual_override"] = manual_calculation[(date, EVENING)]
             else:
                 day_dict["water_level_evening"] = {"value": "--"}
                 day_dict["water_discharge_evening"] = {"value": "--"}
 
-            day_dict["ice_phenomena"] = self._get_ice_phenomena(daily_data)
-            day_dict["daily_precipitation"] = self._get_daily_precipitation(daily_data)
+            day_dict["ice_phenomena"] = self._get_ice_phenomena(date)
+            day_dict["daily_precipitation"] = self._get_daily_precipitation(date)
 
             for metric_name, metric_code in {
                 "water_level_average": HydrologicalMetricName.WATER_LEVEL_DAILY_AVERAGE,
@@ -431,9 +513,10 @@ class OperationalJournalDataTransformer:
                 "air_temperature": HydrologicalMetricName.AIR_TEMPERATURE,
             }.items():
                 day_dict[metric_name] = self._get_metric_value(
-                    daily_data,
                     metric_code,
-                    metric_code in (HydrologicalMetricName.WATER_TEMPERATURE, HydrologicalMetricName.AIR_TEMPERATURE),
+                    date,
+                    include_metadata=metric_code
+                    in (HydrologicalMetricName.WATER_TEMPERATURE, HydrologicalMetricName.AIR_TEMPERATURE),
                 )
             day_dict["date"] = date.strftime("%Y-%m-%d")
             day_dict["id"] = date.strftime("%Y-%m-%d")
@@ -445,23 +528,51 @@ class OperationalJournalDataTransformer:
 
         return results
 
-    def get_discharge_data(self) -> list[dict[str, str | float | int]]:
-        results = []
-        df = self.df
+    def get_daily_data(self) -> list[dict[str, Any]]:
+        if self.is_empty:
+            return []
+
+        dates = self._get_dates()
+        previous_month_last_day = min(dates)
+        previous_day_water_level = None
+
+        if previous_month_last_day.month != self.requested_month:
+            # get morning water_level to be able to calculate the trend on the first day of the given month
+            previous_day_water_level = self._get_morning_water_level(previous_month_last_day)
+
+            # exclude the last day of the previous month
+            dates = [date for date in dates if date != previous_month_last_day]
 
+        return self._build_daily_data(dates, previous_day_water_level)
+
+    def get_daily_data_per_month(self) -> dict[Any, list[dict[str, Any]]]:
+        """
+        Daily journal of every month in the data keyed by the first day of the month, each month the same as
+        get_daily_data for the data of that month and the last day of the previous one.
+        """
+        results = {}
         if self.is_empty:
             return results
 
-        for date in df["date"].unique():
+        dates = set(self._get_dates())
+        for first_day, month_dates in self._get_dates_per_month().items():
+            previous_day = first_day - timedelta(days=1)
+            previous_day_water_level = self._get_morning_water_level(previous_day) if previous_day in dates else None
+            results[first_day] = self._build_daily_data(month_dates, previous_day_water_level)
+
+        return results
+
+    def _build_discharge_data(self, dates: list) -> list[dict[str, str | float | int]]:
+        results = []
+        for date in dates:
             day_dict = {}
-            daily_data = df[df["date"] == date]
 
             for metric_name, metric_code in {
                 "water_level": HydrologicalMetricName.WATER_LEVEL_DECADAL,
                 "water_discharge": HydrologicalMetricName.WATER_DISCHARGE_DAILY,
                 "cross_section": HydrologicalMetricName.RIVER_CROSS_SECTION_AREA,
             }.items():
-                day_dict[metric_name] = self._get_metric_value(daily_data, metric_code, True)
+                day_dict[metric_name] = self._get_metric_value(metric_code, date, include_metadata=True)
 
             day_dict["date"] = date.strftime("%Y-%m-%d")
             day_dict["id"] = date.strftime("%Y-%m-%d")
@@ -470,25 +581,24 @@ class OperationalJournalDataTransformer:
 
         return results
 
-    def get_meteo_decadal_data(self) -> list[dict[int | str, int | float | str]]:
-        results = []
-        df = self.df
-
+    def get_discharge_data(self) -> list[dict[str, str | float | int]]:
         if self.is_empty:
-            return results
+            return []
+        return self._build_discharge_data(self._get_dates())
 
-        for date in df["date"].unique():
-            decade_dict = {}
-            decade_data = df[df["date"] == date]
+    def get_discharge_data_per_month(self) -> dict[Any, list[dict[str, str | float | int]]]:
+        return {
+            first_day: self._build_discharge_data(dates) for first_day, dates in self._get_dates_per_month().items()
+        }
+
+    def _build_meteo_decadal_data(self, dates: list) -> list[dict[int | str, int | float | str]]:
+        results = []
+        for date in dates:
             temperature_data = self._get_metric_value(
-                decade_data,
-                MeteorologicalMetricName.AIR_TEMPERATURE_DECADE_AVERAGE,
-                True,
+                MeteorologicalMetricName.AIR_TEMPERATURE_DECADE_AVERAGE, date, include_metadata=True
             )
             precipitation_data = self._get_metric_value(
-                decade_data,
-                MeteorologicalMetricName.PRECIPITATION_DECADE_AVERAGE,
-                True,
+                MeteorologicalMetricName.PRECIPITATION_DECADE_AVERAGE, date, include_metadata=True
             )
 
             decade_dict = {
@@ -503,22 +613,27 @@ class OperationalJournalDataTransformer:
 
         return results
 
-    def get_hydro_decadal_data(self) -> list[dict[int | str, int | float | str]]:
-        results = []
-        df = self.df
-
+    def get_meteo_decadal_data(self) -> list[dict[int | str, int | float | str]]:
         if self.is_empty:
-            return results
+            return []
+        return self._build_meteo_decadal_data(self._get_dates())
+
+    def get_meteo_decadal_data_per_month(self) -> dict[Any, list[dict[int | str, int | float | str]]]:
+        return {
+            first_day: self._build_meteo_decadal_data(dates)
+            for first_day, dates in self._get_dates_per_month().items()
+        }
 
-        for date in df["date"].unique():
+    def _build_hydro_decadal_data(self, dates: list) -> list[dict[int | str, int | float | str]]:
+        results = []
+        for date in dates:
             decade_dict = {}
-            decade_data = df[df["date"] == date]
 
             for metric_name, metric_code in {
                 "water_level": HydrologicalMetricName.WATER_LEVEL_DECADE_AVERAGE,
                 "water_discharge": HydrologicalMetricName.WATER_DISCHARGE_DECADE_AVERAGE,
             }.items():
-                decade_dict[metric_name] = self._get_metric_value(decade_data, metric_code)
+                decade_dict[metric_name] = self._get_metric_value(metric_code, date)
 
             decade_dict["decade"] = PentadDecadeHelper.calculate_decade_from_the_day_in_month(date.day)
             decade_dict["id"] = date.strftime("%Y-%m-%d")
@@ -528,6 +643,17 @@ class OperationalJournalDataTransformer:
 
         return results
 
+    def get_hydro_decadal_data(self) -> list[dict[int | str, int | float | str]]:
+        if self.is_empty:
+            return []
+        return self._build_hydro_decadal_data(self._get_dates())
+
+    def get_hydro_decadal_data_per_month(self) -> dict[Any, list[dict[int | str, int | float | str]]]:
+        return {
+            first_day: self._build_hydro_decadal_data(dates)
+            for first_day, dates in self._get_dates_per_month().items()
+        }
+
 
 class OperationalJournalVirtualDataTransformer(OperationalJournalDataTransformer):
     def _convert_data_to_dataframe(self):
@@ -535,14 +661,7 @@ class OperationalJournalVirtualDataTransformer(OperationalJournalDataTransformer
             if isinstance(entry["timestamp_local"], datetime):
                 entry["timestamp_local"] = entry["timestamp_local"].replace(tzinfo=None)
 
-        df = pd.DataFrame(self.original_data)
-
-        if not df.empty:
-            df["timestamp_local"] = pd.to_datetime(df["timestamp_local"])
-            df["date"] = df["timestamp_local"].dt.date
-            df["time"] = df["timestamp_local"].dt.strftime("%H:%M")
-
-        return df
+        return super()._convert_data_to_dataframe()
 
     def _get_daily_data_extremes(self, daily_data: list[dict[str, str | float | int]]) -> list[dict[str, str | float]]:
         relevant_metrics = [
@@ -579,39 +698,32 @@ class OperationalJournalVirtualDataTransformer(OperationalJournalDataTransformer
 
         return avg_row
 
-    def get_daily_data(self):
-        df = self.df
+    def _build_daily_data(self, dates: list, previous_day_water_level: dict[str, Any] | None) -> list[dict[str, Any]]:
         results = []
-        if self.is_empty:
-            return results
+        first_rows = self._get_first_rows("date", "time_of_day")
 
         # iterate over the existing dates
-        for date in df["date"].unique():
-            daily_data = df[df["date"] == date]
+        for date in dates:
             day_dict = {}
 
             # get morning data first
-            morning_data = self._get_morning_data(daily_data)
-            if not morning_data.empty:
-                water_discharge_morning = self._get_metric_value(
-                    morning_data, HydrologicalMetricName.WATER_DISCHARGE_DAILY
+            if (date, MORNING) in first_rows:
+                day_dict["water_discharge_morning"] = self._get_metric_value(
+                    HydrologicalMetricName.WATER_DISCHARGE_DAILY, date, MORNING
                 )
-                day_dict["water_discharge_morning"] = water_discharge_morning
             else:
                 day_dict["water_discharge_morning"] = {"value": "--"}
 
             # get evening data next
-            evening_data = self._get_evening_data(daily_data)
-            if not evening_data.empty:
-                water_discharge_evening = self._get_metric_value(
-                    evening_data, HydrologicalMetricName.WATER_DISCHARGE_DAILY
+            if (date, EVENING) in first_rows:
+                day_dict["water_discharge_evening"] = self._get_metric_value(
+                    HydrologicalMetricName.WATER_DISCHARGE_DAILY, date, EVENING
                 )
-                day_dict["water_discharge_evening"] = water_discharge_evening
             else:
                 day_dict["water_discharge_evening"] = {"value": "--"}
 
             day_dict["water_discharge_average"] = self._get_metric_value(
-                daily_data, HydrologicalMetricName.WATER_DISCHARGE_DAILY_AVERAGE
+                HydrologicalMetricName.WATER_DISCHARGE_DAILY_AVERAGE, date
             )
 
             day_dict["date"] = date.strftime("%Y-%m-%d")
@@ -624,20 +736,18 @@ class OperationalJournalVirtualDataTransformer(OperationalJournalDataTransformer
 
         return results
 
-    def get_hydro_decadal_data(self) -> list[dict[int | str, int | float | str]]:
-        results = []
-        df = self.df
-
+    def get_daily_data(self):
         if self.is_empty:
-            return results
-
-        for date in df["date"].unique():
-            decade_dict = {}
-            decade_data = df[df["date"] == date]
+            return []
+        # the virtual journal has no trend, the whole requested range is listed
+        return self._build_daily_data(self._get_dates(), None)
 
-            decade_dict["water_discharge"] = self._get_metric_value(
-                decade_data, HydrologicalMetricName.WATER_DISCHARGE_DECADE_AVERAGE
-            )
+    def _build_hydro_decadal_data(self, dates: list) -> list[dict[int | str, int | float | str]]:
+        results = []
+        for date in dates:
+            decade_dict = {
+                "water_discharge": self._get_metric_value(HydrologicalMetricName.WATER_DISCHARGE_DECADE_AVERAGE, date)
+            }
 
             decade_dict["decade"] = PentadDecadeHelper.calculate_decade_from_the_day_in_month(date.day)
             decade_dict["id"] = date.strftime("%Y-%m-%d")
@@ -742,6 +852,26 @@ def save_metric_and_create_log(
     return metric_instance, log
 
 
+def bulk_save_metrics_and_create_logs(
+    metric_instances: list[HydrologicalMetric] | list[MeteorologicalMetric], description: str = ""
+):
+    """
+    Same as save_metric_and_create_log, but the metrics of one model are written with a single bulk upsert.
+    """
+    if not metric_instances:
+        return [], []
+
+    existing_records = [metric_instance.get_existing_record() for metric_instance in metric_instances]
+    metric_instances[0].__class__.objects.bulk_upsert(metric_instances)
+    logs = [
+        metric_instance.create_log_entry(existing, description)
+        for metric_instance, existing in zip(metric_instances, existing_records)
+        if existing
+    ]
+
+    return metric_instances, logs
+
+
 class SDKDataHelper:
     def __init__(self, organization: Organization, filters: dict):
         self.organization = organization
@@ -1057,6 +1187,268 @@ class SDKDataHelper:
 
         return result
 
+    def get_page(self, cursor: str | None = None, limit: int = SDK_CURSOR_PAGE_SIZE):
+        """
+        Queries one keyset page of the data values and formats it according to the SDK output schema.
+
+        All the requested stations and metrics are read with a single UNION ALL statement, one branch per
+        station type, metric and model, where every branch is filtered past the cursor and limited on its own.
+        The values are ordered by station, metric (in the requested order) and descending local timestamp, and
+        the memory used doesn't depend on the requested time range.
+
+        Args:
+            cursor (str | None): The next cursor returned with the previous page, None for the first page.
+            limit (int): The maximum number of values on the page.
+
+        Returns:
+            dict: A dictionary containing:
+                - next_cursor: The opaque cursor of the next page, None for the last page.
+                - results: A list of SDKOutputSchema objects, only the stations and variables with values on
+                  the page are included.
+
+        Raises:
+            SDKDataError: If the limit is out of range or the cursor is invalid.
+        """
+        if not 1 <= limit <= SDK_CURSOR_MAX_PAGE_SIZE:
+            raise SDKDataError(f"Limit must be between 1 and {SDK_CURSOR_MAX_PAGE_SIZE}")
+
+        after = self._decode_cursor(cursor) if cursor else None
+        stations_info = self._get_stations_info()
+        metric_names = list(dict.fromkeys(self.filters["metric_name__in"]))
+
+        branches = []
+        for station_type_rank, station_type in enumerate(SDK_STATION_TYPES):
+            station_ids = sorted({info["id"] for info in stations_info if info["station_type"] == station_type})
+            if not station_ids:
+                continue
+            for metric_position, metric_name in enumerate(metric_names):
+                for source, model in enumerate(self.metrics_mapping[metric_name]):
+                    if (station_type == "meteo") != (model is MeteorologicalMetric):
+                        continue
+                    branch_key = (station_type_rank, metric_position, source)
+                    keyset_filter = self._get_keyset_filter(
+                        branch_key, after, has_sensor_identifier=model is not MeteorologicalMetric
+                    )
+                    if keyset_filter is None:
+                        continue
+                    branches.append(
+                        self._query_page_branch(model, metric_name, station_ids, branch_key, keyset_filter, limit)
+                    )
+
+        if not branches:
+            return {"next_cursor": None, "results": []}
+
+        queryset = branches[0]
+        if len(branches) > 1:
+            queryset = branches[0].union(*branches[1:], all=True).order_by(*SDK_CURSOR_ORDERING)[: limit + 1]
+        rows = list(queryset)
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = self._encode_cursor(rows[-1])
+
+        return {
+            "next_cursor": next_cursor,
+            "results": self._group_page_rows(rows, stations_info, metric_names),
+        }
+
+    def _query_page_branch(self, model, metric_name, station_ids, branch_key, keyset_filter, limit):
+        """
+        Builds the queryset of a single model and metric name for a page.
+
+        Args:
+            model: The model to query.
+            metric_name (str): The metric name.
+            station_ids (list[int]): The IDs of the stations of the model's station type.
+            branch_key (tuple[int, int, int]): The station type rank, metric position and source position.
+            keyset_filter (Q): The filter of the rows after the cursor.
+            limit (int): The maximum number of values on the page.
+
+        Returns:
+            QuerySet: An ordered and limited values queryset with the columns shared by all the branches.
+        """
+        station_type_rank, metric_position, source = branch_key
+        field_names = {field.name for field in model._meta.get_fields()}
+
+        # annotated in the same order in every branch so the union columns line up
+        columns = {
+            "sdk_station_type": Value(station_type_rank),
+            "sdk_station_id": F("station_id"),
+            "sdk_metric": Value(metric_position),
+            "sdk_timestamp_local": F("timestamp_local"),
+            "sdk_source": Value(source),
+            "sdk_value_type": F("value_type"),
+            "sdk_sensor_identifier": F("sensor_identifier") if "sensor_identifier" in field_names else Value(""),
+            "sdk_value": F("avg_value") if "avg_value" in field_names else F("value"),
+            "sdk_timestamp": (
+                F("timestamp") if "timestamp" in field_names else Value(None, output_field=DateTimeField())
+            ),
+            "sdk_value_code": (
+                F("value_code") if "value_code" in field_names else Value(None, output_field=IntegerField())
+            ),
+        }
+
+        return (
+            model.objects.filter(
+                keyset_filter,
+                station_id__in=station_ids,
+                metric_name=metric_name,
+                **self._get_timestamp_filters("timestamp" in field_names),
+            )
+            .annotate(**columns)
+            .values(*columns)
+            .order_by(*SDK_CURSOR_ORDERING)[: limit + 1]
+        )
+
+    def _get_timestamp_filters(self, has_utc_timestamp: bool) -> dict:
+        """
+        Gets the timestamp filters for a model, the UTC timestamp filters are converted to local timestamp
+        filters for the models which only store the local timestamp.
+        """
+        timestamp_filters = {}
+        for lookup, value in self.filters.items():
+            if not lookup.startswith("timestamp") or value is None:
+                continue
+            if lookup.startswith("timestamp_local") or has_utc_timestamp:
+                timestamp_filters[lookup] = value
+                continue
+            if value.tzinfo is None:
+                value = value.replace(tzinfo=timezone.utc)
+            local_value = value.astimezone(self.organization.timezone).replace(tzinfo=timezone.utc)
+            timestamp_filters[lookup.replace("timestamp", "timestamp_local", 1)] = local_value
+
+        return timestamp_filters
+
+    @staticmethod
+    def _get_keyset_filter(
+        branch_key: tuple[int, int, int], after: list | None, has_sensor_identifier: bool = True
+    ) -> Q | None:
+        """
+        Gets the filter of the branch rows which come after the cursor in the SDK_CURSOR_ORDERING.
+
+        Args:
+            branch_key (tuple[int, int, int]): The station type rank, metric position and source position.
+            after (list | None): The decoded cursor, None for the first page.
+            has_sensor_identifier (bool): Whether the model stores the sensor identifier.
+
+        Returns:
+            Q | None: The filter, or None if all the rows of the branch come before the cursor.
+        """
+        if after is None:
+            return Q()
+
+        station_type_rank, metric_position, source = branch_key
+        (
+            after_station_type,
+            after_station_id,
+            after_metric,
+            after_timestamp,
+            after_source,
+            after_value_type,
+            after_sensor_identifier,
+        ) = after
+
+        if station_type_rank != after_station_type:
+            return Q() if station_type_rank > after_station_type else None
+        if metric_position > after_metric:
+            return Q(station_id__gte=after_station_id)
+        if metric_position < after_metric:
+            return Q(station_id__gt=after_station_id)
+
+        same_station = Q(timestamp_local__lt=after_timestamp)
+        if source > after_source:
+            same_station |= Q(timestamp_local=after_timestamp)
+        elif source == after_source:
+            same_value = Q(value_type__gt=after_value_type)
+            if has_sensor_identifier:
+                same_value |= Q(value_type=after_value_type, sensor_identifier__gt=after_sensor_identifier)
+            same_station |= Q(same_value, timestamp_local=after_timestamp)
+
+        return Q(station_id__gt=after_station_id) | Q(same_station, station_id=after_station_id)
+
+    def _get_filters_fingerprint(self) -> str:
+        serialized_filters = json.dumps(self.filters, sort_keys=True, default=str)
+        return hashlib.sha256(f"{self.organization.uuid}:{serialized_filters}".encode()).hexdigest()[:16]
+
+    def _encode_cursor(self, row: dict) -> str:
+        payload = {
+            "filters": self._get_filters_fingerprint(),
+            "after": [
+                row["sdk_station_type"],
+                row["sdk_station_id"],
+                row["sdk_metric"],
+                row["sdk_timestamp_local"].isoformat(),
+                row["sdk_source"],
+                row["sdk_value_type"],
+                row["sdk_sensor_identifier"],
+            ],
+        }
+        return base64.urlsafe_b64encode(json.dumps(payload, separators=(",", ":")).encode()).decode()
+
+    def _decode_cursor(self, cursor: str) -> list:
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            after = payload["after"]
+            after[3] = datetime.fromisoformat(after[3])
+            if (
+                len(after) != len(SDK_CURSOR_ORDERING)
+                or not all(isinstance(after[idx], int) for idx in (0, 1, 2, 4))
+                or not all(isinstance(after[idx], str) for idx in (5, 6))
+            ):
+                raise ValueError
+            filters_fingerprint = payload["filters"]
+        except (binascii.Error, UnicodeError, ValueError, TypeError, KeyError, IndexError):
+            raise SDKDataError("Invalid cursor")
+
+        if filters_fingerprint != self._get_filters_fingerprint():
+            raise SDKDataError("The cursor was issued for different filters")
+
+        return after
+
+    def _group_page_rows(self, rows: list[dict], stations_info: list[dict], metric_names: list[str]) -> list[dict]:
+        """
+        Groups the ordered page rows by station and metric name into the SDKOutputSchema format.
+        """
+        stations_by_key = {(info["station_type"], info["id"]): info for info in stations_info}
+        result = []
+        station_key = variable_key = None
+
+        for row in rows:
+            row_station_key = (SDK_STATION_TYPES[row["sdk_station_type"]], row["sdk_station_id"])
+            if row_station_key != station_key:
+                station_key, variable_key = row_station_key, None
+                station_info = stations_by_key[station_key]
+                station_data = []
+                result.append(
+                    {
+                        "station_id": station_info["id"],
+                        "station_uuid": station_info["uuid"],
+                        "station_code": station_info["station_code"],
+                        "station_type": station_info["station_type"],
+                        "station_name": station_info["name"],
+                        "data": station_data,
+                    }
+                )
+            if row["sdk_metric"] != variable_key:
+                variable_key = row["sdk_metric"]
+                metric_name = metric_names[variable_key]
+                values = []
+                station_data.append(
+                    {"variable_code": metric_name, "unit": self._get_metric_unit(metric_name), "values": values}
+                )
+            values.append(
+                self._format_value(
+                    row["sdk_value"],
+                    row["sdk_value_type"],
+                    row["sdk_timestamp_local"],
+                    row["sdk_timestamp"],
+                    row["sdk_value_code"],
+                )
+            )
+
+        return result
+
     def _query_model(self, model, metric_name, station_id):
         """
         Queries a model for a given metric name and station ID.
@@ -1093,24 +1485,43 @@ class SDKDataHelper:
             else:
                 continue
 
-            local_timestamp = obj.timestamp_local.replace(tzinfo=self.organization.timezone)
-            utc_timestamp = getattr(
-                obj, "timestamp", local_timestamp.replace(tzinfo=self.organization.timezone).astimezone(timezone.utc)
+            value_schema = self._format_value(
+                value,
+                getattr(obj, "value_type", None),
+                obj.timestamp_local,
+                getattr(obj, "timestamp", None),
+                getattr(obj, "value_code", None),
             )
 
-            # Create the value schema
-            value_schema = {
-                "value_type": getattr(obj, "value_type", None),
-                "value": value,
-                "timestamp_local": local_timestamp,
-                "timestamp_utc": utc_timestamp,
-                "value_code": getattr(obj, "value_code", None),
-            }
-
             result.append(value_schema)
 
         return result
 
+    def _format_value(self, value, value_type, timestamp_local, timestamp, value_code):
+        """
+        Formats a single value according to the SDKDataValueSchema.
+
+        Args:
+            value: The metric value.
+            value_type (str): The value type.
+            timestamp_local (datetime): The stored local timestamp, labelled as UTC.
+            timestamp (datetime | None): The UTC timestamp, None for the models which don't store it.
+            value_code (int | None): The value code.
+
+        Returns:
+            dict: The value in the SDKDataValueSchema format.
+        """
+        local_timestamp = timestamp_local.replace(tzinfo=self.organization.timezone)
+        utc_timestamp = timestamp if timestamp is not None else local_timestamp.astimezone(timezone.utc)
+
+        return {
+            "value_type": value_type,
+            "value": value,
+            "timestamp_local": local_timestamp,
+            "timestamp_utc": utc_timestamp,
+            "value_code": value_code,
+        }
+
     def _get_metric_unit(self, metric_name):
         """
         Gets the unit for a given metric name.
@@ -1121,34 +1532,4 @@ class SDKDataHelper:
         Returns:
             str: The unit.
         """
-        from sapphire_backend.metrics.choices import MetricUnit
-
-        # Map metric names to units
-        metric_units = {
-            # Water levels
-            HydrologicalMetricName.WATER_LEVEL_DAILY: MetricUnit.WATER_LEVEL,
-            HydrologicalMetricName.WATER_LEVEL_DAILY_AVERAGE: MetricUnit.WATER_LEVEL,
-            HydrologicalMetricName.WATER_LEVEL_DECADAL: MetricUnit.WATER_LEVEL,
-            HydrologicalMetricName.WATER_LEVEL_DECADE_AVERAGE: MetricUnit.WATER_LEVEL,
-            # Water discharges
-            HydrologicalMetricName.WATER_DISCHARGE_DAILY: MetricUnit.WATER_DISCHARGE,
-            HydrologicalMetricName.WATER_DISCHARGE_DAILY_AVERAGE: MetricUnit.WATER_DISCHARGE,
-            HydrologicalMetricName.WATER_DISCHARGE_FIVEDAY_AVERAGE: MetricUnit.WATER_DISCHARGE,
-            HydrologicalMetricName.WATER_DISCHARGE_DECADE_AVERAGE: MetricUnit.WATER_DISCHARGE,
-            # Temperatures
-            HydrologicalMetricName.WATER_TEMPERATURE: MetricUnit.TEMPERATURE,
-            HydrologicalMetricName.AIR_TEMPERATURE: MetricUnit.TEMPERATURE,
-            HydrologicalMetricName.WATER_TEMPERATURE_DAILY_AVERAGE: MetricUnit.TEMPERATURE,
-            HydrologicalMetricName.AIR_TEMPERATURE_DAILY_AVERAGE: MetricUnit.TEMPERATURE,
-            # Precipitation
-            HydrologicalMetricName.PRECIPITATION_DAILY: MetricUnit.PRECIPITATION,
-            # Ice phenomena
-            HydrologicalMetricName.ICE_PHENOMENA_OBSERVATION: MetricUnit.ICE_PHENOMENA_OBSERVATION,
-            # Meteorological metrics
-            MeteorologicalMetricName.AIR_TEMPERATURE_DECADE_AVERAGE: MetricUnit.TEMPERATURE,
-            MeteorologicalMetricName.AIR_TEMPERATURE_MONTH_AVERAGE: MetricUnit.TEMPERATURE,
-            MeteorologicalMetricName.PRECIPITATION_DECADE_AVERAGE: MetricUnit.PRECIPITATION,
-            MeteorologicalMetricName.PRECIPITATION_MONTH_AVERAGE: MetricUnit.PRECIPITATION,
-        }
-
-        return metric_units.get(metric_name, "")
+        return METRIC_UNITS.get(metric_name, "")
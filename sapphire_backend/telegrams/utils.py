@@ -1,12 +1,17 @@
 import logging
+import math
 from datetime import timedelta
 
+import numpy as np
+
 from sapphire_backend.estimations.models import (
+    DischargeModel,
     EstimationsWaterDischargeDaily,
     EstimationsWaterDischargeDailyAverage,
     EstimationsWaterLevelDailyAverage,
 )
-from sapphire_backend.estimations.utils import get_discharge_model_from_timestamp_local
+from sapphire_backend.estimations.rating_curve import estimate_discharges_for_models
+from sapphire_backend.estimations.utils import DischargeModelIndex
 from sapphire_backend.metrics.choices import (
     HydrologicalMeasurementType,
     HydrologicalMetricName,
@@ -16,7 +21,7 @@ from sapphire_backend.metrics.choices import (
 )
 from sapphire_backend.metrics.models import HydrologicalMetric, MeteorologicalMetric
 from sapphire_backend.metrics.timeseries.query import TimeseriesQueryManager
-from sapphire_backend.metrics.utils.helpers import save_metric_and_create_log
+from sapphire_backend.metrics.utils.helpers import bulk_save_metrics_and_create_logs, save_metric_and_create_log
 from sapphire_backend.stations.models import HydrologicalStation, MeteorologicalStation
 from sapphire_backend.telegrams.exceptions import TelegramParserException
 from sapphire_backend.telegrams.models import TelegramStored
@@ -278,35 +283,40 @@ def save_section_eight_metrics(
 ) -> None:
     timestamp = meteo_data["timestamp"]
     decade = meteo_data["decade"]
+    meteo_metrics = []
     if meteo_data["precipitation"] is not None:
-        precipitation_metric = MeteorologicalMetric(
-            timestamp=timestamp,
-            value=meteo_data["precipitation"],
-            value_type=MeteorologicalMeasurementType.MANUAL,
-            metric_name=MeteorologicalMetricName.PRECIPITATION_DECADE_AVERAGE
-            if decade != 4
-            else MeteorologicalMetricName.PRECIPITATION_MONTH_AVERAGE,
-            unit=MetricUnit.PRECIPITATION,
-            station=meteo_station,
-            source_type=SourceTypeMixin.SourceType.TELEGRAM,
-            source_id=source_telegram.id if source_telegram else 0,
+        meteo_metrics.append(
+            MeteorologicalMetric(
+                timestamp=timestamp,
+                value=meteo_data["precipitation"],
+                value_type=MeteorologicalMeasurementType.MANUAL,
+                metric_name=MeteorologicalMetricName.PRECIPITATION_DECADE_AVERAGE
+                if decade != 4
+                else MeteorologicalMetricName.PRECIPITATION_MONTH_AVERAGE,
+                unit=MetricUnit.PRECIPITATION,
+                station=meteo_station,
+                source_type=SourceTypeMixin.SourceType.TELEGRAM,
+                source_id=source_telegram.id if source_telegram else 0,
+            )
         )
-        save_metric_and_create_log(precipitation_metric)
 
     if meteo_data["temperature"] is not None:
-        temperature_metric = MeteorologicalMetric(
-            timestamp=timestamp,
-            value=meteo_data["temperature"],
-            value_type=MeteorologicalMeasurementType.MANUAL,
-            metric_name=MeteorologicalMetricName.AIR_TEMPERATURE_DECADE_AVERAGE
-            if decade != 4
-            else MeteorologicalMetricName.AIR_TEMPERATURE_MONTH_AVERAGE,
-            unit=MetricUnit.TEMPERATURE,
-            station=meteo_station,
-            source_type=SourceTypeMixin.SourceType.TELEGRAM,
-            source_id=source_telegram.id if source_telegram else 0,
+        meteo_metrics.append(
+            MeteorologicalMetric(
+                timestamp=timestamp,
+                value=meteo_data["temperature"],
+                value_type=MeteorologicalMeasurementType.MANUAL,
+                metric_name=MeteorologicalMetricName.AIR_TEMPERATURE_DECADE_AVERAGE
+                if decade != 4
+                else MeteorologicalMetricName.AIR_TEMPERATURE_MONTH_AVERAGE,
+                unit=MetricUnit.TEMPERATURE,
+                station=meteo_station,
+                source_type=SourceTypeMixin.SourceType.TELEGRAM,
+                source_id=source_telegram.id if source_telegram else 0,
+            )
         )
-        save_metric_and_create_log(temperature_metric)
+
+    bulk_save_metrics_and_create_logs(meteo_metrics)
 
 
 def fill_template_with_old_metrics(init_struct: dict, parsed_data: dict) -> dict:
@@ -412,8 +422,25 @@ def fill_template_with_old_metrics(init_struct: dict, parsed_data: dict) -> dict
     return result
 
 
-def insert_template_with_new_metrics(data_template: dict, parsed_data: dict) -> dict:
+def estimate_new_discharges(pending_discharges: list[tuple[NewOldMetrics, float | None, DischargeModel | None]]):
+    """
+    Set discharge_new of the collected entries from their water level and discharge model in a single
+    evaluation of the rating curves, None if either of them is missing.
+    """
+    if not pending_discharges:
+        return
+    entries, water_levels, discharge_models = zip(*pending_discharges)
+    discharges = estimate_discharges_for_models(np.array(water_levels, dtype=float), discharge_models)
+    for entry, discharge in zip(entries, discharges.tolist()):
+        entry.discharge_new = None if math.isnan(discharge) else custom_round(discharge, 1)
+
+
+def insert_template_with_new_metrics(
+    data_template: dict, parsed_data: dict, discharge_model_index: DischargeModelIndex | None = None
+) -> dict:
     result = data_template
+    discharge_model_index = discharge_model_index or DischargeModelIndex()
+    pending_discharges = []
     for station_code, station_data in parsed_data["stations"].items():
         hydro_station = station_data["hydro_station_obj"]
         for telegram_data in station_data["telegrams"]:
@@ -425,40 +452,36 @@ def insert_template_with_new_metrics(data_template: dict, parsed_data: dict) ->
 
                 wl_morning_new = section_data["morning_water_level"]
 
-                discharge_model_morning = get_discharge_model_from_timestamp_local(
-                    station=hydro_station, timestamp_local=smart_datetime.morning_local
+                discharge_model_morning, discharge_model_previous_evening = discharge_model_index.get_many(
+                    hydro_station, [smart_datetime.morning_local, smart_datetime.previous_evening_local]
                 )
-                discharge_morning_new = None
-                if discharge_model_morning is not None:
-                    discharge_morning_new = discharge_model_morning.estimate_discharge(wl_morning_new)
 
                 result[station_code][telegram_day_date]["morning"].water_level_new = custom_ceil(wl_morning_new)
-                result[station_code][telegram_day_date]["morning"].discharge_new = custom_round(
-                    discharge_morning_new, 1
+                pending_discharges.append(
+                    (result[station_code][telegram_day_date]["morning"], wl_morning_new, discharge_model_morning)
                 )
 
                 # previous day evening
                 wl_previous_evening_new = section_data["water_level_20h_period"]
 
-                discharge_model_previous_evening = get_discharge_model_from_timestamp_local(
-                    station=hydro_station, timestamp_local=smart_datetime.previous_evening_local
-                )
-                discharge_previous_evening_new = None
-                if discharge_model_previous_evening is not None:
-                    discharge_previous_evening_new = discharge_model_previous_evening.estimate_discharge(
-                        wl_previous_evening_new
-                    )
-
                 result[station_code][previous_day_date]["evening"].water_level_new = custom_ceil(
                     wl_previous_evening_new
                 )
-                result[station_code][previous_day_date]["evening"].discharge_new = custom_round(
-                    discharge_previous_evening_new, 1
+                pending_discharges.append(
+                    (
+                        result[station_code][previous_day_date]["evening"],
+                        wl_previous_evening_new,
+                        discharge_model_previous_evening,
+                    )
                 )
+
+    estimate_new_discharges(pending_discharges)
     return result
 
 
-def insert_new_averages(data_template: dict, parsed_data: dict) -> dict:
+def insert_new_averages(
+    data_template: dict, parsed_data: dict, discharge_model_index: DischargeModelIndex | None = None
+) -> dict:
     """
     Calculate average based on morning and evening water_level_new and estimate average discharge accordingly
     :param data_template:
@@ -466,34 +489,31 @@ def insert_new_averages(data_template: dict, parsed_data: dict) -> dict:
     :return:
     """
     result = {}
+    discharge_model_index = discharge_model_index or DischargeModelIndex()
+    pending_discharges = []
     for station_code, dates in data_template.items():
         result[station_code] = {}
         hydro_station = parsed_data["stations"][station_code]["hydro_station_obj"]
+        discharge_models = discharge_model_index.get_many(
+            hydro_station, [SmartDatetime(date, hydro_station, tz_included=False).midday_local for date in dates]
+        )
 
-        for date in dates:
-            smart_datetime = SmartDatetime(date, hydro_station, tz_included=False)
+        for date, discharge_model in zip(dates, discharge_models):
             result[station_code][date] = data_template[station_code][date]
             wl_morning_new = result[station_code][date]["morning"].water_level_new
             wl_evening_new = result[station_code][date]["evening"].water_level_new
 
-            discharge_average_new = None
-            discharge_model = get_discharge_model_from_timestamp_local(
-                station=hydro_station, timestamp_local=smart_datetime.midday_local
-            )
             if None not in [wl_morning_new, wl_evening_new]:
                 wl_average_new = custom_ceil((wl_morning_new + wl_evening_new) / 2)
-                if discharge_model is not None:
-                    discharge_average_new = discharge_model.estimate_discharge(wl_average_new)
             elif wl_morning_new is None and wl_evening_new is None:
                 wl_average_new = None
             else:
                 wl_average_new = wl_morning_new or wl_evening_new
-                if discharge_model is not None:
-                    discharge_average_new = discharge_model.estimate_discharge(wl_average_new)
 
             result[station_code][date]["average"].water_level_new = wl_average_new
-            result[station_code][date]["average"].discharge_new = custom_round(discharge_average_new, 1)
+            pending_discharges.append((result[station_code][date]["average"], wl_average_new, discharge_model))
 
+    estimate_new_discharges(pending_discharges)
     return result
 
 
@@ -573,10 +593,20 @@ def simulate_telegram_insertion(parsed_data: dict) -> dict:
                 }
                 pass
 
+    # the discharge models of all stations are loaded with one query and shared by both steps
+    discharge_model_index = DischargeModelIndex()
+    discharge_model_index.prefetch(
+        station_data["hydro_station_obj"]
+        for station_data in parsed_data["stations"].values()
+        if station_data["hydro_station_obj"] is not None
+    )
+
     template_filled_old = fill_template_with_old_metrics(initial_template, parsed_data)
-    template_filled_morning_evening = insert_template_with_new_metrics(template_filled_old, parsed_data)
+    template_filled_morning_evening = insert_template_with_new_metrics(
+        template_filled_old, parsed_data, discharge_model_index
+    )
 
-    template_filled_averages = insert_new_averages(template_filled_morning_evening, parsed_data)
+    template_filled_averages = insert_new_averages(template_filled_morning_evening, parsed_data, discharge_model_index)
     return template_filled_averages
 
 
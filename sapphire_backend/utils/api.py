@@ -0,0 +1,12 @@
+from ninja_extra import api_controller, route
+from ninja_jwt.authentication import JWTAuth
+
+from .db_pool import get_pool_stats
+from .permissions import IsSuperAdmin
+
+
+@api_controller("monitoring", tags=["Monitoring"], auth=JWTAuth(), permissions=[IsSuperAdmin])
+class MonitoringAPIController:
+    @route.get("db-pool", response={200: dict[str, int]})
+    def get_db_pool_stats(self, request):
+        return get_pool_stats()
@@ -3,6 +3,8 @@ from decimal import Decimal
 
 from django.db import connection
 
+from .db_pool import autocommit_connection
+
 
 def refresh_continuous_aggregate(start_date: str = None, end_date: str = None):
     if None in [start_date, end_date]:  # full refresh
@@ -11,10 +13,13 @@ def refresh_continuous_aggregate(start_date: str = None, end_date: str = None):
     else:
         # in order to include the end_date
         end_date = (datetime.fromisoformat(end_date) + timedelta(days=1)).date().isoformat()
-    with connection.cursor() as cursor:
+    # the procedure cannot run inside a transaction block, so it gets an autocommit connection
+    with autocommit_connection() as conn, conn.cursor() as cursor:
         cursor.execute(
             f"CALL refresh_continuous_aggregate('public.estimations_water_level_daily_average', '{start_date}', '{end_date}')"
         )
+        # the pentad and decade tables are computed from the daily averages, no trigger sees the aggregate change
+        cursor.execute("SELECT refresh_period_averages(%s, %s)", [start_date, end_date])
 
 
 def execute_sql_hydrological_round(input_value):
@@ -0,0 +1,92 @@
+import logging
+import threading
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+import psycopg
+from django.conf import settings
+from django.db import connection
+from psycopg.conninfo import make_conninfo
+from psycopg_pool import ConnectionPool
+
+TEST_DATABASE_NAME = "test_sapphire_backend"
+
+_pool: ConnectionPool | None = None
+_pool_lock = threading.Lock()
+
+
+def get_conninfo(settings_dict: dict) -> str:
+    params = {
+        "host": settings_dict["HOST"],
+        "port": settings_dict["PORT"],
+        "user": settings_dict["USER"],
+        "password": settings_dict["PASSWORD"],
+        "dbname": settings_dict["NAME"],
+    }
+    return make_conninfo(**{key: value for key, value in params.items() if value})
+
+
+def configure_session(conn: psycopg.Connection) -> None:
+    """
+    Pins the session time zone to the one Django sets for its own connections (UTC). The metric triggers derive
+    the days and the keys of the materialized rows from it, so a pool connection in the server's default zone would
+    write them shifted.
+    """
+    conn.execute("SELECT set_config('TimeZone', %s, false)", [connection.timezone_name])
+
+
+def get_pool() -> ConnectionPool:
+    """
+    Process-wide pool of autocommit connections for statements that must run outside of Django's
+    (request) transaction, e.g. the metric upserts and the continuous aggregate refreshes.
+    The pool is created lazily so every worker process gets its own one after forking.
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(
+                    get_conninfo(connection.settings_dict),
+                    min_size=settings.DB_POOL_MIN_SIZE,
+                    max_size=settings.DB_POOL_MAX_SIZE,
+                    timeout=settings.DB_POOL_TIMEOUT,
+                    max_idle=settings.DB_POOL_MAX_IDLE,
+                    kwargs={"autocommit": True},
+                    configure=configure_session,
+                    check=ConnectionPool.check_connection,
+                    name="sapphire_backend",
+                    open=True,
+                )
+                logging.info(f"Opened database connection pool (min_size={_pool.min_size}, max_size={_pool.max_size})")
+    return _pool
+
+
+def close_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+
+
+def get_pool_stats() -> dict[str, int]:
+    """
+    Current psycopg_pool statistics (pool_size, pool_available, requests_num, requests_waiting, ...),
+    empty if the pool was not used by this process yet.
+    """
+    if _pool is None:
+        return {}
+    return _pool.get_stats()
+
+
+@contextmanager
+def autocommit_connection() -> Iterator[psycopg.Connection]:
+    """
+    Borrow an autocommit connection from the pool. The tests run inside a transaction which a second
+    connection wouldn't see, so the Django connection is used there instead.
+    """
+    if connection.settings_dict["NAME"] == TEST_DATABASE_NAME:
+        yield connection
+        return
+    with get_pool().connection() as conn:
+        yield conn
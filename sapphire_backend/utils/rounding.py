@@ -1,6 +1,12 @@
 import math
 from decimal import ROUND_HALF_UP, Decimal
 
+import numpy as np
+from numpy.typing import ArrayLike
+
+# distance of the scaled value from .5 below which float arithmetic can't decide the rounding direction
+HYDROLOGICAL_ROUND_TIE_TOLERANCE = 1e-6
+
 
 def custom_ceil(value: int | None) -> int | None:
     """
@@ -45,3 +51,50 @@ def hydrological_round(number: Decimal | float | int):
 
     # Format to ensure three significant digits
     return rounded_number
+
+
+def _scale_for_hydrological_round(values: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Absolute values scaled so that hydrological rounding means rounding them half up to an integer,
+    together with the number of decimals of the scaling.
+    """
+    magnitudes = np.abs(values)
+    large = np.isfinite(values) & (values >= 1.0)
+    exponents = np.zeros(values.shape)
+    exponents[large] = np.floor(np.log10(magnitudes[large]))
+    # log10 can be off by one around the powers of ten
+    exponents[large & (10.0**exponents > magnitudes)] -= 1
+    exponents[large & (10.0 ** (exponents + 1) <= magnitudes)] += 1
+    decimals = np.where(large, 2 - exponents, 3)
+    scale = 10.0 ** np.abs(decimals)
+    scaled = np.where(decimals >= 0, magnitudes * scale, magnitudes / scale)
+    return scaled, decimals
+
+
+def _is_near_tie(scaled: np.ndarray) -> np.ndarray:
+    with np.errstate(invalid="ignore"):
+        return np.abs(scaled - np.floor(scaled) - 0.5) < HYDROLOGICAL_ROUND_TIE_TOLERANCE
+
+
+def hydrological_round_ties(values: ArrayLike) -> np.ndarray:
+    """
+    Mask of the values which are too close to a rounding tie to be hydrologically rounded in float arithmetic.
+    """
+    scaled, _ = _scale_for_hydrological_round(np.asarray(values, dtype=float))
+    return _is_near_tie(scaled)
+
+
+def hydrological_round_array(values: ArrayLike) -> np.ndarray:
+    """
+    Vectorized hydrological_round returning floats, NaN for missing or non-finite values.
+    Values next to a rounding tie are passed to hydrological_round so that the results are identical.
+    """
+    values = np.asarray(values, dtype=float)
+    scaled, decimals = _scale_for_hydrological_round(values)
+    rounded = np.floor(scaled + 0.5)
+    scale = 10.0 ** np.abs(decimals)
+    rounded = np.asarray(np.sign(values) * np.where(decimals >= 0, rounded / scale, rounded * scale))
+    rounded[~np.isfinite(values)] = np.nan
+    ties = _is_near_tie(scaled)
+    rounded[ties] = [float(hydrological_round(value)) for value in values[ties]]
+    return rounded
@@ -0,0 +1,28 @@
+import pytest
+from django.db import connection
+
+from sapphire_backend.utils import db_pool
+from sapphire_backend.utils.db_pool import autocommit_connection, get_conninfo, get_pool_stats
+
+
+class TestDBPool:
+    def test_conninfo_skips_empty_values(self):
+        conninfo = get_conninfo(
+            {"HOST": "db", "PORT": "", "USER": "sapphire", "PASSWORD": "secret", "NAME": "sapphire_backend"}
+        )
+
+        assert conninfo == "host=db user=sapphire password=secret dbname=sapphire_backend"
+
+    def test_pool_stats_without_pool(self, monkeypatch):
+        monkeypatch.setattr(db_pool, "_pool", None)
+
+        assert get_pool_stats() == {}
+
+    @pytest.mark.django_db
+    def test_autocommit_connection_uses_test_transaction(self):
+        with autocommit_connection() as conn, conn.cursor() as cursor:
+            cursor.execute("SELECT 1")
+
+            assert conn is connection
+            assert cursor.fetchone() == (1,)
+        assert db_pool._pool is None